@@ -10,6 +10,7 @@ import threading
 import time
 from copy import copy
 
+import numpy as np
 from usb.core import NoBackendError
 
 from meerk40t.balormk.mock_connection import MockConnection
@@ -216,6 +217,54 @@ def _bytes_to_words(r):
     return b0, b1, b2, b3
 
 
+# A list command as written by _list_write(), 12 bytes.
+list_record = np.dtype(
+    [
+        ("command", "<u2"),
+        ("v1", "<u2"),
+        ("v2", "<u2"),
+        ("v3", "<u2"),
+        ("v4", "<u2"),
+        ("v5", "<u2"),
+    ]
+)
+
+
+def list_moves(x, y, marks, last_x, last_y):
+    """
+    Compile moves into list records, the records goto() and mark() write for each position in turn.
+
+    Positions out of range are skipped, as are positions equal to the last position. Since a skipped in range
+    position equals the last position, the last position before each move is the truncated previous in range
+    position, so the whole run is compiled at once.
+
+    @param x: array of x positions
+    @param y: array of y positions
+    @param marks: bool array, True to mark to the position, False to jump.
+    @param last_x: position before the moves
+    @param last_y: position before the moves
+    @return: array of list_record
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    inside = (x >= 0) & (x <= 0xFFFF) & (y >= 0) & (y <= 0xFFFF)
+    x = x[inside]
+    y = y[inside]
+    marks = np.asarray(marks, dtype=bool)[inside]
+    to_x = np.trunc(x)
+    to_y = np.trunc(y)
+    from_x = np.concatenate(([last_x], to_x[:-1]))
+    from_y = np.concatenate(([last_y], to_y[:-1]))
+    moved = (x != from_x) | (y != from_y)
+    distance = np.hypot(x - from_x, y - from_y)[moved]
+    records = np.zeros(np.count_nonzero(moved), dtype=list_record)
+    records["command"] = np.where(marks[moved], listMarkTo, listJumpTo)
+    records["v1"] = to_x[moved]
+    records["v2"] = to_y[moved]
+    records["v4"] = np.minimum(distance, 0xFFFF)
+    return records
+
+
 class GalvoController:
     """
     Galvo controller is tasked with sending queued data to the controller board and ensuring that the connection to the
@@ -246,6 +295,8 @@ class GalvoController:
         self.usb_log = service.channel(
             f"{self.service.safe_label}/usb", buffer_size=500
         )
+        # List commands, only formatted while watched.
+        self.list_log = service.channel(f"{self.service.safe_label}/list")
         # Keep reference to prevent garbage collection with weak=True default
         self._usb_status_handler = lambda e: service.signal("pipe;usb_status", e)
         self.usb_log.watch(self._usb_status_handler)
@@ -602,20 +653,44 @@ class GalvoController:
                 "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
             )
             if self.DEBUG:
-                cmdstr = list_command_lookup.get(command, "unknown")
-                remainder = f"{v1} {v2} {v3} {v4} {v5}"
-                while remainder.endswith(" 0"):
-                    remainder = remainder[:-2]
-                packet = struct.pack(
-                    "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
-                )
-                hexstr = " ".join(f"{x:02X}" for x in packet)
-                self.usb_log(f"> {hexstr} -- {cmdstr} {remainder}")
-            self._active_list[index : index + 12] = struct.pack(
-                "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
-            )
+                self.list_log.lazy(self._list_describe, msg, command, v1, v2, v3, v4, v5)
+            self._active_list[index : index + 12] = msg
             self._active_index += 12
 
+    def _list_write_records(self, records):
+        """
+        Write an array of list_record, sliced directly into the lists.
+
+        @param records: array of list_record
+        @return:
+        """
+        data = memoryview(records.tobytes())
+        with self._list_lock:
+            if self.DEBUG and self.list_log.active:
+                for record in records.tolist():
+                    msg = struct.pack("<6H", *record)
+                    self.list_log(self._list_describe(msg, *record))
+            position = 0
+            while position < len(data):
+                if self._active_index >= 0xC00:
+                    self._list_end()
+                if self._active_list is None:
+                    self._list_new()
+                index = self._active_index
+                length = min(0xC00 - index, len(data) - position)
+                self._active_list[index : index + length] = data[position : position + length]
+                self._active_index += length
+                position += length
+
+    @staticmethod
+    def _list_describe(msg, command, v1, v2, v3, v4, v5):
+        cmdstr = list_command_lookup.get(command, "unknown")
+        remainder = f"{v1} {v2} {v3} {v4} {v5}"
+        while remainder.endswith(" 0"):
+            remainder = remainder[:-2]
+        hexstr = " ".join(f"{x:02X}" for x in msg)
+        return f"> {hexstr} -- {cmdstr} {remainder}"
+
     def _command(self, command, v1=0, v2=0, v3=0, v4=0, v5=0, read=True):
         cmd = struct.pack(
             "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
@@ -731,6 +806,45 @@ class GalvoController:
             self.list_jump_speed(self._goto_speed)
         self.list_jump(x, y, long=long, short=short, distance_limit=distance_limit)
 
+    def moves(self, x, y, marks):
+        """
+        Bulk goto() and mark() of arrays of positions, the list commands are compiled by list_moves().
+
+        Only the final move is signalled with driver;position, the kernel only delivers the latest of a signal.
+
+        @param x: array of x positions
+        @param y: array of y positions
+        @param marks: bool array, True to mark to the position, False to goto.
+        @return:
+        """
+        if self._mark_speed is not None or self._goto_speed is not None:
+            # Speeds are written ahead of the first mark or goto.
+            for px, py, mark in zip(x.tolist(), y.tolist(), marks.tolist()):
+                if mark:
+                    self.mark(px, py)
+                else:
+                    self.goto(px, py)
+            return
+        records = list_moves(x, y, marks, self._last_x, self._last_y)
+        if not len(records):
+            return
+        self._list_write_records(records)
+        x = int(records["v1"][-1])
+        y = int(records["v2"][-1])
+        if len(records) > 1:
+            self._last_x = int(records["v1"][-2])
+            self._last_y = int(records["v2"][-2])
+        if self.service.signal_updates:
+            view = self.service.view
+            l_x, l_y = view.iposition(self._last_x, self._last_y)
+            n_x, n_y = view.iposition(x, y)
+            self.service.signal(
+                "driver;position",
+                (l_x, l_y, n_x, n_y),
+            )
+        self._last_x = x
+        self._last_y = y
+
     def light(self, x, y, long=None, short=None, distance_limit=None):
         if x == self._last_x and y == self._last_y:
             return
@@ -6,6 +6,7 @@ Defines how the balor device interacts with the scene, and accepts data via the
 
 from meerk40t.balormk.driver import BalorDriver
 from meerk40t.core.spoolers import Spooler
+from meerk40t.core.travelcost import JumpDelayTravelCost
 from meerk40t.core.units import Angle, Length
 from meerk40t.core.view import View
 from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
@@ -479,6 +480,19 @@ class BalorDevice(Service, Status):
                 # Hint for translation _("Delays")
                 "subsection": "Delays",
             },
+            {
+                "attr": "redlight_refresh",
+                "object": self,
+                "default": 20,
+                "type": int,
+                "trailer": "Hz",
+                "label": _("Refresh"),
+                "tip": _(
+                    "Outlines with more points than the galvo can trace this often are simplified."
+                ),
+                # Hint for translation _("Delays")
+                "subsection": "Delays",
+            },
             {
                 "attr": "redlight_offset_x",
                 "object": self,
@@ -1177,6 +1191,41 @@ class BalorDevice(Service, Status):
     def calibration_file(self):
         return None
 
+    def travel_cost(self, settings=None):
+        """
+        Travel cost model for sequencing the cuts, the seconds of the jumps between them.
+
+        The model follows what the controller writes to the list for cuts with these settings, as set_settings() does:
+        the jump speed of the operation, or the default rapid speed, and its laser on, laser off and polygon delays.
+        The driver jumps without jump delays, so there are none in the model.
+
+        @param settings: settings of the cuts, the device defaults if None
+        @return: JumpDelayTravelCost
+        """
+        if settings is None:
+            settings = {}
+
+        def enabled(key):
+            return str(settings.get(key, False)).lower() == "true"
+
+        rapid_speed = self.default_rapid_speed
+        if enabled("rapid_enabled"):
+            rapid_speed = settings.get("rapid_speed", rapid_speed)
+        delay_on = self.delay_laser_on
+        delay_off = self.delay_laser_off
+        delay_polygon = self.delay_polygon
+        if enabled("timing_enabled"):
+            delay_on = settings.get("delay_laser_on", delay_on)
+            delay_off = settings.get("delay_laser_off", delay_off)
+            delay_polygon = settings.get("delay_polygon", delay_polygon)
+        galvos_per_mm, _ = self.view.position("1mm", "1mm", vector=True, margins=False)
+        return JumpDelayTravelCost(
+            speed=abs(float(rapid_speed) * galvos_per_mm),
+            # A negative delay overlaps the jump, it takes no time.
+            delay_mark=(max(0.0, float(delay_on)) + max(0.0, float(delay_off))) / 1e6,
+            delay_polygon=max(0.0, float(delay_polygon)) / 1e6,
+        )
+
     @signal_listener("light_simulate")
     def simulate_state(self, origin, v=True):
         self._simulate = False
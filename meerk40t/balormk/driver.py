@@ -8,6 +8,7 @@ driver.
 import threading
 import time
 
+import numpy as np
 from usb.core import NoBackendError
 
 from meerk40t.balormk.controller import GalvoController
@@ -23,7 +24,13 @@ from meerk40t.core.cutcode.quadcut import QuadCut
 from meerk40t.core.cutcode.waitcut import WaitCut
 from meerk40t.core.geomstr import Geomstr
 from meerk40t.core.plotplanner import PlotPlanner
-from meerk40t.device.basedevice import PLOT_FINISH, PLOT_JOG, PLOT_RAPID, PLOT_SETTING
+from meerk40t.device.basedevice import (
+    PLOT_FINISH,
+    PLOT_JOG,
+    PLOT_RAPID,
+    PLOT_RASTER,
+    PLOT_SETTING,
+)
 from meerk40t.kernel import channel
 
 
@@ -86,6 +93,7 @@ class BalorDriver:
         )
         self.value_penbox = None
         self.plot_planner.settings_then_jog = True
+        self.plot_planner.raster_blocks = True
         self._aborting = False
         self._list_bits = None
         self.service.setting(bool, "signal_updates", True)
@@ -242,13 +250,8 @@ class BalorDriver:
 
                 g.clear()
                 g.quad(start, c1, end)
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-                    con.mark(p.real, p.imag)
+                if self._mark_interpolated(g, interp):
+                    return
             elif segment_type == "cubic":
                 last_x, last_y = con.get_last_xy()
                 x, y = start.real, start.imag
@@ -258,13 +261,8 @@ class BalorDriver:
 
                 g.clear()
                 g.cubic(start, c1, c2, end)
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-                    con.mark(p.real, p.imag)
+                if self._mark_interpolated(g, interp):
+                    return
             elif segment_type == "arc":
                 last_x, last_y = con.get_last_xy()
                 x, y = start.real, start.imag
@@ -274,13 +272,8 @@ class BalorDriver:
 
                 g.clear()
                 g.arc(start, c1, end)
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-                    con.mark(p.real, p.imag)
+                if self._mark_interpolated(g, interp):
+                    return
             elif segment_type == "point":
                 function = sets.get("function")
                 if function == "dwell":
@@ -349,6 +342,15 @@ class BalorDriver:
         """
         self.queue.append(plot)
 
+    def plot_batch(self, plots):
+        """
+        Gives the driver consecutive cutcode that should be plotted, as plot() does for each of them.
+
+        @param plots: list of cuts
+        @return:
+        """
+        self.queue.extend(plots)
+
     def _wait_for_input_protocol(self, input_mask, input_value):
         required_passes = self.service.input_passes_required
         passes = 0
@@ -428,13 +430,8 @@ class BalorDriver:
 
                 g = Geomstr()
                 g.quad(complex(*q.start), complex(*q.c()), complex(*q.end))
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-                    con.mark(p.real, p.imag)
+                if self._mark_interpolated(g, interp):
+                    return
             elif isinstance(q, CubicCut):
                 last_x, last_y = con.get_last_xy()
                 x, y = q.start
@@ -449,53 +446,20 @@ class BalorDriver:
                     complex(*q.c2()),
                     complex(*q.end),
                 )
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-                    con.mark(p.real, p.imag)
+                if self._mark_interpolated(g, interp):
+                    return
             elif isinstance(q, PlotCut):
                 last_x, last_y = con.get_last_xy()
                 x, y = q.start
                 if last_x != x or last_y != y:
                     con.goto(x, y)
-                for ox, oy, on, x, y in q.plot:
-                    # LOOP CHECKS
-                    if self._abort_mission():
-                        return
-                    while self.paused:
-                        time.sleep(0.05)
-
-                    # q.plot can have different on values, these are parsed
-                    if on == 0:
-                        con.goto(x, y)
-                    else:
-                        if last_on is None or on != last_on:
-                            # No power change.
-                            last_on = on
-                            if self.value_penbox:
-                                # There is an active value_penbox
-                                settings = dict(q.settings)
-                                limit = len(self.value_penbox) - 1
-                                m = int(round(on * limit))
-                                try:
-                                    pen = self.value_penbox[m]
-                                    settings.update(pen)
-                                except IndexError:
-                                    pass
-                                # Power scaling is exclusive to this penbox. on is used as a lookup and does not scale power.
-                                con.set_settings(settings)
-                            else:
-                                # We are using traditional power-scaling
-                                max_power = float(
-                                    q.settings.get("power", self.service.default_power)
-                                )
-                                percent_power = max_power / 10.0
-                                # Max power is the percent max power, scaled by the pixel power.
-                                con.power(percent_power * on)
-                        con.mark(x, y)
+                plot = np.array(list(q.plot), dtype=float).reshape((-1, 5))
+                # q.plot can have different on values, these are parsed
+                aborted, last_on = self._plot_moves(
+                    plot[:, 3], plot[:, 4], plot[:, 2], q.settings, last_on
+                )
+                if aborted:
+                    return
             elif isinstance(q, DwellCut):
                 start = q.start
                 con.goto(start[0], start[1])
@@ -549,6 +513,12 @@ class BalorDriver:
                         # Special Command.
                         if on & PLOT_FINISH:  # Plot planner is ending.
                             break
+                        elif on & PLOT_RASTER:  # Plot planner grouped the plots of a raster block.
+                            aborted, last_on = self._plot_moves(
+                                *x, self.plot_planner.settings, last_on
+                            )
+                            if aborted:
+                                return
                         elif on & PLOT_SETTING:  # Plot planner settings have changed.
                             settings = self.plot_planner.settings
                             penbox = settings.get("penbox_value")
@@ -570,30 +540,7 @@ class BalorDriver:
                         # This is a regular cut position
                         if last_on is None or on != last_on:
                             last_on = on
-                            if self.value_penbox:
-                                # There is an active value_penbox
-                                settings = dict(self.plot_planner.settings)
-                                limit = len(self.value_penbox) - 1
-                                m = int(round(on * limit))
-                                try:
-                                    pen = self.value_penbox[m]
-                                    settings.update(pen)
-                                except IndexError:
-                                    pass
-                                # Power scaling is exclusive to this penbox. on is used as a lookup and does not scale power.
-                                con.set_settings(settings)
-                            else:
-                                # We are using traditional power-scaling
-                                settings = self.plot_planner.settings
-                                percent_power = (
-                                    float(
-                                        settings.get(
-                                            "power", self.service.default_power
-                                        )
-                                    )
-                                    / 10.0
-                                )
-                                con.power(percent_power * on)
+                            self._plot_power(self.plot_planner.settings, on)
                         con.mark(x, y)
         con.list_delay_time(int(self.service.delay_end / 10.0))
         self._list_bits = None
@@ -608,6 +555,103 @@ class BalorDriver:
             con.light_off()
             con.write_port()
 
+    def _plot_power(self, settings, on):
+        """
+        Sets the power for the on value, or the pen of the active value_penbox.
+
+        @param settings: settings of the plot
+        @param on: on value in range 0 exclusive and 1 inclusive.
+        @return:
+        """
+        con = self.connection
+        if self.value_penbox:
+            # There is an active value_penbox
+            settings = dict(settings)
+            limit = len(self.value_penbox) - 1
+            m = int(round(on * limit))
+            try:
+                pen = self.value_penbox[m]
+                settings.update(pen)
+            except IndexError:
+                pass
+            # Power scaling is exclusive to this penbox. on is used as a lookup and does not scale power.
+            con.set_settings(settings)
+        else:
+            # We are using traditional power-scaling
+            max_power = float(settings.get("power", self.service.default_power))
+            percent_power = max_power / 10.0
+            # Max power is the percent max power, scaled by the pixel power.
+            con.power(percent_power * on)
+
+    def _plot_moves(self, x, y, on, settings, last_on, chunk=1024):
+        """
+        Goto the positions with an on value of 0 and mark the others, setting the power for each new on value.
+
+        The moves between power changes are written in bulk by the controller, in chunks between the loop checks.
+
+        @param x: array of x positions
+        @param y: array of y positions
+        @param on: array of on values
+        @param settings: settings of the plot
+        @param last_on: on value of the current power
+        @return: whether the mission was aborted, and the on value of the current power.
+        """
+        con = self.connection
+        burn = on != 0
+        index = np.flatnonzero(burn)
+        values = on[index]
+        change = np.ones(len(index), dtype=bool)
+        change[1:] = values[1:] != values[:-1]
+        if len(index) and last_on is not None and values[0] == last_on:
+            change[0] = False
+        bounds = [0] + index[change].tolist() + [len(on)]
+        for i in range(len(bounds) - 1):
+            start = bounds[i]
+            end = bounds[i + 1]
+            if i:
+                last_on = on[start].item()
+                self._plot_power(settings, last_on)
+            for position in range(start, end, chunk):
+                # LOOP CHECKS
+                if self._abort_mission():
+                    return True, last_on
+                while self.paused:
+                    time.sleep(0.05)
+                stop = min(position + chunk, end)
+                if stop - position < 8:
+                    # Few moves between power changes are quicker one at a time.
+                    for px, py, mark in zip(
+                        x[position:stop].tolist(),
+                        y[position:stop].tolist(),
+                        burn[position:stop].tolist(),
+                    ):
+                        if mark:
+                            con.mark(px, py)
+                        else:
+                            con.goto(px, py)
+                    continue
+                con.moves(x[position:stop], y[position:stop], burn[position:stop])
+        return False, last_on
+
+    def _mark_interpolated(self, g, interp):
+        """
+        Marks along the equally interpolated points of the geometry, after its start.
+
+        @return: whether the mission was aborted.
+        """
+        points = np.array(
+            list(g.as_equal_interpolated_points(distance=interp))[1:], dtype=complex
+        )
+        # LOOP CHECKS
+        if self._abort_mission():
+            return True
+        while self.paused:
+            time.sleep(0.05)
+        self.connection.moves(
+            points.real, points.imag, np.ones(len(points), dtype=bool)
+        )
+        return False
+
     def move_abs(self, x, y):
         """
         Requests laser move to absolute position x, y in physical units
@@ -5,20 +5,192 @@ This light job is full live because it syncs with the elements to run the curren
 when the elements change. It will show the updated job.
 
 This job works as a spoolerjob. Implementing all the regular calls for being a spooled job.
+
+The outline is traced over and over. It is kept as a RedlightTrace with the list records of one pass, and is only
+rebuilt when the traced elements, the mode, the redlight or view matrix or the redlight settings really change.
+Outlines with more points than the galvo can trace at the redlight refresh rate are simplified.
 """
 
+import hashlib
 import threading
 import time
+from collections import OrderedDict
 from math import isinf
 
 import numpy as np
 
+from meerk40t.balormk.controller import (
+    listJumpDelay,
+    listJumpSpeed,
+    listJumpTo,
+    listWritePort,
+    list_record,
+)
 from meerk40t.core.geomstr import Geomstr
 from meerk40t.core.node.node import Node
 from meerk40t.core.units import UNITS_PER_PIXEL, Length
 from meerk40t.kernel.jobs import Job
 from meerk40t.svgelements import Matrix
 
+# Outlines kept for the selections traced before.
+TRACE_CACHE_SIZE = 8
+# Time the galvo takes for a list command, besides the jump delays and travel.
+LIST_COMMAND_SECONDS = 10e-6
+# Fewest points an outline is simplified to.
+MIN_TRACE_POINTS = 64
+
+
+def _matrix_key(matrix):
+    return matrix.a, matrix.b, matrix.c, matrix.d, matrix.e, matrix.f
+
+
+def _geometry_key(geometry):
+    """
+    Digest of the segments of the geometry, which can be edited in place.
+    """
+    if not isinstance(geometry, Geomstr):
+        return None
+    return hashlib.blake2b(
+        geometry.segments[: geometry.index].tobytes(), digest_size=16
+    ).digest()
+
+
+def _node_key(node):
+    """
+    Values of the node the outline depends on.
+    """
+    bounds = node.bounds
+    matrix = getattr(node, "matrix", None)
+    return (
+        id(node),
+        None if bounds is None else tuple(bounds),
+        None if matrix is None else _matrix_key(matrix),
+        # The shape can be edited in place, without changing the bounds.
+        _geometry_key(getattr(node, "geometry", None)),
+    )
+
+
+class RedlightTrace:
+    """
+    Points of a redlight outline, traced from and back to the first point, and the list records of a pass.
+
+    The records of a pass depend on the state of the controller at its start, so they are kept for each start state.
+    Once the trace repeats, a pass starts in the state the previous pass ended in.
+    """
+
+    def __init__(self, x, y, lights):
+        self.x = x
+        self.y = y
+        self.lights = lights
+        self._encoded = {}
+
+    def __len__(self):
+        return len(self.x)
+
+    def write(self, con, delay_dark, delay_light):
+        """
+        Writes a pass of the trace into the lists of the controller, as light() and dark() would for each point.
+        """
+        state = (
+            con._last_x,
+            con._last_y,
+            con._port_bits,
+            con._travel_speed,
+            con._delay_jump,
+            con._light_speed,
+            con._dark_speed,
+            delay_dark,
+            delay_light,
+        )
+        encoded = self._encoded.get(state)
+        if encoded is None:
+            if len(self._encoded) > 4:
+                self._encoded.clear()
+            encoded = self._encode(con, delay_dark, delay_light)
+            self._encoded[state] = encoded
+        records, end = encoded
+        if len(records):
+            con._list_write_records(records)
+        (
+            con._last_x,
+            con._last_y,
+            con._port_bits,
+            con._travel_speed,
+            con._delay_jump,
+        ) = end
+
+    def _encode(self, con, delay_dark, delay_light):
+        last_x, last_y = con._last_x, con._last_y
+        port = con._port_bits
+        bit = 1 << con._light_bit
+        speed = con._travel_speed
+        delay = con._delay_jump
+        records = []
+        for x, y, light in zip(self.x.tolist(), self.y.tolist(), self.lights.tolist()):
+            if x == last_x and y == last_y:
+                continue
+            if light != bool(port & bit):
+                port = port | bit if light else port & ~bit
+                records.append((listWritePort, port, 0, 0, 0, 0))
+            move_speed = con._light_speed if light else con._dark_speed
+            if move_speed is not None and speed != move_speed:
+                speed = move_speed
+                records.append(
+                    (listJumpSpeed, min(con._convert_speed(speed), 0xFFFF), 0, 0, 0, 0)
+                )
+            move_delay = delay_light if light else delay_dark
+            if move_delay and delay != move_delay:
+                delay = move_delay
+                records.append(
+                    (
+                        listJumpDelay,
+                        abs(delay),
+                        0x0000 if delay >= 0 else 0x8000,
+                        0,
+                        0,
+                        0,
+                    )
+                )
+            distance = int(abs(complex(x, y) - complex(last_x, last_y)))
+            records.append((listJumpTo, x, y, 0, min(distance, 0xFFFF), 0))
+            last_x, last_y = x, y
+        return np.array(records, dtype=list_record), (
+            last_x,
+            last_y,
+            port,
+            speed,
+            delay,
+        )
+
+
+def simplify_trace(x, y, dark, budget, spacing):
+    """
+    Drops points of the runs until there are no more than budget points, keeping the first point in each cell of a
+    grid whose spacing doubles until the points fit, and the ends of each run.
+
+    @param x: int array of x positions
+    @param y: int array of y positions
+    @param dark: bool array, True where a run starts.
+    @param budget: most points
+    @param spacing: first spacing of the grid
+    @return: x, y, dark
+    """
+    count = len(x)
+    if count <= budget:
+        return x, y, dark
+    ends = np.ones(count, dtype=bool)
+    ends[:-1] = dark[1:]
+    spacing = max(int(spacing), 1)
+    while count > budget and spacing <= 0x10000:
+        spacing *= 2
+        cx = x // spacing
+        cy = y // spacing
+        keep = dark | ends
+        keep[1:] |= (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])
+        x, y, dark, ends = x[keep], y[keep], dark[keep], ends[keep]
+        count = len(x)
+    return x, y, dark
+
 
 class LiveLightJob:
     def __init__(
@@ -84,6 +256,9 @@ class LiveLightJob:
         self.changed = True
         self._last_bounds = None
         self.source = "elements"
+        self._traces = OrderedDict()
+        self._trace = None
+        self._trace_key = None
 
     # Generate a copy of the job for reinsertion after stopping
     def copy_for_reinsertion(self):
@@ -204,13 +379,10 @@ class LiveLightJob:
             if self.changed:
                 # print ("Something changed")
                 with self.redlight_lock:
-                    if self.update_method is not None:
-                        self.update_method()
-                        # print (f"We are having now {len(self.points)} points")
-                        # for i, e in enumerate(self.points):
-                        #     print (f"Point {i}: {e}")
                     self.changed = False
-                init_red(con)
+                    rebuilt = self.update_trace()
+                if rebuilt:
+                    init_red(con)
 
             # Now draw the stuff
             self.trace_redlight(con)
@@ -218,54 +390,152 @@ class LiveLightJob:
     def trace_redlight(self, con):
         """Trace the redlight path.
 
-        This function iterates through the calculated redlight points
-        and sends commands to the controller to move the laser
-        accordingly, turning the laser on and off to trace the path.
+        This function writes the list records of a pass of the cached
+        trace to the controller, turning the laser on and off to trace
+        the path, and back to the first point.
 
         Args:
             con: The connection to the laser controller.
         """
         con.light_mode()
-        delay_dark = self.service.redlight_delay_dark
-        delay_between = self.service.redlight_delay_light
-        move = True
-        # We need to jump back to the first point
-        first = True
-        first_x, first_y = None, None
-        for i, e in enumerate(self.points):
-            if self.stopped or self.changed:
-                # Abort due to stoppage or change, no sense to continue
-                return
-            if e is None:
-                move = True
-                continue
-            x, y = e.real, e.imag
-            if np.isnan(x) or np.isnan(y):
-                move = True
-                continue
-            x = int(x)
-            y = int(y)
-            if x < 0 or x > 0xFFFF or y < 0 or y > 0xFFFF:
-                # Our bounds are not in frame.
-                if self.bounded:
-                    # We required them in frame.
-                    continue
-                # Fix them.
-                x = max(min(x, 0xFFFF), 0)
-                y = max(min(y, 0xFFFF), 0)
-            if first:
-                first_x, first_y = x, y
-                first = False
-            if move:
-                con.dark(x, y, long=delay_dark, short=delay_dark)
-                move = False
-                continue
-            con.light(x, y, long=delay_between, short=delay_between)
-        if first_x is not None and first_y is not None:
-            con.dark(first_x, first_y, long=delay_dark, short=delay_dark)
+        trace = self._trace
+        if trace is None or self.stopped or self.changed:
+            return
+        trace.write(
+            con,
+            self.service.redlight_delay_dark,
+            self.service.redlight_delay_light,
+        )
         con.light_off()
         con.write_port()
 
+    def trace_key(self):
+        """Values the redlight trace depends on.
+
+        Returns:
+            tuple: The key of the trace in the cache.
+        """
+        service = self.service
+        view = service.view
+        if self.mode in ("full", "hull", "bounds"):
+            content = tuple(_node_key(node) for node in self._gather_source())
+        elif self.mode == "geometry":
+            # Rotated, flipped and resized in place.
+            content = _geometry_key(self._geometry)
+        else:
+            content = None
+        return (
+            self.mode,
+            self.source,
+            content,
+            _matrix_key(self._redlight_adjust_matrix()),
+            _matrix_key(view.matrix),
+            float(view.width),
+            float(view.height),
+            self.quantization,
+            self.raw,
+            self._travel_speed,
+            service.redlight_speed,
+            service.redlight_delay_dark,
+            service.redlight_delay_light,
+            service.redlight_refresh,
+        )
+
+    def update_trace(self):
+        """Update the redlight trace if anything it depends on changed.
+
+        Traces of the selections traced before are taken from the cache.
+
+        Returns:
+            bool: True if the trace changed.
+        """
+        key = self.trace_key()
+        if key == self._trace_key:
+            return False
+        trace = self._traces.get(key)
+        if trace is None:
+            if self.update_method is None:
+                return False
+            self.update_method()
+            trace = self.build_trace(self.points)
+            self._traces[key] = trace
+            while len(self._traces) > TRACE_CACHE_SIZE:
+                self._traces.popitem(last=False)
+        else:
+            self._traces.move_to_end(key)
+        self._trace = trace
+        self._trace_key = key
+        return True
+
+    def point_budget(self, x, y):
+        """Most points of a trace the galvo passes at the redlight refresh rate.
+
+        Args:
+            x: Array of x positions of the trace.
+            y: Array of y positions of the trace.
+
+        Returns:
+            int: The number of points.
+        """
+        service = self.service
+        speed = self._travel_speed
+        if speed is None:
+            speed = service.redlight_speed
+        galvos_per_mm, _ = service.view.position(
+            "1mm", "1mm", vector=True, margins=False
+        )
+        # Speed in galvos per second.
+        speed = abs(float(speed) * galvos_per_mm)
+        length = float(np.hypot(np.diff(x), np.diff(y)).sum()) if len(x) else 0.0
+        travel = length / speed if speed else 0.0
+        per_point = (
+            max(service.redlight_delay_light, service.redlight_delay_dark, 0) * 1e-6
+            + LIST_COMMAND_SECONDS
+        )
+        period = 1.0 / max(float(service.redlight_refresh), 0.1)
+        # Fewer points don't shorten the travel, at least half the period is left to the points.
+        available = max(period - travel, period / 2)
+        return max(MIN_TRACE_POINTS, int(available / per_point))
+
+    def build_trace(self, points):
+        """Build the redlight trace of the points.
+
+        Points are None or NaN where the path breaks, the trace jumps
+        dark to the point after a break. Points out of frame are skipped
+        if the job is bounded, clamped into frame otherwise.
+
+        Args:
+            points: The interpolated points.
+
+        Returns:
+            RedlightTrace: The trace.
+        """
+        pts = np.array(
+            [complex("nan") if e is None else e for e in points or ()],
+            dtype=complex,
+        )
+        breaks = np.isnan(pts.real) | np.isnan(pts.imag)
+        runs = np.cumsum(breaks)
+        x = np.trunc(np.where(breaks, 0, pts.real))
+        y = np.trunc(np.where(breaks, 0, pts.imag))
+        valid = ~breaks
+        if self.bounded:
+            valid &= (x >= 0) & (x <= 0xFFFF) & (y >= 0) & (y <= 0xFFFF)
+        x = np.clip(x[valid], 0, 0xFFFF).astype(np.int64)
+        y = np.clip(y[valid], 0, 0xFFFF).astype(np.int64)
+        runs = runs[valid]
+        dark = np.ones(len(x), dtype=bool)
+        dark[1:] = runs[1:] != runs[:-1]
+        x, y, dark = simplify_trace(
+            x, y, dark, self.point_budget(x, y), self.quantization
+        )
+        if len(x):
+            # Back to the first point.
+            x = np.append(x, x[0])
+            y = np.append(y, y[0])
+            dark = np.append(dark, True)
+        return RedlightTrace(x, y, ~dark)
+
     def setup_listen(self, start):
         """Set up or tear down listeners for element changes.
 
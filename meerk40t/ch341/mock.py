@@ -8,6 +8,12 @@ class MockCH341Driver:
     This is basic interface code for a mock CH341.
     """
 
+    # Seconds taken by a packet write and a status read.
+    write_delay = 0.04
+    status_delay = 0.01
+    # Whether writes fail and statuses report errors at random.
+    random_errors = True
+
     def __init__(self, channel=None, state=None, bulk=True):
         self.driver_index = None
         self.driver_value = None
@@ -100,10 +106,11 @@ class MockCH341Driver:
             self._start_time_status = time.time()
             self._end_time_status = self._start_time_status + 0.5
             self._time_status = 204
-        if random.randint(0, 5000) == 0:
+        if self.random_errors and random.randint(0, 5000) == 0:
             # Write failed.
             raise ConnectionError
-        time.sleep(0.04)
+        if self.write_delay:
+            time.sleep(self.write_delay)
         # Mock
 
     def write_addr(self, packet):
@@ -152,13 +159,14 @@ class MockCH341Driver:
         # Mock
         from random import randint
 
-        if randint(0, 500) == 0:
+        if self.random_errors and randint(0, 500) == 0:
             status = [255, self.mock_error, 0, 0, 0, 1]
         else:
             status = [255, self.mock_status, 0, 0, 0, 1]
-        if randint(0, 1000) == 0:
+        if self.random_errors and randint(0, 1000) == 0:
             status = [255, self.mock_finish, 0, 0, 0, 1]
-        time.sleep(0.01)
+        if self.status_delay:
+            time.sleep(self.status_delay)
         return status
 
     def get_chip_version(self):
@@ -0,0 +1,374 @@
+"""
+Driver benchmark.
+
+Pushes standardized synthetic jobs through a fresh driver of a device, the way the spooler would run them, with the
+data the driver writes for its transport going into a counting sink rather than the controller and connection. This
+measures the driver end to end, cutcode in and bytes out, without the timing of any hardware or mock connection, and
+reports the throughput of each job as JSON.
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.core.cutcode.cubiccut import CubicCut
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.cutcode.quadcut import QuadCut
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.core.laserjob import LaserJob
+from meerk40t.core.units import UNITS_PER_MM
+from meerk40t.kernel import CommandSyntaxError
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+class ByteSink:
+    """
+    Counts the data written to it, in place of the transport of a driver.
+
+    The sink can stand in for a pipe function, a file-like pipe and a controller the driver waits on, the pipe is
+    never busy.
+    """
+
+    is_shutdown = False
+
+    def __init__(self):
+        self.bytes = 0
+        self.writes = 0
+        self.first_write = None
+
+    def __call__(self, data, *args, **kwargs):
+        self.write(data)
+
+    def __len__(self):
+        return 0
+
+    def write(self, data, *args, **kwargs):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        self.writes += 1
+        self.bytes += len(data)
+
+
+class _SinkConnection:
+    """
+    Connection writing to a sink, for the controllers which talk to a connection object.
+    """
+
+    def __init__(self, sink, reply=bytes(8)):
+        self.sink = sink
+        self.reply = reply
+
+    def is_open(self, index=0):
+        return True
+
+    def open(self, index=0):
+        return index
+
+    def close(self, index=0):
+        pass
+
+    def write(self, index=0, data=None, packet=None):
+        self.sink.write(data if packet is None else packet)
+
+    def read(self, index=0):
+        return self.reply
+
+
+def tap_driver(driver, sink):
+    """
+    Routes the data the driver writes for its transport into the sink.
+
+    @param driver: driver not used for anything else.
+    @param sink: ByteSink
+    @return: whether the output of the driver is known.
+    """
+    if hasattr(driver, "out_pipe"):
+        # GRBL, Lihuiyu and Moshi write to a pipe, which the save_job commands swap for a file as well.
+        driver.out_pipe = sink
+        if hasattr(driver, "out_real"):
+            driver.out_real = sink
+        return True
+    controller = getattr(driver, "controller", None)
+    if controller is not None and hasattr(controller, "start_sending"):
+        # Ruida encodes the whole job and sends it in chunks once the job is started, as with save_job. The status
+        # thread of the controller would wait for a job to be sent through it, which never happens.
+        if hasattr(controller, "shutdown"):
+            controller.shutdown()
+
+        def start_sending():
+            controller.divide_data_into_queue()
+            while controller._send_queue:
+                sink.write(controller._send_queue.popleft())
+
+        controller.write = sink.write
+        controller.start_sending = start_sending
+        return True
+    connection = getattr(driver, "connection", None)
+    if connection is None:
+        return False
+    if hasattr(connection, "wait_ready"):
+        # Galvo controllers send packets and lists and read the status back, which is always ready.
+        from meerk40t.balormk.controller import READY
+
+        def send(data, read=True):
+            sink.write(data)
+            return 0, 0, 0, READY
+
+        connection.send = send
+        # The foot pedal has a polling thread of its own, which would write to the sink as well.
+        driver.start_pedal_polling = lambda origin="": None
+        return True
+    if hasattr(connection, "connect_if_needed"):
+        # Newly controllers write to a USB connection.
+        connection.connection = _SinkConnection(sink)
+        return True
+    return False
+
+
+def _settings(view, speed, power, **kwargs):
+    """
+    Settings of a cut, with the native values the operations add when they are preprocessed.
+    """
+    native_mm = abs(complex(*view.matrix.transform_vector([0, UNITS_PER_MM])))
+    return {
+        "speed": speed,
+        "power": power,
+        "native_mm": native_mm,
+        "native_speed": speed * native_mm,
+        "native_rapid_speed": 300.0 * native_mm,
+        **kwargs,
+    }
+
+
+def vector_job(view, scale=1.0):
+    """
+    Dense vectors, a random walk of short line cuts.
+    """
+    count = max(1, round(20000 * scale))
+    rng = np.random.default_rng(0)
+    steps = rng.normal(0, 0.2, size=(count + 1, 2)) * UNITS_PER_MM
+    points = np.cumsum(steps, axis=0) + 50 * UNITS_PER_MM
+    points = [view.position(x, y) for x, y in points.tolist()]
+    settings = _settings(view, 40.0, 1000.0)
+    return [
+        LineCut(points[i], points[i + 1], settings=settings) for i in range(count)
+    ]
+
+
+def curve_job(view, scale=1.0):
+    """
+    Curves, chains of cubic and quadratic bezier cuts a few mm long.
+    """
+    count = max(1, round(2000 * scale))
+    rng = np.random.default_rng(1)
+    steps = rng.normal(0, 1.0, size=(count * 3 + 1, 2)) * UNITS_PER_MM
+    controls = np.cumsum(steps, axis=0) + 50 * UNITS_PER_MM
+    points = [view.position(x, y) for x, y in controls.tolist()]
+    settings = _settings(view, 30.0, 1000.0)
+    cuts = []
+    for i in range(count):
+        p = points[i * 3 : i * 3 + 4]
+        if i % 2:
+            cuts.append(CubicCut(p[0], p[1], p[2], p[3], settings=settings))
+        else:
+            cuts.append(QuadCut(p[0], p[1], p[3], settings=settings))
+    return cuts
+
+
+def raster_job(view, scale=1.0, dpi=1000):
+    """
+    A 1000 DPI raster of a dithered gradient, 20mm square.
+    """
+    step_x, step_y = view.dpi_to_steps(dpi)
+    # The area of the raster scales.
+    pixels = max(1, round(20 / 25.4 * dpi * scale**0.5))
+    rng = np.random.default_rng(2)
+    gradient = np.linspace(0, 1, pixels)[None, :]
+    image = np.where(rng.random((pixels, pixels)) < gradient, 255, 0).astype(np.uint8)
+    x, y = view.position(10 * UNITS_PER_MM, 10 * UNITS_PER_MM)
+    settings = _settings(
+        view, 200.0, 1000.0, raster_step_x=step_x, raster_step_y=step_y
+    )
+    return [
+        RasterCut(
+            Image.fromarray(image).copy(), x, y, step_x, step_y, settings=settings
+        )
+    ]
+
+
+def mixed_job(view, scale=1.0, layers=8):
+    """
+    Line cuts of several power and speed layers, the layer changing every few cuts.
+    """
+    count = max(1, round(5000 * scale))
+    rng = np.random.default_rng(3)
+    steps = rng.normal(0, 1.0, size=(count + 1, 2)) * UNITS_PER_MM
+    ends = np.cumsum(steps, axis=0) + 50 * UNITS_PER_MM
+    points = [view.position(x, y) for x, y in ends.tolist()]
+    palette = [
+        _settings(view, float(speed), float(power))
+        for speed, power in zip(
+            rng.choice([10, 20, 50, 100], size=layers).tolist(),
+            rng.integers(100, 1000, size=layers).tolist(),
+        )
+    ]
+    order = rng.integers(0, layers, size=count // 5 + 1).tolist()
+    return [
+        LineCut(points[i], points[i + 1], settings=palette[order[i // 5]])
+        for i in range(count)
+    ]
+
+
+JOBS = {
+    "vectors": vector_job,
+    "curves": curve_job,
+    "raster": raster_job,
+    "mixed": mixed_job,
+}
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process in bytes, None where it can't be read.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_job(device, name, cuts):
+    """
+    Runs the cuts through a fresh driver of the device.
+
+    @return: dict of the results, None if the output of the driver is not known.
+    """
+    driver = type(device.driver)(device)
+    sink = ByteSink()
+    if not tap_driver(driver, sink):
+        return None
+    cutcode = CutCode(cuts)
+    job = LaserJob(name, [cutcode], driver=driver)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    # As the spooler runs a job.
+    if hasattr(driver, "job_start"):
+        driver.job_start(job)
+    job.execute(driver)
+    if hasattr(driver, "job_finish"):
+        driver.job_finish(job)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    return {
+        "job": name,
+        "items": len(cuts),
+        "seconds": elapsed,
+        "cpu_seconds": cpu,
+        "items_per_second": len(cuts) / elapsed if elapsed else None,
+        "bytes": sink.bytes,
+        "bytes_per_second": sink.bytes / elapsed if elapsed else None,
+        "time_to_first_byte": None
+        if sink.first_write is None
+        else sink.first_write - start,
+        "peak_rss": peak_rss(),
+    }
+
+
+def benchmark(device, jobs=None, scale=1.0):
+    """
+    Runs the standard jobs, or the named ones, through the driver of the device.
+
+    @param device: device service
+    @param jobs: names of the jobs, all jobs if None
+    @param scale: size of the jobs relative to the standard jobs
+    @return: dict of the device, driver and the results of each job
+    """
+    view = device.view
+    results = []
+    for name in jobs or JOBS:
+        result = run_job(device, name, JOBS[name](view, scale))
+        if result is None:
+            break
+        results.append(result)
+    return {"device": device.label, "driver": type(device.driver).__name__, "runs": results}
+
+
+def plugin(kernel, lifecycle):
+    if lifecycle == "register":
+        _ = kernel.translation
+
+        @kernel.console_command(
+            "driver",
+            help=_("driver <command> : the driver of the active device"),
+            output_type="driver",
+        )
+        def driver_command(channel, _, remainder=None, **kwgs):
+            device = kernel.device
+            driver = getattr(device, "driver", None)
+            if driver is None:
+                channel(_("{name} has no driver.").format(name=device.label))
+                return
+            if remainder is None:
+                channel(
+                    _("Driver of {name}: {driver}").format(
+                        name=device.label, driver=type(driver).__name__
+                    )
+                )
+            return "driver", driver
+
+        @kernel.console_option(
+            "output", "o", type=str, help=_("write the JSON results to this file")
+        )
+        @kernel.console_option(
+            "scale",
+            "s",
+            type=float,
+            default=1.0,
+            help=_("size of the jobs relative to the standard jobs"),
+        )
+        @kernel.console_argument(
+            "jobs",
+            type=str,
+            nargs="*",
+            help=_("jobs to run: {jobs}").format(jobs=", ".join(JOBS)),
+        )
+        @kernel.console_command(
+            "benchmark",
+            help=_("benchmark the driver with synthetic jobs, reports JSON"),
+            input_type="driver",
+            output_type="driver",
+        )
+        def driver_benchmark(
+            channel, _, data=None, jobs=None, output=None, scale=1.0, **kwgs
+        ):
+            # Unfilled arguments are given as None.
+            jobs = [name for name in jobs or () if name is not None]
+            for name in jobs:
+                if name not in JOBS:
+                    raise CommandSyntaxError(
+                        _("Unknown job: {name}").format(name=name)
+                    )
+            results = benchmark(kernel.device, jobs, scale)
+            if not results["runs"]:
+                channel(
+                    _("The output of {driver} is not known.").format(
+                        driver=results["driver"]
+                    )
+                )
+                return "driver", data
+            text = json.dumps(results, indent=2)
+            if output is not None:
+                with open(output, "w") as f:
+                    f.write(text)
+            channel(text)
+            return "driver", data
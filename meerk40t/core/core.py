@@ -52,4 +52,8 @@ def plugin(kernel, lifecycle=None):
 
         plugins.append(svg_io.plugin)
 
+        from . import benchmark
+
+        plugins.append(benchmark.plugin)
+
         return plugins
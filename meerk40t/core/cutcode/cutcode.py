@@ -89,6 +89,13 @@ class CutCode(CutGroup):
             yield "plot", cutobject
         yield "plot_start"
 
+    def generate_batch(self):
+        """
+        Commands of generate(), with all cuts in one plot_batch command.
+        """
+        yield "plot_batch", list(self.flat())
+        yield "plot_start"
+
     def provide_statistics(self, include_start=False):
         result = []
         cutcode = list(self.flat())
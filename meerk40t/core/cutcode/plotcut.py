@@ -1,3 +1,5 @@
+import numpy as np
+
 from ...svgelements import Point
 from ...tools.zinglplotter import ZinglPlotter
 from .cutobject import CutObject
@@ -147,6 +149,64 @@ class PlotCut(CutObject):
         if self.max_y is None or y > self.max_y:
             self.max_y = y
 
+    def plot_append_array(self, x, y, laser):
+        """
+        Append arrays of plot values, as plot_append() would one at a time.
+
+        @param x: x values to append
+        @param y: y values to append
+        @param laser: laser values, which must be between 0 and 1.
+        @return:
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        laser = np.asarray(laser)
+        if not len(x):
+            return
+        assert ((0 <= laser) & (laser <= 1)).all()
+        self._length = None
+        self._calc_lengths = None
+        if self._points:
+            last_x, last_y = self._points[-1]
+            dx = np.diff(x, prepend=last_x)
+            dy = np.diff(y, prepend=last_y)
+        else:
+            dx = np.diff(x)
+            dy = np.diff(y)
+        if len(dx):
+            self.max_dx, self.minmax_dx = self._array_steps(dx, self.max_dx, self.minmax_dx)
+            self.max_dy, self.minmax_dy = self._array_steps(dy, self.max_dy, self.minmax_dy)
+            self.travels_bottom |= bool((dy > 0).any())
+            self.travels_top |= bool((dy < 0).any())
+            self.travels_right |= bool((dx > 0).any())
+            self.travels_left |= bool((dx < 0).any())
+        self._points.extend(zip(x.tolist(), y.tolist()))
+        self._powers.extend(laser.tolist())
+        for attr, value, better in (
+            ("min_x", x.min().item(), min),
+            ("min_y", y.min().item(), min),
+            ("max_x", x.max().item(), max),
+            ("max_y", y.max().item(), max),
+        ):
+            current = getattr(self, attr)
+            setattr(self, attr, value if current is None else better(current, value))
+
+    @staticmethod
+    def _array_steps(d, max_d, minmax_d):
+        """
+        Largest and smallest nonzero steps of d, the first of each in the order plot_append() finds them.
+        """
+        a = np.abs(d)
+        i = int(np.argmax(a))
+        if max_d is None or a[i] > abs(max_d):
+            max_d = d[i].item()
+        moving = np.flatnonzero(a)
+        if len(moving):
+            j = moving[np.argmin(a[moving])]
+            if minmax_d is None or a[j] < abs(minmax_d):
+                minmax_d = d[j].item()
+        return max_d, minmax_d
+
     def major_axis(self):
         """
         If both vertical and horizontal are set we prefer vertical as major axis because vertical rastering is heavier
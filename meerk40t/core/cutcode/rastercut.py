@@ -1,3 +1,5 @@
+import numpy as np
+
 from meerk40t.core.cutcode.cutobject import CutObject
 from meerk40t.tools.rasterplotter import RasterPlotter
 
@@ -62,6 +64,7 @@ class RasterCut(CutObject):
             def image_filter(pixel):
                 return (255 - pixel) / 255.0
 
+        self.custom_filter = post_filter is not None
         if post_filter is None:
             post_filter = image_filter
 
@@ -166,3 +169,26 @@ class RasterCut(CutObject):
 
     def generator(self):
         return self.plot.plot()
+
+    def plot_blocks(self):
+        """
+        Blocks of plots computed with numpy, see RasterPlotter.plot_blocks().
+
+        @return: generator of x, y, on arrays, or None if the cut uses a post_filter or traversal that isn't supported.
+        """
+        if self.custom_filter:
+            return None
+        pixels = np.asarray(self.image)
+        if pixels.dtype == bool:
+            pixels = pixels.astype(np.uint8) * 255
+        if self.inverted:
+
+            def pixel_filter(array):
+                return array / 255.0
+
+        else:
+
+            def pixel_filter(array):
+                return (255 - array) / 255.0
+
+        return self.plot.plot_blocks(pixels, pixel_filter)
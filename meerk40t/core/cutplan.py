@@ -15,6 +15,7 @@ CutPlan handles the various complicated algorithms to optimising the sequence of
     those inside the same curves so that raster burns are fully optimised.
 """
 
+from collections import Counter
 from copy import copy
 from math import isinf
 from os import times
@@ -32,8 +33,12 @@ from .cutcode.rastercut import RasterCut
 from .elements.element_types import op_vector_nodes
 from .node.node import Node
 from .node.util_console import ConsoleOperation
+from .travelcost import TravelCost
 from .units import Length
 
+# Most cuts refined by a travel cost model, the largest orders of the standard sequencers.
+TRAVEL_COST_MAX_CUTS = 500
+
 """
 The time to compile does outweigh the benefit...
 try:
@@ -890,6 +895,28 @@ class CutPlan:
                 # Replace the original cutcode with the sequenced version
                 self.plan[i] = ordered
 
+    def _travel_cost(self, cutcode):
+        """
+        TravelCost model of the device for the cutcode, None for devices sequenced by travel distance.
+
+        The model is given the settings most of the cuts are burnt with.
+        @return:
+        """
+        try:
+            travel_cost = self.context.device.travel_cost
+        except AttributeError:
+            return None
+        counts = Counter()
+        settings = {}
+        for cut in cutcode.flat():
+            counts[id(cut.settings)] += 1
+            settings[id(cut.settings)] = cut.settings
+        if counts:
+            travel_cost = travel_cost(settings[counts.most_common(1)[0][0]])
+        else:
+            travel_cost = travel_cost()
+        return travel_cost if isinstance(travel_cost, TravelCost) else None
+
     def optimize_travel_2opt(self):
         """
         Optimize travel 2opt at optimize stage on cutcode
@@ -904,7 +931,10 @@ class CutPlan:
         for i, c in enumerate(self.plan):
             if isinstance(c, CutCode):
                 self.plan[i] = short_travel_cutcode(
-                    self.plan[i], kernel=self.context.kernel, channel=channel
+                    self.plan[i],
+                    kernel=self.context.kernel,
+                    channel=channel,
+                    travel_cost=self._travel_cost(c),
                 )
 
     def optimize_cuts(self):
@@ -974,6 +1004,7 @@ class CutPlan:
                     complete_path=self.context.opt_complete_subpaths,
                     grouped_inner=grouped_inner,
                     hatch_optimize=self.context.opt_effect_optimize,
+                    travel_cost=self._travel_cost(c),
                 )
 
     def optimize_travel(self):
@@ -1033,6 +1064,7 @@ class CutPlan:
                     complete_path=self.context.opt_complete_subpaths,
                     grouped_inner=grouped_inner,
                     hatch_optimize=self.context.opt_effect_optimize,
+                    travel_cost=self._travel_cost(c),
                 )
                 last = self.plan[i].end
 
@@ -2465,6 +2497,7 @@ def short_travel_cutcode(
     complete_path: Optional[bool] = False,
     grouped_inner: Optional[bool] = False,
     hatch_optimize: Optional[bool] = False,
+    travel_cost: Optional[TravelCost] = None,
 ):
     return short_travel_cutcode_optimized(
         context=context,
@@ -2473,6 +2506,7 @@ def short_travel_cutcode(
         complete_path=complete_path,
         grouped_inner=grouped_inner,
         hatch_optimize=hatch_optimize,
+        travel_cost=travel_cost,
     )
 
 
@@ -2779,6 +2813,7 @@ def short_travel_cutcode_optimized(
     complete_path: Optional[bool] = False,
     grouped_inner: Optional[bool] = False,
     hatch_optimize: Optional[bool] = False,
+    travel_cost: Optional[TravelCost] = None,
 ):
     """
     Optimized short-travel cutcode algorithm with adaptive strategy selection.
@@ -2795,6 +2830,8 @@ def short_travel_cutcode_optimized(
         complete_path: Whether to require complete path traversal
         grouped_inner: Whether to group inner/outer relationships together
         hatch_optimize: Whether to optimize hatch patterns
+        travel_cost: Optional TravelCost model of the device. Without inner-first
+            constraints, the order of the cuts is refined to lower its cost
 
     Returns:
         CutCode with optimized travel order
@@ -2968,6 +3005,7 @@ def short_travel_cutcode_optimized(
         # Very large dataset: Use legacy algorithm
         if channel:
             channel("Using legacy algorithm for very large dataset")
+        # Not refined by the travel cost, the refinement doesn't scale to this many cuts.
         return short_travel_cutcode_legacy(
             context=context,
             kernel=kernel,
@@ -2977,6 +3015,9 @@ def short_travel_cutcode_optimized(
             hatch_optimize=hatch_optimize,
         )
 
+    if travel_cost is not None:
+        ordered_cuts = _refine_with_cost(ordered_cuts, start_pos, travel_cost, channel)
+
     # Create ordered CutCode from selected cuts
     ordered = CutCode()
     ordered.extend(ordered_cuts)
@@ -3956,3 +3997,94 @@ def _spatial_optimized_selection(all_candidates, start_position):
         ordered.append(c)
 
     return ordered
+
+
+def _refine_with_cost(ordered_cuts, start_position, travel_cost, channel=None):
+    """
+    Refines the order of the cuts by the travel cost model, reporting the cost before and after.
+
+    Up to TRAVEL_COST_MAX_CUTS cuts are refined, larger orders are returned as they are.
+    """
+    if len(ordered_cuts) > TRAVEL_COST_MAX_CUTS:
+        return ordered_cuts
+    if channel:
+        before = travel_cost.total(ordered_cuts, start_position)
+    ordered_cuts = _travel_cost_refinement(ordered_cuts, start_position, travel_cost)
+    if channel:
+        after = travel_cost.total(ordered_cuts, start_position)
+        channel(
+            f"Travel cost by {type(travel_cost).__name__}: {before:.4f} -> {after:.4f}"
+        )
+    return ordered_cuts
+
+
+def _travel_cost_refinement(ordered_cuts, start_position, travel_cost, window=64, sweeps=8):
+    """
+    Refines the order of the cuts to lower the cost of travel by the travel_cost model (2-opt).
+
+    A run of reversible cuts is reversed, each cut burning the other way, where the two joins around the run cost
+    less than before. The joins within the run keep their distance. Runs are up to window cuts long.
+
+    Args:
+        ordered_cuts: List of cuts in order, copies made by the sequencer which are reversed in place
+        start_position: Starting (x, y) position tuple
+        travel_cost: TravelCost model
+        window: Longest run of cuts reversed
+        sweeps: Most passes over the cuts
+
+    Returns:
+        List of cuts in refined order
+    """
+    count = len(ordered_cuts)
+    if count < 2:
+        return ordered_cuts
+    cuts = list(ordered_cuts)
+    if any(c.start is None or c.end is None for c in cuts):
+        return ordered_cuts
+    starts = np.array([complex(*c.start) for c in cuts])
+    ends = np.array([complex(*c.end) for c in cuts])
+    fixed = np.array([not c.reversible() for c in cuts])
+    flipped = np.zeros(count, dtype=bool)
+    origin = complex(*start_position)
+    for sweep in range(sweeps):
+        improved = False
+        for i in range(count):
+            if fixed[i]:
+                continue
+            last = min(count, i + window)
+            blocked = np.flatnonzero(fixed[i:last])
+            if len(blocked):
+                last = i + int(blocked[0])
+            previous = origin if i == 0 else ends[i - 1]
+            j = np.arange(i, last)
+            # Position after the run, there is no join after the last cut.
+            after = starts[np.minimum(j + 1, count - 1)]
+            run_ends = ends[i:last]
+            joins = travel_cost(
+                np.abs(
+                    [
+                        np.full(len(j), starts[i] - previous),
+                        after - run_ends,
+                        run_ends - previous,
+                        after - starts[i],
+                    ]
+                )
+            )
+            if last == count:
+                joins[1, -1] = joins[3, -1] = 0.0
+            before = joins[0] + joins[1]
+            gain = before - joins[2] - joins[3]
+            best = int(np.argmax(gain))
+            if gain[best] <= 1e-12 * max(1.0, abs(float(before[best]))):
+                continue
+            k = i + best + 1
+            starts[i:k], ends[i:k] = ends[i:k][::-1].copy(), starts[i:k][::-1].copy()
+            flipped[i:k] = ~flipped[i:k][::-1]
+            cuts[i:k] = cuts[i:k][::-1]
+            improved = True
+        if not improved:
+            break
+    for c, flip in zip(cuts, flipped.tolist()):
+        if flip:
+            c.reverse()
+    return cuts
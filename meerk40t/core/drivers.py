@@ -157,6 +157,17 @@ class Driver:
         """
         pass
 
+    def plot_batch(self, plots):
+        """
+        Optional. Gives the driver consecutive cutcode that should be plotted/performed, as plot() does for each of
+        them. Drivers without plot_batch are given each cut with plot().
+
+        @param plots: list of cuts
+        @return:
+        """
+        for plot in plots:
+            self.plot(plot)
+
     def plot_start(self):
         """
         Called at the end of plot commands to ensure the driver can deal with them all cutcode as a group, if this
@@ -7,10 +7,15 @@ This could be an infinite number of times.
 """
 
 
+import sys
 import time
 from math import isinf
 
 from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.replay import cutcode_digest
+
+# Approximate size of a prepared command, a tuple of the command and a cut.
+COMMAND_SIZE = sys.getsizeof(("plot", None))
 
 
 class LaserJob:
@@ -36,6 +41,15 @@ class LaserJob:
 
         self._estimate = 0
 
+        # Items with the output of their cutcode generated, see prepare().
+        self._prepared = None
+        self._prepared_size = 0
+        # Digests of the cutcode items, by index, for the replay cache of the driver. Computed when first executed.
+        self._digests = {}
+        # Methods of the driver by name and the prefixes it executes directly, resolved once per execute().
+        self._methods = {}
+        self._direct_prefixes = None
+
         for item in self.items:
             if isinstance(item, CutCode):
                 stats = item.provide_statistics()
@@ -89,18 +103,20 @@ class LaserJob:
         self._stopped = False
         self.time_started = time.time()
         self.time_pass_started = time.time()
-        self.steps_total = 0
-        self.calc_steps()
+        self._methods = {}
+        self._direct_prefixes = None
+        self.prepare()
+        items = self._prepared
         try:
             while self.loops_executed < self.loops:
                 self.steps_done = 0
                 if self._stopped:
                     return False
-                while self.item_index < len(self.items):
+                while self.item_index < len(items):
                     if self._stopped:
                         return False
-                    item = self.items[self.item_index]
-                    self.execute_item(item)
+                    item = items[self.item_index]
+                    self.execute_replayable(self.item_index, item)
                     if self._stopped:
                         return False
                     self.item_index += 1
@@ -113,87 +129,220 @@ class LaserJob:
             self._stopped = True
         return True
 
+    def prepare(self):
+        """
+        Prepares the job for execution, this is done by execute() if it wasn't done before.
+
+        The output of the cutcode items is generated into lists, which are executed for each loop in place of the
+        generators, and the steps of the job are counted. If the driver has a `plot_batch` function, the cuts of the
+        cutcode are given to it as one list. Other generators are left alone, their output may depend on
+        the state of the device when they are executed.
+
+        @return: approximate memory held by the prepared items, in bytes.
+        """
+        if self._prepared is None:
+            batch = hasattr(self._driver, "plot_batch")
+            prepared = []
+            size = 0
+            for item in self.items:
+                if isinstance(item, CutCode):
+                    if batch:
+                        item = list(item.generate_batch())
+                        size += sys.getsizeof(item[0][1])
+                    else:
+                        item = list(item.generate())
+                        size += len(item) * COMMAND_SIZE
+                    size += sys.getsizeof(item)
+                prepared.append(item)
+            self._prepared = prepared
+            self._prepared_size = size
+            self.calc_steps()
+        return self._prepared_size
+
     def calc_steps(self):
-        def simple_step(item):
-            if isinstance(item, tuple):
-                attr = item[0]
-                if hasattr(self._driver, attr):
-                    self.steps_total += 1
-            # STRING
-            elif isinstance(item, str):
-                attr = item
-                if hasattr(self._driver, attr):
-                    self.steps_total += 1
-            # .generator is a Generator
-            elif hasattr(item, "generate"):
-                item = getattr(item, "generate")
-                for p in item():
-                    simple_step(p)
+        known = {}
+
+        def count(lines):
+            total = 0
+            for item in lines:
+                if isinstance(item, tuple):
+                    attr = item[0]
+                # STRING
+                elif isinstance(item, str):
+                    attr = item
+                # Prepared output of a generator
+                elif isinstance(item, list):
+                    total += count(item)
+                    continue
+                # .generator is a Generator
+                elif hasattr(item, "generate"):
+                    total += count(item.generate())
+                    continue
+                else:
+                    continue
+                found = known.get(attr)
+                if found is None:
+                    found = hasattr(self._driver, attr)
+                    known[attr] = found
+                if found:
+                    total += len(item[1]) if attr == "plot_batch" else 1
+            return total
+
+        self.steps_total = count(
+            self.items if self._prepared is None else self._prepared
+        )
+
+    def execute_replayable(self, index, item):
+        """
+        Executes the item at index. For cutcode, the data the driver wrote for the same cutcode in the same driver
+        state is replayed from the replay cache of the driver, otherwise the data the driver writes is captured into
+        that cache. Drivers without a replay cache execute the item as usual.
 
-        self.steps_total = 0
-        for pitem in self.items:
-            simple_step(pitem)
+        @param index: index of the item
+        @param item: prepared item
+        @return:
+        """
+        cache = getattr(self._driver, "replay_cache", None)
+        digest = None
+        if cache is not None:
+            digest = self._digest(index)
+        state = None
+        if digest is not None:
+            state = self._driver.replay_state()
+        if state is None:
+            self.execute_item(item)
+            return
+        key = (digest, state)
+        capture = cache.get(key)
+        if capture is not None:
+            if self._driver.replay(capture):
+                self.steps_done += capture.steps
+            return
+        steps = self.steps_done
+        self._driver.capture_start()
+        try:
+            self.execute_item(item)
+        finally:
+            capture = self._driver.capture_finish(self.steps_done - steps)
+        if capture is not None and not self._stopped:
+            cache.put(key, capture)
+
+    def _digest(self, index):
+        """
+        Digest of the cutcode item at index, None for other items or cutcode which can't be digested.
+        """
+        try:
+            return self._digests[index]
+        except KeyError:
+            pass
+        item = self.items[index]
+        digest = cutcode_digest(item) if isinstance(item, CutCode) else None
+        self._digests[index] = digest
+        return digest
 
     def execute_item(self, item):
         """
         This executes the different classes of spoolable object.
 
         * (str, attribute, ...) calls self.driver.str(*attributes)
+        * ("plot_batch", cuts) calls self.driver.plot_batch(cuts), a step for each cut
         * str, calls self.driver.str()
-        * has_attribute(generator), recursive call to list of lines produced by the
-        generator, recursive call to list of lines produced by generator
+        * has_attribute(generator), the lines produced by the generator are executed in turn, commands are called
+        directly and other lines recursively
+        * list, the prepared output of a generator, executed like the lines of a generator
+
+        The methods of the driver are looked up once per execute().
 
         @param item:
         @return:
         """
-
-        def _handle_console_direct(item):
-            # only <“console”, payload> belongs here
-            if item[0] != "console":
-                return False
-
-            sorted_execution_direct_list = sorted(
-                getattr(self._driver, "execution_direct_list", []),
-                key=len,
-                reverse=True,
-            )
-            for prefix in sorted_execution_direct_list:
-                if item[1].startswith(prefix):
-                    args = item[1][len(prefix) :].strip()
-                    self._driver.execute_direct(args)
-                    return True
-            return False
-
         if isinstance(item, tuple):
-            if _handle_console_direct(item):
-                self.steps_done += 1
-                return
-
-            function = getattr(self._driver, item[0])
-            function(*item[1:])
-            self.steps_done += 1
+            self._execute_command(item)
             return
 
         # STRING
         if isinstance(item, str):
-            attr = item
-
-            if hasattr(self._driver, attr):
-                function = getattr(self._driver, attr)
+            function = self._method(item)
+            if function is not None:
                 function()
                 self.steps_done += 1
             return
 
-        # .generator is a Generator
-        if hasattr(item, "generate"):
-            item = getattr(item, "generate")
-            # print (f"Will generator execute on {self._driver.out_pipe}.{self._driver.out_pipe.__class__.__name__}")
-
-        # Generator item
-        for p in item():
+        if isinstance(item, list):
+            # Prepared output of a generator
+            lines = item
+        elif hasattr(item, "generate"):
+            # .generator is a Generator
+            lines = item.generate()
+        else:
+            # Generator item
+            lines = item()
+        methods = self._methods
+        for p in lines:
             if self._stopped:
                 return
-            self.execute_item(p)
+            if not isinstance(p, tuple):
+                self.execute_item(p)
+                continue
+            name = p[0]
+            function = methods.get(name)
+            if function is None or name == "console" or name == "plot_batch":
+                self._execute_command(p)
+                continue
+            function(*p[1:])
+            self.steps_done += 1
+
+    def _method(self, name):
+        """
+        Method of the driver with the given name, None if the driver has no such method.
+        """
+        try:
+            return self._methods[name]
+        except KeyError:
+            pass
+        function = getattr(self._driver, name, None)
+        self._methods[name] = function
+        return function
+
+    def _execute_command(self, item):
+        """
+        Calls the driver with a (str, attribute, ...) command.
+        """
+        name = item[0]
+        if name == "console" and self._execute_direct(item[1]):
+            self.steps_done += 1
+            return
+        function = self._method(name)
+        if function is None:
+            raise AttributeError(
+                f"'{type(self._driver).__name__}' object has no attribute '{name}'"
+            )
+        if name == "plot_batch":
+            function(item[1])
+            self.steps_done += len(item[1])
+            return
+        function(*item[1:])
+        self.steps_done += 1
+
+    def _execute_direct(self, command):
+        """
+        Gives a console command to the driver, if it starts with one of the prefixes the driver executes directly.
+
+        @return: whether the driver executed the command.
+        """
+        prefixes = self._direct_prefixes
+        if prefixes is None:
+            prefixes = sorted(
+                getattr(self._driver, "execution_direct_list", []),
+                key=len,
+                reverse=True,
+            )
+            self._direct_prefixes = prefixes
+        for prefix in prefixes:
+            if command.startswith(prefix):
+                self._driver.execute_direct(command[len(prefix) :].strip())
+                return True
+        return False
 
     def stop(self):
         """
@@ -54,6 +54,8 @@ class BlobNode(Node):
         header2 += "-------+-------------------------------------------------+----------------\n"
         if isinstance(data, str):
             data = data.encode("latin-1")
+        # Memory-mapped data iterates as single bytes, a view iterates as ints.
+        data = memoryview(data)
 
         def create_table():
             ascii_list = list()
@@ -91,7 +93,7 @@ class BlobNode(Node):
         header2 += "-------+-------------------------------------------------+----------------\n"
         if isinstance(data, str):
             data = data.encode("latin-1")
-        return header1 + data.decode("latin-1")
+        return header1 + str(data, "latin-1")
 
     def generate(self):
         if self.data:
@@ -29,6 +29,7 @@ Methods:
 
 import threading
 import time
+from concurrent.futures import CancelledError
 from copy import copy
 from math import ceil, floor
 
@@ -37,6 +38,9 @@ import numpy as np
 from meerk40t.core.node.mixins import LabelDisplay, Suppressable
 from meerk40t.core.node.node import Node
 from meerk40t.core.units import UNITS_PER_INCH, UNITS_PER_MM
+from meerk40t.image.imagecache import image_cache
+from meerk40t.image.imagepipeline import ImagePipeline
+from meerk40t.image.imagesource import ImageSource
 from meerk40t.image.imagetools import RasterScripts
 from meerk40t.svgelements import Matrix, Path, Polygon
 from meerk40t.core.geomstr import Geomstr
@@ -51,6 +55,7 @@ class ImageNode(Node, LabelDisplay, Suppressable):
     """
 
     def __init__(self, **kwargs):
+        self._image_source = None
         self.image = None
         self.matrix = None
         self.overscan = None
@@ -153,6 +158,7 @@ class ImageNode(Node, LabelDisplay, Suppressable):
         self._processed_matrix = None
         self._actualized_matrix = None
         self._process_image_failed = False
+        self._script_timings = None
 
         self.message = None
         if (
@@ -193,7 +199,54 @@ class ImageNode(Node, LabelDisplay, Suppressable):
         return obj
 
     def __repr__(self):
-        return f"{self.__class__.__name__}('{self.type}', {str(self.image)}, {str(self._parent)})"
+        return f"{self.__class__.__name__}('{self.type}', {str(self._image_source)}, {str(self._parent)})"
+
+    @property
+    def image(self):
+        """
+        The source image, decoded on demand. See meerk40t.image.imagesource.
+        The returned image must not be modified in place, assign a new image instead.
+        """
+        source = self._image_source
+        if source is None:
+            return None
+        return source.image()
+
+    @image.setter
+    def image(self, value):
+        if value is None or isinstance(value, ImageSource):
+            self._image_source = value
+        else:
+            self._image_source = ImageSource.from_image(value)
+
+    @property
+    def image_source(self):
+        return self._image_source
+
+    @property
+    def image_size(self):
+        """
+        Size of the source image, available without decoding it.
+        """
+        source = self._image_source
+        if source is None:
+            return 0, 0
+        return source.size
+
+    def preview_image(self, maximum=1024):
+        """
+        Reduced-resolution version of the source image for display purposes.
+
+        @param maximum: maximum size of the larger side
+        @return: image, matrix placing the preview like the source image, or None, None
+        """
+        source = self._image_source
+        if source is None:
+            return None, None
+        image, _scale = source.preview(maximum)
+        sx = source.width / float(image.width) if image.width else 1.0
+        sy = source.height / float(image.height) if image.height else 1.0
+        return image, Matrix.scale(sx, sy) * self.matrix
 
     @property
     def active_image(self):
@@ -448,18 +501,24 @@ class ImageNode(Node, LabelDisplay, Suppressable):
                 ):
                     get_keyhole_geometry()
 
+                # Offload the processing to worker processes if available.
+                service = context.lookup("image/process")
+                if service is not None and not service.available:
+                    service = None
                 # We need to have a thread per image, so we need to provide a node specific thread_name!
                 self._update_thread = context.threaded(
                     self._process_image_thread,
+                    service,
                     result=clear,
                     daemon=True,
                     thread_name=f"image_update_{self.id}_{str(time.perf_counter())}",
                 )
 
-    def _process_image_thread(self):
+    def _process_image_thread(self, service=None):
         """
         The function deletes the caches and processes the image until it no longer needs updating.
 
+        @param service: optional ImageProcessService performing the processing in a worker process.
         @return:
         """
         while self._needs_update:
@@ -469,11 +528,35 @@ class ImageNode(Node, LabelDisplay, Suppressable):
             step_x = step
             step_y = step
             with self._update_lock:
-                self.process_image(step_x, step_y, not self.prevent_crop)
+                self.process_image(
+                    step_x, step_y, not self.prevent_crop, service=service
+                )
                 # Unset cache.
                 self._cache = None
 
-    def process_image(self, step_x=None, step_y=None, crop=True):
+    def _process_image_remote(self, service, step_x, step_y, crop):
+        """
+        Process the image in a worker process of the given service. The request is
+        cancelled as soon as the node requires another update, as its result would
+        be stale.
+
+        @return: actualized_matrix, image or None if processing has to fall back to this process.
+        """
+        self._processing = True
+        try:
+            result = service.process(
+                self, step_x, step_y, crop, cancelled=lambda: self._needs_update
+            )
+        finally:
+            self._processing = False
+        if result is None:
+            return None
+        actualized_matrix, image, attributes = result
+        for attr, value in attributes.items():
+            setattr(self, attr, value)
+        return actualized_matrix, image
+
+    def process_image(self, step_x=None, step_y=None, crop=True, service=None):
         """
         SVG matrices are defined as follows.
         [a c e]
@@ -487,6 +570,9 @@ class ImageNode(Node, LabelDisplay, Suppressable):
         to mark the image as inverted if black should be treated as empty pixels. The scaled down image
         not lose the edge pixels since they could be important, but also dim may not be a multiple
         of step level which requires an introduced empty edge pixel to be added.
+
+        If an ImageProcessService is given the processing is performed in a worker process,
+        falling back to processing in this thread if the service can't handle the request.
         """
 
         from PIL import Image, ImageDraw
@@ -500,7 +586,34 @@ class ImageNode(Node, LabelDisplay, Suppressable):
             step_y = self.step_y
         # print (f"process called with step_x={step_x}, step_y={step_y} (node: {self.step_x}, {self.step_y})")
         try:
-            actualized_matrix, image = self._process_image(step_x, step_y, crop=crop)
+            key = self._process_cache_key(step_x, step_y, crop)
+            cached = None
+            if key is not None:
+                cached = image_cache.get(key, self.matrix.e, self.matrix.f)
+            if cached is not None:
+                actualized_matrix, image, attributes = cached
+                for attr, value in attributes.items():
+                    setattr(self, attr, value)
+            else:
+                result = None
+                if service is not None:
+                    result = self._process_image_remote(service, step_x, step_y, crop)
+                if result is None:
+                    result = self._process_image(step_x, step_y, crop=crop)
+                actualized_matrix, image = result
+                if key is not None:
+                    image_cache.put(
+                        key,
+                        image,
+                        actualized_matrix,
+                        self.matrix.e,
+                        self.matrix.f,
+                        {
+                            "dither": self.dither,
+                            "dither_type": self.dither_type,
+                            "is_depthmap": self.is_depthmap,
+                        },
+                    )
             inverted_main_matrix = Matrix(self.matrix).inverse()
             self._actualized_matrix = actualized_matrix
             self._processed_matrix = actualized_matrix * inverted_main_matrix
@@ -515,6 +628,10 @@ class ImageNode(Node, LabelDisplay, Suppressable):
             bb = self.bbox()
             self._bounds = bb
             self._paint_bounds = bb
+        except CancelledError:
+            # Stale request, the node is already scheduled for another update.
+            self._processing = False
+            return
         except Exception as e:
             # Memory error if creating requires too much memory.
             # DecompressionBomb if over 272 megapixels.
@@ -525,6 +642,53 @@ class ImageNode(Node, LabelDisplay, Suppressable):
             self._processing = False
         self.updated()
 
+    def _source_digest(self):
+        """
+        Digest of the source image, calculated once per image source.
+        """
+        source = self._image_source
+        if source is None:
+            return None
+        return source.digest
+
+    def _process_cache_key(self, step_x, step_y, crop):
+        """
+        Key for the processed image cache. This contains everything that alters
+        the processed pixels. The translation of the main matrix does not, it only
+        offsets the actualized matrix. Without cropping, the fractional pixel
+        position changes the size of the transformed image, so it is part of the key.
+
+        @return: hashable key or None if the image can't be cached
+        """
+        try:
+            digest = self._source_digest()
+            if digest is None:
+                return None
+            m = self.matrix
+            if crop:
+                phase = None
+            else:
+                phase = (
+                    round((m.e / float(step_x)) % 1.0, 6),
+                    round((m.f / float(step_y)) % 1.0, 6),
+                )
+            return (
+                digest,
+                (m.a, m.b, m.c, m.d),
+                float(step_x),
+                float(step_y),
+                bool(crop),
+                phase,
+                bool(self.invert),
+                bool(self.dither),
+                self.dither_type,
+                (self.red, self.green, self.blue, self.lightness),
+                repr(self.operations),
+                self._keyhole_reference,
+            )
+        except (TypeError, ValueError, ZeroDivisionError):
+            return None
+
     @property
     def opaque_image(self):
         from PIL import Image
@@ -637,177 +801,111 @@ class ImageNode(Node, LabelDisplay, Suppressable):
         Process actual raster script operations. Any required grayscale, inversion, and masking will already have
         occurred. If there were reject pixels before they will be masked off after this process.
 
+        Per-pixel and neighbourhood operations are fused by the ImagePipeline, the remaining operations
+        are performed by _process_script_operation.
+
         @param image: image to process with self.operation script.
 
         @return: processed image
         """
-        from PIL import ImageEnhance, ImageFilter, ImageOps
-
-        overall_left = 0
-        overall_top = 0
-        overall_right, overall_bottom = image.size
-        for op in self.operations:
-            name = op["name"]
-            if name == "resample":
-                # This is just a reminder, that while this may still appear in the scripts it is intentionally
-                # ignored (or needs to be revised with the upcoming appearance of passthrough) as it is not
-                # serving the purpose of the past
-                continue
-            if name == "crop":
-                try:
-                    # The dimensions of the image could have already be changed,
-                    # so we recalculate the edges based on the original image size
-                    if op["enable"] and op["bounds"] is not None:
-                        crop = op["bounds"]
-                        left_gap = int(crop[0])
-                        top_gap = int(crop[1])
-                        right_gap = self.image.width - int(crop[2])
-                        bottom_gap = self.image.height - int(crop[3])
-
-                        w, h = image.size
-                        left = left_gap
-                        upper = top_gap
-                        right = image.width - right_gap
-                        lower = image.height - bottom_gap
-
-                        if left >= w:
-                            left = w - 1
-                        if upper >= h:
-                            upper = h
-                        if right <= left:
-                            right = left + 1
-                        if lower <= upper:
-                            lower = upper + 1
-
-                        overall_left += left
-                        overall_top += upper
-                        overall_right -= w - right
-                        overall_bottom -= h - lower
-                        image = image.crop((left, upper, right, lower))
-                except KeyError:
-                    pass
-            elif name == "edge_enhance":
-                try:
-                    if op["enable"]:
-                        if image.mode == "P":
-                            image = image.convert("L")
-                        image = image.filter(filter=ImageFilter.EDGE_ENHANCE)
-                except KeyError:
-                    pass
-            elif name == "auto_contrast":
-                try:
-                    if op["enable"]:
-                        if image.mode not in ("RGB", "L"):
-                            # Auto-contrast raises NotImplementedError if P
-                            # Auto-contrast raises OSError if not RGB, L.
-                            image = image.convert("L")
-                        image = ImageOps.autocontrast(image, cutoff=op["cutoff"])
-                except KeyError:
-                    pass
-            elif name == "tone":
-                try:
-                    if op["enable"] and op["values"] is not None and image.mode == "L":
-                        image = image.convert("P")
-                        tone_values = op["values"]
-                        if op["type"] == "spline":
-                            spline = ImageNode.spline(tone_values)
-                        else:
-                            tone_values = [q for q in tone_values if q is not None]
-                            spline = ImageNode.line(tone_values)
-                        if len(spline) < 256:
-                            spline.extend([255] * (256 - len(spline)))
-                        if len(spline) > 256:
-                            spline = spline[:256]
-                        image = image.point(spline)
-                        if image.mode != "L":
-                            image = image.convert("L")
-                except KeyError:
-                    pass
-            elif name == "contrast":
-                try:
-                    if op["enable"] and (
-                        op["contrast"] is not None and op["brightness"] is not None
-                    ):
-                        contrast = ImageEnhance.Contrast(image)
-                        c = (op["contrast"] + 128.0) / 128.0
-                        image = contrast.enhance(c)
-
-                        brightness = ImageEnhance.Brightness(image)
-                        b = (op["brightness"] + 128.0) / 128.0
-                        image = brightness.enhance(b)
-                except KeyError:
-                    pass
-            elif name == "gamma":
-                try:
-                    if op["enable"] and op["factor"] is not None:
-                        if image.mode == "L":
-                            gamma_factor = float(op["factor"])
-
-                            def crimp(px):
-                                px = int(round(px))
-                                if px < 0:
-                                    return 0
-                                if px > 255:
-                                    return 255
-                                return px
-
-                            if gamma_factor == 0:
-                                gamma_lut = [0] * 256
-                            else:
-                                gamma_lut = [
-                                    crimp(pow(i / 255, (1.0 / gamma_factor)) * 255)
-                                    for i in range(256)
-                                ]
-                            image = image.point(gamma_lut)
-                            if image.mode != "L":
-                                image = image.convert("L")
-                except KeyError:
-                    pass
-            elif name == "unsharp_mask":
-                try:
-                    if (
-                        op["enable"]
-                        and op["percent"] is not None
-                        and op["radius"] is not None
-                        and op["threshold"] is not None
-                    ):
-                        unsharp = ImageFilter.UnsharpMask(
-                            radius=op["radius"],
-                            percent=op["percent"],
-                            threshold=op["threshold"],
-                        )
-                        image = image.filter(unsharp)
-                except (KeyError, ValueError):  # Value error if wrong type of image.
-                    pass
-            elif name == "halftone":
-                try:
-                    if op["enable"]:
-                        image = RasterScripts.halftone(
-                            image,
-                            sample=op["sample"],
-                            angle=op["angle"],
-                            oversample=op["oversample"],
-                            black=op["black"],
-                        )
-                except KeyError:
-                    pass
-            elif name == "dither":
-                # Set dither
-                try:
-                    if op["enable"] and op["type"] is not None:
-                        self.dither_type = op["type"]
-                        self.dither = True
-                        self.is_depthmap = False
-                    else:
-                        # Takes precedence
-                        self.dither = False
-                        # image = self._apply_dither(image)
-                except KeyError:
-                    pass
-            else:
-                # print(f"Unknown operation in raster-script: {name}")
-                continue
-        return image, (overall_left, overall_top, overall_right, overall_bottom)
+        bounds = [0, 0, image.width, image.height]
+
+        def fallback(img, op):
+            return self._process_script_operation(img, op, bounds)
+
+        pipeline = ImagePipeline(self.operations, fallback=fallback)
+        image = pipeline(image)
+        self._script_timings = pipeline.timings
+        return image, tuple(bounds)
+
+    def _process_script_operation(self, image, op, bounds):
+        """
+        Process a single raster script operation that can't be fused.
+
+        @param image: image to process
+        @param op: operation
+        @param bounds: overall bounds of the image within the original image, updated by crop operations
+        @return: processed image
+        """
+        from PIL import ImageOps
+
+        name = op["name"]
+        if name == "resample":
+            # This is just a reminder, that while this may still appear in the scripts it is intentionally
+            # ignored (or needs to be revised with the upcoming appearance of passthrough) as it is not
+            # serving the purpose of the past
+            return image
+        if name == "crop":
+            try:
+                # The dimensions of the image could have already be changed,
+                # so we recalculate the edges based on the original image size
+                if op["enable"] and op["bounds"] is not None:
+                    crop = op["bounds"]
+                    left_gap = int(crop[0])
+                    top_gap = int(crop[1])
+                    right_gap = self.image.width - int(crop[2])
+                    bottom_gap = self.image.height - int(crop[3])
+
+                    w, h = image.size
+                    left = left_gap
+                    upper = top_gap
+                    right = image.width - right_gap
+                    lower = image.height - bottom_gap
+
+                    if left >= w:
+                        left = w - 1
+                    if upper >= h:
+                        upper = h
+                    if right <= left:
+                        right = left + 1
+                    if lower <= upper:
+                        lower = upper + 1
+
+                    bounds[0] += left
+                    bounds[1] += upper
+                    bounds[2] -= w - right
+                    bounds[3] -= h - lower
+                    image = image.crop((left, upper, right, lower))
+            except KeyError:
+                pass
+        elif name == "auto_contrast":
+            try:
+                if op["enable"]:
+                    if image.mode not in ("RGB", "L"):
+                        # Auto-contrast raises NotImplementedError if P
+                        # Auto-contrast raises OSError if not RGB, L.
+                        image = image.convert("L")
+                    image = ImageOps.autocontrast(image, cutoff=op["cutoff"])
+            except KeyError:
+                pass
+        elif name == "halftone":
+            try:
+                if op["enable"]:
+                    image = RasterScripts.halftone(
+                        image,
+                        sample=op["sample"],
+                        angle=op["angle"],
+                        oversample=op["oversample"],
+                        black=op["black"],
+                    )
+            except KeyError:
+                pass
+        elif name == "dither":
+            # Set dither
+            try:
+                if op["enable"] and op["type"] is not None:
+                    self.dither_type = op["type"]
+                    self.dither = True
+                    self.is_depthmap = False
+                else:
+                    # Takes precedence
+                    self.dither = False
+                    # image = self._apply_dither(image)
+            except KeyError:
+                pass
+        # else:
+        #     print(f"Unknown operation in raster-script: {name}")
+        return image
 
     def _apply_dither(self, image):
         """
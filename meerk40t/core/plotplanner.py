@@ -1,5 +1,7 @@
 import random
 
+import numpy as np
+
 from meerk40t.tools.zinglplotter import ZinglPlotter
 
 from ..device.basedevice import (
@@ -9,6 +11,7 @@ from ..device.basedevice import (
     PLOT_JOG,
     PLOT_LEFT_UPPER,
     PLOT_RAPID,
+    PLOT_RASTER,
     PLOT_RIGHT_LOWER,
     PLOT_SETTING,
     PLOT_START,
@@ -56,6 +59,7 @@ class PlotPlanner(Parameters):
         self.abort = False
         self.force_shift = False
         self.group_enabled = True  # Grouped Output Required for Lhymicro-gl.
+        self.raster_blocks = False  # Consumer accepts PLOT_RASTER blocks of plots.
         self.phase_type = 0  # Sequential, random, progressive, static.
         self.phase_value = 0
         self.require_uniform_movement = require_uniform_movement
@@ -112,7 +116,8 @@ class PlotPlanner(Parameters):
         * Send PLOT_DIRECTION: x_dir(), y_dir() - Direction X, Direction Y for initial cut.
         * Send PLOT_LEFT_UPPER: left point, upper point - Point at upper left
         * Send PLOT_RIGHT_LOWER: right point, left point - Point at lower right
-        * Send all X, Y points for cut.
+        * Send all X, Y points for cut. Or PLOT_RASTER: x, y, on arrays - grouped points of raster cuts, see
+          process_blocks().
 
         If the next position is too far away and jogging is allowed we jog to the position. This
         jog is sent after the previous data is flushed out of the planner.
@@ -202,7 +207,11 @@ class PlotPlanner(Parameters):
             # Plot the current.
             # Current is executed in cut settings.
             yield None, None, PLOT_START
-            yield from self.process_plots(cut.generator())
+            blocks = self.process_blocks(cut)
+            if blocks is None:
+                yield from self.process_plots(cut.generator())
+            else:
+                yield from blocks
             self.pos_x = self.single.single_x
             self.pos_y = self.single.single_y
 
@@ -252,6 +261,136 @@ class PlotPlanner(Parameters):
             plot = debug(plot, self.group)
         return plot
 
+    def process_blocks(self, cut):
+        """
+        Vectorized process_plots() of cuts providing plot_blocks(), such as raster cuts.
+
+        Each block of plots is stepped, pulsed and grouped with numpy and yielded as a single (x, y, on), None,
+        PLOT_RASTER event of arrays holding the grouped plots, leaving the planner in the same state as
+        process_plots() would. Blocks with fractional on values while PPI is active are processed by process_plots().
+
+        @param cut: cut to be plotted
+        @return: generator of plots, or None if the cut or the planner settings require process_plots().
+        """
+        if (
+            not self.raster_blocks
+            or self.debug
+            or self.single is None
+            or self.group is None
+            or not self.group_enabled
+            or (self.shift is not None and (self.force_shift or self.shift_enabled))
+            or not hasattr(cut, "plot_blocks")
+        ):
+            return None
+        power = self.power
+        if self.ppi is not None and (
+            self.implicit_dotlength != 1
+            or not 0 <= power <= 1000
+            or power != int(power)
+        ):
+            return None
+        blocks = cut.plot_blocks()
+        if blocks is None:
+            return None
+        return self._process_blocks(blocks, int(power))
+
+    def _process_blocks(self, blocks, power):
+        single = self.single
+        group = self.group
+        ppi = self.ppi
+        for x, y, on in blocks:
+            if self.abort:
+                single.clear()
+                return
+            if (
+                single.single_x is None
+                or single.single_x != group.group_x
+                or single.single_y != group.group_y
+                or (self.shift is not None and not self.shift.flushed())
+                or (
+                    ppi is not None
+                    and (
+                        ppi.dot_left > 0
+                        or not 0 <= ppi.ppi_total < 1000
+                        or ppi.ppi_total != int(ppi.ppi_total)
+                        or np.any((on != 0) & (on != 1))
+                    )
+                )
+            ):
+                yield from self.process_plots(zip(x.tolist(), y.tolist(), on.tolist()))
+                continue
+            # Single: the moves between the plots, in unit steps.
+            dx = np.diff(x, prepend=single.single_x)
+            dy = np.diff(y, prepend=single.single_y)
+            if np.any((dx != 0) & (dy != 0) & (np.abs(dx) != np.abs(dy))):
+                # Non-uniform movement raises within Single, or is stepped there if uniform movement is not required.
+                yield from self.process_plots(zip(x.tolist(), y.tolist(), on.tolist()))
+                continue
+            moved = (dx != 0) | (dy != 0)
+            if not np.any(moved):
+                continue
+            dx = dx[moved]
+            dy = dy[moved]
+            on = on[moved]
+            length = np.maximum(np.abs(dx), np.abs(dy))
+            ux = np.sign(dx)
+            uy = np.sign(dy)
+            if ppi is not None:
+                on = on.astype(int)
+                if power != 1000:
+                    ux, uy, on, length = self._pulse_block(ux, uy, on, length, power)
+            # Group: runs of steps with equal direction and on value, led by the buffered run.
+            if group.group_dx != 0 or group.group_dy != 0:
+                ux = np.concatenate(([group.group_dx], ux))
+                uy = np.concatenate(([group.group_dy], uy))
+                on = np.concatenate(([group.group_on], on))
+                length = np.concatenate(([0], length))
+            run_x = single.single_x + np.cumsum(ux * length)
+            run_y = single.single_y + np.cumsum(uy * length)
+            last = np.ones(len(ux), dtype=bool)
+            last[:-1] = (ux[1:] != ux[:-1]) | (uy[1:] != uy[:-1]) | (on[1:] != on[:-1])
+            ends = np.flatnonzero(last)
+            single.single_x = int(x[-1])
+            single.single_y = int(y[-1])
+            group.group_x = int(run_x[-1])
+            group.group_y = int(run_y[-1])
+            group.group_dx = int(ux[-1])
+            group.group_dy = int(uy[-1])
+            group.group_on = on[-1].item()
+            if len(ends) > 1:
+                ends = ends[:-1]
+                gx = run_x[ends]
+                gy = run_y[ends]
+                gon = on[ends]
+                group.last_x = int(gx[-1])
+                group.last_y = int(gy[-1])
+                group.last_on = gon[-1].item()
+                yield (gx, gy, gon), None, PLOT_RASTER
+
+    def _pulse_block(self, ux, uy, on, length, power):
+        """
+        PPI of a block of moves with on values of 0 or 1, the on moves are split into unit steps which are on whenever
+        the carried total reaches 1000.
+        """
+        ppi = self.ppi
+        burn = on == 1
+        count = int(np.sum(length[burn]))
+        if not count:
+            return ux, uy, on, length
+        total = int(ppi.ppi_total)
+        steps = total + power * np.arange(count + 1, dtype=np.int64)
+        fired = np.diff(steps // 1000)
+        ppi.ppi_total = total + power * count - 1000.0 * int(np.sum(fired))
+        if np.any(fired):
+            ppi.dot_left = 0
+        repeat = np.where(burn, length, 1)
+        index = np.repeat(np.arange(len(on)), repeat)
+        step_on = np.zeros(len(index), dtype=int)
+        split = burn[index]
+        step_on[split] = fired
+        step_length = np.where(split, 1, length[index])
+        return ux[index], uy[index], step_on, step_length
+
     def step_move(self, x0, y0, x1, y1):
         """
         Step move walks a line from a point to another point.
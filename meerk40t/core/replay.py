@@ -0,0 +1,154 @@
+"""
+Replay buffer of the output drivers compile for cutcode.
+
+A driver which keeps a `replay_cache` records the data it writes for the cutcode of a LaserJob, together with its own
+state after the cutcode. Later loops of the job, and identical jobs sent again, replay that data rather than
+planning, interpolating and encoding the same cuts again.
+
+The cache is keyed by the digest of the cutcode content and the state of the driver when the cutcode starts, as the
+driver reports it with `replay_state()`. Drivers without a `replay_cache` run the cutcode as usual.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from meerk40t.core.cutcode.cubiccut import CubicCut
+from meerk40t.core.cutcode.dwellcut import DwellCut
+from meerk40t.core.cutcode.gotocut import GotoCut
+from meerk40t.core.cutcode.homecut import HomeCut
+from meerk40t.core.cutcode.inputcut import InputCut
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.cutcode.outputcut import OutputCut
+from meerk40t.core.cutcode.plotcut import PlotCut
+from meerk40t.core.cutcode.quadcut import QuadCut
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.core.cutcode.waitcut import WaitCut
+
+REPLAY_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _cut_fields(cut):
+    """
+    Values of the cut, other than its settings, which the output of a driver depends on.
+
+    @return: tuple, or None if the cut can't be told apart by its values.
+    """
+    kind = type(cut)
+    if kind is LineCut or kind is GotoCut or kind is HomeCut:
+        return cut.start, cut.end
+    if kind is QuadCut:
+        return cut.start, cut.c(), cut.end
+    if kind is CubicCut:
+        return cut.start, cut.c1(), cut.c2(), cut.end
+    if kind is DwellCut or kind is WaitCut:
+        return cut.start, cut.dwell_time
+    if kind is InputCut:
+        return cut.input_mask, cut.input_value, cut.input_message
+    if kind is OutputCut:
+        return cut.output_mask, cut.output_value, cut.output_message
+    if kind is PlotCut:
+        return cut._points, cut._powers, cut.h_raster, cut.v_raster
+    if kind is RasterCut:
+        if cut.custom_filter:
+            # The filter of the pixels is any function.
+            return None
+        image = cut.image
+        plot = cut.plot
+        return (
+            image.mode,
+            image.size,
+            hashlib.blake2b(image.tobytes(), digest_size=16).digest(),
+            cut.offset_x,
+            cut.offset_y,
+            cut.step_x,
+            cut.step_y,
+            cut.inverted,
+            cut.bidirectional,
+            cut.horizontal,
+            cut.start_minimum_x,
+            cut.start_minimum_y,
+            cut.scan,
+            plot.direction,
+            plot.overlap,
+            sorted(plot.special.items(), key=lambda e: str(e[0])),
+        )
+    return None
+
+
+def cutcode_digest(cutcode):
+    """
+    Digest of the content of the cutcode, the same for cutcode with the same cuts in the same order.
+
+    @param cutcode: CutCode
+    @return: bytes, or None if the cutcode contains cuts which can't be digested.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    settings_digests = {}
+    for cut in cutcode.flat():
+        fields = _cut_fields(cut)
+        if fields is None:
+            return None
+        settings = cut.settings
+        # Settings are mostly shared by the cuts of an operation.
+        settings_digest = settings_digests.get(id(settings))
+        if settings_digest is None:
+            settings_digest = repr(
+                sorted(settings.items(), key=lambda e: str(e[0]))
+            ).encode()
+            settings_digests[id(settings)] = settings_digest
+        digest.update(type(cut).__name__.encode())
+        digest.update(repr(fields).encode())
+        digest.update(settings_digest)
+    return digest.digest()
+
+
+class Capture:
+    """
+    Data a driver wrote for some cutcode, and the state of the driver after it.
+    """
+
+    def __init__(self, data, state, steps=0):
+        self.data = data
+        self.state = state
+        self.steps = steps
+        self.size = sum(len(d) for d in data)
+
+
+class ReplayCache:
+    """
+    Least recently used captures, holding up to budget bytes of data.
+    """
+
+    def __init__(self, budget=REPLAY_CACHE_BYTES):
+        self.budget = budget
+        self.size = 0
+        self._captures = OrderedDict()
+
+    def __len__(self):
+        return len(self._captures)
+
+    def get(self, key):
+        capture = self._captures.get(key)
+        if capture is not None:
+            self._captures.move_to_end(key)
+        return capture
+
+    def put(self, key, capture):
+        """
+        Adds the capture, dropping the least recently used captures over the budget. Captures larger than the
+        budget are not kept.
+        """
+        if capture.size > self.budget:
+            return
+        old = self._captures.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+        self._captures[key] = capture
+        self.size += capture.size
+        while self.size > self.budget:
+            key, old = self._captures.popitem(last=False)
+            self.size -= old.size
+
+    def clear(self):
+        self._captures.clear()
+        self.size = 0
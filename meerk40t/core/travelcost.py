@@ -0,0 +1,86 @@
+"""
+Travel cost models for sequencing cuts.
+
+The sequencers of the cutplan pick the nearest cut to continue with, which minimizes the travel distance. That fits
+gantries, whose travel time grows with the distance. A device whose travel time is dominated by fixed delays, like the
+jump delays of a galvo, provides a TravelCost of its own with `travel_cost()`. The order of the cuts is then refined
+to minimize that cost rather than the distance.
+
+Costs are given for numpy arrays of distances in native units, so the sequencers can price many joins at once.
+"""
+
+import numpy as np
+
+
+class TravelCost:
+    """
+    Cost of the travel between cuts, the distance itself.
+    """
+
+    def __call__(self, distance):
+        """
+        @param distance: array of distances between the end of a cut and the start of the next, in native units.
+        @return: array of costs
+        """
+        return np.asarray(distance, dtype=float)
+
+    def total(self, cuts, start=None):
+        """
+        Cost of the travel to and between the cuts, in order.
+
+        @param cuts: cuts
+        @param start: position before the first cut, the first cut is not travelled to if None
+        @return: total cost
+        """
+        if not cuts:
+            return 0.0
+        starts = np.array([complex(*c.start) for c in cuts])
+        ends = np.array([complex(*c.end) for c in cuts])
+        distance = np.abs(starts[1:] - ends[:-1])
+        if start is not None:
+            distance = np.append(abs(starts[0] - complex(*start)), distance)
+        return float(self(distance).sum())
+
+
+class JumpDelayTravelCost(TravelCost):
+    """
+    Seconds taken by the travel between cuts, for a device which jumps between cuts with a delay for the scanner to
+    settle, the long delay for jumps longer than the distance limit.
+
+    A cut starting where the previous one ends is joined without a jump. The corner between them costs the
+    polygon delay. Each jump ends a mark and starts another one, so it costs the laser off and laser on delays too.
+    """
+
+    def __init__(
+        self,
+        speed,
+        delay_short=0.0,
+        delay_long=0.0,
+        distance_limit=0.0,
+        delay_mark=0.0,
+        delay_polygon=0.0,
+    ):
+        """
+        @param speed: jump speed in native units per second
+        @param delay_short: seconds of the delay after a jump up to the distance limit
+        @param delay_long: seconds of the delay after a jump over the distance limit
+        @param distance_limit: native units
+        @param delay_mark: seconds of the laser off and laser on delays around a jump
+        @param delay_polygon: seconds of the delay at the corner of joined cuts
+        """
+        self.speed = speed
+        self.delay_short = delay_short
+        self.delay_long = delay_long
+        self.distance_limit = distance_limit
+        self.delay_mark = delay_mark
+        self.delay_polygon = delay_polygon
+
+    def __call__(self, distance):
+        distance = np.asarray(distance, dtype=float)
+        jump = distance / self.speed if self.speed else np.zeros_like(distance)
+        jump += np.where(
+            distance > self.distance_limit, self.delay_long, self.delay_short
+        )
+        jump += self.delay_mark
+        # Less than a native unit apart, the position doesn't change.
+        return np.where(distance < 1, self.delay_polygon, jump)
@@ -13,6 +13,7 @@ PLOT_AXIS = 64
 PLOT_DIRECTION = 32
 PLOT_LEFT_UPPER = 512
 PLOT_RIGHT_LOWER = 1024
+PLOT_RASTER = 4096
 
 
 def plugin(kernel, lifecycle=None):
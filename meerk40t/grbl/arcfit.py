@@ -0,0 +1,183 @@
+"""
+Circular arc fitting for G-code output.
+
+Curves are sent to GRBL as dense G1 polylines. Each line costs serial bandwidth and a
+planner block, so curvy designs saturate the link and the 15 block planner buffer.
+GRBL executes G2/G3 arcs natively, so runs of points which lie on a circle within a
+tolerance are replaced by a single arc, straight runs by a single line.
+
+The fitting is greedy: starting at the current point the run is extended with an
+exponential search followed by a binary search as long as it still fits a circle
+(through the first, middle and last point) or a straight line. Both the points and the
+midpoints of the original chords have to be within the tolerance, so the emitted path
+never deviates more than the tolerance from the polyline.
+
+Points are complex numbers in native units.
+"""
+
+from math import pi
+
+import numpy as np
+
+# Maximum sweep of a single arc. Near full circles have badly conditioned centers.
+MAX_SWEEP = 1.5 * pi
+
+
+def circle_center(p0, p1, p2):
+    """
+    Center of the circle through the three given points.
+
+    @return: complex center or None if the points are collinear.
+    """
+    a = p1 - p0
+    b = p2 - p0
+    d = 2.0 * (a.real * b.imag - a.imag * b.real)
+    if d == 0:
+        return None
+    aa = a.real * a.real + a.imag * a.imag
+    bb = b.real * b.real + b.imag * b.imag
+    ux = (b.imag * aa - a.imag * bb) / d
+    uy = (a.real * bb - b.real * aa) / d
+    return p0 + complex(ux, uy)
+
+
+def arc_through(start, control, end, max_radius=None):
+    """
+    Circle of the arc from start through control to end.
+
+    @return: center, ccw or None if the arc is (nearly) straight.
+    """
+    center = circle_center(start, control, end)
+    if center is None:
+        return None
+    if max_radius is not None and abs(start - center) > max_radius:
+        return None
+    a = control - start
+    b = end - control
+    ccw = (a.real * b.imag - a.imag * b.real) > 0
+    return center, ccw
+
+
+class ArcFitter:
+    """
+    Fits arcs and lines to polylines within the given tolerance.
+
+    @param tolerance: maximum deviation from the polyline in native units.
+    @param max_radius: arcs with larger radii are emitted as lines.
+    @param max_sweep: maximum sweep of a single arc in radians.
+    """
+
+    def __init__(self, tolerance, max_radius=None, max_sweep=MAX_SWEEP):
+        self.tolerance = float(tolerance)
+        if max_radius is None:
+            # Beyond this radius the sagitta over the longest useful chords is
+            # below the tolerance anyway, and the center becomes ill-conditioned.
+            max_radius = self.tolerance * 1e6
+        self.max_radius = max_radius
+        self.max_sweep = max_sweep
+
+    def fit(self, points):
+        """
+        Fit the given polyline.
+
+        @param points: sequence of complex points, the first one is the start position.
+        @return: list of ("line", end) and ("arc", end, center, ccw) segments.
+        """
+        pts = np.asarray(points, dtype=complex)
+        n = len(pts)
+        segments = []
+        i = 0
+        while i < n - 1:
+            j_line = self._extend(pts, i, self._line_fits, i + 1)
+            j_arc = i + 1
+            if i + 2 < n and self._arc_fits(pts, i, i + 2):
+                j_arc = self._extend(pts, i, self._arc_fits, i + 2)
+            if j_arc > j_line:
+                center, ccw = self._arc(pts, i, j_arc)
+                segments.append(("arc", complex(pts[j_arc]), complex(center), ccw))
+                i = j_arc
+            else:
+                segments.append(("line", complex(pts[j_line])))
+                i = j_line
+        return segments
+
+    def _extend(self, pts, i, fits, known):
+        """
+        Largest end index j for which fits(pts, i, j) holds, given it holds for known.
+        """
+        n = len(pts)
+        last = n - 1
+        good = known
+        step = max(2, (known - i) * 2)
+        while True:
+            j = i + step
+            if j >= last:
+                if fits(pts, i, last):
+                    return last
+                bad = last
+                break
+            if not fits(pts, i, j):
+                bad = j
+                break
+            good = j
+            step *= 2
+        while bad - good > 1:
+            mid = (good + bad) // 2
+            if fits(pts, i, mid):
+                good = mid
+            else:
+                bad = mid
+        return good
+
+    def _line_fits(self, pts, i, j):
+        if j == i + 1:
+            return True
+        start = pts[i]
+        chord = pts[j] - start
+        length = abs(chord)
+        run = pts[i : j + 1] - start
+        if length == 0:
+            return bool(np.all(np.abs(run) <= self.tolerance))
+        direction = chord / length
+        local = run / direction
+        if np.any(np.abs(local.imag) > self.tolerance):
+            return False
+        # No backtracking along the line.
+        return bool(np.all(np.diff(local.real) >= -self.tolerance))
+
+    def _arc(self, pts, i, j):
+        return arc_through(pts[i], pts[(i + j) // 2], pts[j])
+
+    def _arc_fits(self, pts, i, j):
+        if j - i < 2:
+            return False
+        center = circle_center(pts[i], pts[(i + j) // 2], pts[j])
+        if center is None:
+            return False
+        radius = abs(pts[i] - center)
+        if radius > self.max_radius or radius <= self.tolerance:
+            return False
+        run = pts[i : j + 1] - center
+        tolerance = self.tolerance
+        if np.any(np.abs(np.abs(run) - radius) > tolerance):
+            return False
+        # Chord midpoints, the arc bulges away from the chords.
+        midpoints = (run[1:] + run[:-1]) * 0.5
+        if np.any(np.abs(np.abs(midpoints) - radius) > tolerance):
+            return False
+        # Consistent direction of travel and limited sweep.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            steps = np.angle(run[1:] / run[:-1])
+        steps = steps[np.abs(run[1:] - run[:-1]) > 0]
+        if len(steps) == 0:
+            return False
+        if not (np.all(steps >= 0) or np.all(steps <= 0)):
+            return False
+        return abs(float(np.sum(steps))) <= self.max_sweep
+
+
+def fit_arcs(points, tolerance, max_radius=None):
+    """
+    Fit arcs and lines to the polyline, see ArcFitter.fit
+    """
+    return ArcFitter(tolerance, max_radius=max_radius).fit(points)
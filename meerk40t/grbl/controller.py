@@ -15,11 +15,15 @@ import ast
 import re
 import threading
 import time
+from collections import deque
 
 from meerk40t.kernel import signal_listener
 
 SETTINGS_MESSAGE = re.compile(r"^\$([0-9]+)=(.*)")
 
+# GRBL ends a line on every CR or LF and replies to each line, including empty ones.
+LINE_SPLIT = re.compile(r"[^\r\n]*[\r\n]")
+
 
 def hardware_settings(code):
     """
@@ -455,15 +459,19 @@ class GrblController:
         self._sending_thread = None
         self._recving_thread = None
 
-        self._forward_lock = threading.Lock()
-        self._sending_lock = threading.Lock()
-        self._realtime_lock = threading.Lock()
+        # Guards the queues and the forward ledger, notified on new data and on ok.
         self._loop_cond = threading.Condition()
-        self._sending_queue = []
-        self._realtime_queue = []
+        # Lines waiting to be sent and lines sent but not yet acknowledged, as
+        # (line, byte length) tuples.
+        self._sending_queue = deque()
+        self._realtime_queue = deque()
+        self._forward_lines = deque()
+        self._forward_bytes = 0
+        self._partial_line = ""
+        # Incremented by every soft reset, data written for an older sequence is dropped.
+        self._sequence = 0
         # buffer for feedback...
         self._assembled_response = []
-        self._forward_buffer = bytearray()
         self._device_buffer_size = self.service.planning_buffer_size
         self._log = None
 
@@ -473,6 +481,13 @@ class GrblController:
         self.is_shutdown = False
         self._last_state = None
 
+    @property
+    def sequence(self):
+        """
+        Sequence number of the current work, see write().
+        """
+        return self._sequence
+
     @property
     def last_state(self):
         return self._last_state
@@ -489,36 +504,26 @@ class GrblController:
 
     def __len__(self):
         return (
-            len(self._sending_queue)
-            + len(self._realtime_queue)
-            + len(self._forward_buffer)
+            len(self._sending_queue) + len(self._realtime_queue) + self._forward_bytes
         )
 
-    @property
-    def _length_of_next_line(self):
-        """
-        Lookahead and provide length of the next line.
-        @return:
+    @staticmethod
+    def _split_lines(data):
         """
-        if not self._sending_queue:
-            return 0
-        return len(self._sending_queue[0])
+        Split data into GRBL lines with their byte lengths.
 
-    @property
-    def _index_of_forward_line(self):
-        try:
-            r = self._forward_buffer.index(b"\r")
-        except ValueError:
-            r = -1
-        try:
-            n = self._forward_buffer.index(b"\n")
-        except ValueError:
-            n = -1
-
-        if n != -1:
-            return min(n, r) if r != -1 else n
-        else:
-            return r
+        @param data: string to split
+        @return: list of (line, length), remaining data without line end
+        """
+        lines = []
+        end = 0
+        for match in LINE_SPLIT.finditer(data):
+            line = match.group()
+            # Counted in bytes, as the forward buffer always has.
+            length = len(line.encode("latin-1"))
+            lines.append((line, length))
+            end = match.end()
+        return lines, data[end:]
 
     @signal_listener("update_interface")
     def update_connection(self, origin=None, *args):
@@ -626,21 +631,48 @@ class GrblController:
         self.validate_stop("*")
         self._validation_stage = 0
 
-    def write(self, data):
+    def write(self, data, sequence=None):
         """
         Write data to the sending queue.
 
         @param data:
+        @param sequence: sequence number the data was created for, if it does not match the
+            current sequence a soft reset happened in the meantime and the data is dropped.
         @return:
         """
         self.start()
+        with self._loop_cond:
+            if sequence is not None and sequence != self._sequence:
+                return
+            # GRBL only acknowledges complete lines, an incomplete line is held
+            # back until it is completed by the next write.
+            lines, self._partial_line = self._split_lines(self._partial_line + data)
+            self._sending_queue.extend(lines)
+            pending = len(self._sending_queue) + len(self._realtime_queue)
+            self._loop_cond.notify_all()
         self.service.signal("grbl;write", data)
-        with self._sending_lock:
-            self._sending_queue.append(data)
-        self.service.signal(
-            "grbl;buffer", len(self._sending_queue) + len(self._realtime_queue)
-        )
-        self._send_resume()
+        self.service.signal("grbl;buffer", pending)
+
+    def wait_for_room(self, limit, sequence=None, timeout=None):
+        """
+        Wait until less than limit lines are waiting to be sent.
+
+        @param limit: number of queued lines
+        @param sequence: stop waiting if the sequence changed
+        @param timeout: maximum time to wait in seconds
+        @return: False if the timeout passed without room.
+        """
+
+        def room():
+            return (
+                len(self._sending_queue) < limit
+                or (sequence is not None and sequence != self._sequence)
+                or self._sending_thread is None
+                or not self.connection.connected
+            )
+
+        with self._loop_cond:
+            return self._loop_cond.wait_for(room, timeout)
 
     def realtime(self, data):
         """
@@ -653,18 +685,17 @@ class GrblController:
         """
         self.start()
         self.service.signal("grbl;write", data)
-        with self._realtime_lock:
+        with self._loop_cond:
             self._realtime_queue.append(data)
-        if "\x18" in data:
-            with self._sending_lock:
+            if "\x18" in data:
+                self._sequence += 1
                 self._sending_queue.clear()
-            with self._forward_lock:
-                self._forward_buffer.clear()
-            self._assembled_response = []
-        self.service.signal(
-            "grbl;buffer", len(self._sending_queue) + len(self._realtime_queue)
-        )
-        self._send_resume()
+                self._partial_line = ""
+                self._clear_forward()
+                self._assembled_response = []
+            pending = len(self._sending_queue) + len(self._realtime_queue)
+            self._loop_cond.notify_all()
+        self.service.signal("grbl;buffer", pending)
 
     ####################
     # Control GRBL Sender
@@ -703,7 +734,8 @@ class GrblController:
 
     def shutdown(self):
         self.is_shutdown = True
-        self._forward_buffer.clear()
+        with self._loop_cond:
+            self._clear_forward()
 
     def validate_start(self, cmd):
         if cmd == "$":
@@ -727,10 +759,10 @@ class GrblController:
             return
         self.service(f".timer-{name}{cmd} -q --off")
         if cmd == "$":
-            if len(self._forward_buffer) > 3:
-                # If the forward planning buffer is longer than 3 it must have filled with failed attempts.
-                with self._forward_lock:
-                    self._forward_buffer.clear()
+            with self._loop_cond:
+                if self._forward_bytes > 3:
+                    # If the forward planning buffer is longer than 3 it must have filled with failed attempts.
+                    self._clear_forward()
 
     def _connect_validation_fallback(self):
         """Start boot validation when GRBL does not send a welcome on attach."""
@@ -793,55 +825,74 @@ class GrblController:
         @param line:
         @return:
         """
-        with self._forward_lock:
-            self._forward_buffer += bytes(line, encoding="latin-1")
+        lines, _ = self._split_lines(line)
+        with self._loop_cond:
+            for entry in lines:
+                self._forward_lines.append(entry)
+                self._forward_bytes += entry[1]
         self.connection.write(line)
         # print(f"OUT: {line.strip()} [timestamp={time.time():.2f}]")
 
         self.log(line, type="send")
 
-    def _sending_realtime(self):
+    def _clear_forward(self):
+        """
+        Forget all unacknowledged lines. Requires the _loop_cond lock.
+        """
+        self._forward_lines.clear()
+        self._forward_bytes = 0
+
+    def _sending_realtime(self, line):
         """
         Send one line of realtime queue.
 
         @return:
         """
-        with self._realtime_lock:
-            line = self._realtime_queue.pop(0)
         if "!" in line:
             self._paused = True
         if "~" in line:
             self._paused = False
-        if line is not None:
-            if self._expects_ok(line):
-                self._send(line)
-            else:
-                self._send_realtime(line)
+        if self._expects_ok(line):
+            self._send(line)
+        else:
+            self._send_realtime(line)
         if "\x18" in line:
             self._paused = False
-            with self._forward_lock:
-                self._forward_buffer.clear()
+            with self._loop_cond:
+                self._clear_forward()
 
-    def _sending_single_line(self):
+    def _take_lines(self):
         """
-        Send one line of sending queue.
+        Move as many lines from the sending queue to the forward ledger as fit into the
+        device buffer. Requires the _loop_cond lock.
 
-        @return:
-        """
-        with self._sending_lock:
-            line = self._sending_queue.pop(0)
-        if line:
-            self._send(line)
-        self.service.signal("grbl;buffer", len(self._sending_queue))
-        return True
-
-    def _send_halt(self):
+        @return: data to send, None if the device buffer is full.
         """
-        This is called internally in the _sending command.
-        @return:
-        """
-        with self._loop_cond:
-            self._loop_cond.wait()
+        sync = self.service.buffer_mode == "sync"
+        if sync and self._forward_lines:
+            # Any buffer is too much buffer.
+            return None
+        queue = self._sending_queue
+        forward = self._forward_lines
+        limit = self._device_buffer_size
+        in_flight = self._forward_bytes
+        lines = []
+        while queue:
+            entry = queue[0]
+            if limit <= in_flight + entry[1] and (in_flight or lines):
+                # Stop sending when buffer is the size of permitted buffer size. A line
+                # longer than the whole buffer is sent on its own.
+                break
+            queue.popleft()
+            forward.append(entry)
+            in_flight += entry[1]
+            lines.append(entry[0])
+            if sync:
+                break
+        if not lines:
+            return None
+        self._forward_bytes = in_flight
+        return "".join(lines)
 
     def _send_resume(self):
         """
@@ -850,47 +901,51 @@ class GrblController:
         @return:
         """
         with self._loop_cond:
-            self._loop_cond.notify()
+            self._loop_cond.notify_all()
 
     def _sending(self):
         """
         Generic sender, delegate the function according to the desired mode.
 
+        Lines are sent in batches of as many lines as fit into the device buffer with a
+        single write. The loop waits on _loop_cond, which is notified on new data and on
+        each ok.
+
         This function is only run with the self.sending_thread
         @return:
 
         """
         while self.connection.connected:
-            if self._realtime_queue:
-                # Send realtime data.
-                self._sending_realtime()
-                continue
-            if self._paused or not self.fully_validated():
-                # We are paused or invalid. We do not send anything other than realtime commands.
-                time.sleep(0.05)
-                continue
-            if not self._sending_queue:
-                # There is nothing to write/realtime
-                self.service.laser_status = "idle"
-                self._send_halt()
-                continue
-            buffer = len(self._forward_buffer)
-            if buffer:
-                self.service.laser_status = "active"
-
-            if self.service.buffer_mode == "sync":
-                if buffer:
-                    # Any buffer is too much buffer. Halt.
-                    self._send_halt()
+            realtime = None
+            with self._loop_cond:
+                if self._realtime_queue:
+                    realtime = self._realtime_queue.popleft()
+                elif self._paused or not self.fully_validated():
+                    # We are paused or invalid. We do not send anything other than realtime commands.
+                    self._loop_cond.wait(0.05)
                     continue
-            else:
-                # Buffered
-                if self._device_buffer_size <= buffer + self._length_of_next_line:
-                    # Stop sending when buffer is the size of permitted buffer size.
-                    self._send_halt()
+                elif not self._sending_queue:
+                    # There is nothing to write/realtime
+                    self.service.laser_status = "idle"
+                    self._loop_cond.wait()
                     continue
-            # Go for send_line
-            self._sending_single_line()
+                else:
+                    data = self._take_lines()
+                    if data is None:
+                        # Device buffer is full, wait for an ok.
+                        self._loop_cond.wait()
+                        continue
+                    self.service.laser_status = "active"
+                    pending = len(self._sending_queue)
+                    # Producers waiting for room in the queue.
+                    self._loop_cond.notify_all()
+            if realtime is not None:
+                # Send realtime data.
+                self._sending_realtime(realtime)
+                continue
+            self.connection.write(data)
+            self.log(data, type="send")
+            self.service.signal("grbl;buffer", pending)
         self.service.laser_status = "idle"
 
     ####################
@@ -904,14 +959,23 @@ class GrblController:
 
         @return:
         """
-        q = self._index_of_forward_line
-        if q == -1:
-            raise ValueError("No forward command exists.")
-        with self._forward_lock:
-            cmd_issued = self._forward_buffer[: q + 1]
-            self._forward_buffer = self._forward_buffer[q + 1 :]
+        with self._loop_cond:
+            if not self._forward_lines:
+                raise ValueError("No forward command exists.")
+            cmd_issued, length = self._forward_lines.popleft()
+            self._forward_bytes -= length
         return cmd_issued
 
+    def _wait_read(self):
+        """
+        Wait for the connection to receive data, connections without wait_read are polled.
+        """
+        wait_read = getattr(self.connection, "wait_read", None)
+        if wait_read is None:
+            time.sleep(0.01)
+        else:
+            wait_read(0.01)
+
     def _recving(self):
         """
         Generic recver, delegate the function according to the desired mode.
@@ -933,7 +997,7 @@ class GrblController:
                 except (ConnectionAbortedError, AttributeError):
                     return
                 if not response:
-                    time.sleep(0.01)
+                    self._wait_read()
                     if self.is_shutdown:
                         return
             self.service.signal("grbl;response", response)
@@ -942,7 +1006,6 @@ class GrblController:
                 # Indicates that the command line received was parsed and executed (or set to be executed).
                 try:
                     cmd_issued = self.get_forward_command()
-                    cmd_issued = cmd_issued.decode(encoding="latin-1")
                 except ValueError:
                     # We got an ok. But, had not sent anything.
                     self.log(
@@ -952,7 +1015,7 @@ class GrblController:
                     continue
                     # raise ConnectionAbortedError from e
                 self.log(
-                    f"{response} / {len(self._forward_buffer)} -- {cmd_issued}",
+                    f"{response} / {self._forward_bytes} -- {cmd_issued}",
                     type="recv",
                 )
                 self.service.signal(
@@ -964,7 +1027,6 @@ class GrblController:
                 # Indicates that the command line received contained an error, with an error code x, and was purged.
                 try:
                     cmd_issued = self.get_forward_command()
-                    cmd_issued = cmd_issued.decode(encoding="latin-1")
                 except ValueError:
                     cmd_issued = ""
                 try:
@@ -5,6 +5,7 @@ Defines the interactions between the device service and the meerk40t's viewport.
 Registers relevant commands and options.
 """
 
+import os
 from time import sleep
 
 from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
@@ -15,8 +16,11 @@ from ..core.spoolers import Spooler
 from ..core.units import MM_PER_INCH, Length
 from ..core.view import View
 from ..device.mixins import Status
+from ..svgelements import Matrix
 from .controller import GrblController
 from .driver import GRBLDriver
+from .gcodegeom import parse_gcode
+from .gcodejob import GcodeJob
 
 
 class GRBLDevice(Service, Status):
@@ -477,6 +481,31 @@ class GRBLDevice(Service, Status):
                 "section": "_5_Config",
                 "tip": _("Distance of the curve interpolation in mils"),
             },
+            {
+                "attr": "use_arcs",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Use G2/G3 arcs"),
+                "section": "_5_Config",
+                "tip": _(
+                    "Send curves and connected lines as G2/G3 arcs where they fit within the arc tolerance, "
+                    "instead of many short G1 moves. Requires arc support in the controller firmware."
+                ),
+            },
+            {
+                "attr": "arc_tolerance",
+                "object": self,
+                "default": 1.0,
+                "type": float,
+                "label": _("Arc tolerance"),
+                "trailer": _("mil"),
+                "section": "_5_Config",
+                "tip": _(
+                    "Maximum deviation of the fitted arcs and lines from the interpolated curve in mils"
+                ),
+                "conditional": (self, "use_arcs"),
+            },
             {
                 "attr": "has_endstops",
                 "object": self,
@@ -1241,6 +1270,57 @@ class GRBLDevice(Service, Status):
                 else:
                     channel(_("Export succeeded: {filename}").format(filename=filename))
 
+        @self.console_option(
+            "line", "l", type=int, default=0, help=_("line to resume from")
+        )
+        @self.console_argument("filename", type=str)
+        @self.console_command(
+            "gcode_stream",
+            help=_("gcode_stream <filename>: Stream a gcode file from disk to the device."),
+        )
+        def gcode_stream(channel, _, filename=None, line=0, **kwgs):
+            if filename is None:
+                raise CommandSyntaxError
+            job = GcodeJob(self.driver, self.view.matrix)
+            job.label = os.path.basename(filename)
+            try:
+                job.write_file(filename, start=line)
+            except OSError:
+                channel(_("Could not open: {filename}").format(filename=filename))
+                return
+            channel(
+                _("Streaming {filename}: {lines} lines").format(
+                    filename=filename, lines=job.steps_total - job.steps_done
+                )
+            )
+            self.spooler.send(job)
+
+        @self.console_argument("filename", type=str)
+        @self.console_command(
+            "gcode_geometry",
+            help=_("gcode_geometry <filename>: Read the geometry of a gcode file."),
+            output_type="geometry",
+        )
+        def gcode_geometry(channel, _, filename=None, **kwgs):
+            if filename is None:
+                raise CommandSyntaxError
+            try:
+                with open(filename, "rb") as f:
+                    data = f.read()
+            except OSError:
+                channel(_("Could not open: {filename}").format(filename=filename))
+                return
+            # G-code is in driver units, the inverse of the output of the driver places it in the scene.
+            matrix = Matrix.scale(1.0 / self.driver.stepper_step_size)
+            matrix *= ~self.view.matrix
+            geometry, power, speed = parse_gcode(data, matrix)
+            channel(
+                _("Read {segments} lasered segments from {filename}").format(
+                    segments=int((power > 0).sum()), filename=filename
+                )
+            )
+            return "geometry", geometry
+
         @self.console_command(
             "grblinterpreter", help=_("activate the grbl interpreter.")
         )
@@ -4,6 +4,7 @@ GRBL Driver
 Governs the generic commands issued by laserjob and spooler and converts that into regular GRBL Gcode output.
 """
 
+import threading
 import time
 
 from meerk40t.core.cutcode.cubiccut import CubicCut
@@ -20,9 +21,36 @@ from meerk40t.core.cutcode.waitcut import WaitCut
 from ..core.geomstr import Geomstr
 from ..core.parameters import Parameters
 from ..core.plotplanner import PlotPlanner
+from ..core.replay import Capture, ReplayCache
 from ..core.units import UNITS_PER_INCH, UNITS_PER_MIL, UNITS_PER_MM, Length
 from ..device.basedevice import PLOT_FINISH, PLOT_JOG, PLOT_RAPID, PLOT_SETTING
 from ..kernel import signal_listener
+from .arcfit import ArcFitter
+from .gcodestream import GcodeStream
+
+# Lines compiled by plot_start and geometry are handed to the controller in blocks of
+# BLOCK_LINES, while no more than LOOKAHEAD_LINES lines are waiting to be sent.
+BLOCK_LINES = 64
+LOOKAHEAD_LINES = 2048
+
+# State of the driver restored after replaying captured cutcode, besides the settings.
+REPLAY_STATE = (
+    "native_x",
+    "native_y",
+    "on_value",
+    "power_dirty",
+    "speed_dirty",
+    "zaxis_dirty",
+    "absolute_dirty",
+    "feedrate_dirty",
+    "units_dirty",
+    "move_mode",
+    "_absolute",
+    "feed_mode",
+    "feed_convert",
+    "unit_scale",
+    "units",
+)
 
 
 class GRBLDriver(Parameters):
@@ -81,6 +109,19 @@ class GRBLDriver(Parameters):
 
         self.out_pipe = None
         self.out_real = None
+        self._arc_fitter = None
+
+        # Block of compiled lines, only set while plot_start or geometry compile on
+        # the _block_thread.
+        self._block = None
+        self._block_thread = None
+        self._block_origin = None
+        self._sequence = None
+        self._y_grbl_factor = None
+
+        # Data written for cutcode, captured for the replay cache.
+        self._capture = None
+        self.replay_cache = ReplayCache()
 
         self.reply = None
         self.elements = None
@@ -94,9 +135,76 @@ class GRBLDriver(Parameters):
     def __call__(self, e, real=False):
         if real:
             self.out_real(e)
+        elif self._block is not None and threading.get_ident() == self._block_thread:
+            self._block.append(e)
+            if len(self._block) >= BLOCK_LINES:
+                self._flush_block()
         else:
+            if self._capture is not None:
+                self._capture.append(e)
             self.out_pipe(e)
 
+    def _compile(self, routine, *args):
+        """
+        Run the plotting routine with its output compiled into blocks of lines.
+
+        The blocks are written to the controller ahead of the sender, but no further
+        than LOOKAHEAD_LINES. Blocks are tagged with the sequence number of the
+        controller, blocks compiled before a soft reset are dropped by the controller.
+        """
+        controller = getattr(self.service, "controller", None)
+        if controller is not None and self.out_pipe == controller.write:
+            self._sequence = controller.sequence
+        else:
+            self._sequence = None
+        self._block = []
+        self._block_thread = threading.get_ident()
+        self._block_origin = self.service.current if self._signal_updates else None
+        self._y_grbl_factor = self._rotary_y_grbl_factor()
+        try:
+            return routine(*args)
+        finally:
+            if self._job_aborted():
+                self._block.clear()
+            self._flush_block()
+            self._block = None
+            self._block_thread = None
+            self._sequence = None
+            self._y_grbl_factor = None
+
+    def _compiling(self):
+        return self._block is not None and threading.get_ident() == self._block_thread
+
+    def _flush_block(self):
+        """
+        Write the compiled block, waiting while the controller has LOOKAHEAD_LINES
+        lines queued.
+        """
+        block = self._block
+        if not block:
+            return
+        data = "".join(block)
+        block.clear()
+        if self._capture is not None:
+            self._capture.append(data)
+        if self._sequence is None:
+            self.out_pipe(data)
+        else:
+            controller = self.service.controller
+            while not controller.wait_for_room(LOOKAHEAD_LINES, self._sequence, 0.05):
+                if self.service.kernel.is_shutdown or self._job_aborted():
+                    return
+            self.out_pipe(data, sequence=self._sequence)
+        if self._block_origin is not None:
+            # Position updates of the compiled moves are signalled once per block.
+            old_current = self._block_origin
+            new_current = self.service.current
+            self._block_origin = new_current
+            self.service.signal(
+                "driver;position",
+                (old_current[0], old_current[1], new_current[0], new_current[1]),
+            )
+
     def get_internal_queue_status(self):
         return self._queue_current, self._queue_total
 
@@ -326,9 +434,16 @@ class GRBLDriver(Parameters):
 
         @return:
         """
+        return self._compile(self._geometry, geom)
+
+    def _geometry(self, geom):
         # TODO: estop cannot clear the geom.
         self.signal("grbl_red_dot", False)  # We are not using red-dot if we're cutting.
         self.clear_states()
+        # The plot planner signals the settings of the first raster of each plot, as it does for the first plot.
+        # Otherwise a raster plotted again with the same settings kept the rapid speed of the jog to it, and the
+        # gcode for the same cutcode depended on the plots before it.
+        self.plot_planner.settings = self.settings
         self._g90_absolute()
         self._g94_feedrate()
         self._clean()
@@ -382,12 +497,9 @@ class GRBLDriver(Parameters):
                 interp = self.service.interp
                 g.clear()
                 g.quad(complex(start), complex(c1), complex(end))
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    while self.paused or self._job_aborted():
-                        if self._job_aborted():
-                            return
-                        time.sleep(0.05)
-                    self._move(p.real, p.imag)
+                points = list(g.as_equal_interpolated_points(distance=interp))[1:]
+                if not self._plot_polyline(points):
+                    return
             elif segment_type == "cubic":
                 self.move_mode = 1
                 interp = self.service.interp
@@ -398,14 +510,10 @@ class GRBLDriver(Parameters):
                     complex(c2),
                     complex(end),
                 )
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    while self.paused or self._job_aborted():
-                        if self._job_aborted():
-                            return
-                        time.sleep(0.05)
-                    self._move(p.real, p.imag)
+                points = list(g.as_equal_interpolated_points(distance=interp))[1:]
+                if not self._plot_polyline(points):
+                    return
             elif segment_type == "arc":
-                # TODO: Allow arcs to be directly executed by GRBL which can actually use them.
                 self.move_mode = 1
                 interp = self.service.interp
                 g.clear()
@@ -414,12 +522,9 @@ class GRBLDriver(Parameters):
                     complex(c1),
                     complex(end),
                 )
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    while self.paused or self._job_aborted():
-                        if self._job_aborted():
-                            return
-                        time.sleep(0.05)
-                    self._move(p.real, p.imag)
+                points = list(g.as_equal_interpolated_points(distance=interp))[1:]
+                if not self._plot_polyline(points):
+                    return
             elif segment_type == "point":
                 function = sets.get("function")
                 if function == "dwell":
@@ -450,14 +555,30 @@ class GRBLDriver(Parameters):
         """
         self.queue.append(plot)
 
+    def plot_batch(self, plots):
+        """
+        Gives the driver consecutive cutcode that should be plotted, as plot() does for each of them.
+
+        @param plots: list of cuts
+        @return:
+        """
+        self.queue.extend(plots)
+
     def plot_start(self):
         """
         Called at the end of plot commands to ensure the driver can deal with them all as a group.
 
         @return:
         """
+        return self._compile(self._plot_start)
+
+    def _plot_start(self):
         self.signal("grbl_red_dot", False)  # We are not using red-dot if we're cutting.
         self.clear_states()
+        # The plot planner signals the settings of the first raster of each plot, as it does for the first plot.
+        # Otherwise a raster plotted again with the same settings kept the rapid speed of the jog to it, and the
+        # gcode for the same cutcode depended on the plots before it.
+        self.plot_planner.settings = self.settings
         self._g90_absolute()
         self._g94_feedrate()
         self._clean()
@@ -473,11 +594,17 @@ class GRBLDriver(Parameters):
         first = True
         total = len(self.queue)
         current = 0
-        for q in self.queue:
+        fitter = self._get_arc_fitter()
+        skip = 0
+        for index, q in enumerate(self.queue):
             if self._job_aborted():
                 self._rotary_restore_firmware_steps()
                 self.queue.clear()
                 return
+            if skip:
+                # Already plotted as part of a polyline.
+                skip -= 1
+                continue
             # Are there any custom commands to be executed?
             # Usecase (as described in issue https://github.com/meerk40t/meerk40t/issues/2764 ):
             # Switch between M3 and M4 mode for cut / raster
@@ -532,18 +659,25 @@ class GRBLDriver(Parameters):
             self.settings.update(q.settings)
             if isinstance(q, LineCut):
                 self.move_mode = 1
-                self._move(*q.end)
+                run = self._line_run(index) if fitter is not None else None
+                if run:
+                    # Connected lines are plotted as one polyline.
+                    skip = len(run)
+                    current += skip
+                    self._set_queue_status(current, total)
+                    points = [complex(*c.end) for c in (q, *run)]
+                    if not self._plot_polyline(points):
+                        return
+                else:
+                    self._move(*q.end)
             elif isinstance(q, QuadCut):
                 self.move_mode = 1
                 interp = self.service.interp
                 g = Geomstr()
                 g.quad(complex(*q.start), complex(*q.c()), complex(*q.end))
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    while self.paused or self._job_aborted():
-                        if self._job_aborted():
-                            return
-                        time.sleep(0.05)
-                    self._move(p.real, p.imag)
+                points = list(g.as_equal_interpolated_points(distance=interp))[1:]
+                if not self._plot_polyline(points):
+                    return
             elif isinstance(q, CubicCut):
                 self.move_mode = 1
                 interp = self.service.interp
@@ -554,12 +688,9 @@ class GRBLDriver(Parameters):
                     complex(*q.c2()),
                     complex(*q.end),
                 )
-                for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
-                    while self.paused or self._job_aborted():
-                        if self._job_aborted():
-                            return
-                        time.sleep(0.05)
-                    self._move(p.real, p.imag)
+                points = list(g.as_equal_interpolated_points(distance=interp))[1:]
+                if not self._plot_polyline(points):
+                    return
             elif isinstance(q, WaitCut):
                 self.wait(q.dwell_time)
             elif isinstance(q, HomeCut):
@@ -663,12 +794,89 @@ class GRBLDriver(Parameters):
         """
         if data_type != "grbl":
             return
-        grbl = bytes.decode(data, "latin-1")
-        for split in grbl.split("\r"):
-            g = split.strip()
+        return self._compile(self._blob, GcodeStream(data))
+
+    def _blob(self, stream):
+        for line in stream:
+            g = line.strip()
             if g:
                 self(f"{g}{self.line_end}")
 
+    def replay_state(self):
+        """
+        State of the driver which the gcode of cutcode depends on, see meerk40t.core.replay.
+
+        @return: hashable state, None if the gcode isn't to be replayed.
+        """
+        rotary = getattr(self.service, "rotary", None)
+        if rotary is not None and rotary.active:
+            # Rotary firmware steps are set and restored around the cutcode.
+            return None
+        service = self.service
+        return (
+            repr(sorted(self.settings.items(), key=lambda e: str(e[0]))),
+            self.stepper_step_size,
+            self.unit_scale,
+            self.units,
+            self.line_end,
+            self.power_scale,
+            self.speed_scale,
+            service.use_m3,
+            service.use_g1_for_power,
+            service.interp,
+            getattr(service, "use_arcs", False),
+            getattr(service, "arc_tolerance", 1.0),
+            service.view.native_scale_x,
+        )
+
+    def capture_start(self):
+        """
+        Captures the gcode written until capture_finish().
+        """
+        self._capture = []
+
+    def capture_finish(self, steps=0):
+        """
+        @param steps: steps of the laserjob executed for the capture.
+        @return: Capture of the gcode and the state after it, None if the job was aborted.
+        """
+        data = self._capture
+        self._capture = None
+        if data is None or self._job_aborted():
+            return None
+        state = {name: getattr(self, name) for name in REPLAY_STATE}
+        state["settings"] = dict(self.settings)
+        return Capture(data, state, steps)
+
+    def replay(self, capture):
+        """
+        Writes the captured gcode again and restores the state of the driver after it.
+
+        @param capture: Capture
+        @return: False if the job was aborted.
+        """
+        return self._compile(self._replay, capture)
+
+    def _replay(self, capture):
+        self.signal("grbl_red_dot", False)
+        # The position is signalled as the first block is written, like the position of compiled moves.
+        state = dict(capture.state)
+        self.settings.clear()
+        self.settings.update(state.pop("settings"))
+        for name, value in state.items():
+            setattr(self, name, value)
+        for data in capture.data:
+            if self._job_aborted():
+                return False
+            while self.hold_work(0):
+                if self.service.kernel.is_shutdown or self._job_aborted():
+                    return False
+                time.sleep(0.05)
+            self._block.append(data)
+            self._flush_block()
+        self.wait_finish()
+        return not self._job_aborted()
+
     def physical_home(self):
         """
         Home the laser physically (i.e. run into endstops).
@@ -794,6 +1002,8 @@ class GRBLDriver(Parameters):
         @param values:
         @return:
         """
+        if self._compiling():
+            self._flush_block()
         while True:
             if self._job_aborted():
                 return
@@ -998,8 +1208,104 @@ class GRBLDriver(Parameters):
                 y = -y
         return x, y
 
+    def _get_arc_fitter(self):
+        """
+        ArcFitter if curves are to be sent as G2/G3 arcs, otherwise None.
+
+        Arcs require absolute coordinates without rotary transformation, the rotary
+        y-scaling would distort them into ellipses.
+        """
+        if not getattr(self.service, "use_arcs", False) or not self._absolute:
+            return None
+        rotary = getattr(self.service, "rotary", None)
+        if rotary is not None and rotary.active:
+            return None
+        tolerance = float(getattr(self.service, "arc_tolerance", 1.0))
+        if tolerance <= 0:
+            return None
+        if self._arc_fitter is None or self._arc_fitter.tolerance != tolerance:
+            self._arc_fitter = ArcFitter(tolerance)
+        return self._arc_fitter
+
+    def _line_run(self, index):
+        """
+        LineCuts following the LineCut at index which continue it with the same settings.
+        """
+        q = self.queue[index]
+        if q.settings.get("custom_commands"):
+            return None
+        run = []
+        end = q.end
+        for cut in self.queue[index + 1 :]:
+            if type(cut) is not LineCut or cut.settings is not q.settings:
+                break
+            if cut.start != end:
+                break
+            run.append(cut)
+            end = cut.end
+        return run
+
+    def _plot_polyline(self, points):
+        """
+        Plot from the current position through the given points. With arc fitting
+        enabled the polyline is sent as G2/G3 arcs and merged lines.
+
+        @param points: complex points in native units
+        @return: False if the job was aborted
+        """
+        fitter = self._get_arc_fitter()
+        if fitter is None:
+            segments = [("line", p) for p in points]
+        else:
+            start = complex(self.native_x, self.native_y)
+            segments = fitter.fit([start, *points])
+        for segment in segments:
+            while self.paused or self._job_aborted():
+                if self._job_aborted():
+                    return False
+                time.sleep(0.05)
+            end = segment[1]
+            if segment[0] == "arc":
+                center = segment[2]
+                self._arc(end.real, end.imag, center.real, center.imag, segment[3])
+            else:
+                self._move(end.real, end.imag)
+        return True
+
+    def _arc(self, x, y, cx, cy, ccw):
+        """
+        Arc from the current position to x, y around the center cx, cy. Only valid in
+        absolute mode without rotary transformation, see _get_arc_fitter.
+        """
+        signal = self._signal_updates and not self._compiling()
+        old_current = self.service.current if signal else None
+        i = (cx - self.native_x) / self.unit_scale
+        j = (cy - self.native_y) / self.unit_scale
+        self.native_x = x
+        self.native_y = y
+        line = ["G3" if ccw else "G2"]
+        line.append(f"X{x / self.unit_scale:.3f}")
+        line.append(f"Y{y / self.unit_scale:.3f}")
+        line.append(f"I{i:.3f}")
+        line.append(f"J{j:.3f}")
+        if self.power_dirty:
+            if self.power is not None:
+                line.append(f"S{self.unit_str(self.power * self.on_value)}")
+            self.power_dirty = False
+        if self.speed_dirty:
+            line.append(f"F{self.unit_str(self.feed_convert(self.speed))}")
+            self.speed_dirty = False
+        self(" ".join(line) + self.line_end)
+        if signal:
+            new_current = self.service.current
+            self.service.signal(
+                "driver;position",
+                (old_current[0], old_current[1], new_current[0], new_current[1]),
+            )
+
     def _move(self, x, y, absolute=False):
-        old_current = self.service.current
+        signal = self._signal_updates and not self._compiling()
+        old_current = self.service.current if signal else None
         x, y = self._rotary_transform_move(x, y)
         if self._absolute:
             self.native_x = x
@@ -1017,8 +1323,11 @@ class GRBLDriver(Parameters):
             line.append("G0")
         else:
             line.append("G1")
+        y_factor = self._y_grbl_factor
+        if y_factor is None:
+            y_factor = self._rotary_y_grbl_factor()
         x /= self.unit_scale
-        y = (y * self._rotary_y_grbl_factor()) / self.unit_scale
+        y = (y * y_factor) / self.unit_scale
         line.append(f"X{x:.3f}")
         line.append(f"Y{y:.3f}")
         if self.zaxis_dirty:
@@ -1039,8 +1348,8 @@ class GRBLDriver(Parameters):
             line.append(f"F{self.unit_str(self.feed_convert(self.speed))}")
             self.speed_dirty = False
         self(" ".join(line) + self.line_end)
-        new_current = self.service.current
-        if self._signal_updates:
+        if signal:
+            new_current = self.service.current
             self.service.signal(
                 "driver;position",
                 (old_current[0], old_current[1], new_current[0], new_current[1]),
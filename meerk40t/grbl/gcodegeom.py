@@ -0,0 +1,275 @@
+"""
+G-code Geometry
+
+Vectorized interpretation of g-code into geometry, for importing and previewing large files. Rather than tokenizing
+and executing every line in python like GcodeJob does, the whole buffer is tokenized at once with numpy, the modal
+state (motion mode, units, distance mode, feed, power and laser state) is forward-filled over the lines, and the
+positions are accumulated with cumulative sums.
+
+The result is a Geomstr of the G1 lines and G2/G3 arcs, with a power and a speed value for every segment. Rapid moves
+start new subpaths. Supported are G0-G3 (arcs with I/J offsets or R), G20/G21, G28, G80, G90/G91, F, S and
+M2/M3/M4/M5/M30. Other words are ignored, as are lines with G92.
+"""
+
+import re
+import warnings
+
+import numpy as np
+
+from meerk40t.core.geomstr import TYPE_ARC, TYPE_END, TYPE_LINE, Geomstr
+from meerk40t.core.units import UNITS_PER_INCH, UNITS_PER_MM
+from meerk40t.grbl.gcodestream import line_ends
+
+COMMENT_RE = re.compile(rb"\([^)\r\n]*\)|;[^\r\n]*")
+
+SPACE = 0x20
+PLUS = 0x2B
+MINUS = 0x2D
+DOT = 0x2E
+
+
+def tokenize(data):
+    """
+    Tokenize g-code into its words.
+
+    Comments and whitespace are removed, every letter directly followed by a number is a word.
+
+    @param data: bytes-like or str g-code
+    @return: letters (uppercase ascii codes), values, line index of every word, and the number of lines
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    data = COMMENT_RE.sub(b"", bytes(data)).translate(None, b" \t")
+    ends = line_ends(data)
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if not len(arr):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty.astype(np.uint8), empty.astype(float), empty, 0
+    upper = arr & 0xDF
+    is_letter = (upper >= ord("A")) & (upper <= ord("Z"))
+    is_number = ((arr >= ord("0")) & (arr <= ord("9"))) | (arr == PLUS)
+    is_number |= (arr == MINUS) | (arr == DOT)
+
+    # Runs of number characters, those directly after a letter are the values of words.
+    previous = np.concatenate(([False], is_number[:-1]))
+    following = np.concatenate((is_number[1:], [False]))
+    starts = np.flatnonzero(is_number & ~previous)
+    stops = np.flatnonzero(is_number & ~following) + 1
+    valid = starts > 0
+    valid[valid] = is_letter[starts[valid] - 1]
+    starts = starts[valid]
+    stops = stops[valid]
+
+    mask = np.zeros(len(arr) + 1, dtype=np.int8)
+    mask[starts] = 1
+    mask[stops] -= 1
+    mask = np.cumsum(mask[:-1], dtype=np.int8).astype(bool)
+    cleaned = np.full(len(arr), SPACE, dtype=np.uint8)
+    cleaned[mask] = arr[mask]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            values = np.fromstring(cleaned.tobytes(), dtype=float, sep=" ")
+    except ValueError:
+        values = None
+    if values is None or len(values) != len(starts):
+        # Malformed numbers, such as "1.2.3" or a lone "-", are parsed one at a time.
+        values = np.array(
+            [_float(data[start:stop]) for start, stop in zip(starts, stops)],
+            dtype=float,
+        )
+    letters = upper[starts - 1]
+    lines = np.searchsorted(ends, starts - 1)
+    return letters, values, lines, len(ends)
+
+
+def _float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _last(letters, values, lines, count, letter, accept=None):
+    """
+    Value of the last word with the given letter on every line, nan where there is none.
+    """
+    selected = letters == ord(letter)
+    if accept is not None:
+        selected &= accept
+    index = lines[selected]
+    value = values[selected]
+    last = np.ones(len(index), dtype=bool)
+    last[:-1] = index[1:] != index[:-1]
+    result = np.full(count, np.nan)
+    result[index[last]] = value[last]
+    return result
+
+
+def _fill(values, initial):
+    """
+    Forward-fill the nan entries of values, starting with initial.
+    """
+    present = ~np.isnan(values)
+    index = np.where(present, np.arange(len(values)), -1)
+    np.maximum.accumulate(index, out=index)
+    return np.where(index >= 0, values[np.maximum(index, 0)], initial)
+
+
+def _accumulate(has, value, relative):
+    """
+    Positions along one axis, absolute words set the position, relative words add to it.
+    """
+    absolute = has & ~relative
+    delta = np.cumsum(np.where(has & relative, value, 0.0))
+    index = np.where(absolute, np.arange(len(has)), -1)
+    np.maximum.accumulate(index, out=index)
+    base = np.maximum(index, 0)
+    return np.where(index >= 0, value[base] + delta - delta[base], delta)
+
+
+def _arc_centers(start, end, offset, radius, ccw):
+    """
+    Arc centers from the I/J offsets, or from the radius the way GRBL computes them.
+    """
+    center = start + np.nan_to_num(offset)
+    use_radius = np.isnan(offset) & ~np.isnan(radius)
+    if np.any(use_radius):
+        d = end - start
+        r = np.nan_to_num(radius)
+        chord = np.abs(d)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            h = -np.sqrt(np.maximum(4 * r * r - chord * chord, 0.0)) / chord
+        h = np.where(ccw, -h, h)
+        h = np.where(r < 0, -h, h)
+        h = np.nan_to_num(h)
+        radial = start + 0.5 * (d.real - d.imag * h) + 0.5j * (d.imag + d.real * h)
+        center = np.where(use_radius, radial, center)
+    return center
+
+
+def parse_gcode(data, matrix=None):
+    """
+    Interpret the g-code data into geometry.
+
+    Coordinates are in native units (g-code units scaled by UNITS_PER_MM or UNITS_PER_INCH), transformed by the
+    optional matrix. Power is in 0-1000 and zero while the laser is off (M5), speed is in mm/s.
+
+    @param data: bytes-like or str g-code
+    @param matrix: optional matrix applied to the geometry
+    @return: geometry, power and speed arrays with a value for every segment of the geometry
+    """
+    letters, values, lines, count = tokenize(data)
+    is_g = letters == ord("G")
+    g_value = np.where(is_g, values, np.nan)
+
+    def g_words(*accepted):
+        return _last(letters, values, lines, count, "G", is_g & np.isin(g_value, accepted))
+
+    motion = _fill(g_words(0, 1, 2, 3, 80), 0)
+    inches = _fill(g_words(20, 21, 70, 71), 21)
+    inches = (inches == 20) | (inches == 70)
+    relative = _fill(g_words(90, 91), 90) == 91
+    home = ~np.isnan(g_words(28))
+    offset = ~np.isnan(g_words(92))
+    scale = np.where(inches, UNITS_PER_INCH, UNITS_PER_MM)
+
+    m_value = _last(letters, values, lines, count, "M", np.isin(values, (2, 3, 4, 5, 30)))
+    laser = _fill(np.where(np.isnan(m_value), np.nan, np.isin(m_value, (3, 4))), 0) != 0
+    s_value = _last(letters, values, lines, count, "S")
+    s_value = np.where((s_value > 0) & (s_value <= 1), s_value * 1000, s_value)
+    power = np.where(laser, _fill(s_value, 0), 0)
+    f_value = _last(letters, values, lines, count, "F")
+    speed = _fill(f_value * np.where(inches, 25.4, 1.0) / 60.0, 0)
+
+    x = _last(letters, values, lines, count, "X")
+    y = _last(letters, values, lines, count, "Y")
+    moves = (~np.isnan(x) | ~np.isnan(y)) & (motion != 80) & ~offset & ~home
+    events = np.flatnonzero(moves | home)
+    is_home = home[events]
+    rel = relative[events] & ~is_home
+    has_x = ~np.isnan(x[events]) | is_home
+    has_y = ~np.isnan(y[events]) | is_home
+    event_scale = scale[events]
+    px = _accumulate(has_x, np.nan_to_num(x[events] * event_scale) * ~is_home, rel)
+    py = _accumulate(has_y, np.nan_to_num(y[events] * event_scale) * ~is_home, rel)
+    end = px + 1j * py
+    start = np.concatenate(([0j], end[:-1]))
+    mode = np.where(is_home, 0, motion[events]).astype(int)
+
+    i = _last(letters, values, lines, count, "I")[events]
+    j = _last(letters, values, lines, count, "J")[events]
+    r = _last(letters, values, lines, count, "R")[events] * event_scale
+    has_offset = ~np.isnan(i) | ~np.isnan(j)
+    arc_offset = np.where(
+        has_offset, (np.nan_to_num(i) + 1j * np.nan_to_num(j)) * event_scale, np.nan
+    )
+    ccw = mode == 3
+    is_arc = ((mode == 2) | ccw) & (has_offset | ~np.isnan(r))
+    is_line = (mode != 0) & ~is_arc & (start != end)
+
+    # Arcs, sweeping from the start angle, clockwise for G2 and counterclockwise for G3 with y up.
+    center = _arc_centers(start, end, arc_offset, r, ccw)
+    radius = np.abs(start - center)
+    is_arc &= radius > 0
+    a0 = np.angle(start - center)
+    sweep = np.mod(np.angle(end - center) - a0, 2 * np.pi)
+    sweep = np.where(ccw, sweep, sweep - 2 * np.pi)
+    full = np.isclose(start, end)
+    sweep = np.where(full & ccw, 2 * np.pi, np.where(full & ~ccw, -2 * np.pi, sweep))
+
+    cut = is_line | is_arc
+    travel = np.cumsum(mode == 0)
+    segments = np.flatnonzero(cut)
+    # A new subpath starts after each rapid move.
+    breaks = np.zeros(len(segments), dtype=bool)
+    breaks[1:] = travel[segments[1:]] != travel[segments[:-1]]
+
+    # Arcs sweeping more than half a turn are split in two.
+    split = is_arc[segments] & (np.abs(sweep[segments]) > np.pi)
+    pieces = np.repeat(segments, 1 + split)
+    first = np.ones(len(pieces), dtype=bool)
+    first[1:] = pieces[1:] != pieces[:-1]
+    piece_split = np.repeat(split, 1 + split)
+    f0 = np.where(piece_split & ~first, 0.5, 0.0)
+    f1 = np.where(piece_split & first, 0.5, 1.0)
+    c = center[pieces]
+    rad = radius[pieces]
+    a = a0[pieces]
+    sw = sweep[pieces]
+
+    def arc_point(fraction):
+        return c + rad * np.exp(1j * (a + sw * fraction))
+
+    piece_arc = is_arc[pieces]
+    p_start = np.where(f0 == 0, start[pieces], arc_point(f0))
+    p_end = np.where(f1 == 1, end[pieces], arc_point(f1))
+    p_control = np.where(piece_arc, arc_point((f0 + f1) / 2), 0)
+    p_type = np.where(piece_arc, TYPE_ARC, TYPE_LINE)
+    p_break = np.where(first, np.repeat(breaks, 1 + split), False)
+
+    rows = len(pieces) + int(np.sum(p_break))
+    position = np.arange(len(pieces)) + np.cumsum(p_break)
+    out = np.full((rows, 5), np.nan, dtype=complex)
+    out[:, 2] = TYPE_END
+    out[position, 0] = p_start
+    out[position, 1] = p_control
+    out[position, 3] = p_control
+    out[position, 4] = p_end
+    key = power[events[pieces]] + 1j * speed[events[pieces]]
+    # Settings change rarely, only the first segment of every run of equal settings is looked up.
+    changed = np.ones(len(key), dtype=bool)
+    changed[1:] = key[1:] != key[:-1]
+    unique, index = np.unique(key[changed], return_inverse=True)
+    index = index.reshape(-1)[np.cumsum(changed) - 1]
+    out[position, 2] = p_type + 1j * index
+    segment_power = np.zeros(rows)
+    segment_power[position] = key.real
+    segment_speed = np.zeros(rows)
+    segment_speed[position] = key.imag
+    geometry = Geomstr(out)
+    for index, value in enumerate(unique):
+        geometry.settings(index, {"power": value.real, "speed": value.imag})
+    if matrix is not None:
+        geometry.transform(matrix)
+    return geometry, segment_power, segment_speed
@@ -1,12 +1,17 @@
 import re
 import threading
 import time
+from collections import deque
 
 from meerk40t.core.cutcode.plotcut import PlotCut
 from meerk40t.core.cutcode.waitcut import WaitCut
 from meerk40t.core.units import UNITS_PER_INCH, UNITS_PER_MM
+from meerk40t.grbl.gcodestream import GcodeStream
 from meerk40t.svgelements import Arc
 
+# Lines of a stream processed per call of execute.
+EXECUTE_LINES = 64
+
 CODE_RE = re.compile(r"([A-Za-z])")
 FLOAT_RE = re.compile(r"[-+]?[0-9]*\.?[0-9]*")
 
@@ -125,7 +130,11 @@ class GcodeJob:
         self.channel = channel
         self.reply = None
         self.label = "Gcode Job"
-        self.buffer = list()
+        self.buffer = deque()
+        # Indexed g-code streams, executed before the buffered lines.
+        self.streams = deque()
+        self.line_index = 0
+        self._streamed = 0
 
         self.priority = priority
 
@@ -166,7 +175,26 @@ class GcodeJob:
         self.g94_feedrate()
 
     def __str__(self):
-        return f"{self.__class__.__name__}({len(self.buffer)} lines)"
+        lines = self.steps_total - self.steps_done + len(self.buffer)
+        return f"{self.__class__.__name__}({lines} lines)"
+
+    @property
+    def steps_total(self):
+        return self._streamed + sum(len(s) for s in self.streams)
+
+    @property
+    def steps_done(self):
+        return self._streamed + self.line_index
+
+    @property
+    def progress(self):
+        """
+        Byte offset reached in the current stream and the size of that stream.
+        """
+        if not self.streams:
+            return 0, 0
+        stream = self.streams[0]
+        return stream.offset(self.line_index), stream.size
 
     @property
     def status(self):
@@ -226,13 +254,51 @@ class GcodeJob:
             self.buffer.extend(lines)
 
     def write_blob(self, data):
-        self.write_all(
-            [
-                r
-                for r in re.split("[\n|\r]", data.decode("utf-8", errors="ignore"))
-                if r.strip()
-            ]
-        )
+        self.write_stream(GcodeStream(data))
+
+    def write_file(self, pathname, start=0):
+        """
+        Stream the given g-code file from disk, beginning at line start.
+        """
+        self.write_stream(GcodeStream.open(pathname), start=start)
+
+    def write_stream(self, stream, start=0):
+        if not len(stream):
+            stream.close()
+            return
+        with self.lock:
+            self.streams.append(stream)
+            if len(self.streams) == 1:
+                self._seek(start)
+
+    def seek(self, line):
+        """
+        Resume the current stream from the given line.
+        """
+        with self.lock:
+            if self.streams:
+                self._seek(line)
+
+    def _seek(self, line):
+        self.line_index = max(0, line)
+        if self.line_index >= len(self.streams[0]):
+            self._close_stream()
+
+    def _next_lines(self):
+        if not self.streams:
+            return [self.buffer.popleft()]
+        stream = self.streams[0]
+        lines = stream.lines(self.line_index, self.line_index + EXECUTE_LINES)
+        self.line_index += len(lines)
+        if self.line_index >= len(stream):
+            self._close_stream()
+        return lines
+
+    def _close_stream(self):
+        stream = self.streams.popleft()
+        self._streamed += len(stream)
+        self.line_index = 0
+        stream.close()
 
     def execute(self, driver=None):
         """
@@ -245,13 +311,16 @@ class GcodeJob:
             self.time_started = time.time()
         try:
             with self.lock:
-                line = self.buffer.pop(0)
-            cmd = self._process_gcode(line)
-            self.reply_code(cmd)
+                lines = self._next_lines()
+            for line in lines:
+                if not line.strip():
+                    continue
+                cmd = self._process_gcode(line)
+                self.reply_code(cmd)
         except IndexError:
             # Could not pop, list is empty. Job is done.
             pass
-        if not self.buffer:
+        if not self.buffer and not self.streams:
             # Buffer is empty now. Job is complete
             self.runtime += time.time() - self.time_started
             self._stopped = True
@@ -662,10 +731,10 @@ class GcodeJob:
                 cx = ox
                 cy = oy
                 if "i" in gc:
-                    ix = gc["i"].pop(0)  # * self.scale
+                    ix = gc["i"].pop(0) * self.scale
                     cx += ix
                 if "j" in gc:
-                    jy = gc["j"].pop(0)  # * self.scale
+                    jy = gc["j"].pop(0) * self.scale
                     cy += jy
                 if "r" in gc:
                     # Strictly speaking this uses the R parameter, but that wasn't coded.
@@ -673,7 +742,7 @@ class GcodeJob:
                         start=(ox, oy),
                         center=(cx, cy),
                         end=(nx, ny),
-                        ccw=self.move_mode == 3,
+                        ccw=self.move_mode == 2,
                     )
                     for p in range(self._interpolate + 1):
                         x, y = arc.point(p / self._interpolate)
@@ -683,7 +752,7 @@ class GcodeJob:
                         start=(ox, oy),
                         center=(cx, cy),
                         end=(nx, ny),
-                        ccw=self.move_mode == 3,
+                        ccw=self.move_mode == 2,
                     )
                     for p in range(self._interpolate + 1):
                         x, y = arc.point(p / self._interpolate)
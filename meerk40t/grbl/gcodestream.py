@@ -0,0 +1,140 @@
+"""
+G-code Stream
+
+Line access to g-code data without splitting it into a list of strings. The data is either a bytes-like object or a
+file which is memory-mapped, and a single pass over it records the end offset of every line. Lines are decoded lazily
+when they are read, so a job can be sent, paused, and resumed from any line while only the line index lives in memory.
+
+Line numbers match the lines of the file as an editor shows them, "\\n", "\\r\\n" and "\\r" all end a line.
+"""
+
+import mmap
+import re
+
+import numpy as np
+
+# Bytes scanned per step while building the line index.
+INDEX_CHUNK = 1 << 22
+
+LF = 0x0A
+CR = 0x0D
+
+LINE_END_RE = re.compile(rb"\r\n|\r|\n")
+
+
+def line_ends(data, chunk=INDEX_CHUNK):
+    """
+    Offsets of the line terminators within data, plus the end of the data if the last line is not terminated.
+
+    A carriage return directly followed by a line feed is part of that line feed.
+
+    @param data: bytes-like object
+    @param chunk: bytes scanned per step
+    @return: int64 array of end offsets, one per line
+    """
+    view = np.frombuffer(data, dtype=np.uint8)
+    size = len(view)
+    parts = []
+    for pos in range(0, size, chunk):
+        block = view[pos : pos + chunk]
+        following = view[pos + 1 : pos + chunk + 1]
+        if len(following) < len(block):
+            following = np.append(following, np.uint8(0))
+        ends = np.flatnonzero((block == LF) | ((block == CR) & (following != LF)))
+        if len(ends):
+            parts.append(ends + pos)
+    if size and (not parts or parts[-1][-1] != size - 1):
+        parts.append(np.array([size], dtype=np.int64))
+    if not parts:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(parts).astype(np.int64, copy=False)
+
+
+class GcodeStream:
+    """
+    Indexed, lazily decoded lines of g-code data.
+    """
+
+    def __init__(self, data, pathname=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.pathname = pathname
+        self._data = data
+        self._file = None
+        self._ends = line_ends(data)
+
+    @classmethod
+    def open(cls, pathname):
+        """
+        Memory-map the given file. The stream owns the file until it is closed.
+        """
+        f = open(pathname, "rb")
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            data = b""
+        stream = cls(data, pathname=pathname)
+        stream._file = f
+        return stream
+
+    def close(self):
+        if self._file is None:
+            return
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        self._file = None
+        self._data = b""
+        self._ends = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __iter__(self):
+        for index in range(len(self._ends)):
+            yield self.line(index)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({len(self)} lines, {self.size} bytes)"
+
+    @property
+    def size(self):
+        return len(self._data)
+
+    def offset(self, index):
+        """
+        Byte offset of the start of the given line, the size of the data past the last line.
+        """
+        if index <= 0:
+            return 0
+        if index >= len(self._ends):
+            return self.size
+        return int(self._ends[index - 1]) + 1
+
+    def line_of(self, offset):
+        """
+        Index of the line containing the given byte offset.
+        """
+        return int(np.searchsorted(self._ends, offset, side="left"))
+
+    def line(self, index):
+        """
+        Decoded line without its line ending.
+        """
+        start = self.offset(index)
+        end = int(self._ends[index])
+        return str(self._data[start:end], "utf-8", errors="ignore").rstrip("\r\n")
+
+    def lines(self, start, stop):
+        """
+        Decoded lines from start up to stop, read with a single slice of the data.
+        """
+        stop = min(stop, len(self._ends))
+        if start >= stop:
+            return []
+        chunk = bytes(self._data[self.offset(start) : self.offset(stop)])
+        return [
+            str(line, "utf-8", errors="ignore")
+            for line in LINE_END_RE.split(chunk, stop - start)[: stop - start]
+        ]
@@ -2,10 +2,16 @@
 GCode Loader
 
 Provides the required hooks to register the loader of gcode file.
+
+Files larger than STREAM_SIZE are memory-mapped rather than read, so the blob refers to the file on disk and jobs
+stream their lines from it.
 """
 
+import mmap
 import os
 
+STREAM_SIZE = 1 << 22
+
 
 class GCodeLoader:
     @staticmethod
@@ -16,7 +22,12 @@ class GCodeLoader:
     def load(kernel, service, pathname, **kwargs):
         basename = os.path.basename(pathname)
         with open(pathname, "rb") as f:
+            if os.fstat(f.fileno()).st_size > STREAM_SIZE:
+                # The map stays valid after the file is closed.
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
             op_branch = service.get(type="branch ops")
-            op_branch.add(data=f.read(), data_type="grbl", type="blob", label=basename)
+            op_branch.add(data=data, data_type="grbl", type="blob", label=basename)
             kernel.root.close(basename)
             return True
@@ -5,6 +5,8 @@ Mock Connection for GRBL
 The mock connection is used for debug and research purposes. And simply prints the data sent to it rather than engaging
 any hardware.
 """
+import threading
+
 from meerk40t.grbl.emulator import GRBLEmulator
 
 
@@ -14,6 +16,8 @@ class MockConnection:
         self.controller = controller
         self.laser = None
         self.read_buffer = bytearray()
+        # The emulator replies from the sending thread, read from the receiving thread.
+        self._read_cond = threading.Condition()
         self.emulator = GRBLEmulator(
             device=None, units_to_device_matrix=service.view.matrix, reply=self.add_read
         )
@@ -23,18 +27,29 @@ class MockConnection:
         return self.laser is not None
 
     def add_read(self, code):
-        self.read_buffer += bytes(code, encoding="raw_unicode_escape")
+        with self._read_cond:
+            self.read_buffer += bytes(code, encoding="raw_unicode_escape")
+            self._read_cond.notify()
 
     def read(self):
-        f = self.read_buffer.find(b"\n")
-        if f == -1:
-            return None
-        response = self.read_buffer[:f]
-        self.read_buffer = self.read_buffer[f + 1 :]
+        with self._read_cond:
+            f = self.read_buffer.find(b"\n")
+            if f == -1:
+                return None
+            response = self.read_buffer[:f]
+            del self.read_buffer[: f + 1]
         str_response = str(response, "raw_unicode_escape")
         str_response = str_response.strip()
         return str_response
 
+    def wait_read(self, timeout):
+        """
+        Wait until a complete response is available or the timeout passed.
+        """
+        with self._read_cond:
+            if self.read_buffer.find(b"\n") == -1:
+                self._read_cond.wait(timeout)
+
     def write(self, line: str):
         self.emulator.write(line)
 
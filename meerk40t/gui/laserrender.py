@@ -1173,8 +1173,22 @@ class LaserRender:
         if cache is None:
             # We need to establish the cache
             try:
-                image = node.active_image
-                matrix = node.active_matrix
+                max_allowed = node.max_allowed
+            except AttributeError:
+                max_allowed = 2048
+            preview = False
+            try:
+                if node._processing and node._processed_image is None:
+                    # Still processing: draw a reduced-resolution source image
+                    # meanwhile, which is not cached.
+                    image, matrix = node.preview_image(max_allowed)
+                    preview = image is not None
+            except AttributeError:
+                pass
+            try:
+                if not preview:
+                    image = node.active_image
+                    matrix = node.active_matrix
                 bounds = 0, 0, image.width, image.height
                 if matrix is not None and not matrix.is_identity():
                     gc.ConcatTransform(
@@ -1183,18 +1197,15 @@ class LaserRender:
             except AttributeError:
                 pass
 
-            try:
-                max_allowed = node.max_allowed
-            except AttributeError:
-                max_allowed = 2048
             try:
                 cache = self.make_thumbnail(
                     image,
                     maximum=max_allowed,
                     alphablack=draw_mode & DRAW_MODE_ALPHABLACK == 0,
                 )
-                node._cache_width, node._cache_height = image.size
-                node._cache = cache
+                if not preview:
+                    node._cache_width, node._cache_height = image.size
+                    node._cache = cache
             except Exception:
                 pass
 
@@ -891,7 +891,7 @@ class CropPanel(wx.Panel):
         self._no_update = True
         self.node = node
         self.op = None
-        self._width, self._height = self.node.image.size
+        self._width, self._height = self.node.image_size
         for ctl in (self.slider_left, self.slider_right):
             ctl.SetMin(0)
             ctl.SetMax(self._width)
@@ -905,7 +905,7 @@ class CropPanel(wx.Panel):
             if n.get("name") == "crop":
                 self.op = n
                 break
-        self._width, self._height = self.node.image.size
+        self._width, self._height = self.node.image_size
         self.label_info.SetLabel(f"{self._width} x {self._height} px")
         if self.op is not None:
             flag = self.op["enable"]
@@ -998,7 +998,7 @@ class CropPanel(wx.Panel):
     def on_button_reset(self, event):
         if self.node is None:
             return
-        w, h = self.node.image.size
+        w, h = self.node.image_size
         self._bounds = [0, 0, w, h]
         self._cropleft = 0
         self._cropright = 0
@@ -1012,7 +1012,7 @@ class CropPanel(wx.Panel):
         flag = self.check_enable_crop.GetValue()
         if flag:
             if self.op is None:
-                w, h = self.node.image.size
+                w, h = self.node.image_size
                 self._width = w
                 self._height = h
                 self.op = {"name": "crop", "enable": True, "bounds": [0, 0, w, h]}
@@ -1,5 +1,5 @@
 """
-This function and the associated _DIFFUSION_MAPS taken from hitherdither. MIT License.
+This function and the associated DIFFUSION_MAPS taken from hitherdither. MIT License.
 :copyright: 2016-2017 by hbldh <henrik.blidh@nedomkull.com>
 https://github.com/hbldh/hitherdither
 
@@ -11,7 +11,9 @@ import numpy as np
 from PIL import Image
 
 try:
-    from numba import njit
+    from numba import njit, prange
+
+    HAS_NUMBA = True
 except Exception as e:
     # Jit does not exist, add a dummy decorator and continue.
     # print (f"Encountered error: {e}")
@@ -21,100 +23,12 @@ except Exception as e:
 
         return inner
 
-"""
-_DIFFUSION_MAPS = {
-    "legacy-floyd-steinberg": (
-        (1, 0, 7 / 16),
-        (-1, 1, 3 / 16),
-        (0, 1, 5 / 16),
-        (1, 1, 1 / 16),
-    ),
-    "shiau-fan": (
-        (1, 0, .5),
-        (-2, 1, 1/8),
-        (-1, 1, 1/8),
-        (0, 1, 2/8),
-    ),
-    "shiau-fan-2": (
-        (1, 0, 0.5),
-        (-3, 1, 1/16),
-        (-2, 1, 1/16),
-        (1, 1, 2/16),
-        (0, 1, 4/16),
-    ),
-    "atkinson": (
-        (1, 0, 1 / 8),
-        (2, 0, 1 / 8),
-        (-1, 1, 1 / 8),
-        (0, 1, 1 / 8),
-        (1, 1, 1 / 8),
-        (0, 2, 1 / 8),
-    ),
-    "jarvis-judice-ninke": (
-        (1, 0, 7 / 48),
-        (2, 0, 5 / 48),
-        (-2, 1, 3 / 48),
-        (-1, 1, 5 / 48),
-        (0, 1, 7 / 48),
-        (1, 1, 5 / 48),
-        (2, 1, 3 / 48),
-        (-2, 2, 1 / 48),
-        (-1, 2, 3 / 48),
-        (0, 2, 5 / 48),
-        (1, 2, 3 / 48),
-        (2, 2, 1 / 48),
-    ),
-    "stucki": (
-        (1, 0, 8 / 42),
-        (2, 0, 4 / 42),
-        (-2, 1, 2 / 42),
-        (-1, 1, 4 / 42),
-        (0, 1, 8 / 42),
-        (1, 1, 4 / 42),
-        (2, 1, 2 / 42),
-        (-2, 2, 1 / 42),
-        (-1, 2, 2 / 42),
-        (0, 2, 4 / 42),
-        (1, 2, 2 / 42),
-        (2, 2, 1 / 42),
-    ),
-    "burkes": (
-        (1, 0, 8 / 32),
-        (2, 0, 4 / 32),
-        (-2, 1, 2 / 32),
-        (-1, 1, 4 / 32),
-        (0, 1, 8 / 32),
-        (1, 1, 4 / 32),
-        (2, 1, 2 / 32),
-    ),
-    "sierra3": (
-        (1, 0, 5 / 32),
-        (2, 0, 3 / 32),
-        (-2, 1, 2 / 32),
-        (-1, 1, 4 / 32),
-        (0, 1, 5 / 32),
-        (1, 1, 4 / 32),
-        (2, 1, 2 / 32),
-        (-1, 2, 2 / 32),
-        (0, 2, 3 / 32),
-        (1, 2, 2 / 32),
-    ),
-    "sierra2": (
-        (1, 0, 4 / 16),
-        (2, 0, 3 / 16),
-        (-2, 1, 1 / 16),
-        (-1, 1, 2 / 16),
-        (0, 1, 3 / 16),
-        (1, 1, 2 / 16),
-        (2, 1, 1 / 16),
-    ),
-    "sierra-2-4a": (
-        (1, 0, 2 / 4),
-        (-1, 1, 1 / 4),
-        (0, 1, 1 / 4),
-    ),
-}
-"""
+    prange = range
+    HAS_NUMBA = False
+
+# Images smaller than this are dithered sequentially, even if multiple cores are available.
+PARALLEL_THRESHOLD = 1000000
+
 
 @njit("f4[:,:](f4[:,:])", nogil=True)
 def floyd_steinberg(image):
@@ -353,6 +267,239 @@ def shiau_fan_2(image):
                     image[xn, yn] += error * diffusion_coefficient
     return image
 
+DIFFUSION_MAPS = {
+    "legacy-floyd-steinberg": (
+        (1, 0, 7 / 16),
+        (-1, 1, 3 / 16),
+        (0, 1, 5 / 16),
+        (1, 1, 1 / 16),
+    ),
+    "atkinson": (
+        (1, 0, 1 / 8),
+        (2, 0, 1 / 8),
+        (-1, 1, 1 / 8),
+        (0, 1, 1 / 8),
+        (1, 1, 1 / 8),
+        (0, 2, 1 / 8),
+    ),
+    "jarvis-judice-ninke": (
+        (1, 0, 7 / 48),
+        (2, 0, 5 / 48),
+        (-2, 1, 3 / 48),
+        (-1, 1, 5 / 48),
+        (0, 1, 7 / 48),
+        (1, 1, 5 / 48),
+        (2, 1, 3 / 48),
+        (-2, 2, 1 / 48),
+        (-1, 2, 3 / 48),
+        (0, 2, 5 / 48),
+        (1, 2, 3 / 48),
+        (2, 2, 1 / 48),
+    ),
+    "stucki": (
+        (1, 0, 8 / 42),
+        (2, 0, 4 / 42),
+        (-2, 1, 2 / 42),
+        (-1, 1, 4 / 42),
+        (0, 1, 8 / 42),
+        (1, 1, 4 / 42),
+        (2, 1, 2 / 42),
+        (-2, 2, 1 / 42),
+        (-1, 2, 2 / 42),
+        (0, 2, 4 / 42),
+        (1, 2, 2 / 42),
+        (2, 2, 1 / 42),
+    ),
+    "burkes": (
+        (1, 0, 8 / 32),
+        (2, 0, 4 / 32),
+        (-2, 1, 2 / 32),
+        (-1, 1, 4 / 32),
+        (0, 1, 8 / 32),
+        (1, 1, 4 / 32),
+        (2, 1, 2 / 32),
+    ),
+    "sierra3": (
+        (1, 0, 5 / 32),
+        (2, 0, 3 / 32),
+        (-2, 1, 2 / 32),
+        (-1, 1, 4 / 32),
+        (0, 1, 5 / 32),
+        (1, 1, 4 / 32),
+        (2, 1, 2 / 32),
+        (-1, 2, 2 / 32),
+        (0, 2, 3 / 32),
+        (1, 2, 2 / 32),
+    ),
+    "sierra2": (
+        (1, 0, 4 / 16),
+        (2, 0, 3 / 16),
+        (-2, 1, 1 / 16),
+        (-1, 1, 2 / 16),
+        (0, 1, 3 / 16),
+        (1, 1, 2 / 16),
+        (2, 1, 1 / 16),
+    ),
+    "sierra-2-4a": (
+        (1, 0, 2 / 4),
+        (-1, 1, 1 / 4),
+        (0, 1, 1 / 4),
+    ),
+    "shiau-fan": (
+        (1, 0, 0.5),
+        (-2, 1, 1 / 8),
+        (-1, 1, 1 / 8),
+        (0, 1, 2 / 8),
+    ),
+    "shiau-fan-2": (
+        (1, 0, 0.5),
+        (-3, 1, 1 / 16),
+        (-2, 1, 1 / 16),
+        (1, 1, 2 / 16),
+        (0, 1, 4 / 16),
+    ),
+}
+
+
+class Wavefront:
+    """
+    Gather formulation of an error diffusion map.
+
+    Instead of pushing the error of a pixel to its neighbours, every pixel pulls the
+    errors of the pixels diffusing into it. The sources are visited in scan order,
+    so the accumulated values match the sequential algorithm exactly.
+
+    A pixel only depends on pixels of previous lines up to `lag - 1` pixels ahead,
+    so all pixels on a skewed diagonal x + lag * y = t are independent and can be
+    processed at once.
+    """
+
+    def __init__(self, diff_map):
+        # Scan order of sources: earlier lines first, within a line left to right.
+        ordered = sorted(diff_map, key=lambda e: (-e[1], -e[0]))
+        self.dx = np.array([e[0] for e in ordered], dtype=np.int64)
+        self.dy = np.array([e[1] for e in ordered], dtype=np.int64)
+        self.coefficients = [e[2] for e in ordered]
+        self.coefficient_array = np.array(self.coefficients, dtype=np.float64)
+        lag = 1
+        for dx, dy, _c in diff_map:
+            if dy > 0:
+                lag = max(lag, (-dx) // dy + 1)
+        self.lag = lag
+        self.pad_x = int(np.max(np.abs(self.dx)))
+        self.pad_y = int(np.max(self.dy))
+
+    def error_buffer(self, lines, width):
+        """
+        Zero padded error buffer, so sources outside the image contribute nothing.
+        """
+        return np.zeros(
+            (lines + self.pad_y, width + 2 * self.pad_x), dtype=np.float32
+        )
+
+    def diffuse(self, data):
+        """
+        Vectorized NumPy diffusion processing one diagonal at a time.
+
+        @param data: float32 array, lines along the second axis like the sequential functions
+        @return: dithered data
+        """
+        lines_view = np.ascontiguousarray(data.T)
+        lines, width = lines_view.shape
+        if lines == 0 or width == 0:
+            return data
+        err = self.error_buffer(lines, width)
+        stride = err.shape[1]
+        flat_err = err.reshape(-1)
+        flat_image = lines_view.reshape(-1)
+        offsets = self.dy * stride + self.dx
+        lag = self.lag
+        all_lines = np.arange(lines, dtype=np.int64)
+        for t in range(width + lag * (lines - 1)):
+            y0 = max(0, (t - width + lag) // lag)
+            y1 = min(lines - 1, t // lag)
+            ys = all_lines[y0 : y1 + 1]
+            xs = t - lag * ys
+            err_index = (ys + self.pad_y) * stride + (xs + self.pad_x)
+            image_index = ys * width + xs
+            acc = flat_image[image_index]
+            for offset, c in zip(offsets, self.coefficients):
+                # Products and sums in double precision, stored as single, like the compiled functions.
+                acc = (acc + flat_err[err_index - offset].astype(np.float64) * c).astype(
+                    np.float32
+                )
+            out = np.where(acc <= 127, np.float32(0), np.float32(255))
+            flat_image[image_index] = out
+            flat_err[err_index] = acc - out
+        data[...] = lines_view.T
+        return data
+
+    def diffuse_parallel(self, data):
+        """
+        Numba compiled multi-core diffusion, processing the pixels of every diagonal in parallel.
+        """
+        lines_view = np.ascontiguousarray(data.T)
+        lines, width = lines_view.shape
+        if lines == 0 or width == 0:
+            return data
+        err = self.error_buffer(lines, width)
+        _wavefront_parallel(
+            lines_view,
+            err,
+            self.dx,
+            self.dy,
+            self.coefficient_array,
+            self.lag,
+            self.pad_x,
+            self.pad_y,
+        )
+        data[...] = lines_view.T
+        return data
+
+
+@njit(parallel=True, nogil=True)
+def _wavefront_parallel(image, err, dxs, dys, coefficients, lag, pad_x, pad_y):
+    lines, width = image.shape
+    for t in range(width + lag * (lines - 1)):
+        y0 = max(0, (t - width + lag) // lag)
+        y1 = min(lines - 1, t // lag)
+        for y in prange(y0, y1 + 1):
+            x = t - lag * y
+            acc = image[y, x]
+            for k in range(len(dxs)):
+                acc = np.float32(
+                    acc + err[y + pad_y - dys[k], x + pad_x - dxs[k]] * coefficients[k]
+                )
+            out = np.float32(0.0) if acc <= 127 else np.float32(255.0)
+            image[y, x] = out
+            err[y + pad_y, x + pad_x] = acc - out
+
+
+_wavefronts = {}
+
+
+def wavefront(method):
+    """
+    Cached Wavefront for the given diffusion method.
+    """
+    front = _wavefronts.get(method)
+    if front is None:
+        front = Wavefront(DIFFUSION_MAPS[method])
+        _wavefronts[method] = front
+    return front
+
+
+def _use_parallel(data):
+    if not HAS_NUMBA or data.size < PARALLEL_THRESHOLD:
+        return False
+    try:
+        import numba
+
+        return numba.get_num_threads() > 1
+    except Exception:
+        return False
+
+
 def bayer_dither(image):
     """
     4x4 variant
@@ -376,12 +523,14 @@ def bayer_dither(image):
     height, width = image.shape
     matrix_size = bayer_matrix.shape[0]
 
-    # Repeat the Bayer matrix to match the image size
-    tiled_bayer_matrix = np.tile(bayer_matrix, (height // matrix_size + 1, width // matrix_size + 1))
-    tiled_bayer_matrix = tiled_bayer_matrix[:height, :width]
+    # Scale the 64 matrix levels to centered thresholds within 0..255 and index the
+    # matrix by pixel position instead of tiling it.
+    thresholds = bayer_matrix.astype(np.float32) * (256 / 64) + 2
+    rows = (np.arange(height) % matrix_size)[:, None]
+    columns = (np.arange(width) % matrix_size)[None, :]
 
     # Apply Bayer matrix dithering
-    return np.where(image > tiled_bayer_matrix, 255, 0)
+    return np.where(image > thresholds[rows, columns], 255, 0).astype(np.float32)
 
 def bayer_blue_dither(image):
     """
@@ -416,7 +565,19 @@ function_map = {
     "bayer-blue": bayer_blue_dither,
 }
 
-def dither(image, method="Legacy-Floyd-Steinberg"):
+def dither(image, method="Legacy-Floyd-Steinberg", parallel=None):
+    """
+    Dither the image with the given method.
+
+    Error diffusion uses the compiled sequential functions if numba is available, or
+    the parallel wavefront variant for large images when multiple cores are available.
+    Without numba the vectorized NumPy wavefront is used.
+
+    @param image: PIL image
+    @param method: dither method name
+    @param parallel: force (True) or prevent (False) the parallel variant, None decides
+    @return: "F" image with values 0 and 255
+    """
     method = method.lower()
     dither_function = function_map.get(method)
     if not dither_function:
@@ -424,6 +585,17 @@ def dither(image, method="Legacy-Floyd-Steinberg"):
 
     diff = image.convert("F")
     data = np.array(diff).astype(np.float32)
-    dither_function(data)
+    if method in DIFFUSION_MAPS:
+        if parallel is None:
+            parallel = _use_parallel(data)
+        if parallel and HAS_NUMBA:
+            wavefront(method).diffuse_parallel(data)
+        elif HAS_NUMBA:
+            dither_function(data)
+        else:
+            wavefront(method).diffuse(data)
+    else:
+        # Ordered dithers return a new array.
+        data = np.asarray(dither_function(data), dtype=np.float32)
     diff = Image.fromarray(data)
     return diff
@@ -0,0 +1,190 @@
+"""
+Process-wide cache of processed raster images.
+
+ImageNode.process_image() performs grayscale conversion, the affine transform,
+cropping, the raster script, masking and dithering. Those results only depend on
+the source image and a handful of parameters, so they are kept in a byte-budgeted
+LRU cache keyed by a digest of the source image and those parameters.
+
+The translation of the main matrix does not alter the processed pixels, only the
+offset of the actualized matrix. Translation-only changes are therefore served
+from the cache by re-offsetting the cached actualized matrix.
+
+Usage:
+    The global instance `image_cache` is used by ImageNode. The budget can be
+    changed with `image_cache.set_budget(bytes)` or the `imagecache` console
+    command, `image_cache.stats()` reports hit/miss statistics.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from copy import copy
+
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+def image_digest(image):
+    """
+    Calculate a content digest for the given PIL image. The digest covers the
+    pixel data as well as the mode, size, palette and transparency information.
+
+    @param image: PIL image
+    @return: hex digest string
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{image.mode};{image.width};{image.height}".encode("utf-8"))
+    if image.mode in ("P", "PA"):
+        palette = image.getpalette()
+        if palette is not None:
+            h.update(bytes(palette))
+    transparency = image.info.get("transparency")
+    if transparency is not None:
+        h.update(repr(transparency).encode("utf-8"))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def image_bytes(image):
+    """
+    Estimated memory footprint of a PIL image in bytes.
+    """
+    if image is None:
+        return 0
+    if image.mode == "1":
+        return ((image.width + 7) // 8) * image.height
+    return image.width * image.height * len(image.getbands())
+
+
+class ProcessedImageCache:
+    """
+    LRU cache of processed images limited by an overall byte budget.
+
+    Every entry stores the processed image, the actualized matrix, the
+    translation of the main matrix it was calculated for and any node
+    attributes the processing altered (eg. a dither operation of a raster
+    script changing the dither settings).
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.translated_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, e=0.0, f=0.0):
+        """
+        Retrieve a cached result.
+
+        @param key: cache key as provided by ImageNode
+        @param e: x-translation of the current main matrix
+        @param f: y-translation of the current main matrix
+        @return: (actualized_matrix, image, attributes) or None if not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            image, matrix, ce, cf, attributes, nbytes = entry
+            self.hits += 1
+            matrix = copy(matrix)
+            dx = e - ce
+            dy = f - cf
+            if dx != 0 or dy != 0:
+                self.translated_hits += 1
+                matrix.post_translate(dx, dy)
+            return matrix, image, dict(attributes)
+
+    def put(self, key, image, matrix, e=0.0, f=0.0, attributes=None):
+        """
+        Store a processed result. Results larger than the whole budget are not
+        stored at all, otherwise least recently used entries are evicted until
+        the new entry fits.
+
+        @param key: cache key as provided by ImageNode
+        @param image: processed image
+        @param matrix: actualized matrix
+        @param e: x-translation of the main matrix used for processing
+        @param f: y-translation of the main matrix used for processing
+        @param attributes: node attributes after processing
+        @return: whether the entry was stored
+        """
+        nbytes = image_bytes(image)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[5]
+            if nbytes > self.budget:
+                return False
+            self._entries[key] = (
+                image,
+                copy(matrix),
+                e,
+                f,
+                dict(attributes) if attributes else dict(),
+                nbytes,
+            )
+            self.size += nbytes
+            self._shrink()
+            return True
+
+    def _shrink(self):
+        while self.size > self.budget and self._entries:
+            _key, entry = self._entries.popitem(last=False)
+            self.size -= entry[5]
+            self.evictions += 1
+
+    def set_budget(self, budget):
+        """
+        Change the byte budget of the cache, evicting entries if required.
+        """
+        with self._lock:
+            self.budget = max(0, int(budget))
+            self._shrink()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.translated_hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict with entry count, byte usage, budget and hit/miss counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "translated_hits": self.translated_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+image_cache = ProcessedImageCache()
@@ -0,0 +1,523 @@
+"""
+Fused image adjustment pipeline.
+
+Raster scripts and chained image adjustments are executed operation by operation,
+each step materializing a full new image. The ImagePipeline compiles a list of
+operations into stages instead:
+
+* Per-pixel steps (tone curves, gamma, contrast, brightness, invert, threshold) are
+  folded into one combined 256 entry lookup table. Steps depending on image
+  statistics (contrast uses the image mean) get the histogram of their input by
+  remapping the source histogram through the preceding lookup tables.
+* Neighbourhood steps (blur, sharpen, edge enhance, unsharp mask) are executed on
+  horizontal bands, which are cropped with enough halo rows to provide identical
+  results to the full image filters.
+
+Consecutive fusable stages form a segment, which is executed band-wise in a single
+sweep writing into one output image. Operations that can't be fused (crop,
+halftone, auto contrast, dither) are barriers and are delegated to a fallback.
+
+The results are identical to applying the operations one by one. The execution time
+of every stage is recorded in `timings`.
+"""
+
+import time
+from math import ceil
+
+# Operations the pipeline can express as stages.
+FUSABLE_OPERATIONS = (
+    "tone",
+    "gamma",
+    "contrast",
+    "enhance",
+    "invert",
+    "threshold",
+    "edge_enhance",
+    "unsharp_mask",
+    "filter",
+)
+
+FILTER_TYPES = {
+    "blur": "BLUR",
+    "sharpen": "SHARPEN",
+    "smooth": "SMOOTH",
+    "smooth_more": "SMOOTH_MORE",
+    "edge_enhance": "EDGE_ENHANCE",
+    "edge_enhance_more": "EDGE_ENHANCE_MORE",
+    "detail": "DETAIL",
+    "emboss": "EMBOSS",
+    "find_edges": "FIND_EDGES",
+    "contour": "CONTOUR",
+}
+
+DEFAULT_BAND_HEIGHT = 512
+
+
+def _ramp(values=None):
+    """
+    256x1 "L" image containing the given values, by default every gray level.
+    """
+    from PIL import Image
+
+    if values is None:
+        values = range(256)
+    return Image.frombytes("L", (256, 1), bytes(values))
+
+
+def _crimp(px):
+    px = int(round(px))
+    if px < 0:
+        return 0
+    if px > 255:
+        return 255
+    return px
+
+
+def gamma_lut(factor):
+    if factor == 0:
+        return [0] * 256
+    return [_crimp(pow(i / 255, (1.0 / factor)) * 255) for i in range(256)]
+
+
+def tone_lut(op):
+    from meerk40t.core.node.elem_image import ImageNode
+
+    tone_values = op["values"]
+    if op["type"] == "spline":
+        spline = ImageNode.spline(tone_values)
+    else:
+        tone_values = [q for q in tone_values if q is not None]
+        spline = ImageNode.line(tone_values)
+    if len(spline) < 256:
+        spline.extend([255] * (256 - len(spline)))
+    if len(spline) > 256:
+        spline = spline[:256]
+    return spline
+
+
+def threshold_lut(threshold_min, threshold_max):
+    threshold_min, threshold_max = (
+        min(threshold_min, threshold_max),
+        max(threshold_max, threshold_min),
+    )
+    divide = (threshold_max - threshold_min) / 255.0
+
+    def thresh(g):
+        if threshold_min >= g:
+            return 0
+        elif threshold_max < g:
+            return 255
+        else:
+            return int(round((g - threshold_min) * divide))
+
+    return [thresh(g) for g in range(256)]
+
+
+def histogram_mean(histogram):
+    """
+    Mean as calculated by ImageEnhance.Contrast for an image with this histogram.
+    """
+    from PIL import ImageStat
+
+    return int(ImageStat.Stat(histogram).mean[0] + 0.5)
+
+
+def _blend_lut(base, factor, degenerate):
+    """
+    Lookup table of Image.blend(degenerate, image, factor) applied to an image whose
+    pixels were already mapped by base.
+    """
+    from PIL import Image
+
+    blended = Image.blend(Image.new("L", (256, 1), degenerate), _ramp(base), factor)
+    return list(blended.tobytes())
+
+
+def _filter_halo(image_filter):
+    """
+    Rows of support required above and below a band for an exact result.
+    """
+    from PIL import ImageFilter
+
+    if isinstance(image_filter, ImageFilter.UnsharpMask):
+        # Three box blur passes, each reading less than radius + 1 neighbours.
+        return 3 * (int(ceil(image_filter.radius)) + 2)
+    size = image_filter.filterargs[0]
+    return max(size) // 2
+
+
+class LutStage:
+    """
+    Per-pixel stage. The lut callable receives the lut of the preceding stages
+    and the histogram of the segment input (or None) and returns the new lut.
+    """
+
+    def __init__(self, name, lut, needs_histogram=False):
+        self.name = name
+        self.lut = lut
+        self.needs_histogram = needs_histogram
+
+
+class FilterStage:
+    """
+    Neighbourhood stage, requires halo rows above and below each band.
+    """
+
+    def __init__(self, name, image_filter):
+        self.name = name
+        self.filter = image_filter
+        self.halo = _filter_halo(image_filter)
+
+
+def _remap_histogram(histogram, lut):
+    remapped = [0] * 256
+    for value, count in enumerate(histogram):
+        if count:
+            remapped[lut[value]] += count
+    return remapped
+
+
+def _contrast_stage(name, contrast_factor, brightness_factor=None):
+    def build(base, histogram):
+        mean = histogram_mean(_remap_histogram(histogram, base))
+        lut = _blend_lut(base, contrast_factor, mean)
+        if brightness_factor is not None:
+            lut = _blend_lut(lut, brightness_factor, 0)
+        return lut
+
+    return LutStage(name, build, needs_histogram=True)
+
+
+def _table_stage(name, table):
+    return LutStage(name, lambda base, histogram: [table[v] for v in base])
+
+
+def _tone_stage(name, table):
+    def build(base, histogram):
+        # Tone is applied as palette image, so out of range values get clipped.
+        image = _ramp(base).convert("P").point(table)
+        if image.mode != "L":
+            image = image.convert("L")
+        return list(image.tobytes())
+
+    return LutStage(name, build)
+
+
+def _brightness_stage(name, factor):
+    return LutStage(name, lambda base, histogram: _blend_lut(base, factor, 0))
+
+
+def create_stage(op):
+    """
+    Create a pipeline stage for the given operation.
+
+    @param op: operation dictionary as used by raster scripts
+    @return: stage, False if the operation is disabled, None if it can't be fused.
+    """
+    from PIL import ImageFilter
+
+    name = op.get("name")
+    if name not in FUSABLE_OPERATIONS:
+        return None
+    try:
+        if "enable" in op and not op["enable"]:
+            return False
+        if name == "tone":
+            if op["values"] is None:
+                return False
+            return _tone_stage(name, tone_lut(op))
+        if name == "gamma":
+            if op["factor"] is None:
+                return False
+            return _table_stage(name, gamma_lut(float(op["factor"])))
+        if name == "contrast":
+            if op["contrast"] is None or op["brightness"] is None:
+                return False
+            return _contrast_stage(
+                name,
+                (op["contrast"] + 128.0) / 128.0,
+                (op["brightness"] + 128.0) / 128.0,
+            )
+        if name == "enhance":
+            if op["type"] == "contrast":
+                return _contrast_stage("contrast", float(op["factor"]))
+            if op["type"] == "brightness":
+                return _brightness_stage("brightness", float(op["factor"]))
+            return None
+        if name == "invert":
+            return _table_stage(name, [255 - i for i in range(256)])
+        if name == "threshold":
+            return _table_stage(
+                name, threshold_lut(float(op["min"]), float(op["max"]))
+            )
+        if name == "edge_enhance":
+            return FilterStage(name, ImageFilter.EDGE_ENHANCE)
+        if name == "unsharp_mask":
+            if op["percent"] is None or op["radius"] is None or op["threshold"] is None:
+                return False
+            return FilterStage(
+                name,
+                ImageFilter.UnsharpMask(
+                    radius=op["radius"],
+                    percent=op["percent"],
+                    threshold=op["threshold"],
+                ),
+            )
+        if name == "filter":
+            return FilterStage(
+                op["type"], getattr(ImageFilter, FILTER_TYPES[op["type"]])
+            )
+    except (KeyError, TypeError, ValueError):
+        return None
+    return None
+
+
+def apply_operation(image, op):
+    """
+    Unfused execution of a single fusable operation, used for images that are not
+    in mode "L". Raster script operations keep their original mode requirements.
+    """
+    from PIL import ImageEnhance, ImageFilter, ImageOps
+
+    name = op.get("name")
+    try:
+        if "enable" in op and not op["enable"]:
+            return image
+        if name == "tone":
+            if op["values"] is not None and image.mode == "L":
+                image = image.convert("P").point(tone_lut(op))
+                if image.mode != "L":
+                    image = image.convert("L")
+        elif name == "gamma":
+            if op["factor"] is not None and image.mode == "L":
+                image = image.point(gamma_lut(float(op["factor"])))
+        elif name == "contrast":
+            if op["contrast"] is not None and op["brightness"] is not None:
+                c = (op["contrast"] + 128.0) / 128.0
+                image = ImageEnhance.Contrast(image).enhance(c)
+                b = (op["brightness"] + 128.0) / 128.0
+                image = ImageEnhance.Brightness(image).enhance(b)
+        elif name == "enhance":
+            if op["type"] == "contrast":
+                image = ImageEnhance.Contrast(image).enhance(float(op["factor"]))
+            elif op["type"] == "brightness":
+                image = ImageEnhance.Brightness(image).enhance(float(op["factor"]))
+        elif name == "invert":
+            image = ImageOps.invert(image)
+        elif name == "threshold":
+            image = image.convert("L").point(
+                threshold_lut(float(op["min"]), float(op["max"]))
+            )
+        elif name == "edge_enhance":
+            if image.mode == "P":
+                image = image.convert("L")
+            image = image.filter(filter=ImageFilter.EDGE_ENHANCE)
+        elif name == "unsharp_mask":
+            if (
+                op["percent"] is not None
+                and op["radius"] is not None
+                and op["threshold"] is not None
+            ):
+                image = image.filter(
+                    ImageFilter.UnsharpMask(
+                        radius=op["radius"],
+                        percent=op["percent"],
+                        threshold=op["threshold"],
+                    )
+                )
+        elif name == "filter":
+            if image.mode == "P":
+                image = image.convert("RGBA")
+            image = image.filter(getattr(ImageFilter, FILTER_TYPES[op["type"]]))
+    except (KeyError, ValueError, OSError):
+        pass
+    return image
+
+
+ADJUST_STEPS = (
+    "contrast <factor>",
+    "brightness <factor>",
+    "gamma <factor>",
+    "invert",
+    "threshold <min> <max>",
+    "unsharp <radius> <percent> <threshold>",
+    "autocontrast <cutoff>",
+) + tuple(FILTER_TYPES)
+
+
+def parse_adjust_script(script):
+    """
+    Parse an adjustment chain as used by the `image adjust` command into operations.
+    Steps are separated by ";" or ",", eg. "contrast 1.5; gamma 1.2; sharpen".
+
+    @raise ValueError: for unknown steps or bad parameters.
+    """
+    operations = []
+    for step in script.replace(",", ";").split(";"):
+        args = step.split()
+        if not args:
+            continue
+        name = args[0].lower()
+        if name in ("contrast", "brightness"):
+            operations.append(
+                {"name": "enhance", "type": name, "factor": float(args[1])}
+            )
+        elif name == "gamma":
+            operations.append({"name": "gamma", "enable": True, "factor": float(args[1])})
+        elif name == "invert":
+            operations.append({"name": "invert"})
+        elif name == "threshold":
+            operations.append(
+                {"name": "threshold", "min": float(args[1]), "max": float(args[2])}
+            )
+        elif name == "unsharp":
+            operations.append(
+                {
+                    "name": "unsharp_mask",
+                    "enable": True,
+                    "radius": float(args[1]),
+                    "percent": int(args[2]),
+                    "threshold": int(args[3]),
+                }
+            )
+        elif name == "autocontrast":
+            operations.append(
+                {
+                    "name": "auto_contrast",
+                    "enable": True,
+                    "cutoff": float(args[1]) if len(args) > 1 else 0,
+                }
+            )
+        elif name in FILTER_TYPES:
+            operations.append({"name": "filter", "type": name})
+        else:
+            raise ValueError(name)
+    return operations
+
+
+class ImagePipeline:
+    """
+    Compiled list of image operations.
+
+    @param operations: list of operation dictionaries.
+    @param fallback: callable(image, op) returning the processed image, used for the
+        operations that can't be fused.
+    @param band_height: number of rows processed at once for neighbourhood stages.
+    """
+
+    def __init__(self, operations, fallback=None, band_height=DEFAULT_BAND_HEIGHT):
+        self.fallback = fallback
+        self.band_height = max(1, int(band_height))
+        self.steps = []
+        self.timings = []
+        self._compile(operations)
+
+    def _compile(self, operations):
+        segment = None
+        for op in operations:
+            stage = create_stage(op)
+            if stage is False:
+                continue
+            if stage is None:
+                segment = None
+                self.steps.append(("op", op))
+                continue
+            if segment is not None and isinstance(stage, LutStage):
+                if stage.needs_histogram and any(
+                    isinstance(s, FilterStage) for s, _ in segment
+                ):
+                    # Histogram of a filtered image isn't known ahead of time.
+                    segment = None
+            if segment is None:
+                segment = []
+                self.steps.append(("segment", segment))
+            segment.append((stage, op))
+
+    def __len__(self):
+        return len(self.steps)
+
+    def _timing(self, name, seconds):
+        self.timings.append((name, seconds))
+
+    def __call__(self, image):
+        self.timings = []
+        for kind, step in self.steps:
+            if kind == "op":
+                t = time.perf_counter()
+                if self.fallback is not None:
+                    image = self.fallback(image, step)
+                self._timing(step.get("name"), time.perf_counter() - t)
+            elif image.mode != "L":
+                for _stage, op in step:
+                    t = time.perf_counter()
+                    image = apply_operation(image, op)
+                    self._timing(op.get("name"), time.perf_counter() - t)
+            else:
+                image = self._run_segment(image, step)
+        return image
+
+    def _groups(self, image, segment):
+        """
+        Merge consecutive lut stages of the segment into combined lookup tables.
+        """
+        groups = []
+        histogram = None
+        lut = None
+        names = []
+        leading = True
+        for stage, _op in segment:
+            if isinstance(stage, FilterStage):
+                if lut is not None:
+                    groups.append(("+".join(names), lut))
+                    lut = None
+                    names = []
+                groups.append((stage.name, stage))
+                leading = False
+                continue
+            if stage.needs_histogram and histogram is None:
+                histogram = image.histogram() if leading else None
+            base = lut if lut is not None else list(range(256))
+            lut = stage.lut(base, histogram)
+            names.append(stage.name)
+        if lut is not None:
+            groups.append(("+".join(names), lut))
+        return groups
+
+    def _run_segment(self, image, segment):
+        from PIL import Image
+
+        t = time.perf_counter()
+        groups = self._groups(image, segment)
+        compile_time = time.perf_counter() - t
+        halo = sum(g.halo for _, g in groups if isinstance(g, FilterStage))
+        timings = [0.0] * len(groups)
+        if compile_time and groups:
+            timings[0] += compile_time
+        width, height = image.size
+        if halo == 0 or height <= self.band_height:
+            for i, (name, group) in enumerate(groups):
+                t = time.perf_counter()
+                image = self._apply_group(image, group)
+                timings[i] += time.perf_counter() - t
+        else:
+            output = Image.new("L", image.size)
+            for y0 in range(0, height, self.band_height):
+                y1 = min(height, y0 + self.band_height)
+                top = max(0, y0 - halo)
+                bottom = min(height, y1 + halo)
+                band = image.crop((0, top, width, bottom))
+                for i, (name, group) in enumerate(groups):
+                    t = time.perf_counter()
+                    band = self._apply_group(band, group)
+                    timings[i] += time.perf_counter() - t
+                output.paste(band.crop((0, y0 - top, width, y1 - top)), (0, y0))
+            image = output
+        for (name, group), seconds in zip(groups, timings):
+            self._timing(name, seconds)
+        return image
+
+    @staticmethod
+    def _apply_group(image, group):
+        if isinstance(group, FilterStage):
+            return image.filter(group.filter)
+        return image.point(group)
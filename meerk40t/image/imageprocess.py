@@ -0,0 +1,253 @@
+"""
+Image processing service running ImageNode processing in worker processes.
+
+ImageNode processing (grayscale, affine transform, raster script, dithering) is
+CPU-bound Python and PIL code. When it runs on a thread it holds the GIL for long
+stretches which freezes the UI and stalls the other kernel threads. This service
+hands the source image over to a process pool via shared memory and returns the
+processed image and the actualized matrix.
+
+The service is registered as "image/process" by the imagetools plugin. Requests
+can be cancelled while they wait for their result, stale results are dropped.
+If the pool cannot be used (disabled, broken, unpicklable data) the caller falls
+back to the thread-based processing.
+"""
+
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# Node attributes that determine the processing result.
+PROCESS_ATTRIBUTES = (
+    "invert",
+    "dither",
+    "dither_type",
+    "red",
+    "green",
+    "blue",
+    "lightness",
+    "operations",
+    "is_depthmap",
+    "depth_resolution",
+)
+
+# Node attributes that may be altered by the processing itself.
+RESULT_ATTRIBUTES = ("dither", "dither_type", "is_depthmap")
+
+
+def _attach_segment(name):
+    """
+    Attach to an existing shared memory segment. The segment is owned (and
+    unlinked) by the requesting process.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def process_in_worker(request):
+    """
+    Worker entry point. Rebuilds the source image from shared memory, performs
+    the ImageNode processing and returns the picklable result.
+
+    @param request: dict created by ImageProcessService.submit
+    @return: (matrix values, mode, size, image bytes, attributes)
+    """
+    from PIL import Image
+
+    from meerk40t.core.node.elem_image import ImageNode
+    from meerk40t.svgelements import Matrix
+
+    segment = _attach_segment(request["segment"])
+    try:
+        image = Image.frombytes(
+            request["mode"],
+            request["size"],
+            bytes(segment.buf[: request["length"]]),
+        )
+    finally:
+        segment.close()
+    if request["palette"] is not None:
+        image.putpalette(request["palette"], rawmode=request["palette_mode"])
+    if request["transparency"] is not None:
+        image.info["transparency"] = request["transparency"]
+    node = ImageNode(
+        image=image,
+        matrix=Matrix(*request["matrix"]),
+        comingfromcopy=True,
+        **request["attributes"],
+    )
+    matrix, processed = node._process_image(
+        request["step_x"], request["step_y"], crop=request["crop"]
+    )
+    attributes = {attr: getattr(node, attr) for attr in RESULT_ATTRIBUTES}
+    return (
+        (matrix.a, matrix.b, matrix.c, matrix.d, matrix.e, matrix.f),
+        processed.mode,
+        processed.size,
+        processed.tobytes(),
+        attributes,
+    )
+
+
+class ImageProcessService:
+    """
+    Process pool performing ImageNode processing. The pool is created lazily on
+    the first request and shut down with the kernel.
+    """
+
+    def __init__(self, workers=0, poll=0.05):
+        self.workers = workers
+        self.poll = poll
+        self._executor = None
+        self._lock = threading.Lock()
+        self._failed = False
+        # Futures submitted and not yet done, cancelled on shutdown.
+        self._pending = set()
+
+    @property
+    def available(self):
+        return self.workers > 0 and not self._failed and shared_memory is not None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, ValueError, NotImplementedError):
+                    self._failed = True
+                    return None
+            return self._executor
+
+    def set_workers(self, workers):
+        """
+        Change the number of worker processes, 0 disables the service.
+        """
+        self.shutdown()
+        self.workers = max(0, int(workers))
+        self._failed = False
+
+    def shutdown(self):
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            pending = list(self._pending)
+            self._pending.clear()
+        # Executor.shutdown(cancel_futures=True) requires Python 3.9.
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def submit(self, node, step_x, step_y, crop):
+        """
+        Submit the processing of the given node.
+
+        @return: future or None if the request could not be submitted.
+        """
+        if not self.available or node.image is None:
+            return None
+        executor = self._get_executor()
+        if executor is None:
+            return None
+        image = node.image
+        palette = None
+        palette_mode = "RGB"
+        if image.mode in ("P", "PA") and image.palette is not None:
+            palette_mode = image.palette.mode
+            palette = image.getpalette(palette_mode)
+        data = image.tobytes()
+        try:
+            segment = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        except (OSError, ValueError):
+            return None
+        length = len(data)
+        segment.buf[:length] = data
+        del data
+        request = {
+            "segment": segment.name,
+            "length": length,
+            "mode": image.mode,
+            "size": image.size,
+            "palette": palette,
+            "palette_mode": palette_mode,
+            "transparency": image.info.get("transparency"),
+            "matrix": (
+                node.matrix.a,
+                node.matrix.b,
+                node.matrix.c,
+                node.matrix.d,
+                node.matrix.e,
+                node.matrix.f,
+            ),
+            "attributes": {attr: getattr(node, attr) for attr in PROCESS_ATTRIBUTES},
+            "step_x": step_x,
+            "step_y": step_y,
+            "crop": crop,
+        }
+
+        def release(_future):
+            with self._lock:
+                self._pending.discard(_future)
+            try:
+                segment.close()
+                segment.unlink()
+            except (OSError, FileNotFoundError):
+                pass
+
+        try:
+            future = executor.submit(process_in_worker, request)
+        except Exception:
+            # Broken pool or shutdown in progress.
+            release(None)
+            self._failed = True
+            return None
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(release)
+        return future
+
+    def process(self, node, step_x, step_y, crop, cancelled=None):
+        """
+        Process the node in a worker process and wait for the result.
+
+        @param cancelled: callable, returning True if the request became stale.
+        @return: (actualized_matrix, image, attributes) or None if the service
+            could not process the request and the caller should fall back.
+        @raise CancelledError: if the request was cancelled.
+        """
+        from PIL import Image
+
+        from meerk40t.svgelements import Matrix
+
+        future = self.submit(node, step_x, step_y, crop)
+        if future is None:
+            return None
+        while True:
+            if cancelled is not None and cancelled():
+                future.cancel()
+                raise CancelledError
+            try:
+                result = future.result(timeout=self.poll)
+                break
+            except FutureTimeoutError:
+                continue
+            except CancelledError:
+                raise
+            except Exception:
+                # Worker crashed or the pool is broken.
+                return None
+        matrix, mode, size, data, attributes = result
+        image = Image.frombytes(mode, size, data)
+        return Matrix(*matrix), image, attributes
+
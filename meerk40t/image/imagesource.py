@@ -0,0 +1,442 @@
+"""
+Lazy image payloads for ImageNode.
+
+A decoded camera photo needs tens to hundreds of megabytes, a project with many of
+them can easily exceed the available memory. ImageNode therefore does not keep the
+decoded PIL image itself, but an ImageSource which holds one of:
+
+- the original compressed file bytes (png, jpeg, webp...), decoded on demand, or
+- an in-memory image created by processing (pinned) which is spilled to a
+  memory-mapped raw cache file once it is evicted from the decoded image cache.
+
+Decoded images live in a byte-budgeted LRU shared by all sources. Images which
+are still referenced elsewhere are found again through a weak reference, so they
+are never decoded twice. Previews (thumbnails, display while processing) can be
+created from reduced-resolution decodes using PIL draft() and reduce().
+
+Images returned by ImageSource.image() must be treated as immutable, modified
+images have to be assigned to the node again.
+
+Usage:
+    The global instance `decoded_images` holds the decoded images. The budget can
+    be changed with `decoded_images.set_budget(bytes)` or the `imagecache -d`
+    console command.
+"""
+
+import io
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+from .imagecache import image_bytes, image_digest
+
+DEFAULT_DECODE_BUDGET = 512 * 1024 * 1024
+
+# Formats which are kept as original compressed bytes. Formats requiring external
+# programs to decode (eps) are decoded once and kept as raw data instead.
+LAZY_FORMATS = ("PNG", "JPEG", "MPO", "WEBP", "GIF", "TIFF", "BMP", "ICO")
+
+
+class DecodedImageCache:
+    """
+    LRU of decoded images of ImageSources limited by an overall byte budget.
+
+    Evicted sources without a compressed or mapped payload are spilled to a raw
+    cache file before their image is released.
+    """
+
+    def __init__(self, budget=DEFAULT_DECODE_BUDGET):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, source):
+        return source in self._entries
+
+    def get(self, source):
+        with self._lock:
+            entry = self._entries.get(source)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(source)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, source):
+        """
+        Decoded image if cached, without affecting the LRU order or statistics.
+        """
+        with self._lock:
+            entry = self._entries.get(source)
+            return None if entry is None else entry[0]
+
+    def put(self, source, image):
+        """
+        Store the decoded image of the given source.
+
+        @return: whether the image was stored, images larger than the whole budget are not.
+        """
+        nbytes = image_bytes(image)
+        with self._lock:
+            old = self._entries.pop(source, None)
+            if old is not None:
+                self.size -= old[1]
+            if nbytes > self.budget:
+                evicted = [source]
+                stored = False
+            else:
+                self._entries[source] = (image, nbytes)
+                self.size += nbytes
+                evicted = self._shrink()
+                stored = True
+        for s in evicted:
+            s.release()
+        return stored
+
+    def discard(self, source):
+        with self._lock:
+            entry = self._entries.pop(source, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def _shrink(self):
+        evicted = []
+        while self.size > self.budget and self._entries:
+            source, entry = self._entries.popitem(last=False)
+            self.size -= entry[1]
+            self.evictions += 1
+            evicted.append(source)
+        return evicted
+
+    def set_budget(self, budget):
+        """
+        Change the byte budget of the cache, evicting entries if required.
+        """
+        with self._lock:
+            self.budget = max(0, int(budget))
+            evicted = self._shrink()
+        for s in evicted:
+            s.release()
+
+    def clear(self):
+        with self._lock:
+            evicted = list(self._entries)
+            self._entries.clear()
+            self.size = 0
+        for s in evicted:
+            s.release()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict with entry count, byte usage, budget and hit/miss counters.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+decoded_images = DecodedImageCache()
+
+
+def _close_mapping(mapping, fp):
+    try:
+        mapping.close()
+    except (BufferError, ValueError):
+        # Still exported by a zero-copy image, released with it.
+        pass
+    fp.close()
+
+
+class ImageSource:
+    """
+    Payload of a single source image, see module documentation.
+    """
+
+    def __init__(self, image=None, data=None, mode=None, size=None, transpose=False):
+        """
+        @param image: decoded image to pin, spilled to a raw cache file on eviction.
+        @param data: compressed file bytes.
+        @param mode: mode of the decoded image, required for data.
+        @param size: size of the decoded image, required for data.
+        @param transpose: apply the exif orientation after decoding the data.
+        """
+        self._lock = threading.RLock()
+        self._image = image
+        self._weak = None
+        self._data = data
+        self._transpose = transpose
+        self._mapping = None
+        self._raw = None
+        self._digest = None
+        self._previews = {}
+        if image is not None:
+            mode = image.mode
+            size = image.size
+        self.mode = mode
+        self.size = tuple(size) if size is not None else (0, 0)
+        if image is not None:
+            decoded_images.put(self, image)
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        Create a source for the given PIL image. Images which were opened from a
+        file or buffer, but not decoded yet, keep their compressed bytes.
+        """
+        if image is None:
+            return None
+        data = _compressed_bytes(image)
+        if data is not None:
+            source = cls(data=data, mode=image.mode, size=image.size)
+            source._remember(image)
+            return source
+        return cls(image=image)
+
+    @classmethod
+    def from_file(cls, pathname, image=None, transpose=True):
+        """
+        Create a source for the given image file keeping its compressed bytes.
+
+        @param pathname: image file
+        @param image: decoded (and transposed) image of the file, if already available
+        @param transpose: apply the exif orientation on decode
+        """
+        with open(pathname, "rb") as f:
+            data = f.read()
+        if image is None:
+            image = cls._decode_data(data, transpose)
+        source = cls(data=data, mode=image.mode, size=image.size, transpose=transpose)
+        source._remember(image)
+        return source
+
+    def __repr__(self):
+        if self._data is not None:
+            payload = f"{len(self._data)} compressed bytes"
+        elif self._mapping is not None:
+            payload = "mapped"
+        else:
+            payload = "pinned"
+        return f"{self.__class__.__name__}({self.mode}, {self.size[0]}x{self.size[1]}, {payload})"
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    @property
+    def nbytes(self):
+        """
+        Bytes of the payload kept in memory, excluding the decoded image cache.
+        """
+        if self._data is not None:
+            return len(self._data)
+        if self._image is not None:
+            return image_bytes(self._image)
+        return 0
+
+    @property
+    def is_compressed(self):
+        return self._data is not None
+
+    @property
+    def is_mapped(self):
+        return self._mapping is not None
+
+    @property
+    def digest(self):
+        """
+        Content digest, for compressed payloads calculated from the file bytes.
+        """
+        if self._digest is None:
+            if self._data is not None:
+                import hashlib
+
+                h = hashlib.blake2b(digest_size=20)
+                h.update(f"{self._transpose};".encode("utf-8"))
+                h.update(self._data)
+                self._digest = h.hexdigest()
+            else:
+                self._digest = image_digest(self.image())
+        return self._digest
+
+    def image(self):
+        """
+        Decoded image at full resolution.
+        """
+        image = decoded_images.get(self)
+        if image is not None:
+            return image
+        with self._lock:
+            image = self._image
+            if image is None and self._weak is not None:
+                image = self._weak()
+            if image is None:
+                image = self._decode()
+            self._remember(image)
+        decoded_images.put(self, image)
+        return image
+
+    def preview(self, maximum):
+        """
+        Reduced-resolution image, reduced by a power of two until its larger side
+        does not exceed maximum.
+
+        @return: image, scale of the preview relative to the full image
+        """
+        width, height = self.size
+        factor = 1
+        while max(width, height) > maximum * factor:
+            factor *= 2
+        if factor == 1:
+            return self.image(), 1.0
+        preview = self._previews.get(factor)
+        if preview is None:
+            full = decoded_images.peek(self)
+            if full is None and self._weak is not None:
+                full = self._weak()
+            if full is None:
+                full = self._image
+            if full is None and self._data is not None:
+                preview = self._decode_draft(factor)
+            else:
+                if full is None:
+                    full = self.image()
+                preview = full.reduce(factor)
+            self._previews[factor] = preview
+        return preview, preview.width / float(width)
+
+    def release(self):
+        """
+        Called when the decoded image was evicted. Pinned images are spilled to a
+        raw cache file and unpinned.
+        """
+        with self._lock:
+            if self._image is None:
+                return
+            if self._data is None and self._mapping is None:
+                self._spill(self._image)
+            if self._data is not None or self._mapping is not None:
+                self._remember(self._image)
+                self._image = None
+
+    def _remember(self, image):
+        try:
+            self._weak = weakref.ref(image)
+        except TypeError:
+            self._weak = None
+
+    def _spill(self, image):
+        data = image.tobytes()
+        if not data:
+            return
+        try:
+            fp = tempfile.TemporaryFile(prefix="mk-image-")
+            fp.write(data)
+            fp.flush()
+            mapping = mmap.mmap(fp.fileno(), len(data), access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        palette = None
+        palette_mode = "RGB"
+        if image.mode in ("P", "PA") and image.palette is not None:
+            palette_mode = image.palette.mode
+            palette = image.getpalette(palette_mode)
+        self._raw = (image.mode, image.size, palette, palette_mode, dict(image.info))
+        self._mapping = mapping
+        weakref.finalize(self, _close_mapping, mapping, fp)
+
+    def _decode(self):
+        if self._data is not None:
+            return self._decode_data(self._data, self._transpose)
+        from PIL import Image
+
+        mode, size, palette, palette_mode, info = self._raw
+        image = Image.frombuffer(mode, size, self._mapping, "raw", mode, 0, 1)
+        if palette is not None:
+            image.putpalette(palette, rawmode=palette_mode)
+        image.info.update(info)
+        return image
+
+    @staticmethod
+    def _decode_data(data, transpose):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        if transpose:
+            from PIL import ImageOps
+
+            image = ImageOps.exif_transpose(image)
+        return image
+
+    def _decode_draft(self, factor):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(self._data))
+        # JPEG decodes at 1/2, 1/4, 1/8 scale, a no-op for other formats.
+        image.draft(image.mode, (image.width // factor, image.height // factor))
+        image.load()
+        if self._transpose:
+            from PIL import ImageOps
+
+            image = ImageOps.exif_transpose(image)
+        w, h = self.size
+        remaining = max(1, int(round(image.width / (w / factor))))
+        if remaining > 1:
+            image = image.reduce(remaining)
+        return image
+
+
+def _compressed_bytes(image):
+    """
+    Compressed file bytes of a lazily opened, not yet decoded PIL image.
+    """
+    if getattr(image, "format", None) not in LAZY_FORMATS:
+        return None
+    try:
+        state = image.__dict__
+        if state.get("_im", state.get("im")) is not None or image.tell() != 0:
+            # Decoded (and possibly modified) or not the first frame.
+            return None
+    except (AttributeError, EOFError):
+        return None
+    fp = getattr(image, "fp", None)
+    if fp is not None and hasattr(fp, "getvalue"):
+        return fp.getvalue()
+    filename = getattr(image, "filename", None)
+    if filename and isinstance(filename, (str, bytes, os.PathLike)):
+        try:
+            with open(filename, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+    return None
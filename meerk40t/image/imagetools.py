@@ -16,6 +16,10 @@ from meerk40t.svgelements import Color, Matrix, Path
 from meerk40t.core.geomstr import Geomstr
 
 from .dither import dither
+from .imagecache import image_cache
+from .imagepipeline import ADJUST_STEPS, ImagePipeline, parse_adjust_script
+from .imageprocess import ImageProcessService
+from .imagesource import LAZY_FORMATS, ImageSource, decoded_images
 
 try:
     import cv2
@@ -105,7 +109,7 @@ def do_innerwhite(
     import cv2
 
     def org_bounds(node):
-        image_width, image_height = node.image.size
+        image_width, image_height = node.image_size
         matrix = node.matrix
         x0, y0 = matrix.point_in_matrix_space((0, 0))
         x1, y1 = matrix.point_in_matrix_space((image_width - 1, image_height - 1))
@@ -711,6 +715,11 @@ def plugin(kernel, lifecycle=None):
         kernel.register("raster_script/Xin", RasterScripts.raster_script_xin())
         kernel.register("raster_script/Newsy", RasterScripts.raster_script_newsy())
         kernel.register("raster_script/Simple", RasterScripts.raster_script_simple())
+    if lifecycle == "shutdown":
+        service = kernel.lookup("image/process")
+        if service is not None:
+            service.shutdown()
+        return
     if lifecycle != "register":
         return
     _ = kernel.translation
@@ -784,6 +793,92 @@ def plugin(kernel, lifecycle=None):
     kernel.register_choices("preferences", choices)
 
     context = kernel.root
+    context.setting(int, "image_cache_budget", 256)
+    image_cache.set_budget(context.image_cache_budget * 1024 * 1024)
+    context.setting(int, "image_decode_budget", 512)
+    decoded_images.set_budget(context.image_decode_budget * 1024 * 1024)
+
+    @context.console_option(
+        "budget", "b", type=int, help=_("Cache budget in megabytes")
+    )
+    @context.console_option(
+        "decoded",
+        "d",
+        type=int,
+        help=_("Budget for decoded source images in megabytes"),
+    )
+    @context.console_option(
+        "clear", "c", type=bool, action="store_true", help=_("Clear the cache")
+    )
+    @context.console_command(
+        "imagecache",
+        help=_("imagecache: show or configure the processed image cache"),
+    )
+    def imagecache(channel, _, budget=None, decoded=None, clear=False, **kwargs):
+        if budget is not None:
+            context.image_cache_budget = max(0, budget)
+            image_cache.set_budget(context.image_cache_budget * 1024 * 1024)
+        if decoded is not None:
+            context.image_decode_budget = max(0, decoded)
+            decoded_images.set_budget(context.image_decode_budget * 1024 * 1024)
+        if clear:
+            image_cache.clear()
+            image_cache.reset_stats()
+        stats = image_cache.stats()
+        channel(
+            _("Processed images: {entries}, {used:.1f} MB of {budget:.1f} MB").format(
+                entries=stats["entries"],
+                used=stats["bytes"] / (1024 * 1024),
+                budget=stats["budget"] / (1024 * 1024),
+            )
+        )
+        channel(
+            _(
+                "Hits: {hits} ({translated} translated), misses: {misses}, evictions: {evictions}, ratio: {ratio:.1%}"
+            ).format(
+                hits=stats["hits"],
+                translated=stats["translated_hits"],
+                misses=stats["misses"],
+                evictions=stats["evictions"],
+                ratio=stats["hit_ratio"],
+            )
+        )
+        stats = decoded_images.stats()
+        channel(
+            _("Decoded images: {entries}, {used:.1f} MB of {budget:.1f} MB").format(
+                entries=stats["entries"],
+                used=stats["bytes"] / (1024 * 1024),
+                budget=stats["budget"] / (1024 * 1024),
+            )
+        )
+
+    # Off by default until the worker processes are tested in the frozen builds.
+    context.setting(int, "image_process_workers", 0)
+    process_service = ImageProcessService(workers=context.image_process_workers)
+    kernel.register("image/process", process_service)
+
+    @context.console_option(
+        "workers",
+        "w",
+        type=int,
+        help=_("Number of worker processes, 0 processes images in threads"),
+    )
+    @context.console_command(
+        "imageprocess",
+        help=_("imageprocess: show or configure image processing workers"),
+    )
+    def imageprocess(channel, _, workers=None, **kwargs):
+        if workers is not None:
+            context.image_process_workers = max(0, workers)
+            process_service.set_workers(context.image_process_workers)
+        if process_service.available:
+            channel(
+                _("Images are processed by {count} worker processes").format(
+                    count=process_service.workers
+                )
+            )
+        else:
+            channel(_("Images are processed in threads"))
 
     def update_image_node(node):
         if hasattr(node, "node"):
@@ -811,8 +906,9 @@ def plugin(kernel, lifecycle=None):
                     name = str(node)
                     if len(name) > 50:
                         name = name[:50] + "..."
+                    width, height = node.image_size
                     channel(
-                        f"{i}: ({node.image.width}, {node.image.height}) {node.image.mode}, {name}"
+                        f"{i}: ({width}, {height}) {node.image_source.mode}, {name}"
                     )
                     i += 1
                 channel(_("----------"))
@@ -1707,6 +1803,60 @@ def plugin(kernel, lifecycle=None):
         context.signal("element_property_update", data)
         return "image", data
 
+    @context.console_option(
+        "grayscale",
+        "g",
+        type=bool,
+        action="store_true",
+        help=_("Convert the image to grayscale first"),
+    )
+    @context.console_argument(
+        "script",
+        type=str,
+        help=_("Adjustment steps, eg. \"contrast 1.5; gamma 1.2; sharpen\""),
+    )
+    @context.console_command(
+        "adjust",
+        help=_("apply a chain of adjustments in a single pass"),
+        input_type="image",
+        output_type="image",
+    )
+    def image_adjust(command, channel, _, data, script=None, grayscale=False, **kwargs):
+        from PIL import ImageOps
+
+        if script is None:
+            channel(_("Steps: {steps}").format(steps=", ".join(ADJUST_STEPS)))
+            return "image", data
+        try:
+            operations = parse_adjust_script(script)
+        except (KeyError, IndexError, ValueError):
+            raise CommandSyntaxError(_("Invalid adjustment: {script}").format(script=script))
+
+        def fallback(img, op):
+            if op["name"] == "auto_contrast":
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("L")
+                img = ImageOps.autocontrast(img, cutoff=op["cutoff"])
+            return img
+
+        pipeline = ImagePipeline(operations, fallback=fallback)
+        for inode in data:
+            if inode.lock:
+                channel(
+                    _("Can't modify a locked image: {name}").format(name=str(inode))
+                )
+                continue
+            img = inode.image
+            if grayscale:
+                img = ImageOps.grayscale(inode.opaque_image)
+            inode.image = pipeline(img)
+            update_image_node(inode)
+            for name, seconds in pipeline.timings:
+                channel(f"{name}: {seconds * 1000:.1f}ms")
+            channel(_("Image adjusted."))
+        context.signal("element_property_update", data)
+        return "image", data
+
     @context.console_command(
         "equalize", help=_("equalize image"), input_type="image", output_type="image"
     )
@@ -3162,12 +3312,20 @@ class ImageLoader:
                 "Cannot load an .eps file without GhostScript installed"
             ) from e
         elements_service._loading_cleared = True
+        image_format = image.format
         try:
             from PIL import ImageOps
 
             image = ImageOps.exif_transpose(image)
         except ImportError:
             pass
+        source = image
+        if image_format in LAZY_FORMATS:
+            # Keep the compressed file, the decoded image is only cached.
+            try:
+                source = ImageSource.from_file(pathname, image=image)
+            except OSError:
+                pass
         _dpi = DEFAULT_PPI
         matrix = Matrix(f"scale({UNITS_PER_PIXEL})")
         try:
@@ -3201,7 +3359,7 @@ class ImageLoader:
         else:
             file_node = element_branch
         n = file_node.add(
-            image=image,
+            image=source,
             matrix=matrix,
             # type="image raster",
             type="elem image",
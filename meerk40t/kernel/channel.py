@@ -180,8 +180,34 @@ class Channel:
         send the data. With this you can have `channels` that do no work unless something in the kernel
         is listening for that data, or the data is being buffered.
         """
+        return self.active
+
+    @property
+    def active(self):
+        """
+        Whether messages sent to this channel reach anything, a watcher or the buffer. Callers can skip building
+        messages for inactive channels.
+        """
         return bool(self.watchers) or self.buffer_size != 0
 
+    def lazy(self, message, *args, **kwargs):
+        """
+        Sends the message formatted with the given args, formatting only if the channel is active.
+
+        The message is either a format string for str.format or a callable returning the message when called with
+        the args. Keyword arguments are passed on to the channel call.
+
+        @param message: format string or callable
+        @param args: values to format
+        """
+        if not self.watchers and self.buffer_size == 0:
+            return
+        if callable(message):
+            message = message(*args)
+        else:
+            message = message.format(*args)
+        self(message, **kwargs)
+
     def bbcode_to_ansi(self, text):
         return "".join(
             [
@@ -14,8 +14,12 @@ Deals with the sending of data via the registered connection, and processes some
 
 """
 
+import re
 import threading
 import time
+from collections import deque
+
+import numpy as np
 
 from meerk40t.ch341 import get_ch341_interface
 
@@ -68,15 +72,8 @@ def get_code_string_from_code(code):
 
 def convert_to_list_bytes(data):
     if isinstance(data, str):  # python 2
-        packet = [0] * 30
-        for i in range(0, 30):
-            packet[i] = ord(data[i])
-        return packet
-    else:
-        packet = [0] * 30
-        for i in range(0, 30):
-            packet[i] = data[i]
-        return packet
+        return [ord(c) for c in data[:30]]
+    return list(data[:30])
 
 
 crc_table = [
@@ -142,6 +139,66 @@ def onewire_crc_lookup(line):
     return crc
 
 
+CRC_TABLE = np.array(crc_table, dtype=np.uint8)
+
+# Bytes of the send buffer encoded into packets at once.
+ENCODE_CHUNK = 1 << 16
+
+# Bytes needing process_queue: pipe commands, padding repeats, serial challenges and AT commands.
+SPECIAL_RE = re.compile(rb"[-*&!#%\x18~A]")
+
+NEWLINE = 0x0A
+PADDING = ord("F")
+
+
+def onewire_crc_array(payloads):
+    """
+    Vectorized onewire_crc_lookup, the crc of every row of an (N, 30) uint8 array.
+    """
+    crc = np.zeros(len(payloads), dtype=np.uint8)
+    for i in range(30):
+        crc ^= payloads[:, i]
+        crc = CRC_TABLE[crc & 0x0F] ^ CRC_TABLE[16 + (crc >> 4)]
+    return crc
+
+
+def encode_packets(data):
+    """
+    Encodes the plain packets at the start of data, the way process_queue carves, pads and checksums them.
+
+    A packet is 30 bytes of data or ends with a line end, and is padded with F. Encoding stops before any packet
+    that process_queue handles specially (pipe commands, #, serial challenges, AT commands) and before a trailing
+    partial packet.
+
+    @param data: bytes-like egv data
+    @return: (N, 32) uint8 array of ready to send packets, and the number of data bytes each packet consumes
+    """
+    special = SPECIAL_RE.search(data)
+    stop = special.start() if special is not None else len(data)
+    view = np.frombuffer(data, dtype=np.uint8)[:stop]
+    ends = np.flatnonzero(view == NEWLINE) + 1
+    line_starts = np.concatenate(([0], ends))
+    line_ends = np.concatenate((ends, [stop]))
+    counts = (line_ends - line_starts + 29) // 30
+    line = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    starts = line_starts[line] + 30 * (np.arange(len(line)) - first[line])
+    stops = np.minimum(starts + 30, line_ends[line])
+    lengths = stops - starts
+    complete = (lengths == 30) | (view[np.maximum(stops - 1, 0)] == NEWLINE)
+    # Only the packet before the stop can be incomplete.
+    if len(complete) and not complete[-1]:
+        starts, stops, lengths = starts[:-1], stops[:-1], lengths[:-1]
+    content = lengths - (view[np.maximum(stops - 1, 0)] == NEWLINE)
+    column = np.arange(30)
+    index = np.minimum(starts[:, None] + column, max(stop - 1, 0))
+    packets = np.zeros((len(starts), 32), dtype=np.uint8)
+    if len(starts):
+        packets[:, 1:31] = np.where(column < content[:, None], view[index], PADDING)
+        packets[:, 31] = onewire_crc_array(packets[:, 1:31])
+    return packets, lengths
+
+
 class LihuiyuController:
     """
     K40 Controller controls the Lihuiyu boards sending any queued data to the USB when the signal is not busy.
@@ -168,6 +225,7 @@ class LihuiyuController:
         self._preempt = (
             bytearray()
         )  # Thread-unsafe preempt commands to prepend to the buffer.
+        self._packets = deque()  # Encoded packets at the start of the buffer, with their lengths.
         self._queue_lock = threading.Lock()
         self._preempt_lock = threading.Lock()
         self._main_lock = threading.Lock()
@@ -350,7 +408,7 @@ class LihuiyuController:
             self.realtime_write(bytes_to_write)
             return self
 
-        self.pipe_channel(f"write({str(bytes_to_write)})")
+        self.pipe_channel.lazy("write({})", bytes_to_write)
         with self._queue_lock:
             self._queue += bytes_to_write
         self.start()
@@ -380,7 +438,7 @@ class LihuiyuController:
             if queue_bytes:
                 self.write(queue_bytes)
             return self
-        self.pipe_channel(f"realtime_write({str(bytes_to_write)})")
+        self.pipe_channel.lazy("realtime_write({})", bytes_to_write)
         if b"*" in bytes_to_write:
             self.abort_waiting = True
         with self._preempt_lock:
@@ -450,6 +508,7 @@ class LihuiyuController:
 
     def abort(self):
         self._buffer = bytearray()
+        self._packets = deque()
         self._queue = bytearray()
         self._realtime_buffer = bytearray()
         self.abort_waiting = False
@@ -552,7 +611,9 @@ class LihuiyuController:
                 # The buffer and realtime buffers are empty. No packet creation possible.
                 self.context.laser_status = "idle"
                 with self._loop_cond:
-                    self._loop_cond.wait()
+                    # Data written since the transfer notified before we waited.
+                    if len(self._queue) == 0 and len(self._preempt) == 0:
+                        self._loop_cond.wait()
                 continue
 
             try:
@@ -625,12 +686,26 @@ class LihuiyuController:
                 self._queue.clear()
             self.update_buffer()
 
+        if not self._packets and len(self._buffer):
+            self._encode_buffer()
+
         if len(self._preempt):  # check for and prepend preempt
             with self._preempt_lock:
                 self._realtime_buffer += self._preempt
                 self._preempt.clear()
             self.update_buffer()
 
+    def _encode_buffer(self):
+        """
+        Encodes the plain packets at the start of the buffer ahead of sending, so that sending them is only the usb
+        handshake.
+        """
+        packets, lengths = encode_packets(bytes(self._buffer[:ENCODE_CHUNK]))
+        data = packets.tobytes()
+        self._packets.extend(
+            (data[32 * i : 32 * i + 32], length) for i, length in enumerate(lengths.tolist())
+        )
+
     def debug_packet(self, packet):
         """
         Debugging function to print the packet in a readable format.
@@ -664,6 +739,8 @@ class LihuiyuController:
         if len(self._realtime_buffer) > 0:
             buffer = self._realtime_buffer
             realtime = True
+        elif self._packets:
+            return self._process_packet()
         elif len(self._buffer) > 0:
             buffer = self._buffer
             realtime = False
@@ -743,72 +820,15 @@ class LihuiyuController:
         # print (f"Packet: {packet!r} (len={len(packet)})"    )
         if len(packet) == 30:
             # We have a sendable packet.
-            if not self.pre_ok:
-                self.wait_until_accepting_packets()
             if default_checksum:
                 packet = b"\x00" + packet + bytes([onewire_crc_lookup(packet)])
             else:
                 packet = b"\x00" + packet + bytes([onewire_crc_lookup(packet) ^ 0xFF])
-            # self.debug_packet(packet)
-            self.connection.write(packet)
-            self.pre_ok = False
-
-            # Packet is sent, trying to confirm.
-            status = 0
-            flawless = True
-            for attempts in range(500):
-                # We'll try to confirm this at 500 times.
-                try:
-                    self.update_status()
-                    # Make sure we have a valid status
-                    if self._status is not None and len(self._status) > 1:
-                        status = self._status[1]
-                    if attempts > 10:
-                        time.sleep(min(0.001 * attempts, 0.1))
-                except ConnectionError:
-                    # Errors are ignored, must confirm packet.
-                    flawless = False
-                    continue
-                if status == 0:
-                    # We did not read a status.
-                    continue
-                if status == STATUS_OK:
-                    # Packet was fine.
-                    self.pre_ok = True
-                    break
-                elif status == STATUS_BUSY:
-                    # Busy. We still do not have our confirmation. BUSY comes before ERROR or OK.
-                    continue
-                elif status == STATUS_ERROR:
-                    if not default_checksum:
-                        break
-                    self.context.rejected_count += 1
-                    if flawless:  # Packet was rejected. The CRC failed.
-                        return False
-                    else:
-                        # The channel had the error, assuming packet was actually good.
-                        break
-                elif status == STATUS_FINISH:
-                    # We finished. If we were going to wait for that, we no longer need to.
-                    if post_send_command == self.wait_finished:
-                        post_send_command = None
-                    continue  # This is not a confirmation.
-                elif status == STATUS_SERIAL_CORRECT_M3_FINISH:
-                    if post_send_command == self._confirm_serial:
-                        # We confirmed the serial number on the card.
-                        self.serial_confirmed = True
-                        post_send_command = None
-                        break
-                    elif post_send_command == self.wait_finished:
-                        # This is a STATUS_M3_FINISHED, we no longer wait.
-                        post_send_command = None
-                        continue
-
-            if status == 0:  # After 500 attempts we could only get status = 0.
-                raise ConnectionError  # Broken pipe. Could not confirm packet.
-            self.context.packet_count += (
-                1  # Our packet is confirmed or assumed confirmed.
+            accepted, post_send_command = self._send_packet(
+                packet, default_checksum, post_send_command
             )
+            if not accepted:
+                return False
         else:
             if len(packet) != 0:
                 # We could only generate a partial packet, throw it back
@@ -834,6 +854,102 @@ class LihuiyuController:
                 pass
         return True  # A packet was prepped and sent correctly.
 
+    def _send_packet(self, packet, default_checksum=True, post_send_command=None):
+        """
+        Writes the 32 byte packet to the connection and confirms it with the status.
+
+        @param packet: packet with its leading 0x00 and trailing crc.
+        @param default_checksum: whether the packet carries the correct crc.
+        @param post_send_command: command to be done after the packet, cleared if the status makes it unneeded.
+        @return: whether the packet was accepted, and the post send command.
+        """
+        if not self.pre_ok:
+            self.wait_until_accepting_packets()
+        self.connection.write(packet)
+        self.pre_ok = False
+
+        # Packet is sent, trying to confirm.
+        status = 0
+        flawless = True
+        for attempts in range(500):
+            # We'll try to confirm this at 500 times.
+            try:
+                self.update_status()
+                # Make sure we have a valid status
+                if self._status is not None and len(self._status) > 1:
+                    status = self._status[1]
+                if attempts > 10:
+                    time.sleep(min(0.001 * attempts, 0.1))
+            except ConnectionError:
+                # Errors are ignored, must confirm packet.
+                flawless = False
+                continue
+            if status == 0:
+                # We did not read a status.
+                continue
+            if status == STATUS_OK:
+                # Packet was fine.
+                self.pre_ok = True
+                break
+            elif status == STATUS_BUSY:
+                # Busy. We still do not have our confirmation. BUSY comes before ERROR or OK.
+                continue
+            elif status == STATUS_ERROR:
+                if not default_checksum:
+                    break
+                self.context.rejected_count += 1
+                if flawless:  # Packet was rejected. The CRC failed.
+                    return False, post_send_command
+                else:
+                    # The channel had the error, assuming packet was actually good.
+                    break
+            elif status == STATUS_FINISH:
+                # We finished. If we were going to wait for that, we no longer need to.
+                if post_send_command == self.wait_finished:
+                    post_send_command = None
+                continue  # This is not a confirmation.
+            elif status == STATUS_SERIAL_CORRECT_M3_FINISH:
+                if post_send_command == self._confirm_serial:
+                    # We confirmed the serial number on the card.
+                    self.serial_confirmed = True
+                    post_send_command = None
+                    break
+                elif post_send_command == self.wait_finished:
+                    # This is a STATUS_M3_FINISHED, we no longer wait.
+                    post_send_command = None
+                    continue
+
+        if status == 0:  # After 500 attempts we could only get status = 0.
+            raise ConnectionError  # Broken pipe. Could not confirm packet.
+        self.context.packet_count += (
+            1  # Our packet is confirmed or assumed confirmed.
+        )
+        return True, post_send_command
+
+    def _process_packet(self):
+        """
+        Sends the first of the encoded packets.
+
+        @return: queue process success.
+        """
+        if self.state in ("pause", "busy"):
+            return False  # Processing normal queue, PAUSE and BUSY apply.
+        # An abort() during the send replaces the queues, keep working on these.
+        packets = self._packets
+        buffer = self._buffer
+        self.open()
+        if not packets:
+            return False
+        packet, length = packets[0]
+        accepted, _ = self._send_packet(packet)
+        if not accepted:
+            return False
+        packets.popleft()
+        del buffer[:length]
+        self.update_packet(packet)
+        self.update_buffer()
+        return True
+
     def update_status(self):
         try:
             self._status = self.connection.get_status()
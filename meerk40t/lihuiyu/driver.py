@@ -10,6 +10,8 @@ selected output.
 import math
 import time
 
+import numpy as np
+
 from meerk40t.tools.zinglplotter import ZinglPlotter
 
 from ..core.cutcode.cubiccut import CubicCut
@@ -35,6 +37,7 @@ from ..device.basedevice import (
     PLOT_FINISH,
     PLOT_JOG,
     PLOT_RAPID,
+    PLOT_RASTER,
     PLOT_SETTING,
 )
 from ..core.geomstr import Geomstr
@@ -109,6 +112,21 @@ def lhymicro_distance(v):
     return dist + distance_lookup[v]
 
 
+distance_codes = np.array([lhymicro_distance(v) for v in range(255)], dtype=object)
+
+
+def lhymicro_distances(values):
+    """
+    lhymicro_distance() of every value in the given array of non-negative integers.
+
+    @return: object array of the distance codes.
+    """
+    codes = distance_codes[values % 255]
+    for i in np.flatnonzero(values >= 255):
+        codes[i] = lhymicro_distance(int(values[i]))
+    return codes
+
+
 class LihuiyuDriver(Parameters):
     """
     LihuiyuDriver provides Lihuiyu specific coding for elements and sends it to the backend
@@ -140,6 +158,7 @@ class LihuiyuDriver(Parameters):
         self.native_y = 0
 
         self.plot_planner = PlotPlanner(self.settings)
+        self.plot_planner.raster_blocks = True
         self.plot_attribute_update()
 
         self.plot_data = None
@@ -1014,9 +1033,6 @@ class LihuiyuDriver(Parameters):
             self._set_queue_status(current, total)
             while self.hold_work(0):
                 time.sleep(0.05)
-            sx = self.native_x
-            sy = self.native_y
-            # print("x: %s, y: %s -- c: %s, %s" % (str(x), str(y), str(sx), str(sy)))
             if self.state == DRIVER_STATE_RASTER and on >= 0.3 and on < 1:
                 on = 1
             else:
@@ -1067,32 +1083,141 @@ class LihuiyuDriver(Parameters):
                     else:
                         # Jog is performable and requested. # We have not flagged our direction or state.
                         self._jog_absolute(x, y, mode=self.service.opt_jog_mode)
+                elif on & PLOT_RASTER:  # Block of grouped raster plots.
+                    self._plotplanner_raster(*x)
                 continue
-            dx = x - sx
-            dy = y - sy
-            step_x = self.raster_step_x
-            step_y = self.raster_step_y
-            if step_x == 0 and step_y == 0:
-                # vector mode
-                self.program_mode()
-            else:
-                self.raster_mode()
-                if self._horizontal_major:
-                    # Horizontal Rastering.
-                    if dy != 0:
-                        self._h_switch_g(dy)
-                else:
-                    # Vertical Rastering.
-                    if dx != 0:
-                        self._v_switch_g(dx)
-                # Update dx, dy (if changed by switches)
-                dx = x - self.native_x
-                dy = y - self.native_y
-            self._goto_octent(dx, dy, on & 1)
+            self._plotplanner_plot(x, y, on)
         self.plot_data = None
         self._set_queue_status(0, 0)
         return False
 
+    def _plotplanner_plot(self, x, y, on):
+        """
+        Performs the cardinal movement to the given plot.
+        """
+        dx = x - self.native_x
+        dy = y - self.native_y
+        step_x = self.raster_step_x
+        step_y = self.raster_step_y
+        if step_x == 0 and step_y == 0:
+            # vector mode
+            self.program_mode()
+        else:
+            self.raster_mode()
+            if self._horizontal_major:
+                # Horizontal Rastering.
+                if dy != 0:
+                    self._h_switch_g(dy)
+            else:
+                # Vertical Rastering.
+                if dx != 0:
+                    self._v_switch_g(dx)
+            # Update dx, dy (if changed by switches)
+            dx = x - self.native_x
+            dy = y - self.native_y
+        self._goto_octent(dx, dy, on & 1)
+
+    def _plotplanner_raster(self, x, y, on):
+        """
+        Processes a block of plots, the same as processing each x, y, on plot in turn.
+
+        While rastering, the consecutive plots along the current scanline are encoded at once. Other plots, such as
+        the step to the next scanline, are performed one at a time.
+
+        @param x: array of x positions
+        @param y: array of y positions
+        @param on: array of on values
+        @return:
+        """
+        count = len(x)
+        # Plots are split into runs that stay on the same scanline.
+        row_breaks = np.append(np.flatnonzero(y[1:] != y[:-1]) + 1, count)
+        column_breaks = np.append(np.flatnonzero(x[1:] != x[:-1]) + 1, count)
+        i = 0
+        while i < count:
+            while self.hold_work(0):
+                time.sleep(0.05)
+            if self.plot_planner.abort:
+                return
+            horizontal = self._horizontal_major
+            if self.state == DRIVER_STATE_RASTER and (
+                y[i] == self.native_y if horizontal else x[i] == self.native_x
+            ):
+                breaks = row_breaks if horizontal else column_breaks
+                end = int(breaks[np.searchsorted(breaks, i, side="right")])
+                if horizontal:
+                    self._raster_scanline(x[i:end], on[i:end], True)
+                else:
+                    self._raster_scanline(y[i:end], on[i:end], False)
+                i = end
+                continue
+            plot_on = on[i]
+            if self.state == DRIVER_STATE_RASTER and 0.3 <= plot_on < 1:
+                plot_on = 1
+            else:
+                plot_on = int(plot_on)
+            self._plotplanner_plot(int(x[i]), int(y[i]), plot_on)
+            i += 1
+
+    def _raster_scanline(self, positions, on, horizontal):
+        """
+        Encodes the moves to the given positions along the current scanline, the same as _goto_octent() would.
+
+        @param positions: positions along the major axis
+        @param on: on values of the moves
+        @param horizontal: whether the major axis is horizontal
+        @return:
+        """
+        if horizontal:
+            delta = np.diff(positions, prepend=self.native_x)
+            forward_code, backward_code = self.CODE_RIGHT, self.CODE_LEFT
+            engaged = self.is_right, self.is_left
+        else:
+            delta = np.diff(positions, prepend=self.native_y)
+            forward_code, backward_code = self.CODE_BOTTOM, self.CODE_TOP
+            engaged = self.is_bottom, self.is_top
+        moved = delta != 0
+        if not np.all(moved):
+            delta = delta[moved]
+            on = on[moved]
+            if not len(delta):
+                return
+        on = np.where((on >= 0.3) & (on < 1), 1, on.astype(int)) & 1
+        forward = delta > 0
+        count = len(delta)
+        turn = np.empty(count, dtype=bool)
+        turn[0] = not engaged[0 if forward[0] else 1]
+        turn[1:] = forward[1:] != forward[:-1]
+        switch = np.empty(count, dtype=bool)
+        switch[0] = on[0] != self.laser
+        switch[1:] = on[1:] != on[:-1]
+        direction_codes = np.array([backward_code, forward_code], dtype=object)
+        laser_codes = np.array([self.CODE_LASER_OFF, self.CODE_LASER_ON], dtype=object)
+        codes = np.full((count, 3), b"", dtype=object)
+        codes[turn, 0] = direction_codes[forward[turn].astype(int)]
+        codes[switch, 1] = laser_codes[on[switch]]
+        codes[:, 2] = lhymicro_distances(np.abs(delta))
+
+        old_current = self.service.current
+        self(b"".join(codes.ravel().tolist()))
+        if horizontal:
+            self.native_x += int(np.sum(delta))
+            self._leftward = not forward[-1]
+            self._x_engaged = True
+            self._y_engaged = False
+        else:
+            self.native_y += int(np.sum(delta))
+            self._topward = not forward[-1]
+            self._x_engaged = False
+            self._y_engaged = True
+        self.laser = bool(on[-1])
+        new_current = self.service.current
+        if self._signal_updates:
+            self.service.signal(
+                "driver;position",
+                (old_current[0], old_current[1], new_current[0], new_current[1]),
+            )
+
     def _set_speed(self, speed=None):
         if self.speed != speed:
             self.speed = speed
@@ -8,6 +8,7 @@ for full details.
 
 import argparse
 import faulthandler
+import multiprocessing
 import os.path
 import sys
 
@@ -170,6 +171,8 @@ parser.add_argument(
 
 
 def run():
+    # Frozen builds start the image processing workers with this executable.
+    multiprocessing.freeze_support()
     argv = sys.argv[1:]
     args = parser.parse_args(argv)
 
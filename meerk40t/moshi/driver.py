@@ -289,6 +289,15 @@ class MoshiDriver(Parameters):
         """
         self.queue.append(plot)
 
+    def plot_batch(self, plots):
+        """
+        Gives the driver consecutive cutcode that should be plotted, as plot() does for each of them.
+
+        @param plots: list of cuts
+        @return:
+        """
+        self.queue.extend(plots)
+
     def plot_start(self):
         """
         Called at the end of plot commands to ensure the driver can deal with them all as a group.
@@ -2,10 +2,12 @@
 Newly Controller
 """
 
-import math
+import hashlib
 import struct
 import time
 
+import numpy as np
+
 from meerk40t.core.cutcode.rastercut import RasterCut
 from meerk40t.newly.mock_connection import MockConnection
 from meerk40t.newly.usb_connection import USBConnection
@@ -25,6 +27,7 @@ class NewlyController:
     - Power scaling from percentage values to device-specific ranges
     - Command buffering and execution with error handling
     - Real-time job management and mode switching
+    - Upload cache of the jobs stored in the file slots of the controller
 
     Device Constants:
     The class defines comprehensive constants for device-specific parameters including:
@@ -182,6 +185,8 @@ class NewlyController:
         self.paused = False
         self._command_buffer = []
         self._signal_updates = self.service.setting(bool, "signal_updates", True)
+        # Digests of the jobs stored in the files of the controller.
+        self._uploads = {}
 
     def __call__(self, cmd, *args, **kwargs):
         if isinstance(cmd, str):
@@ -237,6 +242,8 @@ class NewlyController:
             self.usb_log(f"Error during disconnect: {e}")
         self.connection = None
         self._status_code = self.STATUS_INITIALIZING
+        # The files of the controller are not known after reconnecting.
+        self._uploads.clear()
         # Translation hint _("Connection closed")
         self.service.signal("pipe;usb_status", "Connection closed")
         # Reset error to allow another attempt
@@ -289,6 +296,7 @@ class NewlyController:
                 self._status_code = self.connection.open(self._machine_index)
                 if self._status_code < 0:
                     raise ConnectionError
+                self._uploads.clear()
                 self.init_laser()
                 # Translation hint _("Connection established")
                 self.service.signal("pipe;usb_status", "Connection established") 
@@ -496,17 +504,49 @@ class NewlyController:
             self("ZED")
 
     def _execute_job(self):
+        """
+        Sends the buffered commands, the file they are written to no longer holds an uploaded job.
+
+        @return: whether the commands were sent.
+        """
         self.service.laser_status = "active"
         self("ZED")
+        header = self._command_buffer[0]
+        if header.startswith(b"ZZZFile"):
+            self._uploads.pop(int(header[7:]), None)
         cmd = b";".join(self._command_buffer) + b";"
+        sent = False
         try:
             self.connect_if_needed()
             self.connection.write(index=self._machine_index, data=cmd)
+            sent = True
         except ConnectionError as e:
             self.usb_log(f"Error executing job: {e}")
         self._command_buffer.clear()
         self._clear_settings()
         self.service.laser_status = "idle"
+        return sent
+
+    def _upload_job(self):
+        """
+        Uploads the job into the file of file_index, unless the file holds the same job already.
+
+        @return: whether the file holds the job.
+        """
+        file_index = int(self.service.file_index)
+        # The commands after the file header, with the end of the job.
+        digest = hashlib.blake2b(
+            b";".join(self._command_buffer[1:]) + b";ZED", digest_size=16
+        ).digest()
+        if self._uploads.get(file_index) == digest:
+            self._command_buffer.clear()
+            self._clear_settings()
+            self.usb_log(f"Job is stored in file {file_index}, not sent again.")
+            return True
+        if not self._execute_job():
+            return False
+        self._uploads[file_index] = digest
+        return True
 
     def open_job(self, job=None):
         """
@@ -545,9 +585,13 @@ class NewlyController:
         if not self._realtime and self._job_x is not None and self._job_y is not None:
             self.goto_rel(self._job_x, self._job_y)
 
-        self._execute_job()
+        if self.service.upload_cache and not self._realtime:
+            stored = self._upload_job()
+        else:
+            self._execute_job()
+            stored = True
         self.mode = "init"
-        if self.service.autoplay and not self._realtime:
+        if self.service.autoplay and not self._realtime and stored:
             self.replay(self.service.file_index)
 
     def program_mode(self):
@@ -564,7 +608,9 @@ class NewlyController:
         """
         Send a scanline movement.
 
-        @param bits: list of bits.
+        The bits are sent in travel order, the first bit as the lowest bit of the first byte.
+
+        @param bits: list or numpy array of bits.
         @param right: Moving right?
         @param left: Moving left?
         @param top: Moving top?
@@ -575,23 +621,17 @@ class NewlyController:
         cmd = None
         if left:  # left movement
             cmd = bytearray(b"YF")
-            bits = bits[::-1]
         elif right:
             cmd = bytearray(b"YZ")
-            bits = bits[::-1]
         elif top:
             cmd = bytearray(b"XF")
-            bits = bits[::-1]
         elif bottom:
             cmd = bytearray(b"XZ")
-            bits = bits[::-1]
         if cmd is None:
             return  # 0,0 goes nowhere.
         count = len(bits)
-        byte_length = int(math.ceil(count / self.BITS_PER_BYTE))
         cmd += struct.pack(">i", count)[1:]
-        binary = "".join([str(b) for b in bits])
-        cmd += int(binary, 2).to_bytes(byte_length, "little")
+        cmd += np.packbits(np.asarray(bits, dtype=np.uint8), bitorder="little").tobytes()
         self(cmd)
         if left:
             self._last_x -= count
@@ -622,7 +662,8 @@ class NewlyController:
 
         The algorithm processes the raster plot point by point, building scanlines
         of consecutive pixels and committing them when direction changes or Y-axis
-        movement is required.
+        movement is required. Where the cut provides numpy plot blocks the scanlines
+        are built from whole blocks at once, see _raster_blocks().
 
         Args:
             raster_cut: RasterCut object containing plot data and settings
@@ -657,6 +698,15 @@ class NewlyController:
 
         self._raster_jog(previous_x, previous_y, raster_cut)
 
+        blocks = raster_cut.plot_blocks()
+        if blocks is not None:
+            if raster_cut.horizontal:
+                self.mode = "raster_horizontal"
+            else:
+                self.mode = "raster_vertical"
+            self._raster_blocks(raster_cut, blocks, previous_x, previous_y)
+            return
+
         if raster_cut.horizontal:
             self.mode = "raster_horizontal"
             for x, y, on in raster_cut.plot.plot():
@@ -703,6 +753,78 @@ class NewlyController:
                 previous_x, previous_y = x, y
         commit_scanline()
 
+    def _raster_blocks(self, raster_cut, blocks, previous_x, previous_y):
+        """
+        Raster the x, y, on blocks of a RasterCut, sending the same commands raster() sends for its plot.
+
+        Within a block the direction of travel before each plot, the scanline breaks and the bits of every plot
+        are found with numpy, only the breaks are walked in python. Bits of the open scanline carry over to the
+        next block.
+
+        @param raster_cut: RasterCut being rastered
+        @param blocks: generator of x, y, on arrays
+        @param previous_x: position before the first plot
+        @param previous_y: position before the first plot
+        @return:
+        """
+        horizontal = raster_cut.horizontal
+        increasing = True
+        scanline = []
+
+        def commit_scanline(forward):
+            if not scanline:
+                return
+            bits = scanline[0] if len(scanline) == 1 else np.concatenate(scanline)
+            scanline.clear()
+            if horizontal:
+                self.scanline(bits, right=forward, left=not forward)
+            else:
+                self.scanline(bits, bottom=forward, top=not forward)
+
+        for x, y, on in blocks:
+            if not len(x):
+                continue
+            if horizontal:
+                along = np.diff(x, prepend=previous_x)
+                across = np.diff(y, prepend=previous_y)
+            else:
+                along = np.diff(y, prepend=previous_y)
+                across = np.diff(x, prepend=previous_x)
+            # Direction after each plot is that of the last plot moving along the scanline.
+            moved = np.maximum.accumulate(np.where(along != 0, np.arange(len(along)), -1))
+            forward = np.where(moved >= 0, along[moved] > 0, increasing)
+            before = np.concatenate(([increasing], forward[:-1]))
+            switched = ((along < 0) & before) | ((along > 0) & ~before)
+            breaks = np.flatnonzero(switched | (across != 0))
+            lengths = np.abs(along).astype(np.int64)
+            offsets = np.concatenate(([0], np.cumsum(lengths)))
+            bits = np.repeat(on.astype(np.uint8), lengths)
+
+            start = 0
+            for end, direction, jump, bx, by in zip(
+                offsets[breaks].tolist(),
+                before[breaks].tolist(),
+                across[breaks].tolist(),
+                x[breaks].tolist(),
+                y[breaks].tolist(),
+            ):
+                if end > start:
+                    scanline.append(bits[start:end])
+                    start = end
+                commit_scanline(direction)
+                if jump != 0:
+                    if abs(jump) > self.service.max_raster_jog:
+                        self._raster_jog(bx, by, raster_cut)
+                    else:
+                        self._relative = True
+                        self("PR")
+                        self._goto(bx, by)  # remain standard rastermode
+            if len(bits) > start:
+                scanline.append(bits[start:])
+            increasing = bool(forward[-1])
+            previous_x, previous_y = x[-1], y[-1]
+        commit_scanline(increasing)
+
     #######################
     # SETS FOR PLOTLIKES
     #######################
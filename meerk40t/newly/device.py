@@ -322,6 +322,18 @@ class NewlyDevice(Service, Status):
                 "section": "_30_Output",
                 "signals": "newly_autoplay",
             },
+            {
+                "attr": "upload_cache",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Keep uploaded jobs"),
+                "tip": _(
+                    "A job which is stored in the file already is not sent again."
+                ),
+                # Hint for translation _("Output")
+                "section": "_30_Output",
+            },
             {
                 "attr": "signal_updates",
                 "object": self,
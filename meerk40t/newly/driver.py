@@ -247,6 +247,15 @@ class NewlyDriver:
         """
         self.queue.append(plot)
 
+    def plot_batch(self, plots):
+        """
+        Gives the driver consecutive cutcode that should be plotted, as plot() does for each of them.
+
+        @param plots: list of cuts
+        @return:
+        """
+        self.queue.extend(plots)
+
     def plot_start(self):
         """
         This is called after all the cutcode objects are sent. This says it shouldn't expect more cutcode for a bit.
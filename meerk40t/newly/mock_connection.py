@@ -18,6 +18,10 @@ class MockConnection:
         self.interface = {}
         self.backend_error_code = None
         self.timeout = 500
+        # Scale of the simulated transfer delays, 0 writes at once.
+        self.delay = 1.0
+        self.writes = 0
+        self.bytes_written = 0
 
     def is_open(self, index=0):
         try:
@@ -48,6 +52,8 @@ class MockConnection:
     def write(self, index=0, data=None):
         if data is None:
             return
+        self.writes += 1
+        self.bytes_written += len(data)
         data_remaining = len(data)
         while data_remaining > 0:
             packet_length = min(0x1000, data_remaining)
@@ -76,7 +82,7 @@ class MockConnection:
         length_data = struct.pack(">h", packet_length)
         self.channel(f"{length_data}")
         # print (f"Will sleep for {min(3.0,packet_length * 0.01)} seconds to simulate packet size write delay. ")
-        sleep(min(3.0,packet_length * 0.01))
+        sleep(min(3.0, packet_length * 0.01) * self.delay)
 
     def _read_confirmation(self, index=0, attempt=0):
         self.channel("1")
@@ -85,6 +91,6 @@ class MockConnection:
         if packet is None:
             return
         # print (f"Will bulk sleep for {min(3.0, len(packet) * 0.001)} seconds to simulate packet size write delay. ")
-        sleep(min(3.0, len(packet) * 0.001))
+        sleep(min(3.0, len(packet) * 0.001) * self.delay)
 
         self.channel(packet)
@@ -6,6 +6,7 @@ Application Layer (Layer 7) of the OSI model.
 """
 import threading
 import time
+from collections import deque
 
 from meerk40t.core.units import UNITS_PER_uM, Length
 
@@ -23,6 +24,7 @@ from meerk40t.ruida.rdjob import (
     MEM_CURRENT_Z,
     MEM_CURRENT_U,
     RDJob)
+from meerk40t.ruida.udp_transport import UDP_MTU
 
 
 class RuidaController:
@@ -39,7 +41,7 @@ class RuidaController:
         self.events = service.channel(f"{service.safe_label}/events")
 
         self.job = RDJob()
-        self._send_queue = []
+        self._send_queue = deque()
         self._send_thread = None
         self._status_thread_sleep = 0.2 # Time between polls.
         self._status_gross_to = 40 # seconds
@@ -47,6 +49,7 @@ class RuidaController:
         self._connected = False
         self._job_lock = threading.Lock() # To allow running a job.
         self._job_lock.acquire() # Hold threads until told to start.
+        self._monitor_stopped = threading.Event()
         self._status_thread = threading.Thread(
             target=self._status_monitor, daemon=True)
         self._status_thread.start()
@@ -80,16 +83,25 @@ class RuidaController:
         self.events(f"File in {len(self._send_queue)} chunk(s)")
         self._send_thread.start()
 
+    @property
+    def chunk_size(self):
+        '''Largest chunk of commands sent at once. UDP packets are filled up to
+        the controller MTU, less the checksum.'''
+        if self.service.interface == "udp":
+            return UDP_MTU - 2
+        return 1000
+
     def divide_data_into_queue(self):
         last = 0
         total = 0
+        limit = self.chunk_size
         data = self.job.buffer
         for i, command in enumerate(data):
             total += len(command)
-            if total > 1000:
+            if total > limit and i != last:
                 self._send_queue.append(self.job.get_contents(last, i))
                 last = i
-                total = 0
+                total = len(command)
         if last != len(data):
             self._send_queue.append(self.job.get_contents(last))
 
@@ -101,6 +113,13 @@ class RuidaController:
         '''Stop the background machine status monitor.'''
         self._job_lock.acquire()
 
+    def shutdown(self, timeout=2.0):
+        '''End the background machine status monitor, for a controller which
+        is no longer used.'''
+        self._monitor_stopped.set()
+        if self._status_thread is not threading.current_thread():
+            self._status_thread.join(timeout)
+
     @property
     def is_busy(self):
         return self._waiting or self.service.is_busy
@@ -124,7 +143,7 @@ class RuidaController:
         terminates.'''
         self._job_lock.acquire()
         while self._send_queue:
-            data = self._send_queue.pop(0)
+            data = self._send_queue.popleft()
             self.write(data)
         self._send_queue.clear()
         self._send_thread = None
@@ -166,11 +185,17 @@ class RuidaController:
         Ruida controller. It also updates the UI when status changes.
 
         NOTE: This thread is blocked while _data_sender is running.'''
-        time.sleep(3) # Wait for controller window to init. Need a semaphore.
-        while True:
+        # Wait for controller window to init. Need a semaphore.
+        self._monitor_stopped.wait(3)
+        while not self._monitor_stopped.is_set():
             # if not self.is_busy and not self.service.is_busy:
             if self.service.connected and not self.service.is_busy:
-                self._job_lock.acquire() # Wait if sending a job.
+                # Wait if sending a job, checking for a shutdown meanwhile.
+                if not self._job_lock.acquire(timeout=self._status_thread_sleep):
+                    continue
+                if self._monitor_stopped.is_set():
+                    self._job_lock.release()
+                    break
                 self._waiting = True
                 # Step through a series of commands and send/recv each one
                 # by one. When received, recv will update the UI.
@@ -188,7 +213,7 @@ class RuidaController:
                 self._waiting = True
                 self.service.connect()
                 self.card_id = ''
-            time.sleep(self._status_thread_sleep)
+            self._monitor_stopped.wait(self._status_thread_sleep)
 
     def update_card_id(self, card_id):
         if card_id != self.card_id:
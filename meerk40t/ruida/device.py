@@ -276,6 +276,18 @@ class RuidaDevice(Service, Status):
                 "label": _("Swizzle Magic Number"),
                 "tip": _("Swizzle value to communicate with laser."),
             },
+            {
+                "attr": "udp_window",
+                "object": self,
+                "default": 1,
+                "type": int,
+                "lower": 1,
+                "upper": 32,
+                "label": _("UDP Window"),
+                "tip": _(
+                    "How many UDP packets may be sent ahead of their acknowledgement. 1 waits for each packet."
+                ),
+            },
         ]
         self.register_choices("ruida-magic", choices)
 
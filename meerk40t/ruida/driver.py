@@ -5,6 +5,8 @@ The Driver has a set of different commands which are sent and utilizes those whi
 """
 import time
 
+import numpy as np
+
 from meerk40t.core.cutcode.cubiccut import CubicCut
 from meerk40t.core.cutcode.dwellcut import DwellCut
 from meerk40t.core.cutcode.gotocut import GotoCut
@@ -19,7 +21,13 @@ from meerk40t.core.cutcode.waitcut import WaitCut
 from meerk40t.core.geomstr import Geomstr
 from meerk40t.core.parameters import Parameters
 from meerk40t.core.plotplanner import PlotPlanner
-from meerk40t.device.basedevice import PLOT_FINISH, PLOT_JOG, PLOT_RAPID, PLOT_SETTING
+from meerk40t.device.basedevice import (
+    PLOT_FINISH,
+    PLOT_JOG,
+    PLOT_RAPID,
+    PLOT_RASTER,
+    PLOT_SETTING,
+)
 from meerk40t.ruida.controller import RuidaController
 from meerk40t.ruida.rdjob import (
     MACHINE_STATUS_JOB_RUNNING,
@@ -67,6 +75,7 @@ class RuidaDriver(Parameters):
         self.plot_planner = PlotPlanner(
             dict(), single=True, ppi=False, shift=False, group=True
         )
+        self.plot_planner.raster_blocks = True
         self._aborting = False
         # self._signal_updates = self.service.setting(bool, "signal_updates", True)
         self._signal_updates = False  # Disable because not in sync with actual
@@ -162,6 +171,15 @@ class RuidaDriver(Parameters):
         """
         self.queue.append(plot)
 
+    def plot_batch(self, plots):
+        """
+        Gives the driver consecutive cutcode that should be plotted, as plot() does for each of them.
+
+        @param plots: list of cuts
+        @return:
+        """
+        self.queue.extend(plots)
+
     def plot_start(self):
         """
         Called at the end of plot commands to ensure the driver can deal with them all as a group.
@@ -250,14 +268,13 @@ class RuidaDriver(Parameters):
                 pass
             elif isinstance(q, PlotCut):
                 self.set("power", 1000)
-                for ox, oy, on, x, y in q.plot:
-                    while self.hold_work(0):
-                        time.sleep(0.05)
-                    # q.plot can have different on values, these are parsed
-                    if self.on_value != on:
-                        self.power_dirty = True
-                    self.on_value = on
-                    self._move(x, y, cut=self.on_value > 0)
+                plot = list(q.plot)
+                # q.plot can have different on values, these are parsed
+                self._moves(
+                    np.array([p[3] for p in plot]),
+                    np.array([p[4] for p in plot]),
+                    np.array([p[2] for p in plot]),
+                )
             else:
                 #  Rastercut
                 self.plot_planner.push(q)
@@ -272,6 +289,8 @@ class RuidaDriver(Parameters):
                             on = int(on)
                         if on & PLOT_FINISH:  # Plot planner is ending.
                             break
+                        elif on & PLOT_RASTER:  # Plot planner grouped the plots of a raster block.
+                            self._moves(*x)
                         elif on & PLOT_SETTING:  # Plot planner settings have changed.
                             p_set = Parameters(self.plot_planner.settings)
                             if p_set.power != self.power:
@@ -538,6 +557,60 @@ class RuidaDriver(Parameters):
     # PROTECTED DRIVER CODE
     ####################
 
+    def _moves(self, x, y, on, chunk=4096):
+        """
+        Moves to each position, cutting where the on value is positive, as _move() would one position at a time.
+
+        While a speed or power change is pending, positions are moved to one at a time, the rest are encoded in bulk
+        by RDJob.moves() in chunks between the work holds. Only the final move is signalled.
+
+        @param x: array of x positions
+        @param y: array of y positions
+        @param on: array of on values
+        @return:
+        """
+        count = len(x)
+        start = 0
+        while start < count and (
+            self.speed_dirty
+            or (self.power is not None and self.power != self._current_power)
+        ):
+            while self.hold_work(0):
+                time.sleep(0.05)
+            value = on[start].item()
+            if self.on_value != value:
+                self.power_dirty = True
+            self.on_value = value
+            self._move(x[start].item(), y[start].item(), cut=self.on_value > 0)
+            start += 1
+        if start == count:
+            return
+        old_current = self.service.current
+        for position in range(start, count, chunk):
+            while self.hold_work(0):
+                time.sleep(0.05)
+            stop = min(position + chunk, count)
+            px = x[position:stop]
+            py = y[position:stop]
+            self.controller.job.moves(
+                px,
+                py,
+                np.diff(px, prepend=self.native_x),
+                np.diff(py, prepend=self.native_y),
+                on[position:stop] > 0,
+            )
+            self.native_x = px[-1].item()
+            self.native_y = py[-1].item()
+        # Power changes are written, the pending on value only stops cutting at 0.
+        self.power_dirty = False
+        self.on_value = on[-1].item()
+        new_current = self.service.current
+        if self._signal_updates:
+            self.service.signal(
+                "driver;position",
+                (old_current[0], old_current[1], new_current[0], new_current[1]),
+            )
+
     def _move(self, x, y, cut=True, update=True):
         old_current = self.service.current
         job = self.controller.job
@@ -26,6 +26,12 @@ from .rdjob import (
 )
 
 
+# Command bytes _process_realtime() deals with, all other commands go straight to the job.
+REALTIME_COMMANDS = frozenset(range(0x80)) | frozenset(
+    (0xA5, 0xCC, 0xCD, 0xCE, 0xD7, 0xD8, 0xD9, 0xDA, 0xE5, 0xE7, 0xE8)
+)
+
+
 class RuidaEmulator:
     def __init__(self, device, units_to_device_matrix):
         self.device = device
@@ -44,7 +50,7 @@ class RuidaEmulator:
         # self.magic = 0x38
         self.lut_swizzle, self.lut_unswizzle = swizzles_lut(self.magic)
 
-        self.channel = None
+        self._channel = None
 
         self.program_mode = False
         self.reply = None
@@ -58,7 +64,7 @@ class RuidaEmulator:
         self.job = RDJob(
             driver=device.driver,
             priority=0,
-            channel=self._channel,
+            channel=None,
             units_to_device_matrix=units_to_device_matrix,
             magic=self.magic,
         )
@@ -71,6 +77,16 @@ class RuidaEmulator:
         self.d = 0.0
         self._magic_keys = magic_keys()
 
+    @property
+    def channel(self):
+        return self._channel
+
+    @channel.setter
+    def channel(self, channel):
+        # The job describes the commands it processes on the same channel.
+        self._channel = channel
+        self.job.channel = channel
+
     @property
     def x(self):
         return self.device.current[0]
@@ -151,15 +167,28 @@ class RuidaEmulator:
         @return:
         """
         packet = self.unswizzle(data) if unswizzle else data
+        commands = []
         for command in parse_commands(packet):
+            if command[0] not in REALTIME_COMMANDS:
+                commands.append(command)
+                continue
+            # Realtime commands act now, after the job commands before them.
+            self._write_job(commands)
+            commands = []
             array = list(command)
             try:
                 if not self._process_realtime(array):
-                    self.job.write_command(command)
-                    self.device.spooler.send(self.job, prevent_duplicate=True)
+                    commands.append(command)
             except (RuidaCommandError, IndexError):
                 if self.channel:
                     self.channel(f"Process Failure: {str(bytes(array).hex())}")
+        self._write_job(commands)
+
+    def _write_job(self, commands):
+        if not commands:
+            return
+        self.job.write_commands(commands)
+        self.device.spooler.send(self.job, prevent_duplicate=True)
 
     def _home_device(self):
         if hasattr(self.device.driver, "physical_home"):
@@ -170,10 +199,6 @@ class RuidaEmulator:
         else:
             self.device.driver.move_abs(0, 0)
 
-    def _channel(self, text):
-        if self.channel:
-            self.channel(text)
-
     def _describe(self, array, desc):
         if self.channel:
             self.channel(f"--> {str(bytes(array).hex())}\t({desc})")
@@ -1491,7 +1516,7 @@ class RuidaEmulator:
         return "Unknown", 0
 
     def unswizzle(self, data):
-        return bytes([self.lut_unswizzle[b] for b in data])
+        return bytes(data).translate(self.lut_unswizzle)
 
     def swizzle(self, data):
-        return bytes([self.lut_swizzle[b] for b in data])
+        return bytes(data).translate(self.lut_swizzle)
@@ -5,6 +5,14 @@ The mock connection is used for debug and research purposes. And simply prints t
 any hardware.
 """
 
+import queue
+import random
+import socket
+import threading
+import time
+
+from .rdjob import ACK
+
 
 class MockConnection:
     def __init__(self, service):
@@ -58,3 +66,80 @@ class MockConnection:
     def write(self, data):
         if self.send:
             self.send(data)
+
+
+class MockUDPController:
+    """
+    Local stand-in for the UDP port of a Ruida controller, to test and benchmark the UDP transport.
+
+    Packets sent to the port are checked by the checksum_write() of a RuidaEmulator, which answers them with an ACK or
+    a NAK. The answers are sent back after the given latency, which models the round trip. Packets are dropped before
+    they reach the emulator at the loss rate and have their checksum broken at the corrupt rate. The payloads of the
+    accepted packets are kept in order in received.
+    """
+
+    def __init__(self, emulator, latency=0.0, loss=0.0, corrupt=0.0, seed=None):
+        self.emulator = emulator
+        self.latency = latency
+        self.loss = loss
+        self.corrupt = corrupt
+        self.received = []
+        self.dropped = 0
+        self.corrupted = 0
+        self._random = random.Random(seed)
+        self._replies = queue.Queue()
+        self._answers = []
+        emulator.reply = self._reply
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.settimeout(0.05)
+        self.socket.bind(("127.0.0.1", 0))
+        self.port = self.socket.getsockname()[1]
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._receiver, daemon=True),
+            threading.Thread(target=self._sender, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        self._shutdown = True
+        for thread in self._threads:
+            thread.join()
+        self.socket.close()
+
+    def _reply(self, data):
+        self._answers.append(data)
+
+    def _receiver(self):
+        while not self._shutdown:
+            try:
+                packet, address = self.socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            if self._random.random() < self.loss:
+                self.dropped += 1
+                continue
+            if self._random.random() < self.corrupt:
+                self.corrupted += 1
+                packet = bytes([packet[0] ^ 0xFF]) + packet[1:]
+            self._answers = []
+            self.emulator.checksum_write(packet)
+            if not self._answers:
+                continue
+            if self.emulator.unswizzle(self._answers[0]) == ACK:
+                self.received.append(self.emulator.unswizzle(packet[2:]))
+            due = time.monotonic() + self.latency
+            for answer in self._answers:
+                self._replies.put((due, answer, address))
+
+    def _sender(self):
+        while not self._shutdown:
+            try:
+                due, answer, address = self._replies.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.socket.sendto(answer, address)
@@ -1,6 +1,8 @@
 import threading
 import time
 
+import numpy as np
+
 from meerk40t.core.cutcode.plotcut import PlotCut
 from meerk40t.core.units import UNITS_PER_uM
 from meerk40t.svgelements import Color
@@ -291,6 +293,23 @@ def encode32(v):
     )
 
 
+def encode14_array(values):
+    """
+    Bulk encode14() of an array of values, as an n x 2 array of bytes.
+    """
+    v = np.trunc(values).astype(np.int64)
+    return np.stack(((v >> 7) & 0x7F, v & 0x7F), axis=-1).astype(np.uint8)
+
+
+def encode32_array(values):
+    """
+    Bulk encode32() of an array of values, as an n x 5 array of bytes.
+    """
+    v = np.trunc(values).astype(np.int64)
+    shifts = np.array([28, 21, 14, 7, 0])
+    return ((v[:, None] >> shifts) & 0x7F).astype(np.uint8)
+
+
 def encode_coord(coord):
     return encode32(coord)
 
@@ -384,6 +403,10 @@ def decodeu35(data):
     )
 
 
+# relcoord() of the 14 bit values.
+RELCOORD_LUT = [signed14(v) for v in range(0x4000)]
+
+
 def abscoord(data):
     return decode32(data)
 
@@ -419,16 +442,19 @@ def parse_time(data):
 def parse_commands(data):
     """
     Parses data blob into command chunk sized pieces.
+
+    Commands start at the bytes with the high bit set, which are found with numpy in one pass over the data.
     @param data:
-    @return:
+    @return: list of commands, as bytes
     """
-    mark = 0
-    for i, b in enumerate(data):
-        if b >= 0x80 and mark != i:
-            yield data[mark:i]
-            mark = i
-    if mark != len(data):
-        yield data[mark:]
+    data = bytes(data)
+    if not data:
+        return []
+    bounds = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) >= 0x80).tolist()
+    if not bounds or bounds[0] != 0:
+        bounds.insert(0, 0)
+    bounds.append(len(data))
+    return [data[i:j] for i, j in zip(bounds, bounds[1:])]
 
 
 def swizzle_byte(b, magic):
@@ -450,20 +476,20 @@ def unswizzle_byte(b, magic):
 
 
 def swizzles_lut(magic):
+    """
+    Swizzle and unswizzle tables of the magic number, as bytes for bytes.translate().
+    """
     if magic == -1:
-        lut = [s for s in range(256)]
+        lut = bytes(range(256))
         return lut, lut
-    lut_swizzle = [swizzle_byte(s, magic) for s in range(256)]
-    lut_unswizzle = [unswizzle_byte(s, magic) for s in range(256)]
+    lut_swizzle = bytes([swizzle_byte(s, magic) for s in range(256)])
+    lut_unswizzle = bytes([unswizzle_byte(s, magic) for s in range(256)])
     return lut_swizzle, lut_unswizzle
 
 
 def decode_bytes(data, magic=0x88):
     lut_swizzle, lut_unswizzle = swizzles_lut(magic)
-    array = list()
-    for b in data:
-        array.append(lut_unswizzle[b])
-    return bytes(array)
+    return bytes(data).translate(lut_unswizzle)
 
 
 def determine_magic_via_histogram(data):
@@ -475,27 +501,19 @@ def determine_magic_via_histogram(data):
     @param data:
     @return:
     """
-    histogram = [0] * 256
-    prev = -1
-    for d in data:
-        histogram[d] += 5 if prev == d else 1
-        prev = d
-    m = 0
-    magic = None
-    for i in range(len(histogram)):
-        v = histogram[i]
-        if v > m:
-            m = v
-            magic = i - 1
-    return magic
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    if not len(data):
+        return None
+    # Repeats of the previous byte weigh 5.
+    weights = np.ones(len(data))
+    weights[1:][data[1:] == data[:-1]] = 5
+    histogram = np.bincount(data, weights=weights, minlength=256)
+    return int(np.argmax(histogram)) - 1
 
 
 def encode_bytes(data, magic=0x88):
     lut_swizzle, lut_unswizzle = swizzles_lut(magic)
-    array = list()
-    for b in data:
-        array.append(lut_swizzle[b])
-    return bytes(array)
+    return bytes(data).translate(lut_swizzle)
 
 
 def magic_keys():
@@ -520,7 +538,9 @@ class RDJob:
         self.label = "Ruida Job"
         self.reply = None
         self.buffer = list()
-        self.plotcut = None
+        self.batch_size = 1000
+        # Positions, laser values and settings of the current plot, made into a PlotCut when committed.
+        self._plot = None
 
         self.priority = priority
 
@@ -566,6 +586,18 @@ class RDJob:
 
         self.lock = threading.Lock()
 
+        # Decoders of the move and cut commands, dispatched by the command byte when not describing commands.
+        self._geometry = {
+            0x88: self._move_abs_xy,
+            0x89: self._move_rel_xy,
+            0x8A: self._move_rel_x,
+            0x8B: self._move_rel_y,
+            0xA8: self._cut_abs_xy,
+            0xA9: self._cut_rel_xy,
+            0xAA: self._cut_rel_x,
+            0xAB: self._cut_rel_y,
+        }
+
     def __str__(self):
         return f"{self.__class__.__name__}({len(self.buffer)} lines)"
 
@@ -628,6 +660,10 @@ class RDJob:
         with self.lock:
             self.buffer.append(command)
 
+    def write_commands(self, commands):
+        with self.lock:
+            self.buffer.extend(commands)
+
     def file_sum(self):
         return sum([sum(list(g)) for g in self.buffer])
 
@@ -645,15 +681,24 @@ class RDJob:
         if self.time_started is None:
             self.time_started = time.time()
         with self.lock:
-            command = self.buffer.pop(0)
-        try:
-            array = list(command)
-            self.process(array, offset=self.offset)
-            self.offset += len(command)
-        except IndexError as e:
-            raise RuidaCommandError(
-                f"Could not process Ruida buffer, {self.buffer[:25]} with magic: {self.magic:02}"
-            ) from e
+            commands = self.buffer[: self.batch_size]
+            del self.buffer[: self.batch_size]
+        # Moves and cuts which are not described are decoded straight into the plot.
+        geometry = self._geometry if not self.channel else {}
+        for i, command in enumerate(commands):
+            try:
+                decode = geometry.get(command[0])
+                if decode is not None:
+                    decode(command)
+                else:
+                    self.process(list(command), offset=self.offset)
+                self.offset += len(command)
+            except IndexError as e:
+                with self.lock:
+                    self.buffer[:0] = commands[i + 1 :]
+                raise RuidaCommandError(
+                    f"Could not process Ruida buffer, {self.buffer[:25]} with magic: {self.magic:02}"
+                ) from e
         if not self.buffer:
             # Buffer is empty now. Job is complete
             self.runtime += time.time() - self.time_started
@@ -702,26 +747,21 @@ class RDJob:
         @param power:
         @return:
         """
-        matrix = self.units_to_device_matrix
-        if matrix is None:
+        if self.units_to_device_matrix is None:
             # Using job for something other than point plotting
             return
-        if self.plotcut is None:
-            self.x = x
-            self.y = y
-            ox, oy = matrix.transform_point([self.x, self.y])
-            # print (f"Will generate plotcut with power: {self.power}")
-            self.plotcut = PlotCut(
-                settings={
-                    "speed": self.speed,
-                    "power": self.power,
-                    "frequency": self.frequency,
-                }
-            )
-            self.plotcut.plot_init(int(round(ox)), int(round(oy)))
-        tx, ty = matrix.transform_point([x, y])
+        if self._plot is None:
+            settings = {
+                "speed": self.speed,
+                "power": self.power,
+                "frequency": self.frequency,
+            }
+            self._plot = [x], [y], [], settings
+        plot_x, plot_y, plot_on, settings = self._plot
+        plot_x.append(x)
+        plot_y.append(y)
         # power is not a fraction of self.power, but just denoting laser on or off.
-        self.plotcut.plot_append(int(round(tx)), int(round(ty)), power)
+        plot_on.append(power)
         self.x = x
         self.y = y
 
@@ -729,12 +769,61 @@ class RDJob:
         """
         Force commits the old plotcut and unsets the current plotcut.
 
+        The plotted locations are transformed to device positions together and appended to the plotcut in bulk.
+
         @return:
         """
-        if self.plotcut is None:
+        if self._plot is None:
             return
-        self.plot(self.plotcut)
-        self.plotcut = None
+        plot_x, plot_y, plot_on, settings = self._plot
+        self._plot = None
+        matrix = self.units_to_device_matrix
+        x = np.array(plot_x, dtype=float)
+        y = np.array(plot_y, dtype=float)
+        # Same operations as matrix.transform_point(), rounded as round() does.
+        tx = np.rint(x * matrix.a + y * matrix.c + 1 * matrix.e).astype(np.int64)
+        ty = np.rint(x * matrix.b + y * matrix.d + 1 * matrix.f).astype(np.int64)
+        plotcut = PlotCut(settings=settings)
+        plotcut.plot_init(int(tx[0]), int(ty[0]))
+        plotcut.plot_append_array(tx[1:], ty[1:], plot_on)
+        self.plot(plotcut)
+
+    def _move_abs_xy(self, command):
+        self.plot_location(
+            abscoord(command[1:6]) * self.scale, abscoord(command[6:11]) * self.scale, 0
+        )
+
+    def _move_rel_xy(self, command):
+        if len(command) > 1:
+            dx = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+            dy = RELCOORD_LUT[(command[3] & 0x7F) << 7 | command[4] & 0x7F]
+            self.plot_location(self.x + dx * self.scale, self.y + dy * self.scale, 0)
+
+    def _move_rel_x(self, command):
+        dx = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+        self.plot_location(self.x + dx * self.scale, self.y, 0)
+
+    def _move_rel_y(self, command):
+        dy = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+        self.plot_location(self.x, self.y + dy * self.scale, 0)
+
+    def _cut_abs_xy(self, command):
+        self.plot_location(
+            abscoord(command[1:6]) * self.scale, abscoord(command[6:11]) * self.scale, 1
+        )
+
+    def _cut_rel_xy(self, command):
+        dx = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+        dy = RELCOORD_LUT[(command[3] & 0x7F) << 7 | command[4] & 0x7F]
+        self.plot_location(self.x + dx * self.scale, self.y + dy * self.scale, 1)
+
+    def _cut_rel_x(self, command):
+        dx = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+        self.plot_location(self.x + dx * self.scale, self.y, 1)
+
+    def _cut_rel_y(self, command):
+        dy = RELCOORD_LUT[(command[1] & 0x7F) << 7 | command[2] & 0x7F]
+        self.plot_location(self.x, self.y + dy * self.scale, 1)
 
     def plot(self, plot):
         try:
@@ -1361,10 +1450,10 @@ class RDJob:
         return _mem, _v, _decoded
 
     def unswizzle(self, data):
-        return bytes([self.lut_unswizzle[b] for b in data])
+        return bytes(data).translate(self.lut_unswizzle)
 
     def swizzle(self, data):
-        return bytes([self.lut_swizzle[b] for b in data])
+        return bytes(data).translate(self.lut_swizzle)
 
     def _calculate_layer_bounds(self, layer):
         max_x = float("-inf")
@@ -1594,6 +1683,69 @@ class RDJob:
             return
         self.cut_rel_xy(dx, dy)
 
+    def moves(self, x, y, dx, dy, cuts):
+        """
+        Bulk jump() and mark() of arrays of positions, writing the same commands to the buffer.
+
+        The absolute or relative encoding of each move is picked with numpy and the coordinates are packed into one
+        buffer of all commands, which is split into the individual commands.
+
+        @param x: array of x positions
+        @param y: array of y positions
+        @param dx: array of x distances to the positions
+        @param dy: array of y distances to the positions
+        @param cuts: bool array, True to mark to the position, False to jump.
+        @return:
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        dx = np.asarray(dx)
+        dy = np.asarray(dy)
+        cuts = np.asarray(cuts, dtype=bool)
+        absolute = (np.abs(dx) > 8192) | (np.abs(dy) > 8192)
+        moving = (dx != 0) | (dy != 0)
+        if self.first_move:
+            jumps = np.flatnonzero(~cuts)
+            if len(jumps):
+                absolute[jumps[0]] = True
+                moving[jumps[0]] = True
+                self.first_move = False
+        index = np.flatnonzero(moving)
+        if not len(index):
+            return
+        x = x[index]
+        y = y[index]
+        dx = dx[index]
+        dy = dy[index]
+        cuts = cuts[index]
+        absolute = absolute[index]
+        rel_y = ~absolute & (dx == 0)
+        rel_x = ~absolute & ~rel_y & (dy == 0)
+        rel_xy = ~absolute & ~rel_y & ~rel_x
+        lengths = np.where(absolute, 11, np.where(rel_xy, 5, 3))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        data = np.zeros(int(ends[-1]), dtype=np.uint8)
+        for kind, move, cut in (
+            (absolute, MOVE_ABS_XY, CUT_ABS_XY),
+            (rel_xy, MOVE_REL_XY, CUT_REL_XY),
+            (rel_x, MOVE_REL_X, CUT_REL_X),
+            (rel_y, MOVE_REL_Y, CUT_REL_Y),
+        ):
+            data[starts[kind]] = np.where(cuts[kind], cut[0], move[0])
+        at = starts[absolute][:, None] + 1 + np.arange(5)
+        data[at] = encode32_array(x[absolute])
+        data[at + 5] = encode32_array(y[absolute])
+        at = starts[rel_xy][:, None] + 1 + np.arange(2)
+        data[at] = encode14_array(dx[rel_xy])
+        data[at + 2] = encode14_array(dy[rel_xy])
+        data[starts[rel_x][:, None] + 1 + np.arange(2)] = encode14_array(dx[rel_x])
+        data[starts[rel_y][:, None] + 1 + np.arange(2)] = encode14_array(dy[rel_y])
+        data = data.tobytes()
+        commands = [data[i:j] for i, j in zip(starts.tolist(), ends.tolist())]
+        with self.lock:
+            self.buffer.extend(commands)
+
     def _power(self, power):
         self.high_power_warning  = (power > 70.0)
         self.low_power_warning  = (power < 10.0)
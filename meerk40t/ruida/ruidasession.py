@@ -48,6 +48,7 @@ class RuidaSession:
         self.events = service.channel(f"{name}/events", pure=True)
 
         self.transport = None
+        self.window = None # Pipelines UDP data.
 
         # Ruida data
         # TODO: Tune the queue size.
@@ -108,6 +109,11 @@ class RuidaSession:
         except TransportError:
             return
         self.transport.set_timeout(self._timeout)
+        if self.interface == 'udp':
+            self.window = udp.SlidingWindow(
+                self.transport, self.unswizzle, recv=self.recv,
+                max_window=self.service.setting(int, "udp_window", 1),
+                timeout=self._timeout, tries=self._tries)
         # TODO: usb_status is a misnomer.
         self.service.signal("pipe;usb_status", "Opened")
         self.events("Disconnected")
@@ -117,6 +123,7 @@ class RuidaSession:
             return
         self.transport.close()
         self.transport = None
+        self.window = None
         self.service.signal("pipe;usb_status", "Disconnected")
         self.events("Disconnected")
 
@@ -136,6 +143,8 @@ class RuidaSession:
         change the timeout of the transport interface.
         '''
         self._tries = int(seconds / self._timeout)
+        if self.window is not None:
+            self.window.tries = self._tries
 
     def location(self):
         if self.transport is not None:
@@ -159,12 +168,14 @@ class RuidaSession:
 
     @property
     def is_busy(self):
-        return self._reply_pending or self._ack_pending
+        return (self._reply_pending or self._ack_pending
+                or (self.window is not None and len(self.window) > 0))
 
     def abort_connect(self):
         if self.transport is not None:
             self.transport.close()
             self.transport = None
+            self.window = None
             self._open()
 
     def write(self, data):
@@ -340,6 +351,27 @@ class RuidaSession:
                         and _message[1] != 0x01): # 0x01 is a memory set -- no reply.
                     self._reply_pending = True
                 _packet = self._package(_message)
+                _window = self.window
+                if _window is not None:
+                    # PIPELINED
+                    # UDP data without replies is sent ahead of the ACKs, up to
+                    # the window. The ACKs are waited for once the send queue
+                    # is empty and before a command expecting a reply.
+                    try:
+                        if self._reply_pending:
+                            _window.flush()
+                        else:
+                            _window.send(_packet)
+                            self.sends += 1
+                            if self.send_q.empty():
+                                _window.flush()
+                            continue
+                    except (TransportTimeout, TransportError, AttributeError):
+                        # Comms failure.
+                        _window.clear()
+                        self._responding = False
+                        self._reply_pending = False
+                        continue
                 try:
                     self.transport.write(_packet)
                 except TransportError:
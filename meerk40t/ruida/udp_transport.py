@@ -1,11 +1,17 @@
 '''Transport layer interface for UDP comms.'''
 
 import socket
+import time
+from collections import deque
 
 from meerk40t.kernel import Service
 
+from .rdjob import ACK, NAK, ENQ
 from .ruidatransport import RuidaTransport, TransportTimeout, TransportError
 
+# The largest packet the controller accepts, including the 2 byte checksum.
+UDP_MTU = 1472
+
 class UDPTransport(RuidaTransport):
     def __init__(self, service: Service):
         super().__init__(service)
@@ -110,3 +116,157 @@ class UDPTransport(RuidaTransport):
     def connected(self) -> bool:
         '''Return connection status.'''
         return self.socket is not None
+
+
+class SlidingWindow:
+    '''Pipelined sending of packets which are acknowledged in order.
+
+    The Ruida controller answers each packet with an ACK, or a NAK when the
+    checksum does not match, in the order the packets arrive. The answers are
+    not numbered so each one answers the oldest packet in flight.
+
+    Up to window packets are sent ahead of their answers. The window grows by
+    one with each ACK up to max_window, halves with a NAK and drops to one
+    when the retransmit timer of the oldest packet expires. A NAKed or expired
+    packet is sent again and waits for its answer behind the packets already
+    in flight. With a max_window of 1 only NAKed packets are sent again, as by
+    the stop-and-wait handshake: a late ACK would otherwise have the packet
+    executed twice.
+
+    The retransmit timeout follows the round trip times of the ACKs (RFC 6298)
+    but is never shorter than timeout, the controller holds back its ACKs while
+    its buffer is full. It doubles with each expiry, up to half of tries times
+    timeout. Without an ACK for tries times timeout the controller is taken as
+    not responding.
+
+    NOTE: Because the answers are not numbered, a packet lost within a window
+    can't be told apart from a lost ACK, and a packet sent again lands behind
+    the packets sent after it.
+    '''
+    def __init__(self, transport, unswizzle, recv=None, max_window=1,
+                 timeout=0.25, tries=4):
+        self.transport = transport
+        self.unswizzle = unswizzle
+        self.recv = recv # Forwards reply data.
+        self.max_window = max(1, max_window)
+        self.window = 1
+        self.timeout = timeout
+        self.tries = tries
+        self.rto = timeout
+        self._srtt = None
+        self._rttvar = 0.0
+        self._in_flight = deque() # [packet, time sent, sent again]
+        self._progress = time.monotonic()
+
+        # Stats for test and debug.
+        self.sends = 0
+        self.acks = 0
+        self.naks = 0
+        self.resends = 0
+        self.expiries = 0
+        self.replies = 0
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def send(self, packet: bytes):
+        '''Send the packet once the window has room for it.
+
+        raises:
+            TransportTimeout, TransportError
+        '''
+        while len(self._in_flight) >= self.window:
+            self.receive()
+        if not self._in_flight:
+            self._progress = time.monotonic()
+        self.transport.write(packet)
+        self.sends += 1
+        self._in_flight.append([packet, time.monotonic(), False])
+
+    def flush(self):
+        '''Wait until all packets in flight are acknowledged.
+
+        raises:
+            TransportTimeout, TransportError
+        '''
+        while self._in_flight:
+            self.receive()
+
+    def clear(self):
+        '''Forget the packets in flight and restart with a window of one.'''
+        self._in_flight.clear()
+        self.window = 1
+        self.rto = max(self.rto, self.timeout)
+
+    def receive(self):
+        '''Receive one answer to the packets in flight.
+
+        Times out after the timeout of the transport, after which the
+        retransmit timer of the oldest packet is checked.
+
+        raises:
+            TransportTimeout, TransportError
+        '''
+        try:
+            _data = self.transport.read(1)
+        except TransportTimeout:
+            _data = b''
+        _now = time.monotonic()
+        if _data:
+            _answer = self.unswizzle(_data)
+            if _answer == ACK:
+                self._ack(_now)
+            elif _answer == NAK:
+                self.naks += 1
+                self.window = max(1, self.window // 2)
+                self._resend(_now)
+            elif _answer != ENQ:
+                # Reply data, forward to be processed.
+                self.replies += 1
+                if self.recv is not None:
+                    self.recv(_answer)
+        if not self._in_flight:
+            return
+        # Stop-and-wait keeps waiting for the ACK, the controller holds it back
+        # while its buffer is full.
+        if self.max_window > 1 and _now - self._in_flight[0][1] >= self.rto:
+            self.expiries += 1
+            self.window = 1
+            self.rto = min(2 * self.rto, self._max_rto)
+            self._resend(_now)
+        if _now - self._progress >= self.tries * self.timeout:
+            self.clear()
+            raise TransportTimeout('No ACK from the controller.')
+
+    def _ack(self, now):
+        if not self._in_flight:
+            return # Not an answer to a packet in flight.
+        _packet, _sent, _again = self._in_flight.popleft()
+        self.acks += 1
+        self._progress = now
+        if not _again:
+            # Only packets sent once time the round trip (Karn's algorithm).
+            _rtt = now - _sent
+            if self._srtt is None:
+                self._srtt = _rtt
+                self._rttvar = _rtt / 2
+            else:
+                self._rttvar = 0.75 * self._rttvar + 0.25 * abs(self._srtt - _rtt)
+                self._srtt = 0.875 * self._srtt + 0.125 * _rtt
+            self.rto = min(max(self.timeout, self._srtt + 4 * self._rttvar),
+                           self._max_rto)
+        self.window = min(self.max_window, self.window + 1)
+
+    @property
+    def _max_rto(self):
+        return max(self.timeout, self.tries * self.timeout / 2)
+
+    def _resend(self, now):
+        if not self._in_flight:
+            return
+        _entry = self._in_flight.popleft()
+        self.transport.write(_entry[0])
+        self.resends += 1
+        _entry[1] = now
+        _entry[2] = True
+        self._in_flight.append(_entry)
@@ -725,6 +725,161 @@ class RasterPlotter:
                     last_y = ny
         self._locked = False
 
+    def plot_blocks(self, pixels, pixel_filter, lines=64):
+        """
+        Plot the horizontal or vertical traversal with numpy, in blocks of scanlines.
+
+        The pixel chains of all scanlines within a block are found at once, and each block is yielded as x, y and on
+        arrays holding the values plot() yields for those scanlines. Only the non-legacy horizontal and vertical
+        traversals without overlapping laserspot are supported, and only until plot() has consumed the data.
+
+        @param pixels: numpy array of the pixel data, indexed [y, x]
+        @param pixel_filter: the filter applied to arrays of pixels
+        @param lines: number of scanlines per block
+        @return: generator of x, y, on arrays, or None if the traversal is not supported.
+        """
+        if (
+            self.direction
+            in (RASTER_GREEDY_H, RASTER_GREEDY_V, RASTER_CROSSOVER, RASTER_SPIRAL, RASTER_DIAGONAL)
+            or self.special.get("legacy", False)
+            or self.overlap
+            or not self.use_integers
+            or self._cache is not None
+            or self.debug_level > 0
+        ):
+            return None
+        return self._plot_blocks(pixels, pixel_filter, lines)
+
+    def _plot_blocks(self, pixels, pixel_filter, lines):
+        self._distance_travel = 0
+        self._distance_burn = 0
+        if (
+            self.initial_x is None
+            or self.final_x is None
+            or self.initial_y is None
+            or self.final_y is None
+        ):
+            return
+        horizontal = self.horizontal
+        if horizontal:
+            # Scanlines are rows, the positions along them are x.
+            step = 1 if self.start_minimum_y else -1
+            direction = 1 if self.start_minimum_x else -1
+            last = self.initial_x
+            lower = min(self.initial_y, self.final_y)
+            upper = max(self.initial_y, self.final_y)
+            line = lower if self.start_minimum_y else upper
+        else:
+            step = 1 if self.start_minimum_x else -1
+            direction = 1 if self.start_minimum_y else -1
+            last = self.initial_y
+            lower = min(self.initial_x, self.final_x)
+            upper = max(self.initial_x, self.final_x)
+            line = lower if self.start_minimum_x else upper
+        overscan = self.overscan
+        bidirectional = self.bidirectional
+        last_x = self.offset_x
+        last_y = self.offset_y
+        first = True
+        while lower <= line <= upper:
+            end = line + step * (lines - 1)
+            end = min(max(end, lower), upper)
+            a = min(line, end)
+            b = max(line, end) + 1
+            if horizontal:
+                values = pixel_filter(pixels[a:b])
+            else:
+                values = pixel_filter(pixels[:, a:b]).T
+            values = np.where(values == self.skip_pixel, 0, values)
+            # Chains are runs of equal non-skipped values along each scanline.
+            nonzero = values != 0
+            changed = values[:, 1:] != values[:, :-1]
+            begins = nonzero.copy()
+            begins[:, 1:] &= changed
+            ends = nonzero
+            ends[:, :-1] &= changed
+            begins = np.flatnonzero(begins)
+            width = values.shape[1]
+            chain_on = values.ravel()[begins]
+            chain_line, chain_start = np.divmod(begins, width)
+            chain_end = np.flatnonzero(ends) % width
+            bounds = np.searchsorted(chain_line, np.arange(b - a + 1))
+
+            positions = []
+            scanlines = []
+            ons = []
+            for current in range(line, end + step, step):
+                i0 = bounds[current - a]
+                i1 = bounds[current - a + 1]
+                if i0 == i1:
+                    # Just climb the line, and don't change directions
+                    positions.append((last,))
+                    scanlines.append((current,))
+                    ons.append((0,))
+                    continue
+                low = int(chain_start[i0])
+                high = int(chain_end[i1 - 1])
+                overscan_low = 0 if direction >= 0 else overscan
+                overscan_high = 0 if direction <= 0 else overscan
+                if not first and low - overscan_low <= last <= high + overscan_high:
+                    # Inside the chain, move beyond it on the previous scanline.
+                    if direction > 0 and bidirectional:
+                        last = low - overscan_low - 1
+                    else:
+                        last = high + overscan_high + 1
+                    positions.append((last,))
+                    scanlines.append((current - step,))
+                    ons.append((0,))
+                positions.append((last,))
+                scanlines.append((current,))
+                ons.append((0,))
+                if direction > 0:
+                    starts = chain_start[i0:i1] - 0.5
+                    stops = chain_end[i0:i1] + 0.5
+                    chain = chain_on[i0:i1]
+                else:
+                    starts = chain_end[i1 - 1 : i0 - 1 if i0 else None : -1] + 0.5
+                    stops = chain_start[i1 - 1 : i0 - 1 if i0 else None : -1] - 0.5
+                    chain = chain_on[i1 - 1 : i0 - 1 if i0 else None : -1]
+                count = len(starts)
+                position = np.empty(2 * count)
+                position[0::2] = starts
+                position[1::2] = stops
+                on = np.zeros(2 * count)
+                on[1::2] = chain
+                keep = np.ones(2 * count, dtype=bool)
+                keep[0] = last != starts[0]
+                keep[2::2] = stops[:-1] != starts[1:]
+                positions.append(position[keep])
+                ons.append(on[keep])
+                scanlines.append(np.full(int(np.count_nonzero(keep)), current))
+                last = float(stops[-1])
+                if overscan:
+                    last += direction * overscan
+                    positions.append((last,))
+                    scanlines.append((current,))
+                    ons.append((0,))
+                if bidirectional:
+                    direction = -direction
+                first = False
+            position = np.concatenate(positions).astype(float)
+            scanline = np.concatenate(scanlines).astype(float)
+            on = np.concatenate(ons).astype(float)
+            if horizontal:
+                x, y = position, scanline
+            else:
+                x, y = scanline, position
+            x = np.round(self.offset_x + self.step_x * x).astype(np.int64)
+            y = np.round(self.offset_y + y * self.step_y).astype(np.int64)
+            distance = np.hypot(np.diff(x, prepend=last_x), np.diff(y, prepend=last_y))
+            burn = on != 0
+            self._distance_burn += float(np.sum(distance[burn]))
+            self._distance_travel += float(np.sum(distance[~burn]))
+            last_x = int(x[-1])
+            last_y = int(y[-1])
+            yield x, y, on
+            line = end + step
+
     def _plot_pixels(self):
         legacy = self.special.get("legacy", False)
         if self.direction in (RASTER_GREEDY_H, RASTER_GREEDY_V):
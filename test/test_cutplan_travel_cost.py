@@ -0,0 +1,196 @@
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.cutgroup import CutGroup
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.cutplan import (
+    TRAVEL_COST_MAX_CUTS,
+    CutPlan,
+    _refine_with_cost,
+    _travel_cost_refinement,
+    short_travel_cutcode,
+)
+from meerk40t.core.travelcost import JumpDelayTravelCost, TravelCost
+from test import bootstrap
+
+
+def _galvo_cost():
+    return JumpDelayTravelCost(
+        speed=1e6,
+        delay_short=10e-6,
+        delay_long=300e-6,
+        distance_limit=5000,
+        delay_mark=200e-6,
+        delay_polygon=100e-6,
+    )
+
+
+def _lines(seed, count):
+    rng = np.random.default_rng(seed)
+    cuts = []
+    for i in range(count):
+        start = rng.uniform(0, 0xFFFF, size=2).tolist()
+        end = (np.array(start) + rng.uniform(-3000, 3000, size=2)).tolist()
+        cuts.append(LineCut(tuple(start), tuple(end), settings={"speed": 100}))
+    return cuts
+
+
+def _context(cuts):
+    context = CutCode()
+    for cut in cuts:
+        context.append(CutGroup(None, [cut], settings=cut.settings))
+    context._start_x, context._start_y = 0, 0
+    return context
+
+
+class _Device:
+    def __init__(self):
+        self.settings = []
+
+    def travel_cost(self, settings=None):
+        self.settings.append(settings)
+        return _galvo_cost()
+
+
+class TestTravelCost(unittest.TestCase):
+    def test_distance_cost(self):
+        cost = TravelCost()
+        self.assertEqual(cost([0, 3.5]).tolist(), [0, 3.5])
+        cuts = [LineCut((0, 0), (10, 0)), LineCut((10, 4), (20, 4))]
+        self.assertEqual(cost.total(cuts), 4)
+        self.assertEqual(cost.total(cuts, (0, 3)), 7)
+        self.assertEqual(cost.total([], (0, 3)), 0)
+
+    def test_jump_delay_cost(self):
+        cost = _galvo_cost()
+        result = cost([0, 0.5, 1000, 10000]).tolist()
+        self.assertAlmostEqual(result[0], 100e-6)
+        self.assertAlmostEqual(result[1], 100e-6)
+        self.assertAlmostEqual(result[2], 1000 / 1e6 + 10e-6 + 200e-6)
+        self.assertAlmostEqual(result[3], 10000 / 1e6 + 300e-6 + 200e-6)
+
+    def test_refinement_lowers_cost(self):
+        cost = _galvo_cost()
+        for seed in range(4):
+            cuts = _lines(seed, 150)
+            before = cost.total(cuts, (0, 0))
+            ends = sorted((c.start, c.end) for c in cuts)
+            refined = _travel_cost_refinement(list(cuts), (0, 0), cost)
+            self.assertEqual(len(refined), len(cuts))
+            self.assertLess(cost.total(refined, (0, 0)), before)
+            # The same cuts, some of them burning the other way.
+            self.assertEqual(
+                sorted(tuple(sorted((c.start, c.end))) for c in refined),
+                sorted(tuple(sorted(e)) for e in ends),
+            )
+
+    def test_refinement_keeps_fixed_cuts(self):
+        cuts = _lines(5, 40)
+        fixed = cuts[::7]
+        for cut in fixed:
+            cut.reversible = lambda: False
+        positions = [cuts.index(cut) for cut in fixed]
+        starts = [cut.start for cut in fixed]
+        refined = _travel_cost_refinement(list(cuts), (0, 0), _galvo_cost())
+        self.assertEqual([refined.index(cut) for cut in fixed], positions)
+        self.assertEqual([cut.start for cut in fixed], starts)
+
+    def test_joins_paths(self):
+        # Two chains of lines, sequenced by distance the second one is entered from its far end.
+        first = [LineCut((i * 100, 0), ((i + 1) * 100, 0)) for i in range(5)]
+        second = [LineCut((500, 60 + i * 100), (500, 160 + i * 100)) for i in range(5)]
+        cost = JumpDelayTravelCost(speed=1e6, delay_mark=1e-3, delay_polygon=1e-5)
+        cuts = first + second[::-1]
+        for cut in second:
+            cut.reverse()
+        refined = _travel_cost_refinement(list(cuts), (0, 0), cost)
+        self.assertLess(cost.total(refined, (0, 0)), cost.total(cuts, (0, 0)))
+
+    def test_sequencing(self):
+        cost = _galvo_cost()
+        for count in (30, 80, 300):
+            cuts = _lines(count, count)
+            by_distance = short_travel_cutcode(_context(cuts))
+            by_cost = short_travel_cutcode(_context(cuts), travel_cost=cost)
+            distance_order = list(by_distance.flat())
+            cost_order = list(by_cost.flat())
+            self.assertEqual(len(cost_order), count)
+            self.assertLessEqual(
+                cost.total(cost_order, (0, 0)), cost.total(distance_order, (0, 0))
+            )
+
+    def test_large_orders_not_refined(self):
+        cost = _galvo_cost()
+        cuts = _lines(9, TRAVEL_COST_MAX_CUTS + 1)
+        self.assertIs(_refine_with_cost(cuts, (0, 0), cost), cuts)
+        # The legacy sequencer of large jobs isn't refined.
+        by_distance = short_travel_cutcode(_context(cuts))
+        by_cost = short_travel_cutcode(_context(cuts), travel_cost=cost)
+        self.assertEqual(
+            [(c.start, c.end) for c in by_cost.flat()],
+            [(c.start, c.end) for c in by_distance.flat()],
+        )
+
+    def test_plan_travel_cost(self):
+        planner = MagicMock()
+        plan = CutPlan("test", planner)
+        fast = {"rapid_enabled": True, "rapid_speed": 5000}
+        slow = {"rapid_enabled": True, "rapid_speed": 500}
+        cutcode = CutCode(
+            [LineCut((0, 0), (1, 1), settings=s) for s in (fast, slow, slow)]
+        )
+        self.assertIsNone(plan._travel_cost(cutcode))
+        device = _Device()
+        planner.device = device
+        self.assertIsInstance(plan._travel_cost(cutcode), JumpDelayTravelCost)
+        # The settings most cuts are burnt with.
+        self.assertIs(device.settings[-1], slow)
+        plan._travel_cost(CutCode())
+        self.assertIsNone(device.settings[-1])
+        planner.device = object()
+        self.assertIsNone(plan._travel_cost(cutcode))
+
+
+class TestBalorTravelCost(unittest.TestCase):
+    def test_device_travel_cost(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i balor 0\n")
+            device = kernel.device
+            galvos_per_mm = abs(
+                complex(*device.view.position("1mm", 0, vector=True, margins=False))
+            )
+            cost = device.travel_cost()
+            self.assertIsInstance(cost, JumpDelayTravelCost)
+            # The driver writes no jump delays.
+            self.assertEqual((cost.delay_short, cost.delay_long), (0, 0))
+            self.assertAlmostEqual(
+                cost.speed, device.default_rapid_speed * galvos_per_mm, places=3
+            )
+            self.assertAlmostEqual(
+                cost.delay_mark,
+                (device.delay_laser_on + device.delay_laser_off) / 1e6,
+            )
+            # The jump speed and delays of the operation, as set_settings() writes them.
+            cost = device.travel_cost(
+                {
+                    "rapid_enabled": True,
+                    "rapid_speed": 500,
+                    "timing_enabled": "True",
+                    "delay_laser_on": 50,
+                    "delay_laser_off": -20,
+                    "delay_polygon": 30,
+                }
+            )
+            self.assertAlmostEqual(cost.speed, 500 * galvos_per_mm, places=3)
+            self.assertAlmostEqual(cost.delay_mark, 50e-6)
+            self.assertAlmostEqual(cost.delay_polygon, 30e-6)
+            cost = device.travel_cost({"rapid_enabled": False, "rapid_speed": 500})
+            self.assertAlmostEqual(
+                cost.speed, device.default_rapid_speed * galvos_per_mm, places=3
+            )
+        finally:
+            kernel()
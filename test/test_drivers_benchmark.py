@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+import unittest
+
+from meerk40t.core.benchmark import JOBS, ByteSink, benchmark, tap_driver
+from test import bootstrap
+
+KEYS = {
+    "job",
+    "items",
+    "seconds",
+    "cpu_seconds",
+    "items_per_second",
+    "bytes",
+    "bytes_per_second",
+    "time_to_first_byte",
+    "peak_rss",
+}
+
+
+class TestDriverBenchmark(unittest.TestCase):
+    def test_drivers(self):
+        for provider in ("grbl", "lhystudios", "moshi", "balor", "newly", "ruida"):
+            kernel = bootstrap.bootstrap()
+            try:
+                kernel.console(f"service device start -i {provider} 0\n")
+                results = benchmark(kernel.device, scale=0.02)
+            finally:
+                kernel()
+            self.assertEqual([run["job"] for run in results["runs"]], list(JOBS), provider)
+            for run in results["runs"]:
+                self.assertEqual(set(run), KEYS)
+                self.assertGreater(run["bytes"], 0, (provider, run["job"]))
+                self.assertLessEqual(run["time_to_first_byte"], run["seconds"])
+                self.assertGreater(run["items_per_second"], 0)
+
+    def test_no_threads_left(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i ruida 0\n")
+            before = set(threading.enumerate())
+            benchmark(kernel.device, scale=0.02)
+            left = [t for t in threading.enumerate() if t not in before]
+        finally:
+            kernel()
+        self.assertEqual(left, [])
+
+    def test_unknown_driver(self):
+        class Driver:
+            pass
+
+        self.assertFalse(tap_driver(Driver(), ByteSink()))
+
+    def test_console(self):
+        filename = "test_benchmark.json"
+        self.addCleanup(os.remove, filename)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            kernel.console(f"driver benchmark vectors mixed -s 0.05 -o {filename}\n")
+        finally:
+            kernel()
+        with open(filename) as f:
+            results = json.load(f)
+        self.assertEqual(results["driver"], "GRBLDriver")
+        self.assertEqual([run["job"] for run in results["runs"]], ["vectors", "mixed"])
+        self.assertEqual(results["runs"][0]["items"], 1000)
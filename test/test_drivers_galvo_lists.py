@@ -0,0 +1,118 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.balormk.controller import READY, list_moves, list_record
+from meerk40t.balormk.driver import BalorDriver
+from meerk40t.core.cutcode.plotcut import PlotCut
+from meerk40t.core.cutcode.rastercut import RasterCut
+from test import bootstrap
+
+
+def _capture(controller):
+    """
+    Records the lists the controller sends, in place of the connection.
+    """
+    lists = []
+
+    def send(data, read=True):
+        if len(data) == 0xC00:
+            lists.append(bytes(data))
+        return 0, 0, 0, READY
+
+    controller.send = send
+    return lists
+
+
+def _moves_one_at_a_time(controller):
+    def moves(x, y, marks):
+        for px, py, mark in zip(x.tolist(), y.tolist(), marks.tolist()):
+            if mark:
+                controller.mark(px, py)
+            else:
+                controller.goto(px, py)
+
+    controller.moves = moves
+
+
+def _positions(rng, count):
+    x = rng.integers(-100, 0x10100, size=count).astype(float)
+    y = rng.integers(-100, 0x10100, size=count).astype(float)
+    # Repeated positions, small and fractional steps.
+    x[rng.random(count) < 0.2] = 0x8000
+    y[rng.random(count) < 0.2] = 0x8000
+    fraction = rng.random(count) < 0.2
+    x[fraction] = 0x4000 + rng.random(np.count_nonzero(fraction)) * 3
+    return x, y
+
+
+class TestGalvoLists(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i balor 0\n")
+
+    def tearDown(self):
+        self.kernel()
+
+    def _driver(self, bulk):
+        driver = BalorDriver(self.kernel.device, force_mock=True)
+        lists = _capture(driver.connection)
+        if not bulk:
+            _moves_one_at_a_time(driver.connection)
+            driver.plot_planner.raster_blocks = False
+        return driver, lists
+
+    def test_list_moves(self):
+        records = list_moves([10, 10, 13.7, -1, 70000, 13], [20, 20, 24, 5, 5, 24], [False, True, True, True, True, False], 10, 20)
+        self.assertEqual(records.dtype.itemsize, 12)
+        self.assertEqual(records.dtype, list_record)
+        self.assertEqual(records.tolist(), [(0x8005, 13, 24, 0, 5, 0)])
+
+    def test_moves_matches(self):
+        rng = np.random.default_rng(1)
+        for count in (1, 5, 300, 1000):
+            x, y = _positions(rng, count)
+            marks = rng.random(count) < 0.7
+            sent = []
+            for bulk in (True, False):
+                driver, lists = self._driver(bulk)
+                con = driver.connection
+                con.program_mode()
+                con.moves(x, y, marks)
+                con.moves(x[::-1], y[::-1], marks)
+                sent.append((lists, bytes(con._active_list), con.get_last_xy()))
+            self.assertEqual(sent[0], sent[1])
+
+    def _plot_cut(self, rng, count):
+        cut = PlotCut(settings={"power": 600, "speed": 200})
+        x = 0x6000
+        y = 0x6000
+        cut.plot_init(x, y)
+        for i in range(count):
+            x += int(rng.integers(-40, 40))
+            y += int(rng.integers(-40, 40))
+            cut.plot_append(x, y, float(rng.choice([0, 1, 1, 0.5])))
+        return cut
+
+    def _raster_cut(self, rng, horizontal):
+        pixels = np.where(rng.random((40, 60)) < 0.4, 0, 255).astype(np.uint8)
+        pixels[:10] = rng.choice([0, 90, 200, 255], size=(10, 60))
+        settings = {"power": 800, "speed": 300, "raster_step_x": 2, "raster_step_y": 2}
+        return RasterCut(
+            Image.fromarray(pixels).copy(), 0x5000, 0x5000, 2, 2, settings=settings, horizontal=horizontal
+        )
+
+    def test_plot_start_matches(self):
+        sent = []
+        for bulk in (True, False):
+            rng = np.random.default_rng(2)
+            driver, lists = self._driver(bulk)
+            driver.plot(self._plot_cut(rng, 2000))
+            driver.plot(self._raster_cut(rng, True))
+            driver.plot(self._raster_cut(rng, False))
+            driver.plot(self._plot_cut(rng, 50))
+            driver.plot_start()
+            sent.append(lists)
+        self.assertGreater(len(sent[0]), 10)
+        self.assertEqual(sent[0], sent[1])
@@ -0,0 +1,183 @@
+import unittest
+
+import numpy as np
+
+from meerk40t.balormk.controller import READY
+from meerk40t.balormk.driver import BalorDriver
+from meerk40t.balormk.livelightjob import LiveLightJob, simplify_trace
+from meerk40t.core.geomstr import Geomstr
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _capture(controller):
+    lists = []
+
+    def send(data, read=True):
+        if len(data) == 0xC00:
+            lists.append(bytes(data))
+        return 0, 0, 0, READY
+
+    controller.send = send
+    return lists
+
+
+def _legacy_trace(job, con):
+    """
+    Traces the points one at a time, as before the traces were cached.
+    """
+    con.light_mode()
+    delay_dark = job.service.redlight_delay_dark
+    delay_between = job.service.redlight_delay_light
+    move = True
+    first = True
+    first_x, first_y = None, None
+    for e in job.points:
+        if e is None:
+            move = True
+            continue
+        x, y = e.real, e.imag
+        if np.isnan(x) or np.isnan(y):
+            move = True
+            continue
+        x = int(x)
+        y = int(y)
+        if x < 0 or x > 0xFFFF or y < 0 or y > 0xFFFF:
+            if job.bounded:
+                continue
+            x = max(min(x, 0xFFFF), 0)
+            y = max(min(y, 0xFFFF), 0)
+        if first:
+            first_x, first_y = x, y
+            first = False
+        if move:
+            con.dark(x, y, long=delay_dark, short=delay_dark)
+            move = False
+            continue
+        con.light(x, y, long=delay_between, short=delay_between)
+    if first_x is not None and first_y is not None:
+        con.dark(first_x, first_y, long=delay_dark, short=delay_dark)
+    con.light_off()
+    con.write_port()
+
+
+def _points(rng, count):
+    points = []
+    for i in range(count):
+        if rng.random() < 0.05:
+            points.append(None if rng.random() < 0.5 else complex("nan"))
+            continue
+        x, y = rng.integers(-200, 0x10100, size=2) + rng.random(2)
+        points.append(complex(x, y))
+    if count > 12:
+        # Repeated points.
+        points[10:12] = [points[9], points[9]]
+    return points
+
+
+class TestLiveLightTrace(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i balor 0\n")
+        self.service = self.kernel.device
+        self.service.redlight_delay_dark = 30
+        self.service.redlight_delay_light = 5
+        self.service.redlight_refresh = 20
+
+    def tearDown(self):
+        self.kernel()
+
+    def _passes(self, points, bounded, cached, passes=3):
+        # Not simplified.
+        self.service.redlight_refresh = 1
+        driver = BalorDriver(self.service, force_mock=True)
+        lists = _capture(driver.connection)
+        con = driver.connection
+        job = LiveLightJob(self.service, listen=False)
+        job.points = points
+        job.bounded = bounded
+        job._trace = job.build_trace(points)
+        job.changed = False
+        con.light_mode()
+        con._light_speed = con._dark_speed = self.service.redlight_speed
+        for i in range(passes):
+            if cached:
+                job.trace_redlight(con)
+            else:
+                _legacy_trace(job, con)
+        return lists, bytes(con._active_list), con.get_last_xy(), con._port_bits
+
+    def test_trace_matches(self):
+        rng = np.random.default_rng(0)
+        for count in (0, 1, 5, 300, 2000):
+            points = _points(rng, count)
+            for bounded in (False, True):
+                self.assertEqual(
+                    self._passes(points, bounded, True),
+                    self._passes(points, bounded, False),
+                )
+
+    def test_simplify_budget(self):
+        rng = np.random.default_rng(1)
+        x = np.cumsum(rng.integers(-30, 30, size=5000)) + 0x8000
+        y = np.cumsum(rng.integers(-30, 30, size=5000)) + 0x8000
+        dark = rng.random(5000) < 0.01
+        dark[0] = True
+        sx, sy, sdark = simplify_trace(x, y, dark, 500, 100)
+        self.assertLessEqual(len(sx), 500)
+        # Every run keeps its start and end.
+        self.assertEqual(np.count_nonzero(sdark), np.count_nonzero(dark))
+        self.assertEqual((sx[-1], sy[-1]), (x[-1], y[-1]))
+        self.assertIs(simplify_trace(x, y, dark, 5000, 100)[0], x)
+
+    def test_budget(self):
+        job = LiveLightJob(self.service, listen=False)
+        circles = Geomstr()
+        for i in range(200):
+            circles.append(Geomstr.circle(300, 0x8000 + i * 10, 0x8000))
+        job.points = list(circles.as_equal_interpolated_points(distance=5))
+        trace = job.build_trace(job.points)
+        self.assertLess(len(trace), len(job.points))
+        self.assertLessEqual(
+            len(trace), job.point_budget(trace.x, trace.y) + 200 * 2 + 1
+        )
+
+    def test_rebuild_on_change(self):
+        job = LiveLightJob(self.service, mode="geometry", listen=False)
+        job._geometry = Geomstr.rect(0, 0, 1000, 1000)
+        updates = []
+        update_method = job.update_method
+
+        def counted():
+            updates.append(True)
+            update_method()
+
+        job.update_method = counted
+        self.assertTrue(job.update_trace())
+        trace = job._trace
+        self.assertFalse(job.update_trace())
+        self.assertEqual(len(updates), 1)
+        self.service.redlight_delay_light = 7
+        self.assertTrue(job.update_trace())
+        self.assertEqual(len(updates), 2)
+        self.service.redlight_delay_light = 5
+        # Taken from the cache.
+        self.assertTrue(job.update_trace())
+        self.assertIs(job._trace, trace)
+        self.assertEqual(len(updates), 2)
+
+    def test_rebuild_on_geometry_edit(self):
+        job = LiveLightJob(self.service, mode="geometry", listen=False)
+        geometry = Geomstr.lines(0, 0, 1000, 0, 1000, 300)
+        job._geometry = geometry
+        self.assertTrue(job.update_trace())
+        trace = job._trace
+        # Flipped in place, as the scene does.
+        geometry.transform(Matrix("scale(1,-1) translate(0,-1000)"))
+        job._geometry = geometry
+        self.assertTrue(job.update_trace())
+        self.assertIsNot(job._trace, trace)
+        self.assertNotEqual(
+            list(zip(job._trace.x.tolist(), job._trace.y.tolist())),
+            list(zip(trace.x.tolist(), trace.y.tolist())),
+        )
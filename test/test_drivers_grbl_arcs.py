@@ -0,0 +1,178 @@
+import os
+import re
+import unittest
+from cmath import exp, phase
+from math import pi, tau
+
+import numpy as np
+
+from meerk40t.grbl.arcfit import ArcFitter, arc_through, circle_center
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import CubicBezier, Matrix
+from test import bootstrap
+
+
+def _circle(radius, count, center=0j, start=0.0, sweep=tau):
+    return [center + radius * exp(1j * (start + sweep * i / count)) for i in range(count + 1)]
+
+
+def _distance_to_polyline(point, polyline):
+    a = np.asarray(polyline[:-1], dtype=complex)
+    b = np.asarray(polyline[1:], dtype=complex)
+    d = b - a
+    length = np.abs(d) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((point - a) * d.conjugate()).real / length
+    t = np.clip(np.nan_to_num(t), 0, 1)
+    return float(np.min(np.abs(a + t * d - point)))
+
+
+def _segment_points(start, segment, count=16):
+    """
+    Points along a fitted segment, arcs drawn like the GRBL emulator draws them.
+    """
+    end = segment[1]
+    if segment[0] == "line":
+        return [start + (end - start) * i / count for i in range(count + 1)]
+    center, ccw = segment[2], segment[3]
+    sweep = phase((end - center) / (start - center))
+    if ccw and sweep <= 0:
+        sweep += tau
+    if not ccw and sweep >= 0:
+        sweep -= tau
+    return [
+        center + (start - center) * exp(1j * sweep * i / count) for i in range(count + 1)
+    ]
+
+
+class TestArcFitter(unittest.TestCase):
+    def assertWithin(self, polyline, segments, tolerance):
+        current = polyline[0]
+        for segment in segments:
+            for p in _segment_points(current, segment):
+                self.assertLessEqual(
+                    _distance_to_polyline(p, polyline), tolerance * 1.01
+                )
+            current = segment[1]
+        self.assertAlmostEqual(current, polyline[-1])
+
+    def test_circle_center(self):
+        self.assertAlmostEqual(circle_center(1 + 0j, 1j, -1 + 0j), 0j)
+        self.assertIsNone(circle_center(0j, 1 + 1j, 2 + 2j))
+        center, ccw = arc_through(1 + 0j, 1j, -1 + 0j)
+        self.assertTrue(ccw)
+        center, ccw = arc_through(-1 + 0j, 1j, 1 + 0j)
+        self.assertFalse(ccw)
+
+    def test_circle(self):
+        points = _circle(1000, 2000, center=5000 + 5000j)
+        segments = ArcFitter(1.0).fit(points)
+        self.assertLessEqual(len(segments), 3)
+        self.assertTrue(all(s[0] == "arc" for s in segments))
+        self.assertTrue(all(s[3] for s in segments))
+        self.assertWithin(points, segments, 1.0)
+
+    def test_clockwise(self):
+        points = _circle(500, 300, sweep=-pi)
+        segments = ArcFitter(1.0).fit(points)
+        self.assertEqual(len(segments), 1)
+        self.assertFalse(segments[0][3])
+        self.assertWithin(points, segments, 1.0)
+
+    def test_lines_merged(self):
+        points = [complex(x, 2 * x) for x in range(100)]
+        points.extend(complex(99 + x, 198) for x in range(1, 50))
+        segments = ArcFitter(0.5).fit(points)
+        self.assertEqual(segments, [("line", 99 + 198j), ("line", 148 + 198j)])
+
+    def test_polygon_corners_kept(self):
+        polygon = _circle(1000, 12)
+        segments = ArcFitter(1.0).fit(polygon)
+        self.assertEqual(len(segments), 12)
+        self.assertWithin(polygon, segments, 1.0)
+
+    def test_cubic(self):
+        cubic = CubicBezier(0j, 3000 + 0j, -1000 + 4000j, 4000 + 3000j)
+        points = list(cubic.npoint(np.linspace(0, 1, 1500)))
+        points = [complex(x, y) for x, y in points]
+        for tolerance in (0.5, 2.0, 10.0):
+            segments = ArcFitter(tolerance).fit(points)
+            self.assertLess(len(segments), 40)
+            self.assertWithin(points, segments, tolerance)
+
+
+class TestDriverGRBLArcs(unittest.TestCase):
+    def _save_job(self, filename, use_arcs):
+        self.addCleanup(os.remove, filename)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            kernel.console("operation* remove\n")
+            kernel.device.use_arcs = use_arcs
+            kernel.device.arc_tolerance = 1.0
+            kernel.console(
+                f"circle 5cm 5cm 2cm engrave -s 15 plan copy-selected preprocess validate blob preopt optimize save_job {filename}\n"
+            )
+        finally:
+            kernel()
+        with open(filename) as f:
+            return f.read().splitlines()
+
+    def test_circle_arcs(self):
+        lines = self._save_job("test_arcs.gcode", True)
+        plain = self._save_job("test_noarcs.gcode", False)
+        arcs = [line for line in lines if re.match("G[23] ", line)]
+        self.assertGreater(len(arcs), 0)
+        self.assertLess(len(lines), len(plain) // 10)
+        self.assertFalse(any(line.startswith("G2 ") or line.startswith("G3 ") for line in plain))
+
+        # Every arc follows the 2cm circle.
+        path = []
+        position = None
+        for line in lines:
+            values = dict(
+                (m[0], float(m[1:])) for m in re.findall(r"[XYIJ]-?[0-9.]+", line)
+            )
+            if "X" not in values:
+                continue
+            end = complex(values["X"], values["Y"])
+            if line.startswith(("G2 ", "G3 ")):
+                center = position + complex(values["I"], values["J"])
+                segment = ("arc", end, center, line.startswith("G3"))
+                path.extend(_segment_points(position, segment))
+            position = end
+        center = sum(path) / len(path)
+        for p in path:
+            self.assertAlmostEqual(abs(p - center), 20.0, delta=0.05)
+        # Arcs turn the right way, a wrong direction goes the long way round.
+        length = sum(abs(b - a) for a, b in zip(path, path[1:]))
+        self.assertAlmostEqual(length, tau * 20.0, delta=0.5)
+
+
+class TestGcodeJobArcs(unittest.TestCase):
+    def _plot(self, *lines):
+        job = GcodeJob(units_to_device_matrix=Matrix())
+        job._interpolate = 16
+        plotted = []
+
+        def plot_location(x, y, power):
+            plotted.append(complex(x, y))
+            job.x = x
+            job.y = y
+
+        job.plot_location = plot_location
+        for line in lines:
+            job._process_gcode(line)
+        return [p / job.scale for p in plotted]
+
+    def test_arc_direction(self):
+        """
+        G2 is clockwise and G3 counterclockwise with y pointing up.
+        """
+        ccw = self._plot("G21", "G90", "M4", "G0 X10 Y0", "G3 X0 Y10 I-10 J0")
+        cw = self._plot("G21", "G90", "M4", "G0 X10 Y0", "G2 X0 Y10 I-10 J0")
+        for path in (ccw, cw):
+            self.assertTrue(all(abs(abs(p) - 10) < 1e-6 for p in path[1:]))
+        # The quarter circle goes through the first quadrant, G2 the long way round.
+        self.assertTrue(all(p.real >= -1e-6 and p.imag >= -1e-6 for p in ccw[1:]))
+        self.assertTrue(any(p.real < -5 and p.imag < -5 for p in cw[1:]))
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from meerk40t.core.geomstr import TYPE_ARC, TYPE_END, TYPE_LINE
+from meerk40t.core.units import UNITS_PER_INCH, UNITS_PER_MIL, UNITS_PER_MM
+from meerk40t.grbl.gcodegeom import parse_gcode, tokenize
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+MM = UNITS_PER_MM
+
+
+def _types(geometry):
+    return list(geometry.segments[: geometry.index, 2].real.astype(int))
+
+
+def _job_points(data):
+    """
+    Points plotted by GcodeJob with the laser on.
+    """
+    job = GcodeJob(units_to_device_matrix=Matrix())
+    job._interpolate = 24
+    points = []
+
+    def plot_location(x, y, power):
+        if power:
+            points.append(complex(x, y))
+        job.x = x
+        job.y = y
+
+    job.plot_location = plot_location
+    for line in data.splitlines():
+        job._process_gcode(line)
+    return np.array(points)
+
+
+class TestGcodeTokenize(unittest.TestCase):
+    def test_words(self):
+        letters, values, lines, count = tokenize(
+            b"g21 (mm) G90\r\nG1X1.5 Y -2 ; comment X9\n$H\nS.5M3\n\nN10 G0 X-.25"
+        )
+        self.assertEqual(bytes(letters), b"GGGXYSMNGX")
+        self.assertEqual(list(values), [21, 90, 1, 1.5, -2, 0.5, 3, 10, 0, -0.25])
+        self.assertEqual(list(lines), [0, 0, 1, 1, 1, 3, 3, 5, 5, 5])
+        self.assertEqual(count, 6)
+
+    def test_malformed(self):
+        letters, values, lines, count = tokenize(b"G1 X1.2.3 Y-\nG1 X4")
+        self.assertEqual(bytes(letters), b"GXYGX")
+        self.assertTrue(np.isnan(values[1]) and np.isnan(values[2]))
+        self.assertEqual(values[4], 4)
+
+    def test_empty(self):
+        geometry, power, speed = parse_gcode(b"")
+        self.assertEqual(geometry.index, 0)
+        self.assertEqual(len(power), 0)
+
+
+class TestGcodeGeometry(unittest.TestCase):
+    def test_modal_lines(self):
+        geometry, power, speed = parse_gcode(
+            "G21 G90\n"
+            "G0 X10 Y10\n"
+            "M3 S500 F600\n"
+            "G1 X20\n"
+            "Y20\n"
+            "G91 X5 Y5\n"
+            "G0 X10\n"
+            "G90 G1 X0 Y0 S0.5\n"
+            "M5\n"
+            "G1 X10 F1200\n"
+            "G20 G1 X1 Y1\n"
+            "G28\n"
+            "G21 G1 X10 Y0\n"
+        )
+        segments = geometry.segments[: geometry.index]
+        self.assertEqual(
+            _types(geometry),
+            [TYPE_LINE, TYPE_LINE, TYPE_LINE, TYPE_END, TYPE_LINE, TYPE_LINE, TYPE_LINE, TYPE_END, TYPE_LINE],
+        )
+        ends = [complex(x, y) * MM for x, y in ((20, 10), (20, 20), (25, 25))]
+        self.assertTrue(np.allclose(segments[:3, 4], ends))
+        self.assertTrue(np.allclose(segments[4, [0, 4]], [35 * MM + 25j * MM, 0]))
+        self.assertTrue(np.allclose(segments[6, 4], (1 + 1j) * UNITS_PER_INCH))
+        # G28 homes, the next line starts at the origin.
+        self.assertTrue(np.allclose(segments[8, [0, 4]], [0, 10 * MM]))
+        self.assertEqual(list(power), [500, 500, 500, 0, 500, 0, 0, 0, 0])
+        self.assertEqual(list(speed), [10, 10, 10, 0, 10, 20, 20, 0, 20])
+        settings = [geometry._settings[int(i)] for i in segments[[0, 5], 2].imag]
+        self.assertEqual(settings[0], {"power": 500, "speed": 10})
+        self.assertEqual(settings[1], {"power": 0, "speed": 20})
+
+    def test_arcs(self):
+        geometry, power, speed = parse_gcode(
+            "G21 G90 M3 S1000\n"
+            "G0 X10 Y0\n"
+            "G3 X0 Y10 I-10 J0\n"
+            "G2 X10 Y0 R-10\n"
+            "G3 X10 Y0 I-10\n"
+        )
+        segments = geometry.segments[: geometry.index]
+        self.assertEqual(_types(geometry), [TYPE_ARC] * 5)
+        # Quarter circle through the first quadrant.
+        self.assertTrue(np.allclose(segments[0, 1], 10 * MM * np.exp(1j * np.pi / 4)))
+        # Negative R is the long way round, three quarters clockwise around (10, 10).
+        # This arc and the full circle are split in halves.
+        center = (10 + 10j) * MM
+        for segment in segments[1:3]:
+            self.assertTrue(np.allclose(np.abs(segment[[0, 1, 4]] - center), 10 * MM))
+        self.assertTrue(np.allclose(segments[1, 1], center + 10 * MM * np.exp(0.625j * np.pi)))
+        self.assertTrue(np.allclose(segments[2, 4], 10 * MM))
+        self.assertTrue(np.allclose(segments[3, [0, 1, 4]], [10 * MM, 10j * MM, -10 * MM]))
+        self.assertTrue(np.allclose(segments[4, [0, 1, 4]], [-10 * MM, -10j * MM, 10 * MM]))
+
+    def test_matches_gcodejob(self):
+        data = (
+            "G21 G90\n"
+            "M4 S800 F3000\n"
+            "G0 X5 Y5\n"
+            "G1 X20 Y5\n"
+            "G2 X30 Y15 I0 J10\n"
+            "G3 X40 Y5 I10 J0\n"
+            "G1 X40 Y-5\n"
+            "G0 X0 Y0\n"
+            "G1 X3 Y4\n"
+        )
+        geometry, power, speed = parse_gcode(data)
+        sampled = np.array(
+            [
+                p
+                for p in geometry.as_equal_interpolated_points(distance=MM / 10)
+                if p is not None and not np.isnan(p)
+            ]
+        )
+        points = _job_points(data)
+        self.assertGreater(len(points), 20)
+        distance = np.min(np.abs(points[:, None] - sampled[None, :]), axis=1)
+        self.assertLess(np.max(distance), MM / 10)
+
+
+class TestGcodeGeometryCommand(unittest.TestCase):
+    def test_gcode_geometry(self):
+        fd, filename = tempfile.mkstemp(suffix=".gcode")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"G21\nM3 S1000\nG0 X10 Y10\nG1 X20 Y10\nG1 X20 Y20\nM5\n")
+        self.addCleanup(os.remove, filename)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            kernel.console("element* delete\n")
+            kernel.console(f"gcode_geometry {filename} node\n")
+            nodes = list(kernel.elements.elems())
+            self.assertEqual(len(nodes), 1)
+            geometry = nodes[0].as_geometry()
+            self.assertEqual(_types(geometry), [TYPE_LINE, TYPE_LINE])
+            # Where the driver would burn the lines, y pointing up in g-code.
+            view = kernel.device.view
+            mils = UNITS_PER_MM / UNITS_PER_MIL
+            for point, (x, y) in zip(
+                geometry.segments[:2, 4], ((20, 10), (20, 20))
+            ):
+                self.assertAlmostEqual(
+                    complex(*view.position(point.real, point.imag)),
+                    complex(x * mils, y * mils),
+                    places=3,
+                )
+            start, end = geometry.segments[1, 0], geometry.segments[1, 4]
+            self.assertLess(end.imag, start.imag)
+        finally:
+            kernel()
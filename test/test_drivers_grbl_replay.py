@@ -0,0 +1,86 @@
+import unittest
+
+from meerk40t.core.benchmark import curve_job, raster_job, vector_job
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.laserjob import LaserJob
+from meerk40t.core.replay import Capture, ReplayCache, cutcode_digest
+from test import bootstrap
+
+
+def _cuts(view):
+    return (
+        vector_job(view, 0.01)
+        + curve_job(view, 0.02)
+        + raster_job(view, 0.0005)
+        + vector_job(view, 0.005)
+    )
+
+
+class TestReplayCache(unittest.TestCase):
+    def test_budget(self):
+        cache = ReplayCache(100)
+        cache.put("a", Capture(["x" * 40], {}))
+        cache.put("b", Capture(["x" * 40], {}))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", Capture(["x" * 40], {}))
+        # b was used least recently.
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.size, 80)
+        cache.put("d", Capture(["x" * 101], {}))
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(len(cache), 2)
+
+    def test_digest(self):
+        def cutcode(power):
+            settings = {"speed": 10, "power": power}
+            return CutCode(
+                [LineCut((0, i), (i, 0), settings=settings) for i in range(10)]
+            )
+
+        self.assertEqual(cutcode_digest(cutcode(500)), cutcode_digest(cutcode(500)))
+        self.assertNotEqual(cutcode_digest(cutcode(500)), cutcode_digest(cutcode(600)))
+        moved = cutcode(500)
+        moved[3] = LineCut((0, 3), (3, 1), settings=moved[3].settings)
+        self.assertNotEqual(cutcode_digest(cutcode(500)), cutcode_digest(moved))
+
+
+class TestGRBLReplay(unittest.TestCase):
+    def test_replay(self):
+        """
+        Loops and jobs sent again replay the captured gcode, which is the gcode written without replaying.
+        """
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            device = kernel.device
+            outputs = []
+            for replay in (False, True):
+                driver = type(device.driver)(device)
+                if not replay:
+                    driver.replay_cache = None
+                output = []
+                driver.out_pipe = output.append
+                driver.out_real = output.append
+                compiled = []
+                plot_start = driver.plot_start
+                driver.plot_start = lambda: compiled.append(1) or plot_start()
+                steps = []
+                for i in range(2):
+                    job = LaserJob("replay", [CutCode(_cuts(device.view))], driver=driver, loops=3)
+                    self.assertTrue(job.execute(driver))
+                    steps.append((job.steps_done, job.steps_total))
+                outputs.append("".join(output))
+                if replay:
+                    # The first loop starts from the initial state of the driver, the second captures the state
+                    # every later loop starts from.
+                    self.assertEqual(len(compiled), 2)
+                    self.assertEqual(len(driver.replay_cache), 2)
+                else:
+                    self.assertEqual(len(compiled), 6)
+                self.assertEqual(steps[0], steps[1])
+                self.assertEqual(steps[0][0], steps[0][1])
+            self.assertGreater(len(outputs[0]), 1000)
+            self.assertEqual(outputs[0], outputs[1])
+        finally:
+            kernel()
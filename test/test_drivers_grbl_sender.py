@@ -0,0 +1,214 @@
+import threading
+import time
+import unittest
+from collections import deque
+
+from meerk40t.grbl.controller import GrblController
+from test import bootstrap
+
+
+class RecordingConnection:
+    """
+    Connection which records the writes and replies ok when told to.
+    """
+
+    def __init__(self):
+        self.connected = True
+        self.auto_ok = False
+        self.writes = []
+        self.replies = deque()
+        self._cond = threading.Condition()
+
+    def connect(self):
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def write(self, data):
+        with self._cond:
+            self.writes.append(data)
+            if self.auto_ok:
+                lines, _ = GrblController._split_lines(data)
+                self.replies.extend(["ok"] * len(lines))
+            self._cond.notify_all()
+
+    def read(self):
+        try:
+            return self.replies.popleft()
+        except IndexError:
+            return None
+
+    def wait_writes(self, count, timeout=5.0):
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.writes) >= count, timeout)
+
+
+def _wait_for(condition, timeout=5.0):
+    end = time.time() + timeout
+    while not condition():
+        if time.time() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class TestGrblSender(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i grbl 0\n")
+        self.device = self.kernel.device
+        self.controller = self.device.controller
+        self.connection = RecordingConnection()
+        self.controller.connection = self.connection
+        self.controller._device_buffer_size = 64
+        self.controller.force_validate()
+
+    def tearDown(self):
+        self.connection.connected = False
+        self.controller._send_resume()
+        self.kernel()
+
+    def test_split_lines(self):
+        lines, rest = GrblController._split_lines("G1 X1\nG1 Y2\r\nG1")
+        self.assertEqual(lines, [("G1 X1\n", 6), ("G1 Y2\r", 6), ("\n", 1)])
+        self.assertEqual(rest, "G1")
+        lines, rest = GrblController._split_lines("G1 X1 ; µ\n")
+        self.assertEqual(lines[0][1], 10)
+        self.assertEqual(rest, "")
+
+    def test_batched_writes(self):
+        controller = self.controller
+        lines = [f"G1 X{i:03d}\n" for i in range(20)]  # 8 bytes each
+        controller._paused = True
+        for line in lines:
+            controller.write(line)
+        controller._paused = False
+        controller._send_resume()
+        self.assertTrue(self.connection.wait_writes(1))
+        # 7 lines fit into the 64 byte buffer and are sent with a single write.
+        self.assertTrue(_wait_for(lambda: len(controller._forward_lines) == 7))
+        self.assertEqual(self.connection.writes[0], "".join(lines[:7]))
+        self.assertEqual(controller._forward_bytes, 56)
+        self.assertEqual(len(controller), 13 + 56)
+
+        self.connection.auto_ok = True
+        self.connection.replies.extend(["ok"] * 7)
+        self.assertTrue(_wait_for(lambda: len(controller) == 0))
+        self.assertEqual("".join(self.connection.writes), "".join(lines))
+        self.assertTrue(all(len(w) < 64 for w in self.connection.writes))
+
+    def test_sync_mode(self):
+        controller = self.controller
+        self.device.buffer_mode = "sync"
+        for i in range(3):
+            controller.write(f"G1 X{i}\n")
+        self.assertTrue(self.connection.wait_writes(1))
+        time.sleep(0.05)
+        self.assertEqual(self.connection.writes, ["G1 X0\n"])
+        self.connection.replies.append("ok")
+        self.assertTrue(self.connection.wait_writes(2))
+        self.assertEqual(self.connection.writes[1], "G1 X1\n")
+        self.connection.replies.append("ok")
+        self.assertTrue(self.connection.wait_writes(3))
+        self.connection.replies.append("ok")
+        self.assertTrue(_wait_for(lambda: len(controller) == 0))
+
+    def test_partial_and_long_lines(self):
+        controller = self.controller
+        controller.write("G1 X")
+        controller.write("10\n")
+        long_line = "G1 " + "X1 " * 40 + "\n"
+        controller.write(long_line)
+        self.assertTrue(self.connection.wait_writes(1))
+        self.assertEqual(self.connection.writes[0], "G1 X10\n")
+        self.connection.replies.append("ok")
+        # A line longer than the buffer is still sent once the buffer is empty.
+        self.assertTrue(self.connection.wait_writes(2))
+        self.assertEqual(self.connection.writes[1], long_line)
+        self.connection.replies.append("error:20")
+        self.assertTrue(_wait_for(lambda: len(controller) == 0))
+
+    def test_soft_reset_clears(self):
+        controller = self.controller
+        for i in range(20):
+            controller.write(f"G1 X{i:03d}\n")
+        self.assertTrue(_wait_for(lambda: controller._forward_bytes > 0))
+        controller.realtime("\x18")
+        self.assertTrue(_wait_for(lambda: len(controller) == 0))
+        self.assertEqual(controller._forward_bytes, 0)
+        self.assertIn("\x18", self.connection.writes)
+
+    def test_stale_sequence_dropped(self):
+        controller = self.controller
+        self.connection.auto_ok = True
+        sequence = controller.sequence
+        controller.write("G1 X1\n", sequence=sequence)
+        self.assertTrue(self.connection.wait_writes(1))
+        controller.realtime("\x18")
+        self.assertEqual(controller.sequence, sequence + 1)
+        controller.write("G1 X2\n", sequence=sequence)
+        controller.write("G1 X3\n", sequence=sequence + 1)
+        self.assertTrue(_wait_for(lambda: len(controller) == 0))
+        self.assertNotIn("G1 X2\n", self.connection.writes)
+        self.assertIn("G1 X3\n", self.connection.writes)
+
+    def test_wait_for_room(self):
+        controller = self.controller
+        controller._paused = True
+        for i in range(10):
+            controller.write(f"G1 X{i}\n")
+        self.assertFalse(controller.wait_for_room(10, timeout=0.01))
+        self.assertTrue(controller.wait_for_room(11, timeout=0.01))
+        sequence = controller.sequence
+        waiter = threading.Thread(
+            target=lambda: self.assertTrue(controller.wait_for_room(5, sequence, 5.0))
+        )
+        waiter.start()
+        controller.realtime("\x18")
+        waiter.join()
+
+
+class TestGrblDriverBlocks(unittest.TestCase):
+    def test_plot_start_blocks(self):
+        from meerk40t.core.cutcode.linecut import LineCut
+        from meerk40t.grbl.driver import BLOCK_LINES
+
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            driver = kernel.device.driver
+            writes = []
+            driver.out_pipe = writes.append
+            settings = {"speed": 20, "power": 1000}
+            for i in range(300):
+                driver.plot(LineCut((i * 100, 0), (i * 100 + 100, 500), settings=settings))
+            driver.plot_start()
+        finally:
+            kernel()
+        data = "".join(writes)
+        lines = data.splitlines()
+        self.assertEqual(len([line for line in lines if line.startswith("G1 X")]), 300)
+        self.assertTrue(all(w.count("\n") <= BLOCK_LINES for w in writes))
+        self.assertLessEqual(len(writes), len(lines) // BLOCK_LINES + 2)
+
+
+class TestGrblSenderMock(unittest.TestCase):
+    def test_stream_emulator(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            device = kernel.device
+            device.interface = "mock"
+            controller = device.controller
+            controller.update_connection()
+            controller.start()
+            controller.force_validate()
+            for i in range(500):
+                controller.write(f"G1 X{i % 100}.5 Y{i % 37}.25\n")
+            self.assertTrue(_wait_for(lambda: len(controller) == 0, timeout=30))
+            job = controller.connection.emulator.job
+            self.assertAlmostEqual(job.x / job.scale, 99.5)
+            self.assertAlmostEqual(job.y / job.scale, 499 % 37 + 0.25)
+        finally:
+            kernel()
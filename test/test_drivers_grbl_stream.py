@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+
+from meerk40t.grbl.gcodejob import EXECUTE_LINES, GcodeJob
+from meerk40t.grbl.gcodestream import GcodeStream, line_ends
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _gcode_file(data):
+    fd, filename = tempfile.mkstemp(suffix=".gcode")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return filename
+
+
+def _run(job):
+    executed = []
+    job._process_gcode = lambda line, jog=False: executed.append(line) or 0
+    while not job.execute():
+        pass
+    return executed
+
+
+class TestGcodeStream(unittest.TestCase):
+    def test_line_endings(self):
+        data = b"G0 X1\r\nG1 Y2\rG1 Y3\n\nM5"
+        stream = GcodeStream(data)
+        self.assertEqual(list(stream), ["G0 X1", "G1 Y2", "G1 Y3", "", "M5"])
+        self.assertEqual(stream.offset(1), 7)
+        self.assertEqual(stream.offset(5), len(data))
+        self.assertEqual(stream.line_of(8), 1)
+        self.assertEqual(len(GcodeStream(b"G0\n")), 1)
+        self.assertEqual(len(GcodeStream(b"")), 0)
+
+    def test_chunked_index(self):
+        data = b"".join(
+            b"G1 X%d%s" % (i, b"\r\n" if i % 3 else b"\n") for i in range(500)
+        )
+        for chunk in (1, 2, 7, 64, len(data)):
+            self.assertEqual(
+                list(line_ends(data, chunk=chunk)), list(line_ends(data))
+            )
+        self.assertEqual(len(line_ends(data, chunk=5)), 500)
+
+    def test_file(self):
+        filename = _gcode_file(b"G21\nG1 X1\nG1 X2\n")
+        self.addCleanup(os.remove, filename)
+        stream = GcodeStream.open(filename)
+        self.assertEqual(list(stream), ["G21", "G1 X1", "G1 X2"])
+        stream.close()
+        self.assertEqual(len(stream), 0)
+
+
+class TestGcodeJobStream(unittest.TestCase):
+    def test_write_blob(self):
+        job = GcodeJob(units_to_device_matrix=Matrix())
+        job.write_blob(b"G21\r\n\r\nG1 X1\n  \nG1 X2")
+        self.assertEqual(str(job), "GcodeJob(5 lines)")
+        self.assertEqual(_run(job), ["G21", "G1 X1", "G1 X2"])
+        self.assertEqual(job.steps_done, job.steps_total)
+        self.assertEqual(str(job), "GcodeJob(0 lines)")
+
+    def test_resume_and_progress(self):
+        lines = [f"G1 X{i}" for i in range(1000)]
+        filename = _gcode_file("\n".join(lines).encode())
+        self.addCleanup(os.remove, filename)
+        job = GcodeJob(units_to_device_matrix=Matrix())
+        job.write_file(filename, start=400)
+        self.assertEqual(job.steps_done, 400)
+        offset, size = job.progress
+        self.assertEqual(offset, len("\n".join(lines[:400])) + 1)
+        self.assertEqual(size, os.path.getsize(filename))
+
+        executed = []
+        job._process_gcode = lambda line, jog=False: executed.append(line) or 0
+        self.assertFalse(job.execute())
+        self.assertEqual(executed, lines[400 : 400 + EXECUTE_LINES])
+        job.seek(990)
+        self.assertEqual(_run(job), lines[990:])
+        self.assertTrue(job.execute())
+
+        job = GcodeJob(units_to_device_matrix=Matrix())
+        job.write_file(filename, start=1000)
+        self.assertTrue(job.execute())
+
+    def test_streams_then_buffer(self):
+        job = GcodeJob(units_to_device_matrix=Matrix())
+        job.write_blob(b"G0 X1\n")
+        job.write_blob(b"G0 X2\n")
+        job.write("G0 X3")
+        self.assertEqual(_run(job), ["G0 X1", "G0 X2", "G0 X3"])
+
+
+class TestGcodeStreamCommand(unittest.TestCase):
+    def test_gcode_stream(self):
+        filename = _gcode_file(b"G21\nG90\nG0 X10 Y10\nG0 X20 Y5\n")
+        self.addCleanup(os.remove, filename)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            device = kernel.device
+            device.driver.out_pipe = lambda *args, **kwargs: None
+            sent = []
+            device.spooler.send = sent.append
+            kernel.console(f"gcode_stream {filename} -l 2\n")
+            job = sent[0]
+            self.assertIsInstance(job, GcodeJob)
+            self.assertEqual(job.steps_done, 2)
+            while not job.execute(device.driver):
+                pass
+            self.assertAlmostEqual(job.x / job.scale, 20)
+            self.assertAlmostEqual(job.y / job.scale, 5)
+        finally:
+            kernel()
+
+    def test_load_mapped_blob(self):
+        from unittest import mock
+
+        from meerk40t.grbl import loader
+
+        filename = _gcode_file(b"G21\rG90\rG0 X10 Y10\rG1 X20 Y5\r")
+        self.addCleanup(os.remove, filename)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            elements = kernel.elements
+            with mock.patch.object(loader, "STREAM_SIZE", 0):
+                loader.GCodeLoader.load(kernel, elements, filename)
+            blob = list(elements.op_branch.flat(types="blob"))[-1]
+            self.assertEqual(len(blob), os.path.getsize(filename))
+            self.assertIn("G0 X10 Y10", blob.ascii_view(blob.data, blob.data_type))
+            writes = []
+            driver = kernel.device.driver
+            driver.out_pipe = lambda data, **kwargs: writes.append(data)
+            driver.blob("grbl", blob.data)
+            self.assertEqual(
+                "".join(writes).split(driver.line_end),
+                ["G21", "G90", "G0 X10 Y10", "G1 X20 Y5", ""],
+            )
+        finally:
+            kernel()
@@ -0,0 +1,152 @@
+import random
+import unittest
+
+import numpy as np
+
+from meerk40t.lihuiyu.controller import (
+    STATUS_OK,
+    LihuiyuController,
+    encode_packets,
+    onewire_crc_array,
+    onewire_crc_lookup,
+)
+
+
+class _Channel:
+    def __init__(self, *args, **kwargs):
+        self._ = lambda e: e
+
+    def __call__(self, *args, **kwargs):
+        pass
+
+    def __bool__(self):
+        return False
+
+    def lazy(self, *args, **kwargs):
+        pass
+
+    def watch(self, monitor):
+        pass
+
+
+class _Service:
+    safe_label = "mock"
+    path = "mock"
+    mock = True
+    laser_status = "idle"
+
+    def __init__(self):
+        self.rejected_count = 0
+        self.packet_count = 0
+
+    def channel(self, *args, **kwargs):
+        return _Channel()
+
+    def signal(self, *args):
+        pass
+
+
+class _Connection:
+    def __init__(self):
+        self.packets = []
+
+    def is_connected(self):
+        return True
+
+    def write(self, packet):
+        self.packets.append(bytes(packet))
+
+    def get_status(self):
+        return [255, STATUS_OK, 0, 0, 0, 1]
+
+
+def _sent(data, encode=True):
+    """
+    Packets written to the connection by the controller for the given data.
+    """
+    controller = LihuiyuController(_Service())
+    controller.connection = _Connection()
+    controller.pre_ok = True
+    controller.wait_finished = lambda: None
+    if not encode:
+        controller._encode_buffer = lambda: None
+    controller._queue += data
+    while True:
+        controller._check_transfer_buffer()
+        if not controller.process_queue():
+            break
+    return controller.connection.packets, bytes(controller._buffer)
+
+
+def _sample(count, seed=0):
+    rng = random.Random(seed)
+    words = [b"B", b"T", b"L", b"R", b"M", b"D", b"U", b"a", b"z", b"|c", b"123"]
+    lines = []
+    for i in range(count):
+        line = b"".join(rng.choice(words) for _ in range(rng.randint(0, 70)))
+        if i % 7 == 0:
+            line += b"S1P"
+        if i % 11 == 0:
+            line += b"FNSE-"
+        if i % 13 == 0:
+            line += b"@NSE"
+        lines.append(line)
+    return b"\n".join(lines) + b"\n" + b"C" * 29 + b"\n" + b"D" * 30 + b"\n" + b"BTL"
+
+
+class TestLihuiyuPackets(unittest.TestCase):
+    def test_crc(self):
+        rng = np.random.default_rng(1)
+        payloads = rng.integers(0, 256, size=(200, 30), dtype=np.uint8)
+        crc = onewire_crc_array(payloads)
+        self.assertEqual(list(crc), [onewire_crc_lookup(bytes(p)) for p in payloads])
+
+    def test_encode(self):
+        packets, lengths = encode_packets(b"IBzS1P\n" + b"B" * 30 + b"\n" + b"U" * 40)
+        self.assertEqual(list(lengths), [7, 30, 1, 30])
+        payloads = [bytes(p[1:31]) for p in packets]
+        self.assertEqual(payloads[0], b"IBzS1P" + b"F" * 24)
+        self.assertEqual(payloads[2], b"F" * 30)
+        self.assertEqual(payloads[3], b"U" * 30)
+        self.assertTrue(all(p[0] == 0 and p[31] == onewire_crc_lookup(p[1:31]) for p in packets))
+
+    def test_encode_stops(self):
+        # Pipe commands are left to process_queue, as is the trailing partial packet.
+        packets, lengths = encode_packets(b"IB\nFNSE-\nIB\n")
+        self.assertEqual(list(lengths), [3])
+        packets, lengths = encode_packets(b"AT1\x02\x05\n")
+        self.assertEqual(len(packets), 0)
+        packets, lengths = encode_packets(b"")
+        self.assertEqual(len(packets), 0)
+
+    def test_controller_matches(self):
+        data = _sample(400)
+        encoded, left = _sent(data)
+        legacy, legacy_left = _sent(data, encode=False)
+        self.assertGreater(len(encoded), 400)
+        self.assertEqual(encoded, legacy)
+        self.assertEqual(left, b"BTL")
+        self.assertEqual(legacy_left, b"BTL")
+
+    def test_abort_during_send(self):
+        controller = LihuiyuController(_Service())
+        connection = _Connection()
+        controller.connection = connection
+        controller.pre_ok = True
+        controller.wait_finished = lambda: None
+        controller._queue += b"IB\n" + b"B" * 40 + b"\n"
+        controller._check_transfer_buffer()
+        write = connection.write
+
+        def abort_and_queue(packet):
+            write(packet)
+            # Stopped from another thread while the packet is sent, a new job follows.
+            controller.abort()
+            controller._buffer += b"IT\n"
+            connection.write = write
+
+        connection.write = abort_and_queue
+        self.assertTrue(controller.process_queue())
+        self.assertEqual(len(connection.packets), 1)
+        self.assertEqual(bytes(controller._buffer), b"IT\n")
+        self.assertEqual(len(controller._packets), 0)
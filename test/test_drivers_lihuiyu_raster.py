@@ -0,0 +1,152 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.constants import RASTER_GREEDY_H, RASTER_SPIRAL
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.core.plotplanner import PlotPlanner
+from meerk40t.device.basedevice import PLOT_RASTER
+from meerk40t.lihuiyu.driver import LihuiyuDriver, lhymicro_distance, lhymicro_distances
+from test import bootstrap
+
+
+class _Pipe:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def __len__(self):
+        return 0
+
+
+def _pixels(rng, height, width, gray=False):
+    if gray:
+        return rng.choice([0, 90, 200, 255, 255], size=(height, width)).astype(np.uint8)
+    return np.where(rng.random((height, width)) < 0.4, 0, 255).astype(np.uint8)
+
+
+def _cuts(seed, count=40):
+    """
+    Random raster cuts, as arguments for RasterCut.
+    """
+    rng = np.random.default_rng(seed)
+    cuts = []
+    for i in range(count):
+        height, width = rng.integers(1, 30, size=2)
+        step = int(rng.integers(1, 4))
+        settings = {
+            "speed": float(rng.choice([20, 100, 300])),
+            "power": int(rng.choice([1000, 1000, 600, 250])),
+            "raster_step_x": step,
+            "raster_step_y": step,
+        }
+        kwargs = dict(
+            settings=settings,
+            inverted=bool(rng.integers(2)),
+            bidirectional=bool(rng.integers(2)),
+            horizontal=bool(rng.integers(2)),
+            start_minimum_y=bool(rng.integers(2)),
+            start_minimum_x=bool(rng.integers(2)),
+            overscan=int(rng.choice([0, 0, 5, 20])),
+        )
+        offset = (int(rng.integers(0, 3000)), int(rng.integers(0, 3000)))
+        pixels = _pixels(rng, height, width, gray=i % 5 == 0)
+        cuts.append((pixels, offset + (step, step), kwargs))
+    return cuts
+
+
+def _raster(pixels, args, kwargs):
+    return RasterCut(Image.fromarray(pixels).copy(), *args, **kwargs)
+
+
+def _plots(cuts, blocks, ppi=True):
+    planner = PlotPlanner({}, ppi=ppi)
+    planner.raster_blocks = blocks
+    for cut in cuts:
+        planner.push(_raster(*cut))
+    plots = []
+    count = 0
+    for x, y, on in planner.gen():
+        if x is not None and y is None and on == PLOT_RASTER:
+            count += 1
+            plots.extend(zip(*(a.tolist() for a in x)))
+        else:
+            plots.append((x, y, on))
+    return plots, count
+
+
+class TestRasterBlocks(unittest.TestCase):
+    def test_plotter_blocks(self):
+        for pixels, args, kwargs in _cuts(1, 60):
+            cut = _raster(pixels, args, kwargs)
+            if kwargs["inverted"]:
+                pixel_filter = lambda a: a / 255.0
+            else:
+                pixel_filter = lambda a: (255 - a) / 255.0
+            blocks = cut.plot.plot_blocks(pixels, pixel_filter, lines=3)
+            plots = [p for x, y, on in blocks for p in zip(x.tolist(), y.tolist(), on.tolist())]
+            burn = cut.plot.distance_burn
+            self.assertEqual(plots, list(cut.plot.plot()))
+            self.assertAlmostEqual(burn, cut.plot.distance_burn)
+
+    def test_plotter_unsupported(self):
+        pixels = np.zeros((4, 4), dtype=np.uint8)
+        for direction in (RASTER_GREEDY_H, RASTER_SPIRAL):
+            cut = _raster(pixels, (0, 0, 1, 1), dict(direction=direction))
+            self.assertIsNone(cut.plot_blocks())
+        cut = _raster(pixels, (0, 0, 1, 1), dict(special={"legacy": True}))
+        self.assertIsNone(cut.plot_blocks())
+        cut = _raster(pixels, (0, 0, 1, 1), dict(laserspot=3))
+        self.assertIsNone(cut.plot_blocks())
+        cut = _raster(pixels, (0, 0, 1, 1), dict(post_filter=lambda p: p))
+        self.assertIsNone(cut.plot_blocks())
+
+    def test_planner_blocks(self):
+        cuts = _cuts(2)
+        for ppi in (True, False):
+            for i in range(0, len(cuts), 2):
+                plots, _ = _plots(cuts[i : i + 2], True, ppi=ppi)
+                expected, _ = _plots(cuts[i : i + 2], False, ppi=ppi)
+                self.assertEqual(plots, expected)
+        self.assertGreater(_plots(cuts[1:3], True)[1], 0)
+
+    def test_distances(self):
+        values = np.array([0, 1, 26, 51, 52, 254, 255, 256, 600, 70000])
+        self.assertEqual(list(lhymicro_distances(values)), [lhymicro_distance(v) for v in values])
+
+
+class TestRasterEgv(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i lhystudios 0\n")
+
+    def tearDown(self):
+        self.kernel()
+
+    def _egv(self, cuts, blocks):
+        driver = LihuiyuDriver(self.kernel.device)
+        driver.plot_planner.raster_blocks = blocks
+        driver.out_pipe = _Pipe()
+        for cut in cuts:
+            driver.plot(_raster(*cut))
+        driver.plot_start()
+        return bytes(driver.out_pipe.data)
+
+    def test_egv_matches(self):
+        cuts = _cuts(3)
+        for i in range(0, len(cuts), 2):
+            egv = self._egv(cuts[i : i + 2], True)
+            self.assertEqual(egv, self._egv(cuts[i : i + 2], False))
+
+    def test_egv_dithered(self):
+        rng = np.random.default_rng(4)
+        pixels = _pixels(rng, 120, 150)
+        settings = {"speed": 100, "power": 1000, "raster_step_x": 1, "raster_step_y": 1}
+        for horizontal in (True, False):
+            cut = (pixels, (1000, 1000, 1, 1), dict(settings=settings, horizontal=horizontal))
+            egv = self._egv([cut], True)
+            self.assertGreater(len(egv), 5000)
+            self.assertEqual(egv, self._egv([cut], False))
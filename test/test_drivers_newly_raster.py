@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.newly.controller import NewlyController
+from test import bootstrap
+
+
+def _cuts(seed, count=30):
+    """
+    Random raster cuts, as arguments for RasterCut.
+    """
+    rng = np.random.default_rng(seed)
+    cuts = []
+    for i in range(count):
+        height, width = rng.integers(1, 40, size=2)
+        step = int(rng.integers(1, 4))
+        settings = {
+            "speed": float(rng.choice([20, 100, 300])),
+            "power": 1000,
+            "raster_step_x": step,
+            "raster_step_y": step,
+        }
+        kwargs = dict(
+            settings=settings,
+            inverted=bool(rng.integers(2)),
+            bidirectional=bool(rng.integers(2)),
+            horizontal=bool(rng.integers(2)),
+            start_minimum_y=bool(rng.integers(2)),
+            start_minimum_x=bool(rng.integers(2)),
+            overscan=int(rng.choice([0, 0, 5, 20])),
+        )
+        offset = (int(rng.integers(0, 3000)), int(rng.integers(0, 3000)))
+        if i % 5 == 0:
+            pixels = rng.choice([0, 90, 200, 255, 255], size=(height, width))
+        else:
+            pixels = np.where(rng.random((height, width)) < 0.4, 0, 255)
+        cuts.append((pixels.astype(np.uint8), offset + (step, step), kwargs))
+    return cuts
+
+
+class TestNewlyRaster(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i newly 0\n")
+
+    def tearDown(self):
+        self.kernel()
+
+    def _commands(self, cut, blocks, max_raster_jog=15):
+        pixels, args, kwargs = cut
+        raster_cut = RasterCut(Image.fromarray(pixels).copy(), *args, **kwargs)
+        if not blocks:
+            raster_cut.plot_blocks = lambda: None
+        self.kernel.device.max_raster_jog = max_raster_jog
+        controller = NewlyController(self.kernel.device, force_mock=True)
+        controller.raster(raster_cut)
+        return controller._command_buffer
+
+    def test_scanline_bits(self):
+        controller = NewlyController(self.kernel.device, force_mock=True)
+        controller._set_raster_mode()
+        bits = [1, 0, 0, 1, 1, 1, 0, 1, 0, 0, 1]
+        controller.scanline(bits, left=True)
+        binary = "".join(str(b) for b in reversed(bits))
+        expected = b"YF" + len(bits).to_bytes(3, "big") + int(binary, 2).to_bytes(2, "little")
+        self.assertEqual(bytes(controller._command_buffer[-1]), expected)
+
+    def test_raster_matches(self):
+        for cut in _cuts(1):
+            for max_raster_jog in (0, 15):
+                commands = self._commands(cut, True, max_raster_jog)
+                self.assertEqual(commands, self._commands(cut, False, max_raster_jog))
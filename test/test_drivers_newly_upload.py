@@ -0,0 +1,113 @@
+import unittest
+
+from meerk40t.newly.controller import NewlyController
+from test import bootstrap
+
+
+class TestNewlyUploadCache(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i newly 0\n")
+        self.service = self.kernel.device
+        self.service.autoplay = True
+        self.service.file_index = 1
+        self.service.upload_cache = True
+        self.controller = NewlyController(self.service, force_mock=True)
+        self.sent = []
+        self._connect()
+
+    def tearDown(self):
+        self.kernel()
+
+    def _connect(self):
+        self.controller.connect_if_needed()
+        self.connection = self.controller.connection
+        self.connection.delay = 0
+        write = self.connection.write
+
+        def record(index=0, data=None):
+            self.sent.append(data)
+            write(index=index, data=data)
+
+        self.connection.write = record
+
+    def _job(self, size):
+        con = self.controller
+        con.open_job()
+        con.mark(size, 0)
+        con.mark(size, size)
+        con.mark(0, 0)
+        con.close_job()
+
+    def test_same_job_replays(self):
+        self._job(500)
+        self.assertEqual(len(self.sent), 2)
+        self.assertTrue(self.sent[0].startswith(b"ZZZFile1;"))
+        self.assertEqual(self.sent[1], b"ZZZFile0;ZG1;ZED;")
+        self._job(500)
+        # Not uploaded again, only replayed.
+        self.assertEqual(len(self.sent), 3)
+        self.assertEqual(self.sent[2], b"ZZZFile0;ZG1;ZED;")
+        self._job(600)
+        self.assertTrue(self.sent[3].startswith(b"ZZZFile1;"))
+        self.assertEqual(self.sent[4], b"ZZZFile0;ZG1;ZED;")
+        self.assertEqual(self.connection.writes, 5)
+
+    def test_file_index(self):
+        self._job(100)
+        self.service.file_index = 2
+        # Stored in the file of file_index, whatever other files hold.
+        self._job(100)
+        self.assertTrue(self.sent[2].startswith(b"ZZZFile2;"))
+        self.assertEqual(self.sent[3], b"ZZZFile0;ZG2;ZED;")
+        self.service.file_index = 1
+        self._job(100)
+        self.assertEqual(len(self.sent), 5)
+        self.assertEqual(self.sent[4], b"ZZZFile0;ZG1;ZED;")
+
+    def test_without_autoplay(self):
+        self.service.autoplay = False
+        self._job(100)
+        self.assertEqual(len(self.sent), 1)
+        self.assertTrue(self.sent[0].startswith(b"ZZZFile1;"))
+        # The file holds the job already.
+        self._job(100)
+        self.assertEqual(len(self.sent), 1)
+        self._job(200)
+        self.assertEqual(len(self.sent), 2)
+        self.assertTrue(self.sent[1].startswith(b"ZZZFile1;"))
+
+    def test_overwritten_file(self):
+        self._job(100)
+        self.service.upload_cache = False
+        self._job(200)
+        self.service.upload_cache = True
+        self._job(100)
+        # File 1 no longer holds the first job.
+        self.assertEqual(len(self.sent), 6)
+        self.assertEqual(self.sent[4], self.sent[0])
+
+    def test_realtime_file(self):
+        self.service.file_index = 0
+        self._job(100)
+        # The replay is written to file 0 as well.
+        self._job(100)
+        self.assertEqual(len(self.sent), 4)
+        self.assertEqual(self.sent[2], self.sent[0])
+
+    def test_reconnect_clears(self):
+        self._job(100)
+        self.controller.disconnect()
+        self._connect()
+        self._job(100)
+        self.assertEqual(len(self.sent), 4)
+        self.assertEqual(self.sent[0], self.sent[2])
+
+    def test_disabled(self):
+        self.service.upload_cache = False
+        self._job(500)
+        self._job(500)
+        self.assertEqual(len(self.sent), 4)
+        self.assertTrue(self.sent[0].startswith(b"ZZZFile1;"))
+        self.assertEqual(self.sent[0], self.sent[2])
+        self.assertEqual(self.sent[1], b"ZZZFile0;ZG1;ZED;")
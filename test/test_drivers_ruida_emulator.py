@@ -0,0 +1,184 @@
+import unittest
+
+import numpy as np
+
+from meerk40t.core.cutcode.plotcut import PlotCut
+from meerk40t.ruida.emulator import RuidaEmulator
+from meerk40t.ruida.rdjob import RDJob, parse_commands
+from meerk40t.svgelements import Matrix
+
+
+def _parse_commands(data):
+    mark = 0
+    for i, b in enumerate(data):
+        if b >= 0x80 and mark != i:
+            yield data[mark:i]
+            mark = i
+    if mark != len(data):
+        yield data[mark:]
+
+
+class _LegacyJob(RDJob):
+    """
+    RDJob plotting one location at a time, as before the plots were accumulated.
+    """
+
+    def plot_location(self, x, y, power):
+        matrix = self.units_to_device_matrix
+        if self._plot is None:
+            self.x = x
+            self.y = y
+            ox, oy = matrix.transform_point([self.x, self.y])
+            self._plot = PlotCut(
+                settings={
+                    "speed": self.speed,
+                    "power": self.power,
+                    "frequency": self.frequency,
+                }
+            )
+            self._plot.plot_init(int(round(ox)), int(round(oy)))
+        tx, ty = matrix.transform_point([x, y])
+        self._plot.plot_append(int(round(tx)), int(round(ty)), power)
+        self.x = x
+        self.y = y
+
+    def plot_commit(self):
+        if self._plot is None:
+            return
+        self.plot(self._plot)
+        self._plot = None
+
+
+class _Driver:
+    def __init__(self):
+        self.plots = []
+
+    def plot(self, plot):
+        self.plots.append(plot)
+
+
+class _Spooler:
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, job, prevent_duplicate=False):
+        self.sent += 1
+
+
+class _Device:
+    def __init__(self):
+        self.driver = _Driver()
+        self.spooler = _Spooler()
+        self.current = (0, 0)
+
+
+def _commands(seed, count=3000):
+    """
+    Random move, cut, speed and power commands.
+    """
+    rng = np.random.default_rng(seed)
+    job = RDJob(magic=0x88)
+    x, y = 5000, 5000
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.02:
+            job.speed_laser_1(float(rng.choice([10, 50, 200])))
+        elif kind < 0.04:
+            job.max_power_1(float(rng.integers(10, 90)))
+        elif kind < 0.05:
+            job.layer_color(int(rng.integers(0, 0xFFFFFF)))
+        else:
+            step = rng.integers(-3000, 3000, size=2) * (rng.random(2) < 0.8)
+            if rng.random() < 0.02:
+                step *= 10
+            nx, ny = x + int(step[0]), y + int(step[1])
+            if rng.random() < 0.5:
+                job.mark(nx, ny, nx - x, ny - y)
+            else:
+                job.jump(nx, ny, nx - x, ny - y)
+            x, y = nx, ny
+    job.end_of_file()
+    return job.buffer
+
+
+class TestRuidaFraming(unittest.TestCase):
+    def test_parse_commands(self):
+        rng = np.random.default_rng(0)
+        for i in range(50):
+            data = bytes(rng.integers(0, 256, size=int(rng.integers(0, 300))).tolist())
+            self.assertEqual(parse_commands(data), list(_parse_commands(data)))
+            self.assertEqual(parse_commands(bytearray(data)), list(_parse_commands(data)))
+        commands = _commands(1, 200)
+        self.assertEqual(parse_commands(b"".join(commands)), commands)
+
+    def test_plot_append_array(self):
+        rng = np.random.default_rng(2)
+        for i in range(40):
+            count = int(rng.integers(0, 40))
+            x = rng.integers(-5, 5, size=count) * rng.integers(0, 3, size=count)
+            y = rng.integers(-5, 5, size=count) * (rng.random(count) < 0.7)
+            laser = rng.choice([0, 1, 0.5], size=count)
+            expected = PlotCut()
+            plot = PlotCut()
+            if i % 3:
+                expected.plot_init(0, 0)
+                plot.plot_init(0, 0)
+            if i % 4 == 0:
+                expected.plot_append(3, -4, 1)
+                plot.plot_append(3, -4, 1)
+            for px, py, on in zip(x.tolist(), y.tolist(), laser.tolist()):
+                expected.plot_append(px, py, on)
+            plot.plot_append_array(x, y, laser)
+            self.assertEqual(vars(plot), vars(expected))
+
+
+class TestRuidaEmulatorParse(unittest.TestCase):
+    def _plots(self, job_class, commands, describe):
+        device = _Device()
+        emulator = RuidaEmulator(device, Matrix("scale(0.5) translate(30, -7.3)"))
+        job = job_class(
+            driver=device.driver,
+            units_to_device_matrix=emulator.units_to_device_matrix,
+            magic=0x88,
+        )
+        emulator.job = job
+        if describe:
+            emulator.channel = []
+            emulator.channel = emulator.channel.append
+        emulator.write(emulator.swizzle(b"".join(commands)))
+        while not job.execute(device.driver):
+            pass
+        return [vars(plot) for plot in device.driver.plots], job
+
+    def test_plots_match(self):
+        for seed in range(4):
+            commands = _commands(seed)
+            plots, job = self._plots(RDJob, commands, False)
+            expected, legacy = self._plots(_LegacyJob, commands, True)
+            self.assertGreater(len(plots), 5)
+            self.assertEqual(plots, expected)
+            self.assertEqual((job.x, job.y, job.offset), (legacy.x, legacy.y, legacy.offset))
+
+    def test_realtime_order(self):
+        device = _Device()
+        emulator = RuidaEmulator(device, Matrix())
+        commands = _commands(5, 50)
+        keep_alive = b"\xce"
+        data = b"".join(commands[:20]) + keep_alive + b"".join(commands[20:])
+        emulator.write(emulator.swizzle(data))
+        self.assertEqual(emulator.job.buffer, commands)
+        # Before the keep alive, before the end of file and the end of file itself.
+        self.assertEqual(device.spooler.sent, 3)
+
+    def test_bad_command(self):
+        device = _Device()
+        emulator = RuidaEmulator(device, Matrix())
+        job = emulator.job
+        job.write_commands([b"\x89\x01\x02", b"\xa8\x01"] + _commands(6, 20))
+        with self.assertRaises(Exception):
+            job.execute(device.driver)
+        # The commands after the bad one are kept.
+        self.assertEqual(job.buffer[0], b"\xa8\x01")
+        with self.assertRaises(Exception):
+            job.execute(device.driver)
+        self.assertEqual(len(job.buffer), 21)
@@ -0,0 +1,180 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.core.cutcode.plotcut import PlotCut
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.ruida.driver import RuidaDriver
+from meerk40t.ruida.rdjob import (
+    RDJob,
+    decode_bytes,
+    determine_magic_via_histogram,
+    encode14_array,
+    encode32_array,
+    encode_bytes,
+    encode14,
+    encode32,
+    swizzle_byte,
+    unswizzle_byte,
+)
+from test import bootstrap
+
+
+def _histogram_magic(data):
+    histogram = [0] * 256
+    prev = -1
+    for d in data:
+        histogram[d] += 5 if prev == d else 1
+        prev = d
+    m = 0
+    magic = None
+    for i in range(len(histogram)):
+        v = histogram[i]
+        if v > m:
+            m = v
+            magic = i - 1
+    return magic
+
+
+def _positions(seed, count=3000):
+    """
+    Random walk of positions with still, axis aligned and long moves, with on values.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-300, 300, size=(count, 2)).astype(float)
+    steps[rng.random(count) < 0.1, 0] = 0
+    steps[rng.random(count) < 0.1, 1] = 0
+    steps[rng.random(count) < 0.05] = 0
+    steps[rng.random(count) < 0.02] *= 50
+    steps += rng.random((count, 2)) * (rng.random((count, 1)) < 0.3)
+    positions = np.cumsum(steps, axis=0) + 20000
+    on = rng.choice([0, 0, 1, 1, 1, 0.5], size=count)
+    return positions[:, 0], positions[:, 1], on
+
+
+class TestRuidaEncode(unittest.TestCase):
+    def test_swizzle(self):
+        data = bytes(range(256)) * 3
+        for magic in (0x88, 0x11, 0x38, -1):
+            job = RDJob(magic=magic)
+            swizzled = job.swizzle(data)
+            if magic != -1:
+                self.assertEqual(swizzled, bytes(swizzle_byte(b, magic) for b in data))
+                self.assertEqual(
+                    job.unswizzle(data), bytes(unswizzle_byte(b, magic) for b in data)
+                )
+            self.assertEqual(job.unswizzle(swizzled), data)
+            self.assertEqual(decode_bytes(encode_bytes(data, magic), magic), data)
+
+    def test_magic_histogram(self):
+        rng = np.random.default_rng(1)
+        for i in range(30):
+            data = bytes(rng.integers(0, 256, size=int(rng.integers(1, 500))).tolist())
+            data += bytes([int(rng.integers(0, 256))]) * int(rng.integers(0, 20))
+            self.assertEqual(determine_magic_via_histogram(data), _histogram_magic(data))
+        self.assertEqual(determine_magic_via_histogram(b""), _histogram_magic(b""))
+        data = encode_bytes(b"\x00" * 50 + b"\xd7", 0x11)
+        self.assertEqual(determine_magic_via_histogram(data), 0x11)
+
+    def test_encode_arrays(self):
+        values = np.array([0, 1, 127, 128, 8191, -1, -8192, 1.9, -1.9, 2**31 - 1, -(2**31)])
+        self.assertEqual(
+            encode14_array(values).tobytes(), b"".join(encode14(v) for v in values)
+        )
+        self.assertEqual(
+            encode32_array(values).tobytes(), b"".join(encode32(v) for v in values)
+        )
+
+    def test_moves_match(self):
+        for seed in range(6):
+            x, y, on = _positions(seed)
+            dx = np.diff(x, prepend=0)
+            dy = np.diff(y, prepend=0)
+            cuts = on > 0
+            expected = RDJob()
+            job = RDJob()
+            if seed % 2:
+                # A job already past its first move.
+                job.first_move = expected.first_move = False
+            for i in range(len(x)):
+                if cuts[i]:
+                    expected.mark(x[i], y[i], dx[i], dy[i])
+                else:
+                    expected.jump(x[i], y[i], dx[i], dy[i])
+            job.moves(x, y, dx, dy, cuts)
+            self.assertEqual(job.buffer, expected.buffer)
+            self.assertEqual(job.first_move, expected.first_move)
+        job = RDJob()
+        job.moves(np.zeros(3), np.zeros(3), np.zeros(3), np.zeros(3), np.ones(3))
+        self.assertEqual(job.buffer, [])
+
+
+class TestRuidaDriverMoves(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i ruida 0\n")
+
+    def tearDown(self):
+        self.kernel()
+
+    def _job(self, cuts, blocks):
+        driver = RuidaDriver(self.kernel.device)
+        driver.plot_planner.raster_blocks = blocks
+        if not blocks:
+            driver._moves = lambda x, y, on: self._points(driver, x, y, on)
+        driver.controller.write = lambda data: None
+        driver.controller.start_sending = lambda: None
+        for cut in cuts:
+            driver.plot(cut())
+        driver.plot_start()
+        return driver.controller.job.buffer
+
+    @staticmethod
+    def _points(driver, x, y, on):
+        for px, py, pon in zip(x.tolist(), y.tolist(), on.tolist()):
+            if driver.on_value != pon:
+                driver.power_dirty = True
+            driver.on_value = pon
+            driver._move(px, py, cut=driver.on_value > 0)
+
+    def test_plotcut_matches(self):
+        def cut(seed):
+            def make():
+                x, y, on = _positions(seed, 2000)
+                plot = PlotCut(settings={"speed": 40, "power": 800})
+                for px, py, pon in zip(x.tolist(), y.tolist(), on.tolist()):
+                    plot.plot_append(int(px), int(py), pon)
+                return plot
+
+            return make
+
+        cuts = [cut(1), cut(2)]
+        buffer = self._job(cuts, True)
+        self.assertGreater(len(buffer), 2000)
+        self.assertEqual(buffer, self._job(cuts, False))
+
+    def test_raster_matches(self):
+        rng = np.random.default_rng(3)
+        cuts = []
+        for i in range(6):
+            height, width = (int(v) for v in rng.integers(5, 60, size=2))
+            pixels = rng.choice([0, 255, 255, 90], size=(height, width)).astype(np.uint8)
+            kwargs = dict(
+                bidirectional=bool(i % 2),
+                horizontal=i % 3 != 0,
+                overscan=int(rng.choice([0, 20])),
+            )
+            offset = (int(rng.integers(0, 5000)), int(rng.integers(0, 5000)), 2, 2)
+
+            def make(pixels=pixels, offset=offset, kwargs=kwargs):
+                # The job header numbers the parts of the settings, each job gets its own.
+                settings = {"speed": 200, "power": 600, "raster_step_x": 2, "raster_step_y": 2}
+                return RasterCut(
+                    Image.fromarray(pixels).copy(), *offset, settings=settings, **kwargs
+                )
+
+            cuts.append(make)
+        buffer = self._job(cuts, True)
+        self.assertGreater(len(buffer), 500)
+        self.assertEqual(buffer, self._job(cuts, False))
@@ -0,0 +1,108 @@
+import unittest
+
+from PIL import Image, ImageDraw
+
+from meerk40t.core.node.elem_image import ImageNode
+from meerk40t.image.imagecache import ProcessedImageCache, image_cache, image_digest
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _sample_image():
+    image = Image.new("RGBA", (120, 80), "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((20, 10, 90, 70), "black")
+    draw.rectangle((5, 5, 30, 20), "gray")
+    return image
+
+
+class TestProcessedImageCache(unittest.TestCase):
+    def setUp(self):
+        image_cache.clear()
+        image_cache.reset_stats()
+
+    def test_cache_hit_same_parameters(self):
+        node = ImageNode(image=_sample_image(), matrix=Matrix.scale(2), dpi=500)
+        node.update(None)
+        first = node.active_image
+        misses = image_cache.misses
+        node.update(None)
+        self.assertEqual(image_cache.misses, misses)
+        self.assertGreater(image_cache.hits, 0)
+        self.assertEqual(first.tobytes(), node.active_image.tobytes())
+
+    def test_translation_reoffsets_matrix(self):
+        source = _sample_image()
+        node = ImageNode(image=source, matrix=Matrix.scale(2), dpi=500)
+        node.update(None)
+        node.matrix.post_translate(1234.5, -321.25)
+        node.update(None)
+        self.assertGreater(image_cache.translated_hits, 0)
+        cached_image = node.active_image
+        cached_matrix = node.active_matrix
+
+        image_cache.clear()
+        reference = ImageNode(
+            image=source, matrix=Matrix(node.matrix), dpi=500
+        )
+        reference.update(None)
+        self.assertEqual(cached_image.size, reference.active_image.size)
+        self.assertEqual(cached_image.tobytes(), reference.active_image.tobytes())
+        for a, b in zip(
+            (cached_matrix.a, cached_matrix.d, cached_matrix.e, cached_matrix.f),
+            (
+                reference.active_matrix.a,
+                reference.active_matrix.d,
+                reference.active_matrix.e,
+                reference.active_matrix.f,
+            ),
+        ):
+            self.assertAlmostEqual(a, b)
+
+    def test_parameters_change_key(self):
+        node = ImageNode(image=_sample_image(), matrix=Matrix.scale(2), dpi=500)
+        node.update(None)
+        misses = image_cache.misses
+        node.invert = True
+        node.update(None)
+        self.assertEqual(image_cache.misses, misses + 1)
+        node.invert = False
+        node.dpi = 250
+        node.update(None)
+        self.assertEqual(image_cache.misses, misses + 2)
+        node.dpi = 500
+        node.update(None)
+        self.assertEqual(image_cache.misses, misses + 2)
+
+    def test_digest_content(self):
+        a = _sample_image()
+        b = a.copy()
+        self.assertEqual(image_digest(a), image_digest(b))
+        b.putpixel((0, 0), (0, 0, 0, 255))
+        self.assertNotEqual(image_digest(a), image_digest(b))
+
+    def test_budget_eviction(self):
+        cache = ProcessedImageCache(budget=250)
+        for i in range(4):
+            cache.put(i, Image.new("L", (10, 10)), Matrix())
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 2)
+        self.assertIsNone(cache.get(0))
+        self.assertIsNotNone(cache.get(3))
+        self.assertFalse(cache.put("big", Image.new("L", (100, 100)), Matrix()))
+        cache.set_budget(100)
+        self.assertEqual(len(cache), 1)
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertLessEqual(stats["bytes"], 100)
+
+    def test_console_command(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("imagecache -b 10\n")
+            self.assertEqual(image_cache.budget, 10 * 1024 * 1024)
+            kernel.console("imagecache -c\n")
+            self.assertEqual(len(image_cache), 0)
+        finally:
+            kernel()
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.image import dither as dither_module
+from meerk40t.image.dither import (
+    DIFFUSION_MAPS,
+    HAS_NUMBA,
+    dither,
+    function_map,
+    wavefront,
+)
+
+
+def _sample(height=41, width=67, seed=5):
+    rng = np.random.default_rng(seed)
+    return (rng.random((height, width)) * 255).astype(np.float32)
+
+
+def _reference(data, method):
+    """
+    Sequential error diffusion with the arithmetic of the compiled functions.
+    """
+    image = data.astype(np.float32)
+    width, height = image.shape
+    for y in range(height):
+        for x in range(width):
+            pixel = image[x, y]
+            image[x, y] = 0 if pixel <= 127 else 255
+            error = float(pixel - image[x, y])
+            for dx, dy, c in DIFFUSION_MAPS[method]:
+                xn, yn = x + dx, y + dy
+                if 0 <= xn < width and 0 <= yn < height:
+                    image[xn, yn] = np.float32(float(image[xn, yn]) + error * c)
+    return image
+
+
+class TestDither(unittest.TestCase):
+    def test_wavefront_matches_sequential(self):
+        data = _sample()
+        for method in DIFFUSION_MAPS:
+            expected = _reference(data, method)
+            result = wavefront(method).diffuse(data.copy())
+            self.assertTrue(np.array_equal(result, expected), method)
+
+    def test_wavefront_parallel_matches_sequential(self):
+        data = _sample(23, 31)
+        for method in DIFFUSION_MAPS:
+            expected = _reference(data, method)
+            result = wavefront(method).diffuse_parallel(data.copy())
+            self.assertTrue(np.array_equal(result, expected), method)
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_wavefront_matches_compiled(self):
+        data = _sample(300, 200)
+        for method in DIFFUSION_MAPS:
+            expected = data.copy()
+            function_map[method](expected)
+            self.assertTrue(
+                np.array_equal(wavefront(method).diffuse(data.copy()), expected), method
+            )
+            self.assertTrue(
+                np.array_equal(wavefront(method).diffuse_parallel(data.copy()), expected),
+                method,
+            )
+
+    def test_wavefront_lag(self):
+        self.assertEqual(wavefront("legacy-floyd-steinberg").lag, 2)
+        self.assertEqual(wavefront("jarvis-judice-ninke").lag, 3)
+        self.assertEqual(wavefront("shiau-fan-2").lag, 4)
+
+    def test_degenerate_sizes(self):
+        for shape in ((1, 1), (1, 9), (9, 1), (2, 3)):
+            data = _sample(*shape)
+            expected = _reference(data, "stucki")
+            self.assertTrue(
+                np.array_equal(wavefront("stucki").diffuse(data.copy()), expected)
+            )
+
+    def test_dither_image(self):
+        image = Image.fromarray(_sample().astype(np.uint8))
+        for method in function_map:
+            if method == "bayer-blue":
+                continue
+            result = np.array(dither(image, method))
+            self.assertEqual(result.shape, (41, 67))
+            self.assertTrue(np.all((result == 0) | (result == 255)), method)
+
+    def test_dither_parallel_flag_without_numba(self):
+        image = Image.fromarray(_sample().astype(np.uint8))
+        a = np.array(dither(image, "atkinson", parallel=True))
+        b = np.array(dither(image, "atkinson", parallel=False))
+        self.assertTrue(np.array_equal(a, b))
+
+    def test_bayer_ordered(self):
+        flat = np.full((16, 16), 128, dtype=np.float32)
+        result = dither_module.bayer_dither(flat)
+        # Half of the thresholds are below mid gray.
+        self.assertEqual(int(np.count_nonzero(result)), 128)
+        self.assertTrue(np.array_equal(result[:8, :8], result[8:, 8:]))
+        self.assertEqual(np.count_nonzero(dither_module.bayer_dither(flat * 0)), 0)
+        self.assertEqual(
+            np.count_nonzero(dither_module.bayer_dither(flat * 0 + 255)), 256
+        )
+
+    def test_unknown_method(self):
+        with self.assertRaises(NotImplementedError):
+            dither(Image.new("L", (4, 4)), "sparkle")
@@ -0,0 +1,162 @@
+import random
+import unittest
+
+from PIL import Image, ImageDraw
+
+from meerk40t.core.node.elem_image import ImageNode
+from meerk40t.image.imagepipeline import (
+    FilterStage,
+    ImagePipeline,
+    apply_operation,
+    create_stage,
+    parse_adjust_script,
+)
+from meerk40t.image.imagetools import RasterScripts
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _sample_image(width=157, height=233, seed=3):
+    rng = random.Random(seed)
+    image = Image.new("L", (width, height), 255)
+    image.putdata([rng.randint(0, 255) for _ in range(width * height)])
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((20, 30, 120, 180), 40)
+    draw.rectangle((60, 10, 150, 60), 200)
+    return image
+
+
+def _unfused(image, operations):
+    for op in operations:
+        image = apply_operation(image, op)
+    return image
+
+
+TONE = {
+    "name": "tone",
+    "type": "spline",
+    "enable": True,
+    "values": [[0, 0], [100, 150], [255, 255]],
+}
+GAMMA = {"name": "gamma", "enable": True, "factor": 1.7}
+CONTRAST = {"name": "contrast", "enable": True, "contrast": 40, "brightness": -20}
+EDGE = {"name": "edge_enhance", "enable": True}
+UNSHARP = {
+    "name": "unsharp_mask",
+    "enable": True,
+    "percent": 300,
+    "radius": 4,
+    "threshold": 2,
+}
+
+
+class TestImagePipeline(unittest.TestCase):
+    def assertSameImage(self, a, b):
+        self.assertEqual(a.mode, b.mode)
+        self.assertEqual(a.size, b.size)
+        self.assertEqual(a.tobytes(), b.tobytes())
+
+    def test_lut_fusion(self):
+        ops = [TONE, GAMMA, CONTRAST, {"name": "invert"}]
+        pipeline = ImagePipeline(ops)
+        self.assertEqual(len(pipeline), 1)
+        image = _sample_image()
+        self.assertSameImage(pipeline(image), _unfused(image, ops))
+        self.assertEqual(len(pipeline.timings), 1)
+        self.assertEqual(pipeline.timings[0][0], "tone+gamma+contrast+invert")
+
+    def test_banded_filters(self):
+        ops = [GAMMA, EDGE, UNSHARP, {"name": "filter", "type": "blur"}, TONE]
+        image = _sample_image()
+        expected = _unfused(image, ops)
+        for band_height in (7, 32, 100, 1000):
+            pipeline = ImagePipeline(ops, band_height=band_height)
+            self.assertSameImage(pipeline(image), expected)
+        self.assertEqual(
+            [name for name, _ in pipeline.timings],
+            ["gamma", "edge_enhance", "unsharp_mask", "blur", "tone"],
+        )
+
+    def test_contrast_after_filter_splits_segment(self):
+        ops = [GAMMA, EDGE, CONTRAST, GAMMA]
+        pipeline = ImagePipeline(ops, band_height=16)
+        self.assertEqual(len(pipeline), 2)
+        image = _sample_image()
+        self.assertSameImage(pipeline(image), _unfused(image, ops))
+
+    def test_barriers_and_disabled(self):
+        calls = []
+
+        def fallback(image, op):
+            calls.append(op["name"])
+            return image.crop((1, 1, image.width - 1, image.height - 1))
+
+        ops = [
+            GAMMA,
+            {"name": "crop", "enable": True, "bounds": (1, 1, 2, 2)},
+            dict(TONE, enable=False),
+            CONTRAST,
+        ]
+        pipeline = ImagePipeline(ops, fallback=fallback)
+        self.assertEqual(len(pipeline), 3)
+        image = _sample_image()
+        result = pipeline(image)
+        self.assertEqual(calls, ["crop"])
+        expected = _unfused(apply_operation(image, GAMMA).crop(
+            (1, 1, image.width - 1, image.height - 1)
+        ), [CONTRAST])
+        self.assertSameImage(result, expected)
+
+    def test_non_grayscale_unfused(self):
+        image = _sample_image().convert("RGB")
+        ops = [CONTRAST, EDGE]
+        self.assertSameImage(ImagePipeline(ops)(image), _unfused(image, ops))
+
+    def test_raster_scripts(self):
+        image = _sample_image(300, 280)
+        for script in (
+            RasterScripts.raster_script_gold(),
+            RasterScripts.raster_script_stipo(),
+            RasterScripts.raster_script_gravy(),
+            RasterScripts.raster_script_xin(),
+            RasterScripts.raster_script_newsy(),
+        ):
+            fused = ImageNode(image=image, matrix=Matrix(), operations=script)
+            unfused = ImageNode(image=image, matrix=Matrix(), operations=script)
+            fused_image, fused_bounds = fused._process_script(image)
+            reference = image
+            bounds = [0, 0, image.width, image.height]
+            for op in script:
+                if create_stage(op) is None:
+                    reference = unfused._process_script_operation(reference, op, bounds)
+                else:
+                    reference = apply_operation(reference, op)
+            self.assertSameImage(fused_image, reference)
+            self.assertEqual(fused_bounds, tuple(bounds))
+
+    def test_filter_halo(self):
+        pipeline = ImagePipeline([EDGE, {"name": "filter", "type": "smooth_more"}])
+        stages = [stage for stage, _ in pipeline.steps[0][1]]
+        self.assertTrue(all(isinstance(s, FilterStage) for s in stages))
+        self.assertEqual([s.halo for s in stages], [1, 2])
+
+    def test_parse_adjust_script(self):
+        ops = parse_adjust_script("contrast 1.5; gamma 1.2, sharpen;threshold 20 200")
+        self.assertEqual(
+            [op["name"] for op in ops], ["enhance", "gamma", "filter", "threshold"]
+        )
+        with self.assertRaises(ValueError):
+            parse_adjust_script("sparkle 3")
+
+    def test_console_adjust(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            image = _sample_image()
+            elements = kernel.elements
+            node = elements.elem_branch.add(image=image, type="elem image")
+            node.emphasized = True
+            kernel.console('image adjust "contrast 1.5; brightness 0.8; sharpen"\n')
+            ops = parse_adjust_script("contrast 1.5; brightness 0.8; sharpen")
+            self.assertSameImage(node.image, _unfused(image, ops))
+        finally:
+            kernel()
@@ -0,0 +1,90 @@
+import unittest
+from concurrent.futures import CancelledError
+
+from PIL import Image, ImageDraw
+
+from meerk40t.core.node.elem_image import ImageNode
+from meerk40t.image.imagecache import image_cache
+from meerk40t.image.imageprocess import ImageProcessService
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _sample_node(**kwargs):
+    image = Image.new("RGBA", (90, 60), "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((10, 10, 70, 50), "black")
+    draw.rectangle((40, 5, 80, 25), (128, 128, 128, 255))
+    return ImageNode(image=image, matrix=Matrix("scale(300) rotate(15)"), **kwargs)
+
+
+class TestImageProcessService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ImageProcessService(workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.shutdown()
+
+    def setUp(self):
+        image_cache.clear()
+
+    def test_worker_matches_thread(self):
+        node = _sample_node(dither_type="Atkinson")
+        step = node._default_units / node.dpi
+        local_matrix, local_image = node._process_image(step, step, crop=True)
+        matrix, image, attributes = self.service.process(node, step, step, True)
+        self.assertEqual(image.mode, local_image.mode)
+        self.assertEqual(image.size, local_image.size)
+        self.assertEqual(image.tobytes(), local_image.tobytes())
+        self.assertEqual(matrix, local_matrix)
+        self.assertEqual(attributes["dither_type"], "Atkinson")
+
+    def test_process_image_with_service(self):
+        node = _sample_node()
+        step = node._default_units / node.dpi
+        node.process_image(step, step, True, service=self.service)
+        self.assertFalse(node._process_image_failed)
+        self.assertIsNotNone(node._processed_image)
+        self.assertEqual(node._processed_image.mode, "1")
+
+    def test_cancelled_request(self):
+        node = _sample_node()
+        step = node._default_units / node.dpi
+        with self.assertRaises(CancelledError):
+            self.service.process(node, step, step, True, cancelled=lambda: True)
+
+    def test_shutdown_cancels_pending(self):
+        service = ImageProcessService(workers=1)
+        node = _sample_node()
+        step = node._default_units / node.dpi
+        futures = [service.submit(node, step, step, True) for i in range(6)]
+        service.shutdown()
+        self.assertTrue(any(future.cancelled() for future in futures))
+        self.assertFalse(service._pending)
+        # The pool is created again for the next request.
+        self.assertIsNotNone(service.process(node, step, step, True))
+        service.shutdown()
+
+    def test_disabled_service_falls_back(self):
+        service = ImageProcessService(workers=0)
+        self.assertFalse(service.available)
+        node = _sample_node()
+        step = node._default_units / node.dpi
+        self.assertIsNone(service.process(node, step, step, True))
+        node.process_image(step, step, True, service=service)
+        self.assertIsNotNone(node._processed_image)
+
+    def test_console_command(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            service = kernel.lookup("image/process")
+            # Off by default.
+            self.assertFalse(service.available)
+            kernel.console("imageprocess -w 1\n")
+            self.assertTrue(service.available)
+            kernel.console("imageprocess -w 0\n")
+            self.assertFalse(service.available)
+        finally:
+            kernel()
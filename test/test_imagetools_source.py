@@ -0,0 +1,128 @@
+import gc
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image, ImageDraw
+
+from meerk40t.core.node.elem_image import ImageNode
+from meerk40t.image.imagesource import ImageSource, decoded_images
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+
+def _sample_image(size=(320, 240)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((10, 10, size[0] - 20, size[1] - 30), "red")
+    draw.rectangle((5, 5, 60, 40), "blue")
+    return image
+
+
+def _encoded(image, fmt="PNG"):
+    stream = io.BytesIO()
+    image.save(stream, format=fmt)
+    return stream.getvalue()
+
+
+class TestImageSource(unittest.TestCase):
+    def setUp(self):
+        self.budget = decoded_images.budget
+        decoded_images.clear()
+
+    def tearDown(self):
+        decoded_images.set_budget(self.budget)
+
+    def test_lazy_file_keeps_compressed_bytes(self):
+        data = _encoded(_sample_image())
+        source = ImageSource.from_image(Image.open(io.BytesIO(data)))
+        self.assertTrue(source.is_compressed)
+        self.assertEqual(source.nbytes, len(data))
+        self.assertEqual(source.size, (320, 240))
+        self.assertEqual(source.mode, "RGB")
+        self.assertEqual(source.image().tobytes(), _sample_image().tobytes())
+
+    def test_decoded_image_is_pinned(self):
+        image = _sample_image()
+        source = ImageSource.from_image(image)
+        self.assertFalse(source.is_compressed)
+        self.assertIs(source.image(), image)
+
+    def test_eviction_spills_to_mapped_file(self):
+        expected = _sample_image().tobytes()
+        source = ImageSource.from_image(_sample_image())
+        decoded_images.set_budget(0)
+        gc.collect()
+        self.assertTrue(source.is_mapped)
+        self.assertEqual(source.nbytes, 0)
+        self.assertEqual(source.image().tobytes(), expected)
+        palette = _sample_image().convert("P")
+        source = ImageSource.from_image(palette)
+        decoded_images.set_budget(0)
+        reference = palette.tobytes(), palette.getpalette()
+        del palette
+        gc.collect()
+        image = source.image()
+        self.assertEqual((image.tobytes(), image.getpalette()), reference)
+
+    def test_compressed_decoded_on_demand(self):
+        data = _encoded(_sample_image())
+        source = ImageSource.from_image(Image.open(io.BytesIO(data)))
+        decoded_images.reset_stats()
+        first = source.image()
+        self.assertIs(source.image(), first)
+        self.assertEqual(decoded_images.hits, 1)
+        decoded_images.clear()
+        del first
+        gc.collect()
+        self.assertEqual(source.image().tobytes(), _sample_image().tobytes())
+
+    def test_preview(self):
+        data = _encoded(_sample_image((1600, 1200)), "JPEG")
+        source = ImageSource.from_image(Image.open(io.BytesIO(data)))
+        preview, scale = source.preview(300)
+        self.assertEqual(preview.size, (200, 150))
+        self.assertEqual(scale, 0.125)
+        self.assertNotIn(source, decoded_images)
+        full, scale = source.preview(5000)
+        self.assertEqual(full.size, (1600, 1200))
+        self.assertEqual(scale, 1.0)
+
+    def test_digest(self):
+        data = _encoded(_sample_image())
+        a = ImageSource.from_image(Image.open(io.BytesIO(data)))
+        b = ImageSource.from_image(Image.open(io.BytesIO(data)))
+        self.assertEqual(a.digest, b.digest)
+        c = ImageSource.from_image(_sample_image())
+        self.assertNotEqual(a.digest, c.digest)
+
+    def test_node_image_property(self):
+        image = _sample_image()
+        node = ImageNode(image=image, matrix=Matrix.scale(2), dither=False)
+        self.assertIsInstance(node.image_source, ImageSource)
+        self.assertEqual(node.image_size, (320, 240))
+        self.assertIs(node.image, image)
+        copied = node.__copy__()
+        self.assertIs(copied.image_source, node.image_source)
+        node.image = image.convert("L")
+        self.assertEqual(node.image.mode, "L")
+        self.assertEqual(copied.image.mode, "RGB")
+        preview, matrix = copied.preview_image(100)
+        self.assertEqual(preview.size, (80, 60))
+        self.assertAlmostEqual(matrix.a, 8)
+
+    def test_loader_keeps_file(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            with tempfile.TemporaryDirectory() as folder:
+                filename = os.path.join(folder, "photo.png")
+                _sample_image().save(filename)
+                kernel.console(f"load {filename}\n")
+                nodes = [n for n in kernel.elements.elems() if n.type == "elem image"]
+                self.assertEqual(len(nodes), 1)
+                source = nodes[0].image_source
+                self.assertTrue(source.is_compressed)
+                self.assertEqual(nodes[0].image.tobytes(), _sample_image().tobytes())
+        finally:
+            kernel()
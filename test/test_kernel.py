@@ -1,6 +1,7 @@
 import unittest
 
 from meerk40t.kernel import kernel_console_command, service_console_command
+from meerk40t.kernel.channel import Channel
 from test import bootstrap
 
 
@@ -386,3 +387,35 @@ class TestSignalSystem(unittest.TestCase):
 
         finally:
             kernel()
+
+
+class TestChannel(unittest.TestCase):
+    def test_lazy_inactive(self):
+        channel = Channel("lazy")
+        calls = []
+
+        def describe(value):
+            calls.append(value)
+            return f"value {value}"
+
+        self.assertFalse(channel.active)
+        channel.lazy(describe, 1)
+        channel.lazy("{} {}", object(), 2)
+        self.assertEqual(calls, [])
+
+    def test_lazy_watched(self):
+        channel = Channel("lazy")
+        received = []
+        channel.watch(received.append)
+        self.assertTrue(channel.active)
+        channel.lazy("write({})", b"IB")
+        channel.lazy(lambda a, b: f"{a}-{b}", 1, 2, indent=False)
+        self.assertEqual(received, ["    write(b'IB')", "1-2"])
+        channel.unwatch(received.append)
+        self.assertFalse(channel)
+
+    def test_lazy_buffered(self):
+        channel = Channel("lazy", buffer_size=2)
+        self.assertTrue(channel.active)
+        channel.lazy("{}", 1, indent=False)
+        self.assertEqual(list(channel.buffer), ["1"])
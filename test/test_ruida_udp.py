@@ -0,0 +1,165 @@
+import struct
+import time
+import unittest
+
+import numpy as np
+
+from meerk40t.ruida.emulator import RuidaEmulator
+from meerk40t.ruida.mock_connection import MockUDPController
+from meerk40t.ruida.rdjob import RDJob
+from meerk40t.ruida.ruidatransport import TransportTimeout
+from meerk40t.ruida.udp_transport import UDP_MTU, SlidingWindow, UDPTransport
+from test import bootstrap
+
+
+class _Service:
+    name = "mock"
+    interface = "udp"
+    address = "127.0.0.1"
+
+
+class _Spooler:
+    def send(self, job, prevent_duplicate=False):
+        pass
+
+
+class _Device:
+    """
+    Device of the emulator, its job is not spooled.
+    """
+
+    driver = None
+    spooler = _Spooler()
+    current = (0, 0)
+
+
+def _job(count=4000):
+    rng = np.random.default_rng(0)
+    x = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    y = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    job = RDJob(magic=0x88)
+    job.moves(x, y, np.diff(x, prepend=0), np.diff(y, prepend=0), rng.random(count) < 0.5)
+    return job
+
+
+def _chunks(job, limit=UDP_MTU - 2):
+    chunks = []
+    chunk = b""
+    for command in job.buffer:
+        if len(chunk) + len(command) > limit:
+            chunks.append(chunk)
+            chunk = b""
+        chunk += command
+    chunks.append(chunk)
+    return chunks
+
+
+def _package(job, chunk):
+    data = job.swizzle(chunk)
+    return struct.pack(">H", sum(data) & 0xFFFF) + data
+
+
+class TestRuidaUDP(unittest.TestCase):
+    def setUp(self):
+        self.emulator = RuidaEmulator(_Device(), None)
+        self.mock = None
+        self.transport = None
+
+    def tearDown(self):
+        if self.transport is not None:
+            self.transport.close()
+        if self.mock is not None:
+            self.mock.close()
+
+    def _window(self, max_window, timeout=0.1, **kwargs):
+        self.mock = MockUDPController(self.emulator, seed=1, **kwargs)
+        self.transport = UDPTransport(_Service())
+        self.transport.send_port = self.mock.port
+        self.transport.listen_port = 0
+        self.transport.open()
+        self.transport.set_timeout(timeout)
+        return SlidingWindow(
+            self.transport, self.emulator.unswizzle, max_window=max_window, timeout=timeout, tries=20
+        )
+
+    def _send(self, window, job, chunks):
+        for chunk in chunks:
+            window.send(_package(job, chunk))
+        window.flush()
+        self.assertEqual(len(window), 0)
+
+    def test_window_in_order(self):
+        job = _job()
+        chunks = _chunks(job)
+        window = self._window(8, timeout=1.0, latency=0.002)
+        self._send(window, job, chunks)
+        self.assertEqual(self.mock.received, chunks)
+        self.assertEqual(window.acks, len(chunks))
+        self.assertEqual(window.resends, 0)
+        self.assertEqual(window.window, 8)
+
+    def test_stop_and_wait_corrupt(self):
+        job = _job()
+        chunks = _chunks(job)
+        window = self._window(1, corrupt=0.1)
+        self._send(window, job, chunks)
+        self.assertEqual(self.mock.received, chunks)
+        self.assertGreater(window.naks, 0)
+        self.assertEqual(window.expiries, 0)
+        self.assertEqual(window.resends, window.naks)
+
+    def test_stop_and_wait_late_ack(self):
+        # ACKs held back longer than the timeout, no packet is sent twice.
+        job = _job(400)
+        chunks = _chunks(job, 200)
+        window = self._window(1, latency=0.15)
+        self._send(window, job, chunks)
+        self.assertEqual(self.mock.received, chunks)
+        self.assertEqual(window.resends, 0)
+        self.assertEqual(window.expiries, 0)
+
+    def test_window_loss(self):
+        job = _job()
+        chunks = _chunks(job)
+        window = self._window(8, latency=0.002, loss=0.05, corrupt=0.05)
+        self._send(window, job, chunks)
+        # Each packet is answered once, the window keeps count of them.
+        self.assertEqual(window.acks, len(self.mock.received))
+        self.assertEqual(window.sends + window.resends, window.acks + window.naks + self.mock.dropped)
+        self.assertGreater(window.expiries, 0)
+        self.assertGreater(window.naks, 0)
+
+    def test_not_responding(self):
+        job = _job(100)
+        window = self._window(4, timeout=0.02)
+        self.mock.loss = 1.0
+        window.send(_package(job, job.get_contents()))
+        start = time.monotonic()
+        with self.assertRaises(TransportTimeout):
+            window.flush()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(window), 0)
+        self.assertEqual(window.window, 1)
+
+
+class TestRuidaChunks(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i ruida 0\n")
+
+    def tearDown(self):
+        self.kernel()
+
+    def test_divide_data(self):
+        device = self.kernel.device
+        controller = device.driver.controller
+        job = _job()
+        controller.job.buffer = job.buffer
+        for interface, limit in (("udp", UDP_MTU - 2), ("usb", 1000)):
+            device.interface = interface
+            controller._send_queue.clear()
+            controller.divide_data_into_queue()
+            chunks = list(controller._send_queue)
+            self.assertEqual(b"".join(chunks), job.get_contents())
+            self.assertEqual(chunks, _chunks(job, limit))
+        controller._send_queue.clear()
@@ -1,5 +1,8 @@
 import unittest
 
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.laserjob import LaserJob
 from meerk40t.core.spoolers import SpoolerJob
 from test import bootstrap
 
@@ -20,3 +23,106 @@ class TestSpooler(unittest.TestCase):
             kernel.device.spooler.remove(j)
         finally:
             kernel()
+
+
+class TestLaserJobPrepare(unittest.TestCase):
+    def test_prepare(self):
+        """
+        A prepared laserjob executes the same calls as an unprepared one.
+        """
+
+        class Driver:
+            def __init__(self):
+                self.calls = []
+
+            def plot(self, cut):
+                self.calls.append(("plot", cut))
+
+            def plot_start(self):
+                self.calls.append("plot_start")
+
+            def home(self):
+                self.calls.append("home")
+
+        cutcode = CutCode(
+            [LineCut((0, 0), (i, i), settings={"speed": 10}) for i in range(1, 20)]
+        )
+        results = []
+        for prepare in (False, True):
+            driver = Driver()
+            job = LaserJob("test", ["home", cutcode, ("home",)], driver=driver, loops=2)
+            if prepare:
+                self.assertGreater(job.prepare(), 0)
+            self.assertTrue(job.execute(driver))
+            results.append((driver.calls, job.steps_total, job.steps_done))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][1], 22)
+
+
+class TestLaserJobDispatch(unittest.TestCase):
+    def test_dispatch(self):
+        """
+        Drivers with plot_batch are given the consecutive plots at once, other commands are called as before.
+        """
+
+        class Driver:
+            execution_direct_list = ("gc", "gcode")
+
+            def __init__(self):
+                self.calls = []
+
+            def plot(self, cut):
+                self.calls.append(("plot", cut))
+
+            def plot_start(self):
+                self.calls.append("plot_start")
+
+            def wait(self, time_in_ms):
+                self.calls.append(("wait", time_in_ms))
+
+            def console(self, command):
+                self.calls.append(("console", command))
+
+            def execute_direct(self, line):
+                self.calls.append(("direct", line))
+
+        class BatchDriver(Driver):
+            def plot_batch(self, plots):
+                self.calls.append(("batch", len(plots)))
+                for plot in plots:
+                    self.plot(plot)
+
+        def utilities():
+            for i in range(50):
+                yield "wait", i
+                yield "console", "gcode G0 X1\n" if i % 2 else "home\n"
+                yield "unknown"
+
+        settings = {"speed": 10}
+        cutcode = CutCode(
+            [LineCut((0, 0), (i, i), settings=settings) for i in range(1, 20)]
+        )
+        results = []
+        for driver in (Driver(), BatchDriver()):
+            job = LaserJob(
+                "test", [cutcode, utilities, ("wait", 5), cutcode], driver=driver
+            )
+            self.assertTrue(job.execute(driver))
+            results.append(
+                ([c for c in driver.calls if c[0] != "batch"], job.steps_done, job.steps_total)
+            )
+            if isinstance(driver, BatchDriver):
+                self.assertEqual(driver.calls.count(("batch", 19)), 2)
+        self.assertEqual(results[0], results[1])
+        self.assertIn(("direct", "G0 X1"), results[0][0])
+        self.assertIn(("console", "home\n"), results[0][0])
+        # The steps of the utilities aren't counted ahead, as for any generator function.
+        self.assertEqual(results[0][1], 2 * 20 + 100 + 1)
+
+    def test_missing_command(self):
+        class Driver:
+            pass
+
+        job = LaserJob("test", [("missing", 1)], driver=Driver())
+        with self.assertRaises(AttributeError):
+            job.execute(job._driver)
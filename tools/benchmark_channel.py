@@ -0,0 +1,77 @@
+"""
+Benchmark for channel logging in driver hot paths (meerk40t.kernel.channel).
+
+Writes egv data to a Lihuiyu controller and list commands to a Balor controller and reports the writes per second,
+once with nobody watching their channels and once with a watcher attached. Messages of these channels are sent with
+Channel.lazy(), so they are only formatted while watched. The controller threads are not started, the writes only
+queue their data.
+
+Usage:
+    python tools/benchmark_channel.py [writes ...]
+
+Defaults to 100000 writes.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from meerk40t.balormk.controller import listMarkTo
+from test import bootstrap
+
+
+def run_lihuiyu(controller, count):
+    data = b"DBzUaRb" * 4
+    start = time.perf_counter()
+    for _ in range(count):
+        controller.write(data)
+    elapsed = time.perf_counter() - start
+    with controller._queue_lock:
+        controller._queue.clear()
+    return elapsed
+
+
+def run_balor(controller, count):
+    start = time.perf_counter()
+    for i in range(count):
+        if i % 255 == 0:
+            controller._list_new()
+        controller._list_write(listMarkTo, i & 0xFFFF, 0x8000)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("writes", nargs="*", type=int, default=[100000])
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i lhystudios 0\n")
+        lihuiyu = kernel.device.controller
+        lihuiyu.start = lambda: None
+        kernel.console("service device start -i balor 0\n")
+        balor = kernel.device.driver.connection
+        channels = (
+            ("lihuiyu", lihuiyu, lihuiyu.pipe_channel, run_lihuiyu),
+            ("balor", balor, balor.list_log, run_balor),
+        )
+        print(f"{'writes':>8}{'device':>9}{'watched':>9}{'time':>10}{'writes/s':>11}")
+        for count in args.writes:
+            for name, controller, channel, run in channels:
+                received = []
+                for watched in (False, True):
+                    if watched:
+                        channel.watch(received.append)
+                    elapsed = run(controller, count)
+                    print(
+                        f"{count:>8}{name:>9}{str(watched):>9}{elapsed:>9.3f}s{count / elapsed:>11.0f}"
+                    )
+                channel.unwatch(received.append)
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
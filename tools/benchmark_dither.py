@@ -0,0 +1,96 @@
+"""
+Benchmark for the dithering algorithms in meerk40t.image.dither.
+
+Compares, for every method, the available implementations:
+  sequential  - the per-pixel functions (numba compiled if numba is installed)
+  wavefront   - the vectorized NumPy diagonal wavefront
+  parallel    - the numba multi-core wavefront (numba only)
+
+Usage:
+    python tools/benchmark_dither.py [megapixels ...] [--methods a,b] [--skip-python]
+
+Defaults to 1 megapixel. The large bed sizes (50 / 200 MP) need several GB of
+memory. Without numba the sequential functions are plain Python and will take
+minutes per megapixel, use --skip-python to leave them out.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from meerk40t.image import dither as dither_module
+from meerk40t.image.dither import DIFFUSION_MAPS, HAS_NUMBA, function_map, wavefront
+
+
+def sample(megapixels, seed=1):
+    side = int((megapixels * 1000000) ** 0.5)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:side, 0:side]
+    gradient = (x + y) * (255.0 / (2 * side))
+    noise = rng.normal(0, 20, (side, side))
+    return np.clip(gradient + noise, 0, 255).astype(np.float32)
+
+
+def timed(func, data):
+    work = data.copy()
+    start = time.perf_counter()
+    func(work)
+    return time.perf_counter() - start, work
+
+
+def run(megapixels, methods, skip_python):
+    data = sample(megapixels)
+    print(f"\n{data.shape[1]}x{data.shape[0]} ({data.size / 1e6:.1f} MP), numba={HAS_NUMBA}")
+    print(f"{'method':<24}{'sequential':>12}{'wavefront':>12}{'parallel':>12}")
+    for method in methods:
+        front = wavefront(method)
+        row = [method]
+        reference = None
+        if HAS_NUMBA or not skip_python:
+            if HAS_NUMBA:
+                # Warm up the jit.
+                function_map[method](data[:8, :8].copy())
+            elapsed, reference = timed(function_map[method], data)
+            row.append(f"{elapsed:.3f}s")
+        else:
+            row.append("-")
+        elapsed, result = timed(front.diffuse, data)
+        row.append(f"{elapsed:.3f}s")
+        if reference is not None and not np.array_equal(reference, result):
+            row[-1] += "!"
+        if HAS_NUMBA:
+            front.diffuse_parallel(data[:8, :8].copy())
+            elapsed, result = timed(front.diffuse_parallel, data)
+            row.append(f"{elapsed:.3f}s")
+            if reference is not None and not np.array_equal(reference, result):
+                row[-1] += "!"
+        else:
+            row.append("-")
+        print(f"{row[0]:<24}{row[1]:>12}{row[2]:>12}{row[3]:>12}")
+    for method in ("bayer", "bayer-blue"):
+        elapsed, _ = timed(function_map[method], data)
+        print(f"{method:<24}{elapsed:>11.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("megapixels", nargs="*", type=float, default=[1.0])
+    parser.add_argument("--methods", default=",".join(DIFFUSION_MAPS))
+    parser.add_argument("--skip-python", action="store_true")
+    args = parser.parse_args()
+    methods = [m.strip() for m in args.methods.split(",") if m.strip()]
+    if HAS_NUMBA:
+        import numba
+
+        print(f"numba threads: {numba.get_num_threads()}")
+    print(f"parallel threshold: {dither_module.PARALLEL_THRESHOLD} pixels")
+    for megapixels in args.megapixels:
+        run(megapixels, methods, args.skip_python)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for the throughput of the drivers (meerk40t.core.benchmark).
+
+Starts a device of each given type and pushes the standard synthetic jobs of the `driver benchmark` command through
+its driver, dense vectors, curves, a 1000 DPI raster and line cuts of mixed power, with the data for the transport
+going into a counting sink. Prints the cutcode items per second, bytes per second, CPU seconds, peak RSS and time to
+the first byte of each job as JSON. Given the JSON of an earlier run as baseline, the jobs whose items per second
+dropped below the tolerance of their baseline are reported and the exit status is 1.
+
+Usage:
+    python tools/benchmark_drivers.py [devices ...] [--jobs name ...] [--scale factor] [--output file]
+        [--baseline file] [--tolerance ratio]
+
+Defaults to grbl, lhystudios, moshi, balor, newly and ruida devices with all jobs.
+"""
+
+import argparse
+import json
+import sys
+
+sys.path.insert(0, ".")
+
+from meerk40t.core.benchmark import JOBS, benchmark
+from test import bootstrap
+
+DEVICES = ["grbl", "lhystudios", "moshi", "balor", "newly", "ruida"]
+
+
+def run_device(provider, jobs, scale):
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console(f"service device start -i {provider} 0\n")
+        return benchmark(kernel.device, jobs, scale)
+    finally:
+        kernel()
+
+
+def regressions(results, baseline, tolerance):
+    before = {
+        (result["driver"], run["job"]): run["items_per_second"]
+        for result in baseline
+        for run in result["runs"]
+    }
+    slower = []
+    for result in results:
+        for run in result["runs"]:
+            rate = before.get((result["driver"], run["job"]))
+            if rate and run["items_per_second"] < rate * tolerance:
+                slower.append((result["driver"], run["job"], run["items_per_second"] / rate))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("devices", nargs="*", default=DEVICES)
+    parser.add_argument("--jobs", nargs="*", choices=list(JOBS), default=None)
+    parser.add_argument("--scale", type=float, default=1.0, help="size of the jobs")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.8, help="least items per second relative to the baseline"
+    )
+    args = parser.parse_args()
+    results = [run_device(provider, args.jobs, args.scale) for provider in args.devices]
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.tolerance)
+        for driver, job, ratio in slower:
+            print(f"{driver} {job}: {ratio:.2f} of the baseline items per second", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
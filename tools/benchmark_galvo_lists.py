@@ -0,0 +1,107 @@
+"""
+Benchmark for compiling galvo lists (meerk40t.balormk.driver, meerk40t.balormk.controller).
+
+Runs a plot cut of the given number of points and a dithered raster cut through a Balor device on the mock
+connection and reports the list commands per second, once compiled in bulk into numpy list records and once with
+a goto() or mark() call per point. The lists are sent to balormk/mock_connection.py as during a job. The mock
+answers status reads randomly, so waiting for it to be ready before each list is skipped unless --wait is given.
+
+Usage:
+    python tools/benchmark_galvo_lists.py [points ...] [--raster size] [--wait]
+
+Defaults to 100000 points and a 500x500 raster.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, ".")
+
+from meerk40t.balormk.driver import BalorDriver
+from meerk40t.core.cutcode.plotcut import PlotCut
+from meerk40t.core.cutcode.rastercut import RasterCut
+from test import bootstrap
+
+
+def plot_cut(count):
+    rng = np.random.default_rng(0)
+    steps = rng.integers(-30, 31, size=(count, 2))
+    points = 0x8000 + np.cumsum(steps, axis=0)
+    on = rng.choice([0.0, 1.0, 1.0, 1.0], size=count)
+    cut = PlotCut(settings={"power": 600, "speed": 200})
+    cut.plot_init(0x8000, 0x8000)
+    for (x, y), laser in zip(points.tolist(), on.tolist()):
+        cut.plot_append(x, y, laser)
+    return cut
+
+
+def raster_cut(size):
+    rng = np.random.default_rng(0)
+    pixels = np.where(rng.random((size, size)) < 0.5, 0, 255).astype(np.uint8)
+    settings = {"power": 800, "speed": 300, "raster_step_x": 1, "raster_step_y": 1}
+    return RasterCut(Image.fromarray(pixels).copy(), 0x4000, 0x4000, 1, 1, settings=settings)
+
+
+def one_at_a_time(driver):
+    controller = driver.connection
+
+    def moves(x, y, marks):
+        for px, py, mark in zip(x.tolist(), y.tolist(), marks.tolist()):
+            if mark:
+                controller.mark(px, py)
+            else:
+                controller.goto(px, py)
+
+    controller.moves = moves
+    driver.plot_planner.raster_blocks = False
+
+
+def run_job(service, cut, bulk, wait):
+    driver = BalorDriver(service, force_mock=True)
+    driver.service.signal_updates = False
+    if not wait:
+        driver.connection.wait_ready = lambda: None
+    if not bulk:
+        one_at_a_time(driver)
+    packets = []
+    send = driver.connection.send
+
+    def counted(data, read=True):
+        if len(data) == 0xC00:
+            packets.append(len(data))
+        return send(data, read)
+
+    driver.connection.send = counted
+    driver.plot(cut)
+    start = time.perf_counter()
+    driver.plot_start()
+    return time.perf_counter() - start, len(packets) * 0x100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("points", nargs="*", type=int, default=[100000])
+    parser.add_argument("--raster", type=int, default=500, help="raster size in pixels")
+    parser.add_argument("--wait", action="store_true", help="wait for the mock to be ready before each list")
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i balor 0\n")
+        service = kernel.device
+        jobs = [(f"plot {count}", lambda count=count: plot_cut(count)) for count in args.points]
+        jobs.append((f"raster {args.raster}", lambda: raster_cut(args.raster)))
+        print(f"{'job':>14}{'mode':>8}{'time':>10}{'commands':>10}{'commands/s':>12}")
+        for name, make in jobs:
+            for mode, bulk in (("bulk", True), ("single", False)):
+                elapsed, commands = run_job(service, make(), bulk, args.wait)
+                print(f"{name:>14}{mode:>8}{elapsed:>9.3f}s{commands:>10}{commands / elapsed:>12.0f}")
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark for sequencing galvo jobs by the travel cost model of the device (meerk40t.core.travelcost).
+
+Sequences each job with short_travel_cutcode() of the cutplan, once by travel distance only and once refined by the
+travel_cost() of a Balor device, whose cost is the time of the jumps with the laser delays around them. For each order
+it reports the travel distance, the time estimate of CutCode.provide_statistics(), the jump time of the cost model and
+the time taken to sequence. Jobs are scenario files saved by CutPlan.save_scenario() with algorithm testing data, or
+synthesized ones: scattered small closed shapes, bidirectional hatch lines and a grid of short dashes.
+
+Usage:
+    python tools/benchmark_galvo_sequencing.py [scenarios ...] [--cuts count]
+
+Defaults to the synthesized jobs of about 500 cuts, larger orders are not refined.
+"""
+
+import argparse
+import os
+import sys
+import time
+from math import cos, pi, sin
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.cutgroup import CutGroup
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.cutplan import CutPlan, short_travel_cutcode
+from test import bootstrap
+
+# Native speeds are set from the device.
+SETTINGS = {"speed": 1000}
+
+
+def shapes_job(count):
+    rng = np.random.default_rng(0)
+    cuts = []
+    sides = 8
+    for i in range(max(1, count // sides)):
+        cx, cy = rng.uniform(0x1000, 0xF000, size=2).tolist()
+        radius = float(rng.uniform(100, 1500))
+        points = [
+            (cx + radius * cos(2 * pi * k / sides), cy + radius * sin(2 * pi * k / sides))
+            for k in range(sides + 1)
+        ]
+        cuts.extend(LineCut(points[k], points[k + 1], settings=SETTINGS) for k in range(sides))
+    return cuts
+
+
+def hatch_job(count):
+    rng = np.random.default_rng(1)
+    cuts = []
+    y = 0x4000
+    for i in range(count):
+        left = 0x4000 + float(rng.uniform(0, 500))
+        right = 0xC000 - float(rng.uniform(0, 500))
+        cuts.append(LineCut((left, y), (right, y), settings=SETTINGS))
+        y += 0x8000 / count
+    return cuts
+
+
+def dashes_job(count):
+    side = max(1, int(count**0.5))
+    cuts = []
+    for i in range(side):
+        for j in range(side):
+            x = 0x2000 + i * 0xC000 / side
+            y = 0x2000 + j * 0xC000 / side
+            cuts.append(LineCut((x, y), (x + 120, y + 40), settings=SETTINGS))
+    return cuts
+
+
+def scenario_job(planner, filename):
+    plan = CutPlan("benchmark", planner)
+    scenario = plan.load_scenario(filename)
+    result = plan.create_cuts_from_scenario(scenario)
+    if result is None:
+        return None
+    cuts, start, _ = result
+    for cut in CutCode(cuts).flat():
+        cut.settings = {**SETTINGS, **cut.settings}
+    return cuts, start
+
+
+def sequence(cuts, start, travel_cost):
+    context = CutCode()
+    for cut in cuts:
+        if isinstance(cut, CutGroup):
+            context.append(cut)
+        else:
+            context.append(CutGroup(None, [cut], settings=cut.settings))
+    context._start_x, context._start_y = start
+    begin = time.perf_counter()
+    ordered = short_travel_cutcode(context, travel_cost=travel_cost)
+    return ordered, time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*")
+    parser.add_argument("--cuts", type=int, default=500, help="cuts of the synthesized jobs")
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i balor 0\n")
+        travel_cost = kernel.device.travel_cost()
+        galvos_per_mm, _ = kernel.device.view.position("1mm", "1mm", vector=True, margins=False)
+        SETTINGS["native_speed"] = abs(SETTINGS["speed"] * galvos_per_mm)
+        SETTINGS["native_rapid_speed"] = travel_cost.speed
+        jobs = []
+        for filename in args.scenarios:
+            job = scenario_job(kernel.planner, filename)
+            if job is None:
+                print(f"{filename}: no algorithm testing data", file=sys.stderr)
+                continue
+            jobs.append((os.path.basename(filename), *job))
+        if not args.scenarios:
+            for name, make in (("shapes", shapes_job), ("hatch", hatch_job), ("dashes", dashes_job)):
+                jobs.append((name, make(args.cuts), (0x8000, 0x8000)))
+        print(
+            f"{'job':>14}{'order':>10}{'cuts':>7}{'travel':>12}{'estimate':>11}{'jumps':>11}{'sequenced':>11}"
+        )
+        for name, cuts, start in jobs:
+            for order, cost in (("distance", None), ("galvo", travel_cost)):
+                ordered, elapsed = sequence(cuts, start, cost)
+                flat = list(ordered.flat())
+                estimate = ordered.provide_statistics(include_start=True)[-1]["time_at_end_of_burn"]
+                jumps = travel_cost.total(flat, start)
+                print(
+                    f"{name[-14:]:>14}{order:>10}{len(flat):>7}{ordered.length_travel(True):>12.0f}"
+                    f"{estimate:>10.3f}s{jumps:>10.3f}s{elapsed:>10.3f}s"
+                )
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
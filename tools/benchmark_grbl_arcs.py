@@ -0,0 +1,97 @@
+"""
+Benchmark for the GRBL G2/G3 arc output (meerk40t.grbl.arcfit).
+
+Creates curvy sample designs, saves the GRBL job with and without arc fitting and
+reports for each:
+  lines     - number of G-code lines
+  bytes     - size of the G-code
+  serial    - time to transmit the G-code at the given baud rate (8N1)
+  compile   - time to create the G-code
+  parse     - time for the GRBL emulator to parse and plot the G-code
+
+Usage:
+    python tools/benchmark_grbl_arcs.py [--tolerance mil] [--baud rate]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import Matrix
+from test import bootstrap
+
+DESIGNS = {
+    "circles": "circle 5cm 5cm 2cm circle 5cm 5cm 3cm circle 5cm 5cm 4cm",
+    "ellipses": "ellipse 8cm 6cm 6cm 3cm ellipse 8cm 6cm 3cm 5cm",
+    "curves": 'path "M 10,80 C 40,10 65,10 95,80 S 150,150 180,80 Q 220,20 260,80 T 340,80"',
+    "rounded": "rect 2cm 2cm 8cm 5cm -x 1cm -y 1cm",
+}
+
+
+def save_job(kernel, design, use_arcs, tolerance):
+    kernel.device.use_arcs = use_arcs
+    kernel.device.arc_tolerance = tolerance
+    fd, filename = tempfile.mkstemp(suffix=".gcode")
+    os.close(fd)
+    try:
+        kernel.console("element* delete\n")
+        start = time.perf_counter()
+        kernel.console(
+            f"{design} engrave -s 15 plan copy-selected preprocess validate blob preopt optimize save_job {filename}\n"
+        )
+        elapsed = time.perf_counter() - start
+        kernel.console("plan clear\n")
+        with open(filename) as f:
+            return f.read(), elapsed
+    finally:
+        os.remove(filename)
+
+
+def parse(data):
+    job = GcodeJob(units_to_device_matrix=Matrix())
+    lines = data.splitlines()
+    start = time.perf_counter()
+    for line in lines:
+        job._process_gcode(line)
+    return time.perf_counter() - start
+
+
+def run(tolerance, baud):
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i grbl 0\n")
+        kernel.console("operation* delete\n")
+        print(f"tolerance={tolerance} mil, {baud} baud")
+        print(
+            f"{'design':<10}{'mode':<7}{'lines':>8}{'bytes':>9}{'serial':>9}{'compile':>9}{'parse':>9}"
+        )
+        for name, design in DESIGNS.items():
+            for use_arcs in (False, True):
+                data, compiled = save_job(kernel, design, use_arcs, tolerance)
+                parsed = parse(data)
+                lines = len(data.splitlines())
+                size = len(data)
+                serial = size * 10.0 / baud
+                print(
+                    f"{name:<10}{'arcs' if use_arcs else 'lines':<7}{lines:>8}{size:>9}"
+                    f"{serial:>8.2f}s{compiled:>8.3f}s{parsed:>8.3f}s"
+                )
+    finally:
+        kernel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tolerance", type=float, default=1.0, help="arc tolerance in mil")
+    parser.add_argument("--baud", type=int, default=115200, help="serial baud rate")
+    args = parser.parse_args()
+    run(args.tolerance, args.baud)
+
+
+if __name__ == "__main__":
+    main()
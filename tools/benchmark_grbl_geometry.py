@@ -0,0 +1,77 @@
+"""
+Benchmark for reading g-code into geometry (meerk40t.grbl.gcodegeom).
+
+Creates g-code with G1 lines, G2/G3 arcs, rapid moves and power changes and reports
+the time to read it with the vectorized parse_gcode, and with GcodeJob interpreting it
+line by line into plotted points (the way "Convert to Elements" reads g-code). The
+line by line reading is skipped for counts above --legacy.
+
+Usage:
+    python tools/benchmark_grbl_geometry.py [lines ...] [--legacy lines]
+
+Defaults to 100000 and 2000000 lines.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from meerk40t.grbl.gcodegeom import parse_gcode
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import Matrix
+
+
+def sample(count):
+    lines = ["G21", "G90", "M4 S0"]
+    for i in range(count):
+        x = (i * 37) % 20000 / 100.0
+        y = (i * 91) % 20000 / 100.0
+        if i % 50 == 0:
+            lines.append(f"G0 X{x:.3f} Y{y:.3f}")
+        elif i % 10 == 0:
+            lines.append(f"G2 X{x:.3f} Y{y:.3f} R{50 + i % 7:.1f} S{i % 1000}")
+        else:
+            lines.append(f"G1 X{x:.3f} Y{y:.3f} F{600 + i % 5 * 100}")
+    lines.append("M5")
+    return "\n".join(lines).encode()
+
+
+def legacy(data):
+    job = GcodeJob(units_to_device_matrix=Matrix())
+    points = []
+
+    def plot_location(x, y, power):
+        points.append((x, y, power))
+        job.x = x
+        job.y = y
+
+    job.plot_location = plot_location
+    for line in data.decode().splitlines():
+        job._process_gcode(line)
+    return len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("lines", nargs="*", type=int, default=[100000, 2000000])
+    parser.add_argument("--legacy", type=int, default=200000, help="largest line by line run")
+    args = parser.parse_args()
+    print(f"{'lines':>9}{'bytes':>11}{'parse':>9}{'segments':>10}{'GcodeJob':>10}")
+    for count in args.lines:
+        data = sample(count)
+        start = time.perf_counter()
+        geometry, power, speed = parse_gcode(data)
+        parsed = time.perf_counter() - start
+        if count <= args.legacy:
+            start = time.perf_counter()
+            legacy(data)
+            interpreted = f"{time.perf_counter() - start:>9.3f}s"
+        else:
+            interpreted = f"{'-':>10}"
+        print(f"{count:>9}{len(data):>11}{parsed:>8.3f}s{geometry.index:>10}{interpreted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark for the GRBL controller sending loop (meerk40t.grbl.controller).
+
+Streams G-code lines through the controller into the mock connection, which
+parses them with the GRBL emulator and replies with "ok", and reports the
+achieved lines per second for the buffered (character counting) and sync
+protocols. The "job" rows compile the same number of line cuts with the driver
+(plot_start) while the controller is sending them.
+
+Usage:
+    python tools/benchmark_grbl_sender.py [lines ...] [--buffer bytes]
+
+Defaults to 20000 lines and the default 128 byte planning buffer.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from test import bootstrap
+
+
+def sample(count):
+    lines = []
+    for i in range(count):
+        x = (i * 37) % 20000 / 100.0
+        y = (i * 91) % 20000 / 100.0
+        lines.append(f"G1 X{x:.3f} Y{y:.3f}\n")
+    return lines
+
+
+def stream(controller, lines, timeout=600.0):
+    start = time.perf_counter()
+    for line in lines:
+        controller.write(line)
+    while len(controller):
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{len(controller)} left after {timeout}s")
+        time.sleep(0.0005)
+    return time.perf_counter() - start
+
+
+def job(driver, count):
+    from meerk40t.core.cutcode.linecut import LineCut
+
+    settings = {"speed": 20, "power": 1000}
+    for i in range(count):
+        x = (i * 37) % 20000
+        y = (i * 91) % 20000
+        driver.plot(LineCut((x, y), (x + 50, y + 50), settings=settings))
+    start = time.perf_counter()
+    driver.plot_start()
+    return time.perf_counter() - start
+
+
+def run(counts, buffer_size):
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i grbl 0\n")
+        device = kernel.device
+        device.interface = "mock"
+        device.planning_buffer_size = buffer_size
+        controller = device.controller
+        controller.update_connection()
+        controller._device_buffer_size = buffer_size
+        controller.start()
+        controller.force_validate()
+        # Warm up.
+        stream(controller, sample(100))
+        print(f"{'lines':>8}{'mode':>10}{'time':>10}{'lines/s':>10}")
+        for count in counts:
+            lines = sample(count)
+            for mode in ("buffered", "sync"):
+                device.buffer_mode = mode
+                elapsed = stream(controller, lines)
+                print(f"{count:>8}{mode:>10}{elapsed:>9.3f}s{count / elapsed:>10.0f}")
+            device.buffer_mode = "buffered"
+            elapsed = job(device.driver, count)
+            print(f"{count:>8}{'job':>10}{elapsed:>9.3f}s{count / elapsed:>10.0f}")
+    finally:
+        kernel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("lines", nargs="*", type=int, default=[20000])
+    parser.add_argument("--buffer", type=int, default=128, help="planning buffer size")
+    args = parser.parse_args()
+    run(args.lines, args.buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark for streaming g-code jobs from disk (meerk40t.grbl.gcodestream).
+
+Writes a g-code file and runs it through a GcodeJob, once loaded as a list of lines
+that is popped from the front (the former blob handling) and once streamed from the
+memory-mapped file. The g-code itself is not interpreted, so the times show the cost
+of the job's line handling alone. Reports for each:
+  load      - time to read and split, or to map and index the file
+  run       - time to hand every line to the job
+  peak      - peak Python memory allocated while loading and running
+
+Usage:
+    python tools/benchmark_grbl_stream.py [lines ...]
+
+Defaults to 100000 and 400000 lines.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import Matrix
+
+
+def write_sample(filename, count):
+    with open(filename, "w", newline="") as f:
+        for i in range(count):
+            x = (i * 37) % 20000 / 100.0
+            y = (i * 91) % 20000 / 100.0
+            f.write(f"G1 X{x:.3f} Y{y:.3f}\n")
+
+
+def run_list(filename):
+    """
+    The former handling: the whole file split into a list, popped per line.
+    """
+    start = time.perf_counter()
+    with open(filename, "rb") as f:
+        data = f.read()
+    buffer = [
+        r for r in re.split("[\n|\r]", data.decode("utf-8", errors="ignore")) if r.strip()
+    ]
+    loaded = time.perf_counter()
+    count = 0
+    while buffer:
+        buffer.pop(0)
+        count += 1
+    return loaded - start, time.perf_counter() - loaded, count
+
+
+def run_stream(filename):
+    start = time.perf_counter()
+    job = GcodeJob(units_to_device_matrix=Matrix())
+    job.write_file(filename)
+    loaded = time.perf_counter()
+    count = 0
+
+    def process(line, jog=False):
+        nonlocal count
+        count += 1
+        return 0
+
+    job._process_gcode = process
+    while not job.execute():
+        pass
+    return loaded - start, time.perf_counter() - loaded, count
+
+
+def measure(routine, filename):
+    load, run, count = routine(filename)
+    # Tracing slows allocations down, the memory is measured in a second run.
+    tracemalloc.start()
+    routine(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return load, run, count, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("lines", nargs="*", type=int, default=[100000, 400000])
+    args = parser.parse_args()
+    print(f"{'lines':>8}{'mode':>8}{'load':>9}{'run':>9}{'lines/s':>11}{'peak':>10}")
+    for count in args.lines:
+        fd, filename = tempfile.mkstemp(suffix=".gcode")
+        os.close(fd)
+        try:
+            write_sample(filename, count)
+            for name, routine in (("list", run_list), ("stream", run_stream)):
+                load, run, done, peak = measure(routine, filename)
+                assert done == count
+                print(
+                    f"{count:>8}{name:>8}{load:>8.3f}s{run:>8.3f}s"
+                    f"{count / run:>11.0f}{peak / 1e6:>8.1f}MB"
+                )
+        finally:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark for dispatching the items of a LaserJob (meerk40t.core.laserjob).
+
+Runs a job of utility commands, waits, outputs and console commands as material tests and wordlist runs produce them,
+and a job of cutcode, through a driver which only counts the calls. The cutcode runs with a driver taking each cut
+with plot() and with a driver taking the cuts with plot_batch(). The preparation of the job, which generates the output
+of the cutcode once for all loops, is timed apart from its execution.
+
+Usage:
+    python tools/benchmark_laserjob.py [--items count] [--loops count]
+
+Defaults to 100000 items.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.linecut import LineCut
+from meerk40t.core.laserjob import LaserJob
+
+
+class Driver:
+    execution_direct_list = ("grbl", "gcode")
+
+    def __init__(self):
+        self.calls = 0
+
+    def plot(self, plot):
+        self.calls += 1
+
+    def plot_start(self):
+        self.calls += 1
+
+    def wait(self, time_in_ms):
+        self.calls += 1
+
+    def set(self, key, value):
+        self.calls += 1
+
+    def console(self, command):
+        self.calls += 1
+
+    def execute_direct(self, line):
+        self.calls += 1
+
+
+class BatchDriver(Driver):
+    def plot_batch(self, plots):
+        self.calls += len(plots)
+
+
+def utilities(count):
+    def generate():
+        for i in range(count // 4):
+            yield "wait", 10
+            yield "set", "output", i
+            yield "console", f"gcode M3 S{i}\n"
+            yield "console", "beep\n"
+
+    return generate
+
+
+def cuts(count):
+    # The native speeds keep the statistics of the cutcode from looking them up for each cut.
+    settings = {"speed": 20, "power": 1000, "native_speed": 20, "native_rapid_speed": 300}
+    return CutCode(
+        [LineCut((i, 0), (i + 1, 1), settings=settings) for i in range(count)]
+    )
+
+
+def run(items, driver, loops):
+    job = LaserJob("benchmark", items, driver=driver, loops=loops)
+    start = time.perf_counter()
+    job.prepare()
+    prepared = time.perf_counter()
+    job.execute(driver)
+    return prepared - start, time.perf_counter() - prepared, driver.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000, help="items of each job")
+    parser.add_argument("--loops", type=int, default=1, help="loops of each job")
+    args = parser.parse_args()
+    runs = [
+        ("utilities", [utilities(args.items)], Driver()),
+        ("plot", [cuts(args.items)], Driver()),
+        ("plot_batch", [cuts(args.items)], BatchDriver()),
+    ]
+    print(f"{'job':>12}{'calls':>10}{'prepare':>10}{'execute':>10}{'items/s':>12}")
+    for name, items, driver in runs:
+        preparing, elapsed, calls = run(items, driver, args.loops)
+        print(f"{name:>12}{calls:>10}{preparing:>9.3f}s{elapsed:>9.3f}s{calls / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark for sending Lihuiyu packets (meerk40t.lihuiyu.controller).
+
+Queues egv data in the controller of a Lihuiyu device on the mock CH341 connection
+and reports the packets per second the sending thread achieves, once with the plain
+packets encoded ahead in bulk and once carved, padded and checksummed one packet at
+a time. The mock write and status delays default to zero and its random errors are
+off, so the times show the controller's own cost per packet.
+
+Usage:
+    python tools/benchmark_lihuiyu_packets.py [packets ...] [--delay seconds]
+
+Defaults to 20000 packets.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from meerk40t.ch341.mock import MockCH341Driver
+from test import bootstrap
+
+
+def sample(count):
+    lines = []
+    for i in range(count):
+        if i % 200 == 0:
+            lines.append(b"IBzS1P")
+        elif i % 3 == 0:
+            lines.append(b"D" + b"Bc" * (i % 7) + b"U" + b"|a" * (i % 5))
+        else:
+            lines.append((b"BTLRM" * 7 + b"ab" * 5)[:30 + i % 20])
+    return b"\n".join(lines) + b"\n"
+
+
+def run_packets(controller, data, encode, timeout=600.0):
+    if encode:
+        controller.__dict__.pop("_encode_buffer", None)
+    else:
+        controller._encode_buffer = lambda: None
+    count = controller.context.packet_count
+    start = time.perf_counter()
+    controller.write(data)
+    while len(controller):
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{len(controller)} left after {timeout}s")
+        time.sleep(0.0005)
+    return time.perf_counter() - start, controller.context.packet_count - count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("packets", nargs="*", type=int, default=[20000])
+    parser.add_argument("--delay", type=float, default=0.0, help="mock write and status delay")
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i lhystudios 0\n")
+        device = kernel.device
+        device.mock = True
+        controller = device.controller
+        MockCH341Driver.write_delay = args.delay
+        MockCH341Driver.status_delay = args.delay
+        MockCH341Driver.random_errors = False
+        run_packets(controller, sample(100), True)
+        print(f"{'packets':>8}{'mode':>9}{'time':>10}{'packets/s':>11}")
+        for count in args.packets:
+            data = sample(count)
+            for name, encode in (("encoded", True), ("carved", False)):
+                elapsed, sent = run_packets(controller, data, encode)
+                print(f"{sent:>8}{name:>9}{elapsed:>9.3f}s{sent / elapsed:>11.0f}")
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark for Lihuiyu raster engraving (meerk40t.lihuiyu.driver).
+
+Plots a dithered image as a 1000 DPI raster cut through the Lihuiyu driver and reports the time to generate the egv
+and its size, once with the raster blocks of the plot planner and once stepping through every pixel. Both egv outputs
+are compared to be identical.
+
+Usage:
+    python tools/benchmark_lihuiyu_raster.py [inches ...] [--unidirectional] [--vertical] [--power ppi]
+
+Defaults to a 1 inch and a 2 inch square at 1000 DPI.
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import numpy as np
+from PIL import Image
+
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.lihuiyu.driver import LihuiyuDriver
+from test import bootstrap
+
+DPI = 1000
+
+
+class Pipe:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def __len__(self):
+        return 0
+
+
+def dithered(size, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    gray = (np.sin(x / 40.0) + np.cos(y / 55.0) + 2) / 4 * 255
+    return np.where(gray > rng.random((size, size)) * 255, 255, 0).astype(np.uint8)
+
+
+def run_raster(device, pixels, args, blocks):
+    driver = LihuiyuDriver(device)
+    driver.plot_planner.raster_blocks = blocks
+    driver.out_pipe = Pipe()
+    settings = {"speed": 100, "power": args.power, "raster_step_x": 1, "raster_step_y": 1}
+    cut = RasterCut(
+        Image.fromarray(pixels).copy(),
+        1000,
+        1000,
+        1,
+        1,
+        settings=settings,
+        bidirectional=not args.unidirectional,
+        horizontal=not args.vertical,
+    )
+    start = time.perf_counter()
+    driver.plot(cut)
+    driver.plot_start()
+    return time.perf_counter() - start, bytes(driver.out_pipe.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inches", nargs="*", type=float, default=[1.0, 2.0])
+    parser.add_argument("--unidirectional", action="store_true")
+    parser.add_argument("--vertical", action="store_true")
+    parser.add_argument("--power", type=int, default=1000, help="ppi power of the raster")
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i lhystudios 0\n")
+        device = kernel.device
+        print(f"{'pixels':>12}{'mode':>9}{'time':>10}{'egv bytes':>11}{'speedup':>9}")
+        for inches in args.inches:
+            size = int(inches * DPI)
+            pixels = dithered(size)
+            blocked, egv = run_raster(device, pixels, args, True)
+            stepped, expected = run_raster(device, pixels, args, False)
+            if egv != expected:
+                raise ValueError("Raster blocks produced different egv.")
+            label = f"{size}x{size}"
+            print(f"{label:>12}{'blocks':>9}{blocked:>9.3f}s{len(egv):>11}{stepped / blocked:>8.1f}x")
+            print(f"{label:>12}{'stepped':>9}{stepped:>9.3f}s{len(expected):>11}{1:>8.1f}x")
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark for Newly raster scanlines (meerk40t.newly.controller).
+
+Rasters a dithered image of the given size on a Newly device with the mock connection and reports the time taken to
+build the YZ/YF/XZ/XF scanline commands, once from the numpy plot blocks of the RasterCut and once point by point
+from its plot. With --send the job is also written to the mock connection, whose simulated packet delays are included.
+
+Usage:
+    python tools/benchmark_newly_raster.py [size ...] [--vertical] [--send]
+
+Defaults to a 1000x1000 image.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, ".")
+
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.newly.controller import NewlyController
+from test import bootstrap
+
+
+def raster_cut(size, horizontal):
+    rng = np.random.default_rng(0)
+    pixels = np.where(rng.random((size, size)) < 0.5, 0, 255).astype(np.uint8)
+    settings = {"speed": 200, "power": 1000, "raster_step_x": 1, "raster_step_y": 1}
+    return RasterCut(
+        Image.fromarray(pixels).copy(), 0, 0, 1, 1, settings=settings, horizontal=horizontal, bidirectional=True
+    )
+
+
+def run_raster(service, cut, blocks, send):
+    if not blocks:
+        cut.plot_blocks = lambda: None
+    controller = NewlyController(service, force_mock=True)
+    start = time.perf_counter()
+    controller.raster(cut)
+    length = sum(len(c) + 1 for c in controller._command_buffer)
+    if send:
+        controller._execute_job()
+    return time.perf_counter() - start, length
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000])
+    parser.add_argument("--vertical", action="store_true", help="raster vertically")
+    parser.add_argument("--send", action="store_true", help="write the job to the mock connection")
+    args = parser.parse_args()
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i newly 0\n")
+        service = kernel.device
+        print(f"{'size':>6}{'mode':>8}{'time':>10}{'bytes':>10}")
+        for size in args.sizes:
+            for name, blocks in (("blocks", True), ("plot", False)):
+                cut = raster_cut(size, not args.vertical)
+                elapsed, length = run_raster(service, cut, blocks, args.send)
+                print(f"{size:>6}{name:>8}{elapsed:>9.3f}s{length:>10}")
+    finally:
+        kernel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark for parsing Ruida jobs in the emulator (meerk40t.ruida.emulator).
+
+Replays the given RD files, or a synthesized random walk of move and cut commands, through the RuidaEmulator and
+reports the time of the framing stage, write() unswizzling the data and splitting it into the commands of the
+job, and of the decoding stage, the job executing those commands into plot cuts. The decoding runs once with the
+table dispatch of the move and cut commands and once with each command described on a channel, which goes through
+RDJob.process() like every other command.
+
+Usage:
+    python tools/benchmark_ruida_emulator.py [files ...] [--commands count]
+
+Defaults to a synthesized job of 1000000 commands.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from meerk40t.ruida.emulator import RuidaEmulator
+from meerk40t.ruida.rdjob import RDJob, determine_magic_via_histogram
+from meerk40t.svgelements import Matrix
+
+
+class Spooler:
+    def send(self, job, prevent_duplicate=False):
+        pass
+
+
+class Driver:
+    def __init__(self):
+        self.plots = []
+
+    def plot(self, plot):
+        self.plots.append(plot)
+
+
+class Device:
+    def __init__(self):
+        self.driver = Driver()
+        self.spooler = Spooler()
+        self.current = (0, 0)
+
+
+def synthesize(count):
+    rng = np.random.default_rng(0)
+    x = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    y = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    job = RDJob(magic=0x88)
+    job.speed_laser_1(100)
+    job.moves(x, y, np.diff(x, prepend=0), np.diff(y, prepend=0), rng.random(count) < 0.5)
+    job.end_of_file()
+    return job.swizzle(job.get_contents())
+
+
+def replay(data, magic, describe):
+    device = Device()
+    emulator = RuidaEmulator(device, Matrix())
+    emulator._set_magic(magic)
+    if describe:
+        emulator.channel = lambda text: None
+    start = time.perf_counter()
+    emulator.write(data)
+    framing = time.perf_counter() - start
+    job = emulator.job
+    commands = len(job.buffer)
+    start = time.perf_counter()
+    while not job.execute(device.driver):
+        pass
+    decoding = time.perf_counter() - start
+    return commands, framing, decoding, len(device.driver.plots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--commands", type=int, default=1000000, help="commands of the synthesized job")
+    args = parser.parse_args()
+    sources = []
+    for filename in args.files:
+        with open(filename, "rb") as f:
+            data = f.read()
+        sources.append((os.path.basename(filename), data, determine_magic_via_histogram(data)))
+    if not sources:
+        sources.append(("synthesized", synthesize(args.commands), 0x88))
+    print(f"{'file':>16}{'mode':>10}{'commands':>10}{'framing':>10}{'decoding':>10}{'commands/s':>12}{'plots':>8}")
+    for name, data, magic in sources:
+        for mode, describe in (("table", False), ("described", True)):
+            commands, framing, decoding, plots = replay(data, magic, describe)
+            rate = commands / (framing + decoding)
+            print(
+                f"{name[-16:]:>16}{mode:>10}{commands:>10}{framing:>9.3f}s{decoding:>9.3f}s{rate:>12.0f}{plots:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
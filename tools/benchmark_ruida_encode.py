@@ -0,0 +1,78 @@
+"""
+Benchmark for encoding Ruida jobs (meerk40t.ruida.rdjob).
+
+Encodes a random walk of the given number of move and cut commands into an RDJob and reports the commands per
+second, once with RDJob.moves() picking the absolute or relative encodings and packing the coordinates in bulk and
+once with a jump() or mark() call per command. The encoded job is then swizzled as a whole file, with the
+bytes.translate() tables and with the per byte swizzle_byte() the tables are built from.
+
+Usage:
+    python tools/benchmark_ruida_encode.py [commands ...]
+
+Defaults to 1000000 commands.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from meerk40t.ruida.rdjob import RDJob, swizzle_byte
+
+
+def walk(count):
+    rng = np.random.default_rng(0)
+    steps = rng.integers(-300, 301, size=(count, 2))
+    steps[rng.random(count) < 0.2, 0] = 0
+    steps[rng.random(count) < 0.2, 1] = 0
+    steps[rng.random(count) < 0.01] *= 100
+    x = 100000 + np.cumsum(steps[:, 0])
+    y = 100000 + np.cumsum(steps[:, 1])
+    return x, y, np.diff(x, prepend=0), np.diff(y, prepend=0), rng.random(count) < 0.7
+
+
+def run_bulk(x, y, dx, dy, cuts):
+    job = RDJob()
+    start = time.perf_counter()
+    job.moves(x, y, dx, dy, cuts)
+    return time.perf_counter() - start, job
+
+
+def run_points(x, y, dx, dy, cuts):
+    job = RDJob()
+    start = time.perf_counter()
+    for px, py, pdx, pdy, cut in zip(x.tolist(), y.tolist(), dx.tolist(), dy.tolist(), cuts.tolist()):
+        if cut:
+            job.mark(px, py, pdx, pdy)
+        else:
+            job.jump(px, py, pdx, pdy)
+    return time.perf_counter() - start, job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("commands", nargs="*", type=int, default=[1000000])
+    args = parser.parse_args()
+    print(f"{'commands':>9}{'mode':>8}{'time':>10}{'commands/s':>12}")
+    for count in args.commands:
+        arrays = walk(count)
+        for name, run in (("bulk", run_bulk), ("points", run_points)):
+            elapsed, job = run(*arrays)
+            print(f"{len(job.buffer):>9}{name:>8}{elapsed:>9.3f}s{len(job.buffer) / elapsed:>12.0f}")
+        data = job.get_contents()
+        start = time.perf_counter()
+        swizzled = job.swizzle(data)
+        elapsed = time.perf_counter() - start
+        print(f"{len(data):>9}{'table':>8}{elapsed:>9.3f}s{len(data) / elapsed:>12.0f} bytes/s")
+        start = time.perf_counter()
+        legacy = bytes([swizzle_byte(b, job.magic) for b in data])
+        elapsed = time.perf_counter() - start
+        print(f"{len(data):>9}{'bytes':>8}{elapsed:>9.3f}s{len(data) / elapsed:>12.0f} bytes/s")
+        assert swizzled == legacy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for sending Ruida jobs over UDP (meerk40t.ruida.udp_transport).
+
+Sends an encoded job to the local UDP stand-in of a Ruida controller in meerk40t/ruida/mock_connection.py, which
+answers through the RuidaEmulator after the given round trip latency and drops or corrupts packets at the given
+rates. Reports the throughput of the sliding window for each window size, with packets filled up to the controller
+MTU, and of the former stop-and-wait sending of 1000 byte chunks.
+
+Usage:
+    python tools/benchmark_ruida_udp.py [windows ...] [--size bytes] [--latency seconds] [--loss rate]
+
+Defaults to windows 1, 4 and 16 for a 1 MB job with 1ms latency.
+"""
+
+import argparse
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, ".")
+
+from meerk40t.ruida.emulator import RuidaEmulator
+from meerk40t.ruida.mock_connection import MockUDPController
+from meerk40t.ruida.rdjob import RDJob
+from meerk40t.ruida.udp_transport import UDP_MTU, SlidingWindow, UDPTransport
+
+
+class Service:
+    name = "benchmark"
+    interface = "udp"
+    address = "127.0.0.1"
+
+
+class Spooler:
+    def send(self, job, prevent_duplicate=False):
+        pass
+
+
+class Device:
+    driver = None
+    spooler = Spooler()
+    current = (0, 0)
+
+
+def job_data(size):
+    rng = np.random.default_rng(0)
+    count = size // 4
+    x = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    y = 100000 + np.cumsum(rng.integers(-300, 301, size=count))
+    job = RDJob(magic=0x88)
+    job.moves(x, y, np.diff(x, prepend=0), np.diff(y, prepend=0), rng.random(count) < 0.5)
+    return job
+
+
+def packets(job, limit):
+    chunks = []
+    chunk = b""
+    for command in job.buffer:
+        if len(chunk) + len(command) > limit:
+            chunks.append(chunk)
+            chunk = b""
+        chunk += command
+    chunks.append(chunk)
+    result = []
+    for chunk in chunks:
+        data = job.swizzle(chunk)
+        result.append(struct.pack(">H", sum(data) & 0xFFFF) + data)
+    return result
+
+
+def run_window(job, limit, max_window, args):
+    mock = MockUDPController(
+        RuidaEmulator(Device(), None), latency=args.latency, loss=args.loss, corrupt=args.loss, seed=0
+    )
+    transport = UDPTransport(Service())
+    transport.send_port = mock.port
+    transport.listen_port = 0
+    transport.open()
+    transport.set_timeout(0.25)
+    window = SlidingWindow(transport, mock.emulator.unswizzle, max_window=max_window)
+    data = packets(job, limit)
+    try:
+        start = time.perf_counter()
+        for packet in data:
+            window.send(packet)
+        window.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        transport.close()
+        mock.close()
+    return elapsed, sum(len(p) for p in data), window.resends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("windows", nargs="*", type=int, default=[1, 4, 16])
+    parser.add_argument("--size", type=int, default=1000000, help="job size in bytes")
+    parser.add_argument("--latency", type=float, default=0.001, help="round trip latency")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss and corruption rate")
+    args = parser.parse_args()
+    job = job_data(args.size)
+    runs = [("1000 bytes", 1000, 1)]
+    runs.extend((f"window {w}", UDP_MTU - 2, w) for w in args.windows)
+    print(f"{'sending':>12}{'bytes':>10}{'time':>10}{'kB/s':>10}{'resends':>9}")
+    for name, limit, max_window in runs:
+        elapsed, size, resends = run_window(job, limit, max_window, args)
+        print(f"{name:>12}{size:>10}{elapsed:>9.3f}s{size / elapsed / 1000:>10.0f}{resends:>9}")
+
+
+if __name__ == "__main__":
+    main()